@@ -9,11 +9,19 @@ Integrations:
 """
 
 import os
+import time
 from strands import Agent, tool
 from strands.models import BedrockModel
-from strands_tools import retrieve
 from strands_tools import current_time
-from datetime import datetime
+from batch_eligibility import check_return_eligibility_batch
+from batch_refunds import calculate_refund_batch
+from bedrock_clients import shared_session
+from hedging import hedged_model
+from kb_retrieve import retrieve
+from model_router import model_router
+from policy_renderer import render_policy
+from policy_rules import calculate_refund, check_eligibility, get_policy_engine
+from tool_memo import memoize_tool
 
 # Constants
 MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
@@ -22,7 +30,12 @@ SESSION_ID = "default-session"
 ACTOR_ID = "default-actor"
 
 # Model configuration
-bedrock_model = BedrockModel(model_id=MODEL_ID, temperature=0.3)
+# Shared Bedrock runtime client: pooled connections, keep-alive, adaptive retries
+bedrock_model = hedged_model(BedrockModel(model_id=MODEL_ID, temperature=0.3, boto_session=shared_session(REGION)))
+
+# Return policy rules (compiled once, hot-reloaded when the rules file changes)
+policy_engine = get_policy_engine()
+print(f"✓ Policy rules loaded: version {policy_engine.policy.version}")
 
 # ============================================================================
 # KNOWLEDGE BASE CONFIGURATION
@@ -41,7 +54,7 @@ When using the retrieve tool, always pass these parameters:
 
 # Custom tool definitions
 @tool
-
+@memoize_tool(date_aware=True, case_insensitive=('category',))
 def check_return_eligibility(purchase_date: str, category: str) -> dict:
     """
     Check if an item is eligible for return based on purchase date and category.
@@ -53,48 +66,10 @@ def check_return_eligibility(purchase_date: str, category: str) -> dict:
     Returns:
         Dictionary with eligibility status and reason
     """
-    try:
-        purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
-        days_since_purchase = (datetime.now() - purchase_dt).days
-        
-        # Return windows by category
-        return_windows = {
-            'electronics': 30,
-            'clothing': 30,
-            'books': 30,
-            'grocery': 30,
-            'jewelry': 30,
-            'default': 30
-        }
-        
-        window = return_windows.get(category.lower(), return_windows['default'])
-        
-        if days_since_purchase < 0:
-            return {
-                'eligible': False,
-                'reason': 'Purchase date is in the future',
-                'days_remaining': 0
-            }
-        elif days_since_purchase <= window:
-            return {
-                'eligible': True,
-                'reason': f'Within {window}-day return window',
-                'days_remaining': window - days_since_purchase
-            }
-        else:
-            return {
-                'eligible': False,
-                'reason': f'Exceeded {window}-day return window',
-                'days_remaining': 0
-            }
-    except ValueError:
-        return {
-            'eligible': False,
-            'reason': 'Invalid date format. Use YYYY-MM-DD',
-            'days_remaining': 0
-        }
+    return check_eligibility(purchase_date, category)
 
 @tool
+@memoize_tool(case_insensitive=('return_reason',))
 def calculate_refund_amount(original_price: float, condition: str, return_reason: str) -> dict:
     """
     Calculate refund amount based on price, condition, and return reason.
@@ -107,42 +82,7 @@ def calculate_refund_amount(original_price: float, condition: str, return_reason
     Returns:
         Dictionary with refund amount and breakdown
     """
-    if original_price < 0:
-        return {
-            'refund_amount': 0.0,
-            'deduction': 0.0,
-            'reason': 'Invalid price'
-        }
-    
-    # Condition-based deductions
-    condition_deductions = {
-        'new': 0.0,
-        'opened': 0.0,
-        'used': 0.20,  # 20% deduction
-        'damaged': 0.50  # 50% deduction
-    }
-    
-    # Reason-based adjustments (defective/wrong items get full refund)
-    full_refund_reasons = ['defective', 'wrong_item', 'not_as_described']
-    
-    if return_reason.lower() in full_refund_reasons:
-        # Full refund regardless of condition for seller errors
-        refund_amount = original_price
-        deduction = 0.0
-        reason = 'Full refund - seller error'
-    else:
-        # Apply condition-based deduction
-        deduction_rate = condition_deductions.get(condition.lower(), 0.20)
-        deduction = original_price * deduction_rate
-        refund_amount = original_price - deduction
-        reason = f'{int(deduction_rate * 100)}% deduction for {condition} condition'
-    
-    return {
-        'refund_amount': round(refund_amount, 2),
-        'deduction': round(deduction, 2),
-        'original_price': original_price,
-        'reason': reason
-    }
+    return calculate_refund(original_price, condition, return_reason)
 
 @tool
 def format_policy_response(policy_text: str, customer_question: str = '') -> str:
@@ -156,41 +96,19 @@ def format_policy_response(policy_text: str, customer_question: str = '') -> str
     Returns:
         Formatted, customer-friendly policy response
     """
-    # Add friendly header
-    formatted = '📋 Return Policy Information\n'
-    formatted += '=' * 50 + '\n\n'
-    
-    if customer_question:
-        formatted += f'Regarding: {customer_question}\n\n'
-    
-    # Clean up and format the policy text
-    lines = policy_text.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            formatted += '\n'
-        elif line.isupper() or line.endswith(':'):
-            # Treat as section header
-            formatted += f'\n{line}\n'
-        elif line.startswith('-') or line.startswith('•'):
-            # Keep bullet points
-            formatted += f'  {line}\n'
-        else:
-            # Regular text
-            formatted += f'{line}\n'
-    
-    formatted += '\n' + '=' * 50 + '\n'
-    formatted += '💡 Tip: If you have specific questions about your return, I can help!\n'
-    
-    return formatted
+    return render_policy(policy_text, customer_question)
 
 
 def run_agent(user_input: str, session_id: str = SESSION_ID, actor_id: str = ACTOR_ID):
     """Run the agent with user input"""
     
+    # Simple requests (greetings, general policy questions) are answered by the fast model tier
+    routed = model_router.answer(user_input)
+    if routed:
+        return routed.text
+
     # Build tools list
-    custom_tools = [retrieve, current_time, check_return_eligibility, calculate_refund_amount, format_policy_response]
+    custom_tools = [retrieve, current_time, check_return_eligibility, check_return_eligibility_batch, calculate_refund_amount, calculate_refund_batch, format_policy_response]
     
     # Create agent
     agent = Agent(
@@ -199,7 +117,9 @@ def run_agent(user_input: str, session_id: str = SESSION_ID, actor_id: str = ACT
         system_prompt=system_prompt
     )
     
+    started = time.perf_counter()
     response = agent(user_input)
+    model_router.observe_main_latency(time.perf_counter() - started)
     return response.message["content"][0]["text"]
 
 if __name__ == "__main__":
@@ -10,13 +10,25 @@ Integrations:
 
 import os
 import json
+import time
 from strands import Agent, tool
 from strands.models import BedrockModel
-from strands_tools import retrieve
 from strands_tools import current_time
+from bedrock_agentcore.memory import MemoryClient
 from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
 from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
-from datetime import datetime
+from batch_eligibility import check_return_eligibility_batch
+from batch_refunds import calculate_refund_batch
+from bedrock_clients import shared_session
+from fast_path import record_turn
+from hedging import hedged_model
+from kb_retrieve import retrieve
+from model_router import model_router
+from policy_renderer import render_policy
+from policy_rules import calculate_refund, check_eligibility, get_policy_engine
+from token_budget import token_budget
+from tool_compactor import ToolResultCompactor
+from tool_memo import memoize_tool
 
 # Constants
 MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
@@ -25,7 +37,15 @@ SESSION_ID = "default-session"
 ACTOR_ID = "default-actor"
 
 # Model configuration
-bedrock_model = BedrockModel(model_id=MODEL_ID, temperature=0.3)
+# Shared Bedrock runtime client: pooled connections, keep-alive, adaptive retries
+bedrock_model = hedged_model(BedrockModel(model_id=MODEL_ID, temperature=0.3, boto_session=shared_session(REGION)))
+
+# Return policy rules (compiled once, hot-reloaded when the rules file changes)
+policy_engine = get_policy_engine()
+print(f"✓ Policy rules loaded: version {policy_engine.policy.version}")
+
+# Compacts tool results carried across turns (shared so metrics cover all sessions)
+tool_compactor = ToolResultCompactor()
 
 # ============================================================================
 # LOAD CONFIGURATION FROM FILES
@@ -73,6 +93,9 @@ def create_memory_session_manager(mem_id: str, session_id: str = SESSION_ID, act
         region_name=REGION
     )
 
+# Records fast model tier turns in memory (the session manager is only built for main model turns)
+memory_client = MemoryClient(region_name=REGION)
+
 # System prompt
 system_prompt = f"""You are a personalized returns assistant who remembers customer preferences and history. Use the retrieve tool to access Amazon return policy documents for accurate information.
 
@@ -84,6 +107,7 @@ When using the retrieve tool, always pass these parameters:
 
 # Custom tool definitions
 @tool
+@memoize_tool(date_aware=True, case_insensitive=('category',))
 def check_return_eligibility(purchase_date: str, category: str) -> dict:
     """
     Check if an item is eligible for return based on purchase date and category.
@@ -95,48 +119,10 @@ def check_return_eligibility(purchase_date: str, category: str) -> dict:
     Returns:
         Dictionary with eligibility status and reason
     """
-    try:
-        purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
-        days_since_purchase = (datetime.now() - purchase_dt).days
-        
-        # Return windows by category
-        return_windows = {
-            'electronics': 30,
-            'clothing': 30,
-            'books': 30,
-            'grocery': 30,
-            'jewelry': 30,
-            'default': 30
-        }
-        
-        window = return_windows.get(category.lower(), return_windows['default'])
-        
-        if days_since_purchase < 0:
-            return {
-                'eligible': False,
-                'reason': 'Purchase date is in the future',
-                'days_remaining': 0
-            }
-        elif days_since_purchase <= window:
-            return {
-                'eligible': True,
-                'reason': f'Within {window}-day return window',
-                'days_remaining': window - days_since_purchase
-            }
-        else:
-            return {
-                'eligible': False,
-                'reason': f'Exceeded {window}-day return window',
-                'days_remaining': 0
-            }
-    except ValueError:
-        return {
-            'eligible': False,
-            'reason': 'Invalid date format. Use YYYY-MM-DD',
-            'days_remaining': 0
-        }
+    return check_eligibility(purchase_date, category)
 
 @tool
+@memoize_tool(case_insensitive=('return_reason',))
 def calculate_refund_amount(original_price: float, condition: str, return_reason: str) -> dict:
     """
     Calculate refund amount based on price, condition, and return reason.
@@ -149,42 +135,7 @@ def calculate_refund_amount(original_price: float, condition: str, return_reason
     Returns:
         Dictionary with refund amount and breakdown
     """
-    if original_price < 0:
-        return {
-            'refund_amount': 0.0,
-            'deduction': 0.0,
-            'reason': 'Invalid price'
-        }
-    
-    # Condition-based deductions
-    condition_deductions = {
-        'new': 0.0,
-        'opened': 0.0,
-        'used': 0.20,  # 20% deduction
-        'damaged': 0.50  # 50% deduction
-    }
-    
-    # Reason-based adjustments (defective/wrong items get full refund)
-    full_refund_reasons = ['defective', 'wrong_item', 'not_as_described']
-    
-    if return_reason.lower() in full_refund_reasons:
-        # Full refund regardless of condition for seller errors
-        refund_amount = original_price
-        deduction = 0.0
-        reason = 'Full refund - seller error'
-    else:
-        # Apply condition-based deduction
-        deduction_rate = condition_deductions.get(condition.lower(), 0.20)
-        deduction = original_price * deduction_rate
-        refund_amount = original_price - deduction
-        reason = f'{int(deduction_rate * 100)}% deduction for {condition} condition'
-    
-    return {
-        'refund_amount': round(refund_amount, 2),
-        'deduction': round(deduction, 2),
-        'original_price': original_price,
-        'reason': reason
-    }
+    return calculate_refund(original_price, condition, return_reason)
 
 @tool
 def format_policy_response(policy_text: str, customer_question: str = '') -> str:
@@ -198,41 +149,25 @@ def format_policy_response(policy_text: str, customer_question: str = '') -> str
     Returns:
         Formatted, customer-friendly policy response
     """
-    # Add friendly header
-    formatted = '📋 Return Policy Information\n'
-    formatted += '=' * 50 + '\n\n'
-    
-    if customer_question:
-        formatted += f'Regarding: {customer_question}\n\n'
-    
-    # Clean up and format the policy text
-    lines = policy_text.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            formatted += '\n'
-        elif line.isupper() or line.endswith(':'):
-            # Treat as section header
-            formatted += f'\n{line}\n'
-        elif line.startswith('-') or line.startswith('•'):
-            # Keep bullet points
-            formatted += f'  {line}\n'
-        else:
-            # Regular text
-            formatted += f'{line}\n'
-    
-    formatted += '\n' + '=' * 50 + '\n'
-    formatted += '💡 Tip: If you have specific questions about your return, I can help!\n'
-    
-    return formatted
+    return render_policy(policy_text, customer_question)
 
 
 def run_agent(user_input: str, session_id: str = SESSION_ID, actor_id: str = ACTOR_ID):
     """Run the agent with user input"""
     
+    # Simple requests (greetings, general policy questions) are answered by the fast model tier
+    # (recorded in memory so later main model turns see them in the conversation history)
+    routed = model_router.answer(user_input)
+    if routed:
+        if memory_id:
+            try:
+                record_turn(memory_client, memory_id, actor_id, session_id, user_input, routed.text)
+            except Exception as e:
+                print(f"⚠️  Failed to record fast model turn in memory: {e}")
+        return routed.text
+
     # Build tools list
-    custom_tools = [retrieve, current_time, check_return_eligibility, calculate_refund_amount, format_policy_response]
+    custom_tools = [retrieve, current_time, check_return_eligibility, check_return_eligibility_batch, calculate_refund_amount, calculate_refund_batch, format_policy_response]
     
     # Configure memory
     if not memory_id:
@@ -247,10 +182,14 @@ def run_agent(user_input: str, session_id: str = SESSION_ID, actor_id: str = ACT
         model=bedrock_model,
         tools=custom_tools,
         system_prompt=system_prompt,
-        session_manager=session_manager
+        session_manager=session_manager,
+        hooks=[tool_compactor, token_budget],
+        trace_attributes={"actor.id": actor_id, "session.id": session_id}
     )
     
+    started = time.perf_counter()
     response = agent(user_input)
+    model_router.observe_main_latency(time.perf_counter() - started)
     return response.message["content"][0]["text"]
 
 if __name__ == "__main__":
@@ -14,12 +14,26 @@ import json
 import time
 import zipfile
 import io
+import os
+import tempfile
+import itertools
 from datetime import datetime, timedelta
 
+from order_tool_schemas import TOOL_SCHEMAS
+from order_data import generate_orders
+from order_store import build_sample_orders, build_sqlite_store
+
 # Configuration
 REGION = 'us-west-2'
 FUNCTION_NAME = 'OrderLookupFunction'
 ROLE_NAME = 'OrderLookupLambdaRole'
+# Prebuilt order database to bundle instead of the sample orders (optional)
+ORDER_DB_SOURCE = os.environ.get('ORDER_DB_SOURCE')
+# Synthetic orders bundled alongside the sample orders (order_data.py; see 35_generate_orders.py)
+SYNTHETIC_ORDERS = int(os.environ.get('SYNTHETIC_ORDERS', 0))
+# CPU share scales with memory; 128 MB leaves little headroom once a large
+# orders.db is memory-mapped (see 32_lambda_cold_start.py for peak RSS by store size)
+MEMORY_SIZE_MB = int(os.environ.get('LAMBDA_MEMORY_MB', 256))
 
 print("=" * 80)
 print("LAMBDA FUNCTION SETUP FOR ORDER LOOKUP")
@@ -102,130 +116,41 @@ recent_date = (today - timedelta(days=15)).strftime('%Y-%m-%d')
 old_date = (today - timedelta(days=45)).strftime('%Y-%m-%d')
 defective_date = (today - timedelta(days=10)).strftime('%Y-%m-%d')
 
-lambda_code = f'''
-import json
-from datetime import datetime, timedelta
+# Handler source lives in order_lookup_lambda.py; eligibility uses the shared
+# policy rules engine, so its module and rules file are bundled with it
+with open('order_lookup_lambda.py') as f:
+    lambda_code = f.read()
 
-# Mock order database
-ORDERS = {{
-    "ORD-001": {{
-        "order_id": "ORD-001",
-        "product_name": "Dell XPS 15 Laptop",
-        "purchase_date": "{recent_date}",
-        "amount": 1299.99,
-        "category": "electronics",
-        "status": "delivered"
-    }},
-    "ORD-002": {{
-        "order_id": "ORD-002",
-        "product_name": "iPhone 13",
-        "purchase_date": "{old_date}",
-        "amount": 799.99,
-        "category": "electronics",
-        "status": "delivered"
-    }},
-    "ORD-003": {{
-        "order_id": "ORD-003",
-        "product_name": "Samsung Galaxy Tab (Defective)",
-        "purchase_date": "{defective_date}",
-        "amount": 449.99,
-        "category": "electronics",
-        "status": "delivered"
-    }}
-}}
-
-def check_return_eligibility(purchase_date, category):
-    """Check if order is eligible for return"""
-    try:
-        purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
-        days_since_purchase = (datetime.now() - purchase_dt).days
-        
-        # 30-day return window for electronics
-        return_window = 30
-        
-        if days_since_purchase <= return_window:
-            return {{
-                "eligible": True,
-                "reason": f"Within {{return_window}}-day return window",
-                "days_remaining": return_window - days_since_purchase
-            }}
-        else:
-            return {{
-                "eligible": False,
-                "reason": f"Exceeded {{return_window}}-day return window",
-                "days_remaining": 0
-            }}
-    except Exception as e:
-        return {{
-            "eligible": False,
-            "reason": f"Error checking eligibility: {{str(e)}}",
-            "days_remaining": 0
-        }}
-
-def lambda_handler(event, context):
-    """
-    Lambda handler for order lookup.
-    
-    Expected input:
-    {{
-        "order_id": "ORD-001"
-    }}
-    """
-    try:
-        # Parse input
-        if isinstance(event, str):
-            event = json.loads(event)
-        
-        order_id = event.get('order_id', '').upper()
-        
-        if not order_id:
-            return {{
-                'statusCode': 400,
-                'body': json.dumps({{
-                    'error': 'order_id is required'
-                }})
-            }}
-        
-        # Look up order
-        order = ORDERS.get(order_id)
-        
-        if not order:
-            return {{
-                'statusCode': 404,
-                'body': json.dumps({{
-                    'error': f'Order {{order_id}} not found',
-                    'available_orders': list(ORDERS.keys())
-                }})
-            }}
-        
-        # Check return eligibility
-        eligibility = check_return_eligibility(
-            order['purchase_date'],
-            order['category']
-        )
-        
-        # Build response
-        response_data = {{
-            **order,
-            'return_eligibility': eligibility
-        }}
-        
-        return {{
-            'statusCode': 200,
-            'body': json.dumps(response_data)
-        }}
-        
-    except Exception as e:
-        return {{
-            'statusCode': 500,
-            'body': json.dumps({{
-                'error': f'Internal error: {{str(e)}}'
-            }})
-        }}
-'''
-
-print("✓ Lambda code created with mock order data")
-print(f"  Sample orders: ORD-001 (recent laptop), ORD-002 (old phone), ORD-003 (defective tablet)")
+with open('policy_rules.py') as f:
+    policy_rules_code = f.read()
+
+with open('return_policy_rules.json') as f:
+    policy_rules_json = f.read()
+
+with open('order_store.py') as f:
+    order_store_code = f.read()
+
+with open('order_tool_schemas.py') as f:
+    order_tool_schemas_code = f.read()
+
+# Mock order database (dates fixed at deployment time)
+sample_orders = build_sample_orders(today)
+
+# Order store bundled with the function: a read-only SQLite file
+if ORDER_DB_SOURCE:
+    with open(ORDER_DB_SOURCE, 'rb') as f:
+        orders_db = f.read()
+    print(f"✓ Lambda code created with order database {ORDER_DB_SOURCE}")
+else:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'orders.db')
+        build_sqlite_store(db_path, itertools.chain(sample_orders.values(), generate_orders(SYNTHETIC_ORDERS)))
+        with open(db_path, 'rb') as f:
+            orders_db = f.read()
+    print("✓ Lambda code created with mock order data")
+    if SYNTHETIC_ORDERS:
+        print(f"  Synthetic orders: {SYNTHETIC_ORDERS:,} (ORD-00000000 onwards, customers CUST-0000000 onwards)")
+    print(f"  Sample orders: ORD-001 (recent laptop), ORD-002 (old phone), ORD-003 (defective tablet)")
 
 # ============================================================================
 # STEP 3: Package Lambda Code
@@ -237,11 +162,19 @@ print("Step 3: Packaging Lambda code...")
 zip_buffer = io.BytesIO()
 with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
     zip_file.writestr('lambda_function.py', lambda_code)
+    zip_file.writestr('order_store.py', order_store_code)
+    zip_file.writestr('order_tool_schemas.py', order_tool_schemas_code)
+    zip_file.writestr('orders.db', orders_db)
+    zip_file.writestr('policy_rules.py', policy_rules_code)
+    zip_file.writestr('return_policy_rules.json', policy_rules_json)
+    zip_file.writestr('sample_orders.json', json.dumps(sample_orders, indent=2))
 
 zip_buffer.seek(0)
 lambda_zip = zip_buffer.read()
 
 print(f"✓ Lambda code packaged (size: {len(lambda_zip)} bytes)")
+print("  Files: lambda_function.py, order_store.py, orders.db, policy_rules.py, return_policy_rules.json, "
+      "sample_orders.json")
 
 # ============================================================================
 # STEP 4: Create or Update Lambda Function
@@ -261,7 +194,12 @@ try:
             ZipFile=lambda_zip
         )
         function_arn = update_response['FunctionArn']
-        print(f"✓ Function updated: {function_arn}")
+        lambda_client.get_waiter('function_updated_v2').wait(FunctionName=FUNCTION_NAME)
+        lambda_client.update_function_configuration(
+            FunctionName=FUNCTION_NAME,
+            MemorySize=MEMORY_SIZE_MB
+        )
+        print(f"✓ Function updated: {function_arn} ({MEMORY_SIZE_MB} MB)")
     except lambda_client.exceptions.ResourceNotFoundException:
         # Create new function
         create_response = lambda_client.create_function(
@@ -272,10 +210,10 @@ try:
             Code={'ZipFile': lambda_zip},
             Description='Order lookup function for returns agent',
             Timeout=30,
-            MemorySize=128
+            MemorySize=MEMORY_SIZE_MB
         )
         function_arn = create_response['FunctionArn']
-        print(f"✓ Function created: {function_arn}")
+        print(f"✓ Function created: {function_arn} ({MEMORY_SIZE_MB} MB)")
         
         # Wait for function to be active
         print("  Waiting for function to be active...")
@@ -291,28 +229,14 @@ except Exception as e:
 print()
 print("Step 5: Creating tool schema for gateway integration...")
 
+# lookup_order for one order, lookup_orders for several orders in one invocation,
+# search_orders for a page of a customer's orders
 tool_schema = {
-    "inlinePayload": [
-        {
-            "name": "lookup_order",
-            "description": "Look up order details by order ID. Returns order information including product name, purchase date, amount, and return eligibility status.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "order_id": {
-                        "type": "string",
-                        "description": "The order ID to look up (e.g., ORD-001, ORD-002, ORD-003)"
-                    }
-                },
-                "required": ["order_id"]
-            }
-        }
-    ]
+    "inlinePayload": TOOL_SCHEMAS
 }
 
 print("✓ Tool schema created")
-print("  Tool name: lookup_order")
-print("  Input: order_id (string)")
+print("  Tools: lookup_order (order_id), lookup_orders (order_ids), search_orders (customer_id)")
 
 # ============================================================================
 # STEP 6: Save Configuration
@@ -325,6 +249,7 @@ config = {
     "function_arn": function_arn,
     "tool_schema": tool_schema,
     "tool_name": "lookup_order",
+    "tool_names": [schema["name"] for schema in TOOL_SCHEMAS],
     "region": REGION,
     "sample_orders": ["ORD-001", "ORD-002", "ORD-003"]
 }
@@ -349,7 +274,7 @@ print("=" * 80)
 print()
 print(f"Function ARN: {function_arn}")
 print(f"Function Name: {FUNCTION_NAME}")
-print(f"Tool Name: lookup_order")
+print(f"Tool Names: lookup_order, lookup_orders, search_orders")
 print()
 print("Sample Orders:")
 print(f"  ORD-001: Dell XPS 15 Laptop (purchased {recent_date}, eligible for return)")
@@ -359,8 +284,8 @@ print()
 print("Configuration saved to: lambda_config.json")
 print()
 print("This Lambda function:")
-print("  ✓ Looks up order details by order ID")
-print("  ✓ Checks return eligibility (30-day window)")
+print("  ✓ Looks up order details by order ID (indexed SQLite order store)")
+print("  ✓ Checks return eligibility (shared policy rules)")
 print("  ✓ Returns product info and eligibility status")
 print("  ✓ Ready to be added as a gateway target")
 print("=" * 80)
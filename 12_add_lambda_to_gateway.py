@@ -11,6 +11,8 @@ import json
 import boto3
 import sys
 
+from order_tool_schemas import TOOL_SCHEMAS
+
 print("=" * 80)
 print("ADD LAMBDA TARGET TO GATEWAY")
 print("=" * 80)
@@ -71,6 +73,11 @@ print("Step 3: Preparing Lambda target configuration...")
 lambda_arn = lambda_config['function_arn']
 tool_schema = lambda_config['tool_schema']['inlinePayload']
 
+# Register every tool the function serves with its current schema (configs written
+# by older versions of 10_create_lambda.py lack lookup_orders, search_orders and the fields parameter)
+current_schemas = {schema['name']: schema for schema in TOOL_SCHEMAS}
+tool_schema = [current_schemas.pop(tool['name'], tool) for tool in tool_schema] + list(current_schemas.values())
+
 print(f"✓ Lambda ARN: {lambda_arn}")
 print(f"✓ Tool Schema loaded:")
 for tool in tool_schema:
@@ -104,17 +111,28 @@ print(f"  Gateway ID: {gateway_config['gateway_id']}")
 print(f"  Target Name: OrderLookup")
 
 try:
-    create_response = gateway_client.create_gateway_target(
+    # Update the target in place if it already exists (e.g. to add lookup_orders)
+    existing_target = next(
+        (t for t in gateway_client.list_gateway_targets(gatewayIdentifier=gateway_config["gateway_id"])
+         .get("items", []) if t["name"] == "OrderLookup"),
+        None
+    )
+    target_args = dict(
         gatewayIdentifier=gateway_config["gateway_id"],
         name="OrderLookup",
-        description="Lambda function to look up order details by order ID",
+        description="Lambda function to look up order details by order ID (single or batch)",
         targetConfiguration=lambda_target_config,
         credentialProviderConfigurations=credential_config
     )
-    
-    target_id = create_response["targetId"]
-    
-    print(f"✓ Lambda target added successfully!")
+
+    if existing_target:
+        gateway_client.update_gateway_target(targetId=existing_target["targetId"], **target_args)
+        target_id = existing_target["targetId"]
+        print(f"✓ Existing Lambda target updated")
+    else:
+        create_response = gateway_client.create_gateway_target(**target_args)
+        target_id = create_response["targetId"]
+        print(f"✓ Lambda target added successfully!")
     print(f"  Target ID: {target_id}")
     
 except Exception as e:
@@ -128,12 +146,13 @@ print()
 print("Step 5: Updating gateway configuration...")
 
 # Add target info to gateway config
-gateway_config['targets'] = gateway_config.get('targets', [])
+gateway_config['targets'] = [t for t in gateway_config.get('targets', []) if t.get('target_id') != target_id]
 gateway_config['targets'].append({
     "target_id": target_id,
     "target_name": "OrderLookup",
     "lambda_arn": lambda_arn,
-    "tool_name": lambda_config['tool_name']
+    "tool_name": lambda_config['tool_name'],
+    "tool_names": [tool['name'] for tool in tool_schema]
 })
 
 try:
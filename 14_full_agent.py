@@ -10,16 +10,29 @@ Integrations:
 
 import os
 import json
+import time
 from strands import Agent, tool
-from strands.models import BedrockModel
-from strands_tools import retrieve
 from strands_tools import current_time
 from strands.tools.mcp import MCPClient
 from mcp.client.streamable_http import streamablehttp_client
 import requests
+from bedrock_agentcore.memory import MemoryClient
 from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
 from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
-from datetime import datetime
+from batch_eligibility import check_return_eligibility_batch
+from batch_refunds import calculate_refund_batch
+from fast_path import record_turn
+from kb_retrieve import retrieve
+from model_router import model_router
+from order_loader import coalesce_gateway_tools
+from policy_renderer import render_policy
+from policy_rules import calculate_refund, check_eligibility, get_policy_engine
+from prompt_cache import cached_system_prompt, create_bedrock_model, prompt_cache_stats
+from token_budget import token_budget
+from tool_compactor import ToolResultCompactor
+from tool_executor import ToolLimits
+from tool_memo import memoize_tool
+from tool_selector import tool_selector
 
 # Constants
 MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
@@ -27,8 +40,19 @@ REGION = "us-west-2"
 SESSION_ID = "default-session"
 ACTOR_ID = "default-actor"
 
-# Model configuration
-bedrock_model = BedrockModel(model_id=MODEL_ID, temperature=0.3)
+# Model configuration (prompt cache points after the tool definitions and the system prompt)
+bedrock_model = create_bedrock_model(MODEL_ID, temperature=0.3)
+
+# Return policy rules (compiled once, hot-reloaded when the rules file changes)
+policy_engine = get_policy_engine()
+print(f"✓ Policy rules loaded: version {policy_engine.policy.version}")
+
+# Compacts tool results carried across turns (shared so metrics cover all sessions)
+tool_compactor = ToolResultCompactor()
+
+# Bounds the independent tool calls the agent runs concurrently from one model turn
+# (per-invocation limit, per-tool timeouts); registered after the other hooks
+tool_limits = ToolLimits()
 
 # ============================================================================
 # LOAD CONFIGURATION FROM FILES
@@ -80,6 +104,15 @@ except FileNotFoundError:
     cognito_discovery_url = os.environ.get("COGNITO_DISCOVERY_URL")
     print(f"⚠️  cognito_config.json not found, using env variables")
 
+# Gateway environment variables take precedence over the config files
+# (e.g. to run against the local gateway emulator, 33_local_gateway.py)
+if os.environ.get("GATEWAY_URL") and os.environ.get("COGNITO_DISCOVERY_URL"):
+    gateway_url = os.environ["GATEWAY_URL"]
+    cognito_client_id = os.environ.get("COGNITO_CLIENT_ID")
+    cognito_client_secret = os.environ.get("COGNITO_CLIENT_SECRET")
+    cognito_discovery_url = os.environ["COGNITO_DISCOVERY_URL"]
+    print(f"✓ Gateway and Cognito overridden from env: {gateway_url}")
+
 print()
 
 # ============================================================================
@@ -155,6 +188,9 @@ def create_memory_session_manager(mem_id: str, session_id: str = SESSION_ID, act
         region_name=REGION
     )
 
+# Records fast model tier turns in memory (the session manager is only built for main model turns)
+memory_client = MemoryClient(region_name=REGION)
+
 # System prompt
 system_prompt = f"""You are a returns assistant with memory and order lookup capabilities. Remember customer preferences, look up order details, and use the retrieve tool to access Amazon return policy documents for accurate information.
 
@@ -162,71 +198,49 @@ When using the retrieve tool, always pass these parameters:
 - knowledgeBaseId: {kb_id}
 - region: {REGION}
 - text: the search query
-- Gateway tools for external operations
+- Gateway tools for external operations (use lookup_orders to look up several orders in one call, search_orders to find a customer's orders when they don't know the order ID, and pass fields to get only the order fields you need)
 - Customer conversation history and preferences through memory"""
 
 # Custom tool definitions
 @tool
+@memoize_tool(date_aware=True, case_insensitive=('category',))
 def check_return_eligibility(purchase_date: str, category: str) -> dict:
     """Check if an item is eligible for return based on purchase date and category"""
-    try:
-        purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
-        days_since_purchase = (datetime.now() - purchase_dt).days
-        return_windows = {'electronics': 30, 'clothing': 30, 'books': 30, 'grocery': 30, 'jewelry': 30, 'default': 30}
-        window = return_windows.get(category.lower(), return_windows['default'])
-        if days_since_purchase < 0:
-            return {'eligible': False, 'reason': 'Purchase date is in the future', 'days_remaining': 0}
-        elif days_since_purchase <= window:
-            return {'eligible': True, 'reason': f'Within {window}-day return window', 'days_remaining': window - days_since_purchase}
-        else:
-            return {'eligible': False, 'reason': f'Exceeded {window}-day return window', 'days_remaining': 0}
-    except ValueError:
-        return {'eligible': False, 'reason': 'Invalid date format. Use YYYY-MM-DD', 'days_remaining': 0}
+    return check_eligibility(purchase_date, category)
 
 @tool
+@memoize_tool(case_insensitive=('return_reason',))
 def calculate_refund_amount(original_price: float, condition: str, return_reason: str) -> dict:
     """Calculate refund amount based on price, condition, and return reason"""
-    if original_price < 0:
-        return {'refund_amount': 0.0, 'deduction': 0.0, 'reason': 'Invalid price'}
-    condition_deductions = {'new': 0.0, 'opened': 0.0, 'used': 0.20, 'damaged': 0.50}
-    full_refund_reasons = ['defective', 'wrong_item', 'not_as_described']
-    if return_reason.lower() in full_refund_reasons:
-        refund_amount = original_price
-        deduction = 0.0
-        reason = 'Full refund - seller error'
-    else:
-        deduction_rate = condition_deductions.get(condition.lower(), 0.20)
-        deduction = original_price * deduction_rate
-        refund_amount = original_price - deduction
-        reason = f'{int(deduction_rate * 100)}% deduction for {condition} condition'
-    return {'refund_amount': round(refund_amount, 2), 'deduction': round(deduction, 2), 'original_price': original_price, 'reason': reason}
+    return calculate_refund(original_price, condition, return_reason)
 
 @tool
 def format_policy_response(policy_text: str, customer_question: str = '') -> str:
     """Format policy information in a customer-friendly way"""
-    formatted = '📋 Return Policy Information\n' + '=' * 50 + '\n\n'
-    if customer_question:
-        formatted += f'Regarding: {customer_question}\n\n'
-    lines = policy_text.strip().split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line:
-            formatted += '\n'
-        elif line.isupper() or line.endswith(':'):
-            formatted += f'\n{line}\n'
-        elif line.startswith('-') or line.startswith('•'):
-            formatted += f'  {line}\n'
-        else:
-            formatted += f'{line}\n'
-    formatted += '\n' + '=' * 50 + '\n' + '💡 Tip: If you have specific questions about your return, I can help!\n'
-    return formatted
+    return render_policy(policy_text, customer_question)
 
 
 def run_agent(user_input: str, session_id: str = SESSION_ID, actor_id: str = ACTOR_ID):
     """Run the agent with user input"""
     
+    # Simple requests (greetings, general policy questions) are answered by the fast model tier
+    # (recorded in memory so later main model turns see them in the conversation history)
+    routed = model_router.answer(user_input)
+    if routed:
+        if memory_id:
+            try:
+                record_turn(memory_client, memory_id, actor_id, session_id, user_input, routed.text)
+            except Exception as e:
+                print(f"⚠️  Failed to record fast model turn in memory: {e}")
+        return routed.text
+
+    # The customer's ID lets the model search their orders; it follows the system prompt's cache point
+    agent_prompt = cached_system_prompt(system_prompt, f"The customer's ID (customer_id for search_orders) is {actor_id}.")
+    # Token usage is accounted per actor and session (token_budget); also labels the agent's trace spans
+    trace_attributes = {"actor.id": actor_id, "session.id": session_id}
+
     # Build tools list
-    custom_tools = [retrieve, current_time, check_return_eligibility, calculate_refund_amount, format_policy_response]
+    custom_tools = [retrieve, current_time, check_return_eligibility, check_return_eligibility_batch, calculate_refund_amount, calculate_refund_batch, format_policy_response]
     
     # Configure memory
     if not memory_id:
@@ -243,33 +257,43 @@ def run_agent(user_input: str, session_id: str = SESSION_ID, actor_id: str = ACT
         try:
             # Keep MCP client active during agent execution
             with mcp_client:
-                # Get gateway tools from MCP client
-                gateway_tools = list(mcp_client.list_tools_sync())
+                # Get gateway tools from MCP client (lookup_order calls are coalesced into lookup_orders batches)
+                gateway_tools = coalesce_gateway_tools(mcp_client.list_tools_sync())
                 print(f"✓ Loaded {len(gateway_tools)} gateway tools")
                 
                 # Create agent with gateway tools
+                selection = tool_selector.select(user_input, custom_tools + gateway_tools)
                 agent = Agent(
                     model=bedrock_model,
-                    tools=custom_tools + gateway_tools,
-                    system_prompt=system_prompt,
-                    session_manager=session_manager
+                    tools=selection.tools,
+                    system_prompt=agent_prompt,
+                    session_manager=session_manager,
+                    hooks=[tool_compactor, prompt_cache_stats, token_budget, selection, tool_limits],
+                    trace_attributes=trace_attributes
                 )
                 
+                started = time.perf_counter()
                 response = agent(user_input)
+                model_router.observe_main_latency(time.perf_counter() - started)
                 return response.message["content"][0]["text"]
         except Exception as e:
             print(f"⚠️  Failed to use gateway tools: {e}")
             # Fall back to agent without gateway tools
     
     # Create agent without gateway tools (fallback or no gateway)
+    selection = tool_selector.select(user_input, custom_tools)
     agent = Agent(
         model=bedrock_model,
-        tools=custom_tools,
-        system_prompt=system_prompt,
-        session_manager=session_manager
+        tools=selection.tools,
+        system_prompt=agent_prompt,
+        session_manager=session_manager,
+        hooks=[tool_compactor, prompt_cache_stats, token_budget, selection, tool_limits],
+        trace_attributes=trace_attributes
     )
     
+    started = time.perf_counter()
     response = agent(user_input)
+    model_router.observe_main_latency(time.perf_counter() - started)
     return response.message["content"][0]["text"]
 
 if __name__ == "__main__":
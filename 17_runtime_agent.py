@@ -13,17 +13,40 @@ This agent is ready to deploy to AgentCore Runtime with:
 
 import os
 import json
+import math
+import threading
+import time
 import traceback
-from datetime import datetime
+from datetime import timedelta
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from bedrock_agentcore.memory import MemoryClient
 from strands import Agent, tool
-from strands.models import BedrockModel
-from strands_tools import retrieve, current_time
+from strands_tools import current_time
 from strands.tools.mcp import MCPClient
+from strands.types.exceptions import MCPClientInitializationError
 from mcp.client.streamable_http import streamablehttp_client
 import requests
 from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
 from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
+from batch_eligibility import check_return_eligibility_batch
+from batch_refunds import calculate_refund_batch
+from bedrock_clients import connection_stats
+from deadline import (STAGE_GATEWAY, STAGE_MEMORY, Deadline, DeadlineExceeded, current_deadline, deadline_stats,
+                      memory_client_config, remaining_timeout)
+from fast_path import FastPathRouter, decode_lambda_response, record_turn
+from hedging import hedger
+from kb_retrieve import retrieve
+from model_router import model_router
+from order_cache import order_cache
+from order_loader import coalesce_gateway_tools, gateway_batch_fetcher, order_loader
+from policy_renderer import stream_policy
+from policy_rules import calculate_refund, check_eligibility, get_policy_engine
+from prompt_cache import cached_system_prompt, create_bedrock_model, prompt_cache_stats
+from token_budget import token_budget
+from tool_compactor import ToolResultCompactor
+from tool_executor import ToolLimits
+from tool_memo import memoize_tool, tool_memo_cache
+from tool_selector import tool_selector
 
 # Constants
 MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
@@ -31,14 +54,29 @@ REGION = "us-west-2"
 SESSION_ID = "default-session"
 ACTOR_ID = "default-actor"
 
+# Read timeout of the fast path's batched order lookups (as the lookup_orders tool timeout)
+GATEWAY_LOOKUP_TIMEOUT_S = 10.0
+
 # Initialize app
 app = BedrockAgentCoreApp()
 
+# Return policy rules (compiled once, hot-reloaded when the rules file changes)
+policy_engine = get_policy_engine()
+print(f"✓ Policy rules loaded: version {policy_engine.policy.version}")
+
+# Compacts tool results carried across turns (shared so metrics cover all sessions)
+tool_compactor = ToolResultCompactor()
+
+# Bounds the independent tool calls the agent runs concurrently from one model turn
+# (per-invocation limit, per-tool timeouts); registered after the other hooks
+tool_limits = ToolLimits()
+
 # ============================================================================
 # CUSTOM TOOLS (from original agent)
 # ============================================================================
 
 @tool
+@memoize_tool(date_aware=True, case_insensitive=('category',))
 def check_return_eligibility(purchase_date: str, category: str) -> dict:
     """
     Check if an item is eligible for return based on purchase date and category.
@@ -51,45 +89,7 @@ def check_return_eligibility(purchase_date: str, category: str) -> dict:
         Dictionary with eligibility status and reason
     """
     try:
-        purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
-        days_since_purchase = (datetime.now() - purchase_dt).days
-        
-        # Return windows by category
-        return_windows = {
-            'electronics': 30,
-            'clothing': 30,
-            'books': 30,
-            'grocery': 30,
-            'jewelry': 30,
-            'default': 30
-        }
-        
-        window = return_windows.get(category.lower(), return_windows['default'])
-        
-        if days_since_purchase < 0:
-            return {
-                'eligible': False,
-                'reason': 'Purchase date is in the future',
-                'days_remaining': 0
-            }
-        elif days_since_purchase <= window:
-            return {
-                'eligible': True,
-                'reason': f'Within {window}-day return window',
-                'days_remaining': window - days_since_purchase
-            }
-        else:
-            return {
-                'eligible': False,
-                'reason': f'Exceeded {window}-day return window',
-                'days_remaining': 0
-            }
-    except ValueError:
-        return {
-            'eligible': False,
-            'reason': 'Invalid date format. Use YYYY-MM-DD',
-            'days_remaining': 0
-        }
+        return check_eligibility(purchase_date, category)
     except Exception as e:
         print(f"Error in check_return_eligibility: {e}")
         return {
@@ -99,6 +99,7 @@ def check_return_eligibility(purchase_date: str, category: str) -> dict:
         }
 
 @tool
+@memoize_tool(case_insensitive=('return_reason',))
 def calculate_refund_amount(original_price: float, condition: str, return_reason: str) -> dict:
     """
     Calculate refund amount based on price, condition, and return reason.
@@ -112,42 +113,7 @@ def calculate_refund_amount(original_price: float, condition: str, return_reason
         Dictionary with refund amount and breakdown
     """
     try:
-        if original_price < 0:
-            return {
-                'refund_amount': 0.0,
-                'deduction': 0.0,
-                'reason': 'Invalid price'
-            }
-        
-        # Condition-based deductions
-        condition_deductions = {
-            'new': 0.0,
-            'opened': 0.0,
-            'used': 0.20,  # 20% deduction
-            'damaged': 0.50  # 50% deduction
-        }
-        
-        # Reason-based adjustments (defective/wrong items get full refund)
-        full_refund_reasons = ['defective', 'wrong_item', 'not_as_described']
-        
-        if return_reason.lower() in full_refund_reasons:
-            # Full refund regardless of condition for seller errors
-            refund_amount = original_price
-            deduction = 0.0
-            reason = 'Full refund - seller error'
-        else:
-            # Apply condition-based deduction
-            deduction_rate = condition_deductions.get(condition.lower(), 0.20)
-            deduction = original_price * deduction_rate
-            refund_amount = original_price - deduction
-            reason = f'{int(deduction_rate * 100)}% deduction for {condition} condition'
-        
-        return {
-            'refund_amount': round(refund_amount, 2),
-            'deduction': round(deduction, 2),
-            'original_price': original_price,
-            'reason': reason
-        }
+        return calculate_refund(original_price, condition, return_reason)
     except Exception as e:
         print(f"Error in calculate_refund_amount: {e}")
         return {
@@ -157,7 +123,7 @@ def calculate_refund_amount(original_price: float, condition: str, return_reason
         }
 
 @tool
-def format_policy_response(policy_text: str, customer_question: str = '') -> str:
+async def format_policy_response(policy_text: str, customer_question: str = ''):
     """
     Format policy information in a customer-friendly way.
     
@@ -169,51 +135,49 @@ def format_policy_response(policy_text: str, customer_question: str = '') -> str
         Formatted, customer-friendly policy response
     """
     try:
-        # Add friendly header
-        formatted = '📋 Return Policy Information\n'
-        formatted += '=' * 50 + '\n\n'
-        
-        if customer_question:
-            formatted += f'Regarding: {customer_question}\n\n'
-        
-        # Clean up and format the policy text
-        lines = policy_text.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                formatted += '\n'
-            elif line.isupper() or line.endswith(':'):
-                # Treat as section header
-                formatted += f'\n{line}\n'
-            elif line.startswith('-') or line.startswith('•'):
-                # Keep bullet points
-                formatted += f'  {line}\n'
-            else:
-                # Regular text
-                formatted += f'{line}\n'
-        
-        formatted += '\n' + '=' * 50 + '\n'
-        formatted += '💡 Tip: If you have specific questions about your return, I can help!\n'
-        
-        return formatted
+        # Stream the rendered policy in chunks; the full text is the tool result
+        chunks = []
+        for chunk in stream_policy(policy_text, customer_question):
+            chunks.append(chunk)
+            yield {'policy_chunk': chunk}
+        yield ''.join(chunks)
     except Exception as e:
         print(f"Error in format_policy_response: {e}")
-        return f"Error formatting policy: {str(e)}"
+        yield f"Error formatting policy: {str(e)}"
 
 # ============================================================================
 # GATEWAY HELPER FUNCTIONS
 # ============================================================================
 
+# Cognito access tokens by (client ID, scope) as (token, expiry), reused until
+# TOKEN_EXPIRY_MARGIN_S before they expire; token endpoints by discovery URL
+TOKEN_EXPIRY_MARGIN_S = 60
+_cognito_tokens = {}
+_token_endpoints = {}
+_token_lock = threading.Lock()
+
 def get_cognito_token_with_scope(client_id, client_secret, discovery_url, scope):
-    """Get Cognito bearer token with a specific OAuth scope"""
+    """
+    Get Cognito bearer token with a specific OAuth scope, and the time.monotonic()
+    after which it must not be used. Tokens are reused until then; requests for a
+    new one have their timeouts capped by the request's deadline.
+    """
+    key = (client_id, scope)
+    with _token_lock:
+        cached = _cognito_tokens.get(key)
+        token_endpoint = _token_endpoints.get(discovery_url)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached
+
     try:
         # Extract token endpoint from discovery URL
-        discovery_response = requests.get(discovery_url, timeout=10)
-        discovery_response.raise_for_status()
-        token_endpoint = discovery_response.json()['token_endpoint']
+        if token_endpoint is None:
+            discovery_response = requests.get(discovery_url, timeout=remaining_timeout(10))
+            discovery_response.raise_for_status()
+            token_endpoint = discovery_response.json()['token_endpoint']
         
         # Get token using client credentials flow
+        requested = time.monotonic()
         response = requests.post(
             token_endpoint,
             data={
@@ -223,47 +187,353 @@ def get_cognito_token_with_scope(client_id, client_secret, discovery_url, scope)
                 'scope': scope
             },
             headers={'Content-Type': 'application/x-www-form-urlencoded'},
-            timeout=10
+            timeout=remaining_timeout(10)
         )
         
         response.raise_for_status()
-        return response.json()["access_token"]
+        body = response.json()
+        token = (body["access_token"], requested + float(body.get("expires_in", 3600)) - TOKEN_EXPIRY_MARGIN_S)
+        with _token_lock:
+            _token_endpoints[discovery_url] = token_endpoint
+            _cognito_tokens[key] = token
+        return token
     except Exception as e:
         print(f"Error getting Cognito token: {e}")
         raise
 
-def create_mcp_client():
-    """Create MCP client for gateway access"""
+def gateway_credentials():
+    """Gateway URL, bearer token and the token's expiry (time.monotonic()), or None when not configured"""
+    # Get environment variables
+    gateway_url = os.environ.get("GATEWAY_URL")
+    cognito_client_id = os.environ.get("COGNITO_CLIENT_ID")
+    cognito_client_secret = os.environ.get("COGNITO_CLIENT_SECRET")
+    cognito_discovery_url = os.environ.get("COGNITO_DISCOVERY_URL")
+    oauth_scopes = os.environ.get("OAUTH_SCOPES", "gateway-api/read gateway-api/write")
+    
+    if not all([gateway_url, cognito_client_id, cognito_client_secret, cognito_discovery_url]):
+        print("Warning: Gateway environment variables not set - gateway tools will not be available")
+        return None
+    
+    token, expires_at = get_cognito_token_with_scope(
+        cognito_client_id,
+        cognito_client_secret,
+        cognito_discovery_url,
+        oauth_scopes
+    )
+    return gateway_url, token, expires_at
+
+def create_mcp_client(request_scoped=True, credentials=None):
+    """
+    Create MCP client for gateway access (None when the gateway is not configured)
+
+    Args:
+        request_scoped: Cap the HTTP timeouts by the current request's deadline; False
+            for a client kept open across requests (its handshake is still capped)
+        credentials: gateway_credentials() result, when already fetched
+    """
     try:
-        # Get environment variables
-        gateway_url = os.environ.get("GATEWAY_URL")
-        cognito_client_id = os.environ.get("COGNITO_CLIENT_ID")
-        cognito_client_secret = os.environ.get("COGNITO_CLIENT_SECRET")
-        cognito_discovery_url = os.environ.get("COGNITO_DISCOVERY_URL")
-        oauth_scopes = os.environ.get("OAUTH_SCOPES", "gateway-api/read gateway-api/write")
-        
-        if not all([gateway_url, cognito_client_id, cognito_client_secret, cognito_discovery_url]):
-            print("Warning: Gateway environment variables not set - gateway tools will not be available")
+        credentials = credentials or gateway_credentials()
+        if credentials is None:
             return None
+        gateway_url, token, _ = credentials
         
-        token = get_cognito_token_with_scope(
-            cognito_client_id,
-            cognito_client_secret,
-            cognito_discovery_url,
-            oauth_scopes
-        )
-        
+        # HTTP and handshake timeouts fit in the time left (the MCP defaults without a deadline)
+        http_timeout = timedelta(seconds=remaining_timeout(30) if request_scoped else 30)
+        sse_read_timeout = timedelta(seconds=remaining_timeout(300) if request_scoped else 300)
         print(f"✓ Gateway configured: {gateway_url}")
         return MCPClient(
             lambda: streamablehttp_client(
                 gateway_url,
                 headers={"Authorization": f"Bearer {token}"},
-            )
+                timeout=http_timeout,
+                sse_read_timeout=sse_read_timeout,
+            ),
+            startup_timeout=math.ceil(remaining_timeout(30))
         )
     except Exception as e:
         print(f"Warning: Failed to create MCP client: {e}")
         return None
 
+# ============================================================================
+# FAST PATH (structured questions answered without the model)
+# ============================================================================
+
+def gateway_read_timeout():
+    """Time left before the request's deadline as an MCP call timeout (None without a deadline)"""
+    deadline = current_deadline()
+    return timedelta(seconds=deadline.timeout(math.inf)) if deadline.bounded else None
+
+def gateway_lookup_order(order_id):
+    """Look up an order from the order cache, or else the gateway; returns (status code, body)"""
+    order_id = order_id.upper()
+    cached = order_cache.get(order_id)
+    if cached is not None:
+        return cached
+    status, body = fetch_order_from_gateway(order_id)
+    order_cache.put(order_id, status, body)
+    return status, body
+
+class FastPathGateway:
+    """
+    Gateway connection kept open for the fast path's direct order lookups.
+
+    Opening a connection per lookup costs a Cognito token request, the MCP
+    initialize handshake and tools/list before the lookup itself. The connection,
+    its tool-name map and its batch fetcher are reused by every request until the
+    bearer token nears expiry or the connection itself breaks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mcp_client = None
+        self._tool_names = {}
+        self._batch_fetch = None
+        self._expires_at = 0.0
+        self.connects = 0
+
+    def get(self):
+        """(MCP client, {bare tool name: gateway tool name}, lookup_orders fetcher or None), or None"""
+        with self._lock:
+            if self._mcp_client is not None and time.monotonic() < self._expires_at:
+                return self._mcp_client, self._tool_names, self._batch_fetch
+            self._close()
+            credentials = gateway_credentials()
+            mcp_client = create_mcp_client(request_scoped=False, credentials=credentials)
+            if mcp_client is None:
+                return None
+            mcp_client.start()
+            try:
+                tool_names = {t.tool_name.split('___')[-1]: t.tool_name for t in mcp_client.list_tools_sync()}
+            except Exception:
+                mcp_client.stop(None, None, None)
+                raise
+            self._mcp_client, self._tool_names, self._expires_at = mcp_client, tool_names, credentials[2]
+            # The batch call is shared by the requests in it, so it is bounded by the
+            # lookup timeout rather than one request's deadline (each waits on its own)
+            self._batch_fetch = (gateway_batch_fetcher(mcp_client, tool_names['lookup_orders'],
+                                                       timedelta(seconds=GATEWAY_LOOKUP_TIMEOUT_S))
+                                 if 'lookup_orders' in tool_names else None)
+            self.connects += 1
+            return self._mcp_client, self._tool_names, self._batch_fetch
+
+    def reset(self, mcp_client):
+        """Drop a broken connection (the next lookup reconnects)"""
+        with self._lock:
+            if self._mcp_client is mcp_client:
+                self._close()
+
+    def _close(self):
+        if self._mcp_client is not None:
+            try:
+                self._mcp_client.stop(None, None, None)
+            except Exception as e:
+                print(f"⚠️  Failed to close the fast path gateway connection: {e}")
+        self._mcp_client, self._tool_names, self._batch_fetch = None, {}, None
+
+# Shared by every agent and session in the process
+fast_path_gateway = FastPathGateway()
+
+# Errors that mean the shared gateway connection itself is broken (the session has
+# ended or the transport failed); timeouts and failed tool calls leave it open
+GATEWAY_CONNECTION_ERRORS = (MCPClientInitializationError, ConnectionError)
+
+def fetch_order_from_gateway(order_id):
+    """Call the gateway order lookup tools directly; returns (status code, body)"""
+    connection = fast_path_gateway.get()
+    if not connection:
+        return 503, {'error': 'Gateway not configured'}
+    mcp_client, tool_names, batch_fetch = connection
+
+    try:
+        if batch_fetch is not None:
+            # Coalesced with concurrent lookups from other sessions; waits no longer than
+            # this request's deadline allows
+            try:
+                return order_loader.load(order_id, batch_fetch, key=mcp_client,
+                                         timeout=current_deadline().timeout(GATEWAY_LOOKUP_TIMEOUT_S))
+            except TimeoutError:
+                # A direct lookup would not finish in time either
+                raise
+            except Exception as e:
+                print(f"⚠️  Batched order lookup failed, looking up {order_id} directly: {e}")
+        tool_name = tool_names.get('lookup_order')
+        if tool_name is None:
+            return 503, {'error': 'lookup_order is not available on the gateway'}
+        result = hedger.call(
+            'lookup_order', mcp_client.call_tool_sync,
+            tool_use_id=f"fast-path-{order_id}",
+            name=tool_name,
+            arguments={'order_id': order_id},
+            read_timeout_seconds=gateway_read_timeout()
+        )
+    except TimeoutError:
+        # This request's deadline ran out (DeadlineExceeded is a TimeoutError too); other
+        # sessions' lookups are still using the connection, so it stays open
+        raise
+    except GATEWAY_CONNECTION_ERRORS:
+        fast_path_gateway.reset(mcp_client)
+        raise
+
+    if result['status'] != 'success':
+        return 502, {'error': 'lookup_order failed'}
+    return decode_lambda_response(result['content'][0]['text'])
+
+fast_path = FastPathRouter(check_return_eligibility, calculate_refund_amount, lookup_order=gateway_lookup_order)
+
+# Records fast-path turns in memory (the session manager is only built for model turns)
+memory_client = MemoryClient(region_name=REGION)
+
+def print_invocation_stats():
+    """Print the share of traffic served by the fast path, latencies and tool execution stats"""
+    stats = fast_path.stats()
+    fast_p50 = f"{stats['fast_p50_ms']:.1f} ms" if stats['fast_p50_ms'] is not None else "n/a"
+    model_p50 = f"{stats['model_p50_ms']:.0f} ms" if stats['model_p50_ms'] is not None else "n/a"
+    print(f"✓ Fast path: {stats['served']}/{stats['requests']} requests ({stats['share']:.0%}), "
+          f"p50 {fast_p50} vs model p50 {model_p50}; {fast_path_gateway.connects} gateway connections opened")
+    tools = tool_limits.stats()
+    print(f"✓ Tool calls: {tools['calls']} run, up to {tools['max_in_flight']} concurrently "
+          f"(limit {tools['max_concurrency']}), {tools['timeouts']} timed out")
+    cache = order_cache.stats()
+    print(f"✓ Order cache: {cache['hits']} hits, {cache['negative_hits']} not-found hits, {cache['misses']} misses "
+          f"({cache['hit_rate']:.0%}), {cache['entries']} entries")
+    loads = order_loader.stats()
+    print(f"✓ Order lookups: {loads['requests']} in {loads['batches']} gateway calls "
+          f"(mean batch {loads['mean_batch_size']:.1f}, {loads['round_trips_saved']} round trips saved)")
+    routing = model_router.stats()
+    main_p50 = f"{routing['main_p50_ms']:.0f} ms" if routing['main_p50_ms'] is not None else "n/a"
+    fast_model_p50 = f"{routing['fast_p50_ms']:.0f} ms" if routing['fast_p50_ms'] is not None else "n/a"
+    print(f"✓ Model routing: {routing['fast_answered']}/{routing['requests']} requests on the fast model "
+          f"({routing['fast_share']:.0%}), {routing['escalations']} escalated ({routing['escalation_rate']:.0%}), "
+          f"p50 {fast_model_p50} vs main p50 {main_p50}")
+    prompt_cache = prompt_cache_stats.stats()
+    print(f"✓ Prompt cache: {prompt_cache['cache_hits']}/{prompt_cache['invocations']} invocations hit "
+          f"({prompt_cache['cached_share']:.0%} of input tokens read from cache: "
+          f"{prompt_cache['cache_read_tokens']} read, {prompt_cache['cache_write_tokens']} written)")
+    budget = token_budget.stats()
+    usage = budget['usage']
+    print(f"✓ Token budget: {budget['model_calls']} model calls, {budget['trimmed_calls']} trimmed "
+          f"(~{budget['tokens_trimmed']} tokens, ceiling {budget['ceiling']}), {budget['over_budget']} over budget; "
+          f"{usage['input_tokens']} input / {usage['output_tokens']} output tokens "
+          f"over {budget['actors']} actors and {budget['sessions']} sessions")
+    selection = tool_selector.stats()
+    print(f"✓ Tool selection: {selection['mean_tools_offered']:.1f}/{selection['mean_tools_available']:.1f} tools offered "
+          f"per request (~{selection['tokens_saved']} tool definition tokens saved, {selection['saved_share']:.0%}), "
+          f"{selection['fallbacks']} full-set fallbacks, {selection['misses']} calls to tools not offered")
+    for client, pool in connection_stats().items():
+        print(f"✓ Bedrock client {client}: {pool['requests']} requests on {pool['connections']} connections "
+              f"({pool['reuse_rate']:.0%} reused)")
+    if hedger.enabled:
+        hedging = hedger.stats()
+        print(f"✓ Hedging: {hedging['hedges']}/{hedging['requests']} calls hedged ({hedging['hedge_share']:.1%}), "
+              f"{hedging['hedge_wins']} won by the hedge, {hedging['budget_denied']} denied by the budget")
+    deadlines = deadline_stats.stats()
+    if deadlines['requests']:
+        stages = ', '.join(f"{stage}: {count}" for stage, count in sorted(deadlines['expired_by_stage'].items()))
+        print(f"✓ Deadlines: {deadlines['expired']}/{deadlines['requests']} requests cut short "
+              f"({deadlines['expired_share']:.0%}){f' ({stages})' if stages else ''}")
+    memo = tool_memo_cache.stats()
+    print(f"✓ Tool memo cache: {memo['hits']} hits / {memo['hits'] + memo['misses']} calls "
+          f"({memo['hit_rate']:.0%}), {memo['entries']} entries")
+
+# ============================================================================
+# STREAMING RESPONSES
+# ============================================================================
+
+async def stream_text(text):
+    """Stream a complete answer as a single text event"""
+    yield {"text": text}
+
+async def agent_stream_events(agent, user_input, cancel_signal=None):
+    """Yield text deltas and formatted policy chunks from an agent run as they are produced"""
+    async for event in agent.stream_async(user_input, cancel_signal=cancel_signal):
+        if "data" in event:
+            yield {"text": event["data"]}
+        elif event.get("type") == "tool_stream":
+            data = event["tool_stream_event"].get("data")
+            if isinstance(data, dict) and "policy_chunk" in data:
+                yield {"policy_chunk": data["policy_chunk"]}
+
+async def stream_agent_response(bedrock_model, custom_tools, system_prompt, session_manager, trace_attributes, user_input,
+                                deadline):
+    """Streaming variant of the agent run in invoke (sent to the caller as server-sent events)"""
+    print(f"✓ Streaming query: {user_input[:100]}...")
+    streamed = False
+    try:
+        with deadline:
+            async for event in stream_agent_events(bedrock_model, custom_tools, system_prompt, session_manager,
+                                                   trace_attributes, user_input, deadline):
+                streamed = True
+                yield event
+        if deadline.cut_short:
+            print(f"⚠️  Deadline reached ({deadline.expired_stage}); answer cut short")
+            yield {"text": deadline.stream_ending(streamed)}
+        else:
+            print("✓ Agent response streamed successfully")
+    except DeadlineExceeded as e:
+        print(f"⚠️  {e}")
+        yield {"text": deadline.stream_ending(streamed)}
+    except Exception as e:
+        error_msg = f"Agent invocation failed: {str(e)}"
+        print(f"✗ {error_msg}")
+        traceback.print_exc()
+        yield {"error": error_msg}
+    finally:
+        deadline.finish()
+
+async def stream_agent_events(bedrock_model, custom_tools, system_prompt, session_manager, trace_attributes, user_input,
+                              deadline):
+    """Agent run of stream_agent_response: with gateway tools when available, else without"""
+    streamed = False
+    deadline.check(STAGE_GATEWAY)
+    mcp_client = create_mcp_client()
+
+    if mcp_client:
+        try:
+            with mcp_client:
+                gateway_tools = coalesce_gateway_tools(mcp_client.list_tools_sync())
+                print(f"✓ Gateway tools loaded: {len(gateway_tools)} tools")
+
+                selection = tool_selector.select(user_input, custom_tools + gateway_tools)
+                agent = Agent(
+                    model=bedrock_model,
+                    tools=selection.tools,
+                    system_prompt=system_prompt,
+                    session_manager=session_manager,
+                    hooks=[tool_compactor, prompt_cache_stats, token_budget, selection, deadline, tool_limits],
+                    trace_attributes=trace_attributes
+                )
+                async for event in agent_stream_events(agent, user_input, deadline.cancel_signal):
+                    streamed = True
+                    yield event
+                return
+        except Exception as e:
+            # Output already sent cannot be retracted, so only fall back before the first event
+            if streamed:
+                raise
+            print(f"⚠️  Failed to use gateway tools: {e}")
+            print("Falling back to agent without gateway tools")
+            traceback.print_exc()
+
+    print("✓ Creating agent without gateway tools")
+    selection = tool_selector.select(user_input, custom_tools)
+    agent = Agent(
+        model=bedrock_model,
+        tools=selection.tools,
+        system_prompt=system_prompt,
+        session_manager=session_manager,
+        hooks=[tool_compactor, prompt_cache_stats, token_budget, selection, deadline, tool_limits],
+        trace_attributes=trace_attributes
+    )
+    async for event in agent_stream_events(agent, user_input, deadline.cancel_signal):
+        yield event
+
+def agent_answer(response, deadline):
+    """The agent's answer, or the best partial answer when the deadline cut the run short"""
+    if deadline.cut_short:
+        print(f"⚠️  Deadline reached ({deadline.expired_stage}); returning partial answer")
+        return deadline.partial_answer()
+    return response.message["content"][0]["text"]
+
 # ============================================================================
 # RUNTIME ENTRYPOINT
 # ============================================================================
@@ -271,13 +541,29 @@ def create_mcp_client():
 @app.entrypoint
 def invoke(payload, context=None):
     """AgentCore Runtime entrypoint with comprehensive error handling"""
+    started = time.perf_counter()
+    deadline = Deadline()
+    streaming = False
     try:
         print("=" * 80)
         print("AGENT INVOCATION STARTED")
         print("=" * 80)
+
+        # Order-status updates only invalidate cached order lookups
+        if payload.get("order_update"):
+            invalidated = order_cache.handle_order_update(payload["order_update"])
+            print(f"✓ Order update: {invalidated} cached lookups invalidated")
+            return {"invalidated": invalidated}
+
+        # Time budget for the whole request; every stage below gets what is left of it
+        deadline = Deadline.from_payload(payload)
+        deadline.start()
+        print(f"✓ Deadline: {deadline.budget_ms:.0f} ms" if deadline.bounded else "✓ Deadline: none")
         
         # Initialize model
-        bedrock_model = BedrockModel(model_id=MODEL_ID, temperature=0.3)
+        # Cache points after the tool definitions and the system prompt; every request's
+        # model uses the same Bedrock runtime client (bedrock_clients), so no new connections
+        bedrock_model = create_bedrock_model(MODEL_ID, temperature=0.3)
         print(f"✓ Model initialized: {MODEL_ID}")
         
         # Load configuration from environment variables
@@ -302,8 +588,35 @@ def invoke(payload, context=None):
         actor_id = payload.get("actor_id", ACTOR_ID)
         print(f"✓ Session ID: {session_id}")
         print(f"✓ Actor ID: {actor_id}")
+
+        # Deterministic fast path: structured eligibility/refund questions skip the model
+        user_input = payload.get("prompt", "")
+        with deadline:
+            answer = fast_path.route(user_input)
+        if answer:
+            try:
+                record_turn(memory_client, memory_id, actor_id, session_id, user_input, answer.text)
+            except Exception as e:
+                print(f"⚠️  Failed to record fast path turn in memory: {e}")
+            print(f"✓ Answered by fast path ({answer.intent}) in {answer.latency_ms:.1f} ms")
+            print_invocation_stats()
+            print("=" * 80)
+            return stream_text(answer.text) if payload.get("stream") else answer.text
+
+        # Model routing: greetings and general policy questions go to the fast model tier
+        with deadline:
+            routed = model_router.answer(user_input, cancel_signal=deadline.cancel_signal)
+        if routed:
+            try:
+                record_turn(memory_client, memory_id, actor_id, session_id, user_input, routed.text)
+            except Exception as e:
+                print(f"⚠️  Failed to record fast model turn in memory: {e}")
+            print_invocation_stats()
+            print("=" * 80)
+            return stream_text(routed.text) if payload.get("stream") else routed.text
         
         # Configure memory with retrieval settings
+        deadline.check(STAGE_MEMORY)
         agentcore_memory_config = AgentCoreMemoryConfig(
             memory_id=memory_id,
             session_id=session_id,
@@ -315,13 +628,16 @@ def invoke(payload, context=None):
             }
         )
         
+        # Memory reads time out within the time left (and are then skipped)
         session_manager = AgentCoreMemorySessionManager(
             agentcore_memory_config=agentcore_memory_config,
-            region_name=REGION
+            region_name=REGION,
+            boto_client_config=memory_client_config(deadline)
         )
         print("✓ Memory session manager configured")
-        
-        # System prompt with KB ID
+
+        # System prompt with KB ID (the same on every request, so it is cached;
+        # the customer's ID follows the cache point)
         system_prompt = f"""Production returns assistant with full memory and gateway capabilities. Use the retrieve tool to access Amazon return policy documents for accurate information.
 
 When using the retrieve tool, always pass these parameters:
@@ -330,40 +646,62 @@ When using the retrieve tool, always pass these parameters:
 - text: the search query
 
 You have access to:
-- Gateway tools for external operations (order lookup)
+- Gateway tools for external operations (order lookup; use lookup_orders to look up several orders in one call, search_orders to find a customer's orders when they don't know the order ID, and pass fields to get only the order fields you need)
 - Customer conversation history and preferences through memory
 - Custom tools for return eligibility and refund calculations"""
+        system_prompt = cached_system_prompt(
+            system_prompt, f"The customer's ID (customer_id for search_orders) is {actor_id}."
+        )
         
+        # Token usage is accounted per actor and session (token_budget); also labels the agent's trace spans
+        trace_attributes = {"actor.id": actor_id, "session.id": session_id}
+
         # Build custom tools list
-        custom_tools = [retrieve, current_time, check_return_eligibility, calculate_refund_amount, format_policy_response]
+        custom_tools = [retrieve, current_time, check_return_eligibility, check_return_eligibility_batch, calculate_refund_amount, calculate_refund_batch, format_policy_response]
         print(f"✓ Custom tools loaded: {len(custom_tools)} tools")
-        
+
+        # Opt-in streaming: returning an async generator makes the app respond with SSE
+        if payload.get("stream"):
+            streaming = True
+            return stream_agent_response(
+                bedrock_model, custom_tools, system_prompt, session_manager, trace_attributes, user_input, deadline
+            )
+
         # Try to create MCP client for gateway tools
-        mcp_client = create_mcp_client()
+        deadline.check(STAGE_GATEWAY)
+        with deadline:
+            mcp_client = create_mcp_client()
         
         if mcp_client:
             try:
                 # Keep MCP client active during agent execution
                 with mcp_client:
-                    # Get gateway tools from MCP client
-                    gateway_tools = list(mcp_client.list_tools_sync())
+                    # Get gateway tools from MCP client (lookup_order calls are coalesced into lookup_orders batches)
+                    gateway_tools = coalesce_gateway_tools(mcp_client.list_tools_sync())
                     print(f"✓ Gateway tools loaded: {len(gateway_tools)} tools")
                     
                     # Create agent with all tools
+                    selection = tool_selector.select(user_input, custom_tools + gateway_tools)
                     agent = Agent(
                         model=bedrock_model,
-                        tools=custom_tools + gateway_tools,
+                        tools=selection.tools,
                         system_prompt=system_prompt,
-                        session_manager=session_manager
+                        session_manager=session_manager,
+                        hooks=[tool_compactor, prompt_cache_stats, token_budget, selection, deadline, tool_limits],
+                        trace_attributes=trace_attributes,
+                        callback_handler=deadline.callback_handler()
                     )
                     
-                    user_input = payload.get("prompt", "")
                     print(f"✓ Processing query: {user_input[:100]}...")
                     
-                    response = agent(user_input)
-                    result = response.message["content"][0]["text"]
+                    with deadline:
+                        response = agent(user_input, cancel_signal=deadline.cancel_signal)
+                    result = agent_answer(response, deadline)
                     
                     print("✓ Agent response generated successfully")
+                    fast_path.observe_model_latency(time.perf_counter() - started)
+                    model_router.observe_main_latency(time.perf_counter() - started)
+                    print_invocation_stats()
                     print("=" * 80)
                     return result
             except Exception as e:
@@ -373,23 +711,37 @@ You have access to:
         
         # Create agent without gateway tools (fallback)
         print("✓ Creating agent without gateway tools")
+        selection = tool_selector.select(user_input, custom_tools)
         agent = Agent(
             model=bedrock_model,
-            tools=custom_tools,
+            tools=selection.tools,
             system_prompt=system_prompt,
-            session_manager=session_manager
+            session_manager=session_manager,
+            hooks=[tool_compactor, prompt_cache_stats, token_budget, selection, deadline, tool_limits],
+            trace_attributes=trace_attributes,
+            callback_handler=deadline.callback_handler()
         )
         
-        user_input = payload.get("prompt", "")
         print(f"✓ Processing query: {user_input[:100]}...")
         
-        response = agent(user_input)
-        result = response.message["content"][0]["text"]
+        with deadline:
+            response = agent(user_input, cancel_signal=deadline.cancel_signal)
+        result = agent_answer(response, deadline)
         
         print("✓ Agent response generated successfully")
+        fast_path.observe_model_latency(time.perf_counter() - started)
+        model_router.observe_main_latency(time.perf_counter() - started)
+        print_invocation_stats()
         print("=" * 80)
         return result
     
+    except DeadlineExceeded as e:
+        print(f"⚠️  {e}")
+        answer = deadline.partial_answer()
+        print_invocation_stats()
+        print("=" * 80)
+        return stream_text(answer) if payload.get("stream") else answer
+
     except Exception as e:
         error_msg = f"Agent invocation failed: {str(e)}"
         print(f"✗ {error_msg}")
@@ -397,5 +749,10 @@ You have access to:
         print("=" * 80)
         return error_msg
 
+    finally:
+        # A streamed response finishes the deadline when the stream ends
+        if not streaming:
+            deadline.finish()
+
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch vs scalar return eligibility.
+
+Compares check_eligibility_batch (NumPy datetime64 arithmetic) against calling the
+scalar check_return_eligibility tool from 01_returns_refunds_agent.py once per row.
+
+Sizes: 1k, 100k and 10M rows. The scalar version is timed on at most
+SCALAR_SAMPLE_LIMIT rows and extrapolated linearly above that (marked with *).
+
+Before timing, a parity check runs PARITY_DATES (canonical, non-canonical and
+malformed purchase dates) through both and reports any row where the batch
+result (eligible, days remaining) differs from the scalar tool's.
+"""
+
+import os
+import sys
+import time
+import importlib.util
+
+import numpy as np
+
+from batch_eligibility import check_eligibility_batch
+
+# Configuration
+SIZES = [1_000, 100_000, 10_000_000]
+SCALAR_SAMPLE_LIMIT = 200_000
+CATEGORY_LABELS = ['electronics', 'clothing', 'books', 'grocery', 'jewelry', 'toys']
+SEED = 42
+
+# Purchase date strings the batch parser must treat exactly like the scalar tool's strptime
+PARITY_DATES = [
+    str(np.datetime64('today', 'D') - np.timedelta64(5, 'D')),  # canonical, eligible
+    '2026-1-5',            # non-canonical, accepted by strptime
+    '2026-10',             # month only
+    '2026-10-01T12:00',    # date and time
+    ' 2026-10-01',         # leading space
+    '2026-10-01 ',         # trailing space
+    '2026-02-30',          # impossible day
+    '0000-01-01',          # year 0
+    '',
+    'yesterday',
+]
+
+os.environ.setdefault("KNOWLEDGE_BASE_ID", "BENCHMARK")
+
+# Import the scalar tool from 01_returns_refunds_agent.py using importlib
+spec = importlib.util.spec_from_file_location("returns_refunds_agent", "01_returns_refunds_agent.py")
+agent_module = importlib.util.module_from_spec(spec)
+sys.modules["returns_refunds_agent"] = agent_module
+spec.loader.exec_module(agent_module)
+
+check_return_eligibility = agent_module.check_return_eligibility
+
+
+def generate_rows(size, rng):
+    """Generate purchase dates (last 90 days plus a few future dates) and category codes"""
+    today = np.datetime64('today', 'D')
+    offsets = rng.integers(-3, 90, size=size)
+    dates = today - offsets.astype('timedelta64[D]')
+    category_codes = rng.integers(0, len(CATEGORY_LABELS), size=size).astype(np.int8)
+    return dates, category_codes
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run_scalar(date_strings, categories):
+    for purchase_date, category in zip(date_strings, categories):
+        check_return_eligibility(purchase_date, category)
+
+
+def check_parity():
+    """Rows of PARITY_DATES where the batch and scalar results differ (as strings and as bytes)"""
+    mismatches = []
+    for column in (PARITY_DATES, [d.encode() for d in PARITY_DATES]):
+        result = check_eligibility_batch(column, 'electronics')
+        for purchase_date, eligible, days in zip(PARITY_DATES, result['eligible'].tolist(),
+                                                 result['days_remaining'].tolist()):
+            scalar = check_return_eligibility(purchase_date, 'electronics')
+            if (eligible, days) != (scalar['eligible'], scalar['days_remaining']):
+                mismatches.append((purchase_date, (eligible, days), (scalar['eligible'], scalar['days_remaining'])))
+    return mismatches
+
+
+print("=" * 80)
+print("RETURN ELIGIBILITY BENCHMARK: BATCH vs SCALAR")
+print("=" * 80)
+print()
+
+mismatches = check_parity()
+if mismatches:
+    print(f"❌ Parity: {len(mismatches)} batch results differ from the scalar tool")
+    for purchase_date, batch, scalar in mismatches:
+        print(f"    {purchase_date!r}: batch {batch}, scalar {scalar}")
+else:
+    print(f"✓ Parity: batch matches the scalar tool on {len(PARITY_DATES)} edge-case dates")
+print()
+
+rng = np.random.default_rng(SEED)
+rows = []
+
+for size in SIZES:
+    print(f"Rows: {size:,}")
+    dates, category_codes = generate_rows(size, rng)
+    date_bytes = np.datetime_as_string(dates).astype('S10')
+    categories = np.array([c.encode() for c in CATEGORY_LABELS])[category_codes]
+
+    # Batch from ISO date strings and category strings (parse + compute)
+    batch_str_s, result = time_call(lambda: check_eligibility_batch(date_bytes, categories))
+    print(f"  Batch (strings):       {batch_str_s:10.4f}s")
+
+    # Batch from a datetime64 column and dictionary-encoded categories (compute only)
+    batch_dt_s, _ = time_call(
+        lambda: check_eligibility_batch(dates, category_codes, category_labels=CATEGORY_LABELS)
+    )
+    print(f"  Batch (dt64 + codes):  {batch_dt_s:10.4f}s")
+
+    # Scalar tool, one call per row
+    sample = min(size, SCALAR_SAMPLE_LIMIT)
+    sample_dates = [d.decode() for d in date_bytes[:sample].tolist()]
+    sample_categories = [c.decode() for c in categories[:sample].tolist()]
+    scalar_s, _ = time_call(lambda: run_scalar(sample_dates, sample_categories))
+    extrapolated = sample < size
+    if extrapolated:
+        scalar_s = scalar_s * size / sample
+    marker = '*' if extrapolated else ' '
+    print(f"  Scalar (per-row tool): {scalar_s:10.4f}s{marker}")
+
+    rows.append((size, scalar_s, extrapolated, batch_str_s, batch_dt_s))
+    del dates, category_codes, categories, date_bytes, result
+    print()
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"{'Rows':>12} {'Scalar (s)':>12} {'Batch str (s)':>14} {'Batch codes (s)':>15} {'Speedup':>9} {'Rows/s (batch)':>16}")
+for size, scalar_s, extrapolated, batch_str_s, batch_dt_s in rows:
+    marker = '*' if extrapolated else ' '
+    speedup = scalar_s / batch_str_s if batch_str_s else float('inf')
+    print(f"{size:>12,} {scalar_s:>11.3f}{marker} {batch_str_s:>14.4f} {batch_dt_s:>15.4f} "
+          f"{speedup:>8.0f}x {size / batch_str_s:>16,.0f}")
+print()
+print("* scalar time extrapolated from the first "
+      f"{SCALAR_SAMPLE_LIMIT:,} rows")
+print("Speedup compares the scalar tool with the batch engine on string input;")
+print("'codes' is datetime64 dates with dictionary-encoded categories.")
+print("=" * 80)
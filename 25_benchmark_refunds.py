@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch integer-cents refunds vs looping over the scalar tool.
+
+Generates multi-item orders (1-5 items each), quotes them with quote_refunds_batch
+and with the calculate_refund_amount tool from 01_returns_refunds_agent.py, and
+reports time, speedup and float drift of the scalar loop.
+
+The scalar version is timed on at most SCALAR_SAMPLE_LIMIT items and extrapolated
+linearly above that (marked with *). Drift is measured on the timed sample.
+"""
+
+import os
+import sys
+import time
+import importlib.util
+
+import numpy as np
+
+from batch_refunds import CONDITION_LABELS, REASON_LABELS, quote_refunds_batch
+
+# Configuration
+SIZES = [1_000, 100_000, 1_000_000]
+SCALAR_SAMPLE_LIMIT = 200_000
+SEED = 7
+
+os.environ.setdefault("KNOWLEDGE_BASE_ID", "BENCHMARK")
+
+# Import the scalar tool from 01_returns_refunds_agent.py using importlib
+spec = importlib.util.spec_from_file_location("returns_refunds_agent", "01_returns_refunds_agent.py")
+agent_module = importlib.util.module_from_spec(spec)
+sys.modules["returns_refunds_agent"] = agent_module
+spec.loader.exec_module(agent_module)
+
+calculate_refund_amount = agent_module.calculate_refund_amount
+
+
+def generate_items(size, rng):
+    """Item prices (cents), condition/reason codes and the order each item belongs to"""
+    price_cents = rng.integers(99, 250_000, size=size)
+    condition_codes = rng.integers(0, len(CONDITION_LABELS), size=size)
+    reason_codes = rng.integers(0, len(REASON_LABELS), size=size)
+    items_per_order = rng.integers(1, 6, size=size)
+    order_index = np.repeat(np.arange(size), items_per_order)[:size]
+    return price_cents, condition_codes, reason_codes, order_index
+
+
+def run_scalar(prices, conditions, reasons):
+    """Quote every item with the scalar tool; returns (refund sum, items whose parts don't add up)"""
+    total = 0.0
+    mismatched = 0
+    for price, condition, reason in zip(prices, conditions, reasons):
+        result = calculate_refund_amount(price, condition, reason)
+        total += result['refund_amount']
+        if round((result['refund_amount'] + result['deduction']) * 100) != round(price * 100):
+            mismatched += 1
+    return total, mismatched
+
+
+print("=" * 80)
+print("REFUND QUOTING BENCHMARK: BATCH (INTEGER CENTS) vs SCALAR (FLOAT)")
+print("=" * 80)
+print()
+
+rng = np.random.default_rng(SEED)
+rows = []
+
+for size in SIZES:
+    print(f"Items: {size:,}")
+    price_cents, condition_codes, reason_codes, order_index = generate_items(size, rng)
+
+    start = time.perf_counter()
+    result = quote_refunds_batch(price_cents, condition_codes, reason_codes, order_index=order_index)
+    batch_s = time.perf_counter() - start
+    num_orders = len(result['order_refund_cents'])
+    print(f"  Batch:  {batch_s:10.4f}s  ({num_orders:,} orders)")
+
+    sample = min(size, SCALAR_SAMPLE_LIMIT)
+    prices = (price_cents[:sample] / 100).tolist()
+    conditions = [CONDITION_LABELS[c] for c in condition_codes[:sample].tolist()]
+    reasons = [REASON_LABELS[r] for r in reason_codes[:sample].tolist()]
+
+    start = time.perf_counter()
+    scalar_total, mismatched = run_scalar(prices, conditions, reasons)
+    scalar_s = time.perf_counter() - start
+    extrapolated = sample < size
+    if extrapolated:
+        scalar_s = scalar_s * size / sample
+    print(f"  Scalar: {scalar_s:10.4f}s{'*' if extrapolated else ''}")
+
+    exact_total_cents = int(result['refund_cents'][:sample].sum())
+    drift_cents = round(scalar_total * 100) - exact_total_cents
+    print(f"  Scalar drift on {sample:,} items: {drift_cents:+,} cents in the refund total, "
+          f"{mismatched:,} items where refund + deduction != price")
+
+    rows.append((size, scalar_s, extrapolated, batch_s, drift_cents, mismatched))
+    print()
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"{'Items':>10} {'Scalar (s)':>12} {'Batch (s)':>10} {'Speedup':>9} {'Items/s (batch)':>16} "
+      f"{'Drift (cents)':>14} {'Split errors':>13}")
+for size, scalar_s, extrapolated, batch_s, drift_cents, mismatched in rows:
+    marker = '*' if extrapolated else ' '
+    print(f"{size:>10,} {scalar_s:>11.3f}{marker} {batch_s:>10.4f} {scalar_s / batch_s:>8.0f}x "
+          f"{size / batch_s:>16,.0f} {drift_cents:>+14,} {mismatched:>13,}")
+print()
+print(f"* scalar time extrapolated from the first {SCALAR_SAMPLE_LIMIT:,} items")
+print("Drift: scalar float refund total minus the exact integer-cents total.")
+print("Split errors: scalar items whose rounded refund and deduction don't add up to the price.")
+print("=" * 80)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: format_policy_response renderer on large policy texts.
+
+Compares the original implementation (split into a list of lines, grow one string
+with +=) against policy_renderer: full render, time to first streamed chunk, and a
+render cache hit. Outputs are checked to be identical.
+
+Policy texts are built from a realistic mix of section headers, bullets, prose and
+blank lines, from 1 KB to 5 MB.
+"""
+
+import random
+import time
+import tracemalloc
+
+from policy_renderer import RenderCache, iter_policy_chunks, render_policy
+
+# Configuration
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+REPEATS = 3
+SEED = 11
+
+SECTION_LINES = [
+    "RETURN WINDOWS",
+    "Refund processing:",
+    "- Most items can be returned within 30 days of receipt",
+    "• Electronics must include all original accessories",
+    "Items that are damaged, used or missing parts may receive a partial refund.",
+    "   Refunds are issued to the original payment method within 3-5 business days.   ",
+    "",
+]
+
+
+def legacy_format_policy_response(policy_text, customer_question=''):
+    """The original format_policy_response implementation"""
+    formatted = '📋 Return Policy Information\n'
+    formatted += '=' * 50 + '\n\n'
+
+    if customer_question:
+        formatted += f'Regarding: {customer_question}\n\n'
+
+    lines = policy_text.strip().split('\n')
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            formatted += '\n'
+        elif line.isupper() or line.endswith(':'):
+            formatted += f'\n{line}\n'
+        elif line.startswith('-') or line.startswith('•'):
+            formatted += f'  {line}\n'
+        else:
+            formatted += f'{line}\n'
+
+    formatted += '\n' + '=' * 50 + '\n'
+    formatted += '💡 Tip: If you have specific questions about your return, I can help!\n'
+
+    return formatted
+
+
+def build_policy_text(size, rng):
+    """Policy text of roughly size characters"""
+    lines = []
+    total = 0
+    while total < size:
+        line = rng.choice(SECTION_LINES)
+        lines.append(line)
+        total += len(line) + 1
+    return '\n'.join(lines)
+
+
+def best_of(func, repeats=REPEATS):
+    """Fastest wall time of several runs, and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func):
+    """Peak traced allocation (bytes) while running func"""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def first_chunk(policy_text, question):
+    return next(iter_policy_chunks(policy_text, question))
+
+
+print("=" * 80)
+print("POLICY RENDERER BENCHMARK")
+print("=" * 80)
+print()
+
+rng = random.Random(SEED)
+question = "Can I return an opened laptop?"
+rows = []
+
+for size in SIZES:
+    policy_text = build_policy_text(size, rng)
+    print(f"Policy text: {len(policy_text):,} characters")
+
+    legacy_s, legacy_output = best_of(lambda: legacy_format_policy_response(policy_text, question))
+    render_s, output = best_of(lambda: ''.join(iter_policy_chunks(policy_text, question)))
+    first_s, _ = best_of(lambda: first_chunk(policy_text, question))
+
+    if output != legacy_output:
+        print("  ❌ Output differs from the original implementation")
+    else:
+        print("  ✓ Output identical to the original implementation")
+
+    render_policy(policy_text, question)
+    cached_s, _ = best_of(lambda: render_policy(policy_text, question))
+    key_s, _ = best_of(lambda: RenderCache.key(policy_text, question))
+
+    legacy_peak = peak_memory(lambda: legacy_format_policy_response(policy_text, question))
+    stream_peak = peak_memory(lambda: [None for _ in iter_policy_chunks(policy_text, question)])
+
+    print(f"  Original:        {legacy_s * 1000:10.2f} ms  (peak {legacy_peak / 1e6:8.2f} MB)")
+    print(f"  Renderer:        {render_s * 1000:10.2f} ms")
+    print(f"  First chunk:     {first_s * 1000:10.3f} ms  (streaming peak {stream_peak / 1e6:8.2f} MB)")
+    print(f"  Cache hit:       {cached_s * 1000:10.3f} ms  (of which key hash {key_s * 1000:.3f} ms)")
+    print()
+
+    rows.append((len(policy_text), legacy_s, render_s, first_s, cached_s, legacy_peak, stream_peak))
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"{'Chars':>10} {'Original (ms)':>14} {'Render (ms)':>12} {'First chunk':>12} {'Cached (ms)':>12} "
+      f"{'Peak orig':>10} {'Peak stream':>12}")
+for chars, legacy_s, render_s, first_s, cached_s, legacy_peak, stream_peak in rows:
+    print(f"{chars:>10,} {legacy_s * 1000:>14.2f} {render_s * 1000:>12.2f} {first_s * 1000:>12.3f} "
+          f"{cached_s * 1000:>12.3f} {legacy_peak / 1e6:>9.1f}M {stream_peak / 1e6:>11.1f}M")
+print()
+print("First chunk: time until the streaming renderer yields its first chunk.")
+print("Peak: traced memory while rendering (the original also holds the full list of lines).")
+print("=" * 80)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Report: share of traffic the deterministic fast path answers without the model.
+
+Runs a representative mix of customer messages through FastPathRouter (orders are
+looked up with the order Lambda handler in-process, so no AWS access is needed)
+and reports the share served, per-intent counts and fast-path latency. Messages
+that are not served would go to the model in 17_runtime_agent.py.
+
+Usage:
+    python 27_fast_path_report.py [repeats]
+"""
+
+import sys
+
+from fast_path import FastPathRouter, decode_lambda_response
+from order_lookup_lambda import lambda_handler
+from policy_rules import calculate_refund, check_eligibility
+
+REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+SAMPLE_MESSAGES = [
+    # Structured questions (fast path)
+    "Can I return ORD-001?",
+    "Hi, can I still return my order ORD-002? Thanks",
+    "Is ORD-003 eligible for return?",
+    "Check return eligibility for order ORD-001",
+    "Can I return ORD-404?",
+    "How much will I get back for a used $200 item?",
+    "How much would I get back for a $1,299.99 opened laptop that is defective?",
+    "What's the refund for a damaged $80 blender because I changed my mind?",
+    "What would be my refund on a new $49.99 lamp that's the wrong item?",
+    # Open-ended or combined questions (model)
+    "What is the return policy for electronics?",
+    "Can I return ORD-001 and ORD-002 together?",
+    "My headphones stopped working after 20 days, what are my options?",
+    "How do I print a return label?",
+    "How much will I get back for a used $200 item and can I return ORD-001?",
+    "Do you remember what I asked about last time?",
+    "Can I return a gift without a receipt?",
+]
+
+
+def lookup_order(order_id):
+    return decode_lambda_response(lambda_handler({'order_id': order_id}, None))
+
+
+print("=" * 80)
+print("FAST PATH REPORT")
+print("=" * 80)
+print()
+
+router = FastPathRouter(check_eligibility, calculate_refund, lookup_order=lookup_order)
+
+print("Routing decisions:")
+for message in SAMPLE_MESSAGES:
+    answer = router.route(message)
+    route = f"fast path ({answer.intent})" if answer else "model"
+    print(f"  {route:<30} {message}")
+print()
+
+for _ in range(REPEATS - 1):
+    for message in SAMPLE_MESSAGES:
+        router.route(message)
+
+stats = router.stats()
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"Requests:              {stats['requests']:,}")
+print(f"Served by fast path:   {stats['served']:,} ({stats['share']:.1%})")
+for intent, count in sorted(stats['served_by_intent'].items()):
+    print(f"  {intent:<20} {count:,}")
+print(f"Fell back after match: {stats['fallbacks']:,}")
+print(f"Fast path latency:     p50 {stats['fast_p50_ms']:.3f} ms, p95 {stats['fast_p95_ms']:.3f} ms")
+print()
+print("Order lookups run in-process here; in the runtime they add one gateway round trip.")
+print("=" * 80)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: multi-order turns with sequential vs bounded concurrent tool execution.
+
+A scripted model (no Bedrock calls) asks for N lookup_order calls plus N
+check_return_eligibility calls in one turn, then answers. lookup_order simulates a
+gateway Lambda round trip with a fixed latency. The same turn is run with the
+SequentialToolExecutor and with the ConcurrentToolExecutor bounded by ToolLimits at
+different limits, and the
+tool results are checked to come back in the order they were requested.
+"""
+
+import asyncio
+import json
+import time
+
+from strands import Agent, tool
+from strands.models import Model
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+
+from policy_rules import check_eligibility
+from tool_executor import ToolLimits
+
+# Configuration
+ORDER_COUNTS = [1, 3, 5, 10]
+GATEWAY_LATENCY_SECONDS = 0.15
+LIMITS = [4, 8]
+
+
+class ScriptedModel(Model):
+    """Requests the given tool uses in its first turn, then answers"""
+
+    def __init__(self, tool_uses):
+        self.tool_uses = tool_uses
+        self.turns = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("structured output is not used in this benchmark")
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.turns += 1
+        yield {"messageStart": {"role": "assistant"}}
+        if self.turns == 1:
+            for index, (name, arguments) in enumerate(self.tool_uses):
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tool-{index}", "name": name}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments)}}}}
+                yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            yield {"contentBlockDelta": {"delta": {"text": "Here is the status of your orders."}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+@tool
+async def lookup_order(order_id: str) -> dict:
+    """
+    Look up an order (simulated gateway round trip).
+
+    Args:
+        order_id: Order ID
+    """
+    await asyncio.sleep(GATEWAY_LATENCY_SECONDS)
+    return {'order_id': order_id, 'purchase_date': '2026-10-01', 'category': 'electronics'}
+
+
+@tool
+def check_return_eligibility(purchase_date: str, category: str) -> dict:
+    """
+    Check if an item is eligible for return.
+
+    Args:
+        purchase_date: Purchase date in YYYY-MM-DD format
+        category: Product category
+    """
+    return check_eligibility(purchase_date, category)
+
+
+def run_turn(order_count, executor, hooks=()):
+    """Run one multi-order turn; returns (seconds, tool results in message order)"""
+    tool_uses = [('lookup_order', {'order_id': f'ORD-{i:03d}'}) for i in range(order_count)]
+    tool_uses += [('check_return_eligibility', {'purchase_date': '2026-10-01', 'category': 'electronics'})
+                  for _ in range(order_count)]
+    agent = Agent(
+        model=ScriptedModel(tool_uses),
+        tools=[lookup_order, check_return_eligibility],
+        tool_executor=executor,
+        hooks=list(hooks),
+        callback_handler=None
+    )
+    start = time.perf_counter()
+    agent("Can I return these orders?")
+    elapsed = time.perf_counter() - start
+    results = [block['toolResult'] for block in agent.messages[2]['content']]
+    return elapsed, results
+
+
+print("=" * 80)
+print("TOOL EXECUTION BENCHMARK: SEQUENTIAL vs BOUNDED CONCURRENT")
+print("=" * 80)
+print(f"Simulated gateway latency: {GATEWAY_LATENCY_SECONDS * 1000:.0f} ms per lookup_order")
+print()
+
+rows = []
+for order_count in ORDER_COUNTS:
+    sequential_s, expected = run_turn(order_count, SequentialToolExecutor())
+    expected_ids = [result['toolUseId'] for result in expected]
+    timings = []
+    for limit in LIMITS:
+        concurrent_s, results = run_turn(order_count, ConcurrentToolExecutor(), [ToolLimits(max_concurrency=limit)])
+        ordered = [result['toolUseId'] for result in results] == expected_ids
+        print(f"{order_count:>3} orders, limit {limit}: {concurrent_s:.3f}s vs sequential {sequential_s:.3f}s "
+              f"{'✓ ordered' if ordered else '❌ out of order'}")
+        timings.append(concurrent_s)
+    rows.append((order_count, sequential_s, timings))
+print()
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+header = f"{'Orders':>7} {'Tool calls':>11} {'Sequential (s)':>15}"
+for limit in LIMITS:
+    header += f" {f'Limit {limit} (s)':>13} {'Speedup':>8}"
+print(header)
+for order_count, sequential_s, timings in rows:
+    line = f"{order_count:>7} {order_count * 2:>11} {sequential_s:>15.3f}"
+    for concurrent_s in timings:
+        line += f" {concurrent_s:>13.3f} {sequential_s / concurrent_s:>7.1f}x"
+    print(line)
+print("=" * 80)
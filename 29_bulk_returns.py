@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Bulk returns processing: order lookup, eligibility and refunds for a whole export.
+
+Streams a CSV or JSONL file of return requests (e.g. a warehouse export) through
+order lookup, return eligibility and refund calculation across a process pool,
+without the model, and writes a report row per request incrementally, instead of
+sending requests to the agent one by one with 21_invoke_agent.py. Requests that
+cannot be processed (unknown orders, missing order IDs, bad prices) are flagged
+in the report with the reason.
+
+Input columns / keys: order_id, condition, return_reason, and optionally
+request_id, purchase_date, category and price (see bulk_returns.py).
+
+Usage:
+    python 29_bulk_returns.py returns.csv [-o report.csv] [--workers N] [--chunk-size N] [--today YYYY-MM-DD]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from bulk_returns import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, detect_format, run_pipeline
+
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+
+def default_output(input_path):
+    """returns.csv -> returns_report.csv (same format and compression as the input)"""
+    suffix = '.gz' if input_path.endswith('.gz') else ''
+    base = input_path[:-len(suffix)] if suffix else input_path
+    stem = os.path.splitext(base)[0]
+    return f"{stem}_report.{detect_format(input_path)}{suffix}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process a file of return requests without the model")
+    parser.add_argument('input', help="CSV or JSONL file of return requests (optionally .gz)")
+    parser.add_argument('-o', '--output', help="Report file (.csv or .jsonl, optionally .gz)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk")
+    parser.add_argument('--today', help="Evaluation date for return windows (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    output = args.output or default_output(args.input)
+
+    print("=" * 80)
+    print("BULK RETURNS PROCESSING")
+    print("=" * 80)
+    print(f"Input:      {args.input}")
+    print(f"Report:     {output}")
+    print(f"Workers:    {args.workers}")
+    print(f"Chunk size: {args.chunk_size:,}")
+    print()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Error: {args.input} not found")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    last_report = start
+
+    def progress(totals):
+        nonlocal last_report
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+            last_report = now
+            print(f"  {totals['rows']:>12,} rows  {totals['rows'] / (now - start):>10,.0f} rows/s")
+
+    try:
+        totals = run_pipeline(args.input, output, workers=args.workers, chunk_size=args.chunk_size,
+                              today=args.today, progress=progress)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    print(f"Rows:              {totals['rows']:,}")
+    print(f"Processed:         {totals['ok']:,}")
+    print(f"  Eligible:        {totals['eligible']:,}")
+    print(f"  Total refunds:   ${totals['refund_cents'] / 100:,.2f}")
+    print(f"Order not found:   {totals['order_not_found']:,}")
+    print(f"Invalid requests:  {totals['invalid_request']:,}")
+    print(f"Elapsed:           {elapsed:.2f}s")
+    print(f"Throughput:        {totals['rows'] / elapsed if elapsed else 0:,.0f} rows/s")
+    print()
+    print(f"✓ Report written to {output}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark: order store init and lookup latency.
+
+Builds a SQLite order database with synthetic orders (1M by default), then measures:
+- Lambda init: importing the handler module in a fresh interpreter, which opens
+  the store (the work done once per execution environment)
+- Warm lambda_handler latency for found and not-found orders
+- Store latency for get, get_many, orders_for_customer and orders_between
+
+The in-memory backend and the DynamoDB backend are run on a smaller sample, and
+all three backends are checked to return the same orders for the same queries.
+The DynamoDB backend runs on LocalDynamoDBClient here (its queries scan every
+item and there is no network), so its timings say nothing about DynamoDB itself.
+
+Usage:
+    python 30_benchmark_order_store.py [orders]
+"""
+
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from order_data import customer_id, default_customer_count, generate_orders
+from order_store import (DynamoDBOrderStore, InMemoryOrderStore, LocalDynamoDBClient, SQLiteOrderStore,
+                         build_sqlite_store, create_dynamodb_table)
+
+# Configuration
+ORDER_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+SMALL_COUNT = 20_000
+LOOKUPS = 20_000
+INIT_RUNS = 5
+SEED = 7
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    pick = lambda q: samples_ms[min(len(samples_ms) - 1, int(q * len(samples_ms)))]
+    return f"p50 {pick(0.50):7.3f} ms  p95 {pick(0.95):7.3f} ms  p99 {pick(0.99):7.3f} ms"
+
+
+def time_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def measure_init(db_path):
+    """Seconds to import the handler module (and open the store) in a fresh interpreter"""
+    code = (
+        "import time; start = time.perf_counter(); import order_lookup_lambda as m; "
+        "print(time.perf_counter() - start, m.STORE.backend)"
+    )
+    env = {**os.environ, 'ORDER_DB_PATH': db_path, 'ORDER_STORE_BACKEND': 'sqlite'}
+    runs = []
+    for _ in range(INIT_RUNS):
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        runs.append(float(output[0]))
+    return statistics.median(runs), output[1]
+
+
+def store_queries(store, count, rng):
+    """Latency of each store operation on random keys"""
+    ids = [f'ORD-{rng.randrange(count):08d}' for _ in range(LOOKUPS)]
+    customers = [customer_id(rng.randrange(default_customer_count(count))) for _ in range(LOOKUPS // 10)]
+    days = [(date.today() - timedelta(days=rng.randrange(730))).isoformat() for _ in range(LOOKUPS // 10)]
+    return {
+        'get': time_calls(store.get, [(i,) for i in ids]),
+        'get_many (25 ids)': time_calls(store.get_many, [(ids[i:i + 25],) for i in range(0, LOOKUPS, 25)]),
+        'orders_for_customer': time_calls(store.orders_for_customer, [(c,) for c in customers]),
+        'orders_between (1 day)': time_calls(store.orders_between, [(d, d, 20) for d in days]),
+    }
+
+
+print("=" * 80)
+print("ORDER STORE BENCHMARK")
+print("=" * 80)
+print()
+
+rng = random.Random(SEED)
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    db_path = os.path.join(tmp_dir, 'orders.db')
+
+    # ------------------------------------------------------------------------
+    # Parity: every backend answers the same queries with the same orders
+    # ------------------------------------------------------------------------
+    print(f"Checking backend parity on {SMALL_COUNT:,} orders...")
+    small_orders = list(generate_orders(SMALL_COUNT, seed=SEED))
+    small_path = os.path.join(tmp_dir, 'small.db')
+    build_sqlite_store(small_path, small_orders)
+    client = LocalDynamoDBClient()
+    create_dynamodb_table(client, 'orders')
+    dynamodb_store = DynamoDBOrderStore('orders', client=client)
+    dynamodb_store.put_orders(small_orders)
+    stores = {
+        'sqlite': SQLiteOrderStore(small_path),
+        'memory': InMemoryOrderStore({o['order_id']: o for o in small_orders}),
+        'dynamodb (local)': dynamodb_store,
+    }
+    checks = [('get', ('ORD-00000042',)), ('get', ('ORD-99999999',)),
+              ('get_many', ([f'ORD-{i:08d}' for i in range(0, 400, 3)] + ['ORD-MISSING'],)),
+              ('orders_for_customer', ('CUST-0000007',)),
+              ('orders_between', ((date.today() - timedelta(days=40)).isoformat(),
+                                  (date.today() - timedelta(days=10)).isoformat(), 50))]
+    for name, args in checks:
+        results = [json.dumps(getattr(store, name)(*args), sort_keys=True) for store in stores.values()]
+        print(f"  {name:<22} {'✓ same' if len(set(results)) == 1 else '❌ differs'}")
+    print()
+
+    print("Store latency (small sample):")
+    for backend, store in stores.items():
+        print(f"  {backend}")
+        for operation, timing in store_queries(store, SMALL_COUNT, rng).items():
+            print(f"    {operation:<24} {timing}")
+        store.close()
+    print()
+
+    # ------------------------------------------------------------------------
+    # SQLite at full size
+    # ------------------------------------------------------------------------
+    print(f"Building SQLite store with {ORDER_COUNT:,} orders...")
+    start = time.perf_counter()
+    build_sqlite_store(db_path, generate_orders(ORDER_COUNT, seed=SEED))
+    build_s = time.perf_counter() - start
+    size_mb = os.path.getsize(db_path) / 1024 / 1024
+    print(f"  ✓ Built in {build_s:.1f}s ({size_mb:.0f} MB)")
+    print()
+
+    init_s, backend = measure_init(db_path)
+    print(f"Lambda init (import handler + open {backend} store, median of {INIT_RUNS}): {init_s * 1000:.1f} ms")
+    start = time.perf_counter()
+    SQLiteOrderStore(db_path).close()
+    print(f"Store open alone: {(time.perf_counter() - start) * 1000:.2f} ms")
+    print()
+
+    os.environ['ORDER_DB_PATH'] = db_path
+    os.environ['ORDER_STORE_BACKEND'] = 'sqlite'
+    from order_lookup_lambda import lambda_handler
+
+    hit_ids = [f'ORD-{rng.randrange(ORDER_COUNT):08d}' for _ in range(LOOKUPS)]
+    miss_ids = [f'ORD-X{i:07d}' for i in range(LOOKUPS // 10)]
+    hit_timing = time_calls(lambda_handler, [({'order_id': i}, None) for i in hit_ids])
+    miss_timing = time_calls(lambda_handler, [({'order_id': i}, None) for i in miss_ids])
+
+    store = SQLiteOrderStore(db_path)
+    timings = store_queries(store, ORDER_COUNT, rng)
+    store.close()
+
+print("=" * 80)
+print(f"SUMMARY ({ORDER_COUNT:,} orders, SQLite)")
+print("=" * 80)
+print(f"Build:                      {build_s:.1f}s, {size_mb:.0f} MB")
+print(f"Lambda init:                {init_s * 1000:.1f} ms")
+print(f"lambda_handler (found)      {hit_timing}")
+print(f"lambda_handler (not found)  {miss_timing}")
+for operation, timing in timings.items():
+    print(f"{operation:<27} {timing}")
+print("=" * 80)
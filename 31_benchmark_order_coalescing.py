@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: coalesced vs direct gateway order lookups.
+
+The gateway is simulated in-process: a stand-in MCP client adds a fixed round-trip
+latency and invokes the order Lambda handler, and the real MCPAgentTool adapters
+are built from the Lambda's tool schemas. Two scenarios:
+- one model turn (scripted, no Bedrock calls) that asks for N lookup_order calls
+- N concurrent sessions each looking up one order (as the fast path does)
+
+Each runs with direct lookup_order calls and with the coalescing loader. The
+report shows gateway calls, wall time, batch sizes and round trips saved, and
+checks that every caller got the same order (status and body) both ways.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from mcp.types import Tool
+from strands import Agent
+from strands.models import Model
+from strands.tools.mcp.mcp_agent_tool import MCPAgentTool
+
+from fast_path import decode_lambda_response
+from order_cache import OrderLookupCache
+from order_loader import OrderLookupCoalescer, coalesce_gateway_tools, gateway_batch_fetcher
+from order_lookup_lambda import lambda_handler
+from order_tool_schemas import TOOL_SCHEMAS
+from tool_executor import ToolLimits
+
+# Configuration
+GATEWAY_LATENCY_SECONDS = 0.08
+ORDER_COUNTS = [1, 3, 5, 10]
+SESSION_COUNTS = [1, 10, 50]
+WINDOW_MS = 5
+TARGET = 'OrderLookup'
+
+
+class SimulatedGatewayClient:
+    """Stand-in for MCPClient: a fixed round trip, then the Lambda handler in-process"""
+
+    def __init__(self, latency=GATEWAY_LATENCY_SECONDS):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _invoke(self, tool_use_id, name, arguments):
+        with self._lock:
+            self.calls += 1
+        context = SimpleNamespace(client_context=SimpleNamespace(custom={'bedrockAgentCoreToolName': name}))
+        response = lambda_handler(dict(arguments), context)
+        return {'status': 'success', 'toolUseId': tool_use_id, 'content': [{'text': json.dumps(response)}]}
+
+    def call_tool_sync(self, tool_use_id, name, arguments=None, **kwargs):
+        time.sleep(self.latency)
+        return self._invoke(tool_use_id, name, arguments or {})
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._invoke(tool_use_id, name, arguments or {})
+
+
+class ScriptedModel(Model):
+    """Requests the given tool uses in its first turn, then answers"""
+
+    def __init__(self, tool_uses):
+        self.tool_uses = tool_uses
+        self.turns = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("structured output is not used in this benchmark")
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.turns += 1
+        yield {"messageStart": {"role": "assistant"}}
+        if self.turns == 1:
+            for index, (name, arguments) in enumerate(self.tool_uses):
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tool-{index}", "name": name}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(arguments)}}}}
+                yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            yield {"contentBlockDelta": {"delta": {"text": "Here are your orders."}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def gateway_tools(client):
+    """MCPAgentTool adapters for the Lambda's tools, named the way the gateway names them"""
+    return [
+        MCPAgentTool(Tool(name=f"{TARGET}___{schema['name']}", description=schema['description'],
+                          inputSchema=schema['inputSchema']), client)
+        for schema in TOOL_SCHEMAS
+    ]
+
+
+def order_ids(count):
+    """Mix of existing sample orders and unknown IDs"""
+    return [f'ORD-{(i % 3) + 1:03d}' if i % 4 else f'ORD-9{i:02d}' for i in range(count)]
+
+
+def run_turn(count, coalesce):
+    client = SimulatedGatewayClient()
+    loader = OrderLookupCoalescer(window_ms=WINDOW_MS)
+    tools = gateway_tools(client)
+    if coalesce:
+        # Caching disabled: every lookup goes through the loader
+        tools = coalesce_gateway_tools(tools, loader, OrderLookupCache(ttl_seconds=0, negative_ttl_seconds=0))
+    tool_uses = [(f'{TARGET}___lookup_order', {'order_id': order_id}) for order_id in order_ids(count)]
+    agent = Agent(model=ScriptedModel(tool_uses), tools=tools, hooks=[ToolLimits()],
+                  callback_handler=None)
+    start = time.perf_counter()
+    agent("Can I return these orders?")
+    elapsed = time.perf_counter() - start
+    results = [decode_lambda_response(block['toolResult']['content'][0]['text'])
+               for block in agent.messages[2]['content']]
+    return elapsed, client.calls, results, loader.stats()
+
+
+def run_sessions(count, coalesce):
+    client = SimulatedGatewayClient()
+    loader = OrderLookupCoalescer(window_ms=WINDOW_MS)
+    batch_tool = f'{TARGET}___lookup_orders'
+    results = [None] * count
+
+    def session(index, order_id):
+        if coalesce:
+            results[index] = loader.load(order_id, gateway_batch_fetcher(client, batch_tool), key=client)
+        else:
+            response = client.call_tool_sync(f'direct-{index}', f'{TARGET}___lookup_order', {'order_id': order_id})
+            results[index] = decode_lambda_response(response['content'][0]['text'])
+
+    threads = [threading.Thread(target=session, args=(i, order_id)) for i, order_id in enumerate(order_ids(count))]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, client.calls, results, loader.stats()
+
+
+print("=" * 80)
+print("ORDER LOOKUP BENCHMARK: DIRECT vs COALESCED")
+print("=" * 80)
+print(f"Simulated gateway round trip: {GATEWAY_LATENCY_SECONDS * 1000:.0f} ms, window {WINDOW_MS} ms")
+print()
+
+rows = []
+for label, counts, run in (("turn", ORDER_COUNTS, run_turn), ("sessions", SESSION_COUNTS, run_sessions)):
+    for count in counts:
+        direct_s, direct_calls, expected, _ = run(count, coalesce=False)
+        coalesced_s, coalesced_calls, results, stats = run(count, coalesce=True)
+        same = results == expected
+        print(f"{label:>8} x{count:<3} direct {direct_calls:>3} calls {direct_s:.3f}s | "
+              f"coalesced {coalesced_calls:>3} calls {coalesced_s:.3f}s, batches {stats['batch_sizes']} "
+              f"{'✓ same results' if same else '❌ results differ'}")
+        rows.append((label, count, direct_calls, direct_s, coalesced_calls, coalesced_s, stats))
+print()
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"{'Scenario':>9} {'Lookups':>8} {'Direct calls':>13} {'Direct (s)':>11} "
+      f"{'Batched calls':>14} {'Batched (s)':>12} {'Saved':>6}")
+for label, count, direct_calls, direct_s, coalesced_calls, coalesced_s, stats in rows:
+    print(f"{label:>9} {count:>8} {direct_calls:>13} {direct_s:>11.3f} "
+          f"{coalesced_calls:>14} {coalesced_s:>12.3f} {stats['round_trips_saved']:>6}")
+print("=" * 80)
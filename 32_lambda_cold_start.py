@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark: order lookup Lambda cold start and warm latency by store size.
+
+For each order-store size a SQLite order database is built (size 0 is the
+in-memory sample orders), then:
+- cold start: the handler module is imported in fresh interpreters, as Lambda
+  does once per execution environment; the report shows the process wall time
+  to a ready handler, the module's own INIT_TIMINGS by phase, and peak RSS
+  (compare with the function's MemorySize)
+- warm: one environment serves the first request right after init, then a
+  stream of lookup_order (found / not found) and lookup_orders requests
+
+It also compares precomputed eligibility (EligibilityTable) with calling
+check_eligibility per order.
+
+Usage:
+    python 32_lambda_cold_start.py [largest store size]
+"""
+
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from order_data import CATEGORY_PROFILES, generate_orders
+from order_store import build_sqlite_store
+from policy_rules import EligibilityTable, check_eligibility, get_policy_engine
+
+# Configuration
+MAX_ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+STORE_SIZES = [size for size in (0, 10_000, 100_000, 1_000_000) if size <= MAX_ORDERS]
+CATEGORIES = [profile[0] for profile in CATEGORY_PROFILES]
+COLD_RUNS = 5
+WARM_REQUESTS = 5_000
+BATCH_SIZE = 10
+SEED = 11
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter: import (init), then warm requests; prints one JSON line
+CHILD_CODE = r'''
+import json, os, random, resource, sys, time
+start = time.perf_counter()
+import order_lookup_lambda as m
+ready_ms = (time.perf_counter() - start) * 1000
+result = {'ready_ms': ready_ms, 'init': m.INIT_TIMINGS, 'backend': m.STORE.backend}
+
+warm = int(os.environ['BENCH_WARM_REQUESTS'])
+if warm:
+    count, batch_size = int(os.environ['BENCH_ORDERS']), int(os.environ['BENCH_BATCH_SIZE'])
+    rng = random.Random(int(os.environ['BENCH_SEED']))
+    ids = (lambda: f'ORD-{rng.randrange(count):08d}') if count else (lambda: f'ORD-00{rng.randrange(1, 4)}')
+
+    def timed(event):
+        begin = time.perf_counter()
+        response = m.lambda_handler(event, None)
+        return (time.perf_counter() - begin) * 1000, response['statusCode']
+
+    result['first_request_ms'], _ = timed({'order_id': ids()})
+    samples = {'found': [], 'not found': [], f'batch of {batch_size}': []}
+    for i in range(warm):
+        samples['found'].append(timed({'order_id': ids()})[0])
+        if i % 10 == 0:
+            samples['not found'].append(timed({'order_id': f'ORD-X{i:07d}'})[0])
+            samples[f'batch of {batch_size}'].append(timed({'order_ids': [ids() for _ in range(batch_size)]})[0])
+    result['warm_ms'] = {name: sorted(values) for name, values in samples.items()}
+
+result['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+'''
+
+
+def run_child(env, warm_requests=0):
+    env = {**env, 'BENCH_WARM_REQUESTS': str(warm_requests)}
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD_CODE], env=env, capture_output=True, text=True,
+                            check=True, cwd=HERE).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    return wall_ms, json.loads(output.strip().splitlines()[-1])
+
+
+def pick(sorted_ms, q):
+    return sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))]
+
+
+print("=" * 80)
+print("ORDER LOOKUP LAMBDA: COLD START AND WARM LATENCY")
+print("=" * 80)
+print(f"Store sizes: {', '.join(f'{size:,}' for size in STORE_SIZES)}; "
+      f"{COLD_RUNS} cold starts and {WARM_REQUESTS:,} warm requests each")
+print()
+
+# ----------------------------------------------------------------------------
+# Eligibility: precomputed table vs strptime per call
+# ----------------------------------------------------------------------------
+rng = random.Random(SEED)
+start = time.perf_counter()
+table = EligibilityTable(get_policy_engine().policy)
+table_build_ms = (time.perf_counter() - start) * 1000
+pairs = [((date.today() - timedelta(days=rng.randrange(730))).isoformat(), rng.choice(CATEGORIES))
+         for _ in range(50_000)]
+start = time.perf_counter()
+expected = [check_eligibility(purchase_date, category) for purchase_date, category in pairs]
+strptime_us = (time.perf_counter() - start) / len(pairs) * 1e6
+start = time.perf_counter()
+results = [table.check(purchase_date, category) for purchase_date, category in pairs]
+table_us = (time.perf_counter() - start) / len(pairs) * 1e6
+print(f"Eligibility: table built in {table_build_ms:.2f} ms ({table.precomputed} precomputed entries)")
+print(f"  check_eligibility (strptime) {strptime_us:6.2f} us/order")
+print(f"  EligibilityTable.check       {table_us:6.2f} us/order  "
+      f"{'✓ same results' if results == expected else '❌ results differ'}")
+print()
+
+rows = []
+with tempfile.TemporaryDirectory() as tmp_dir:
+    for size in STORE_SIZES:
+        env = {**os.environ, 'BENCH_ORDERS': str(size), 'BENCH_BATCH_SIZE': str(BATCH_SIZE),
+               'BENCH_SEED': str(SEED)}
+        if size:
+            db_path = os.path.join(tmp_dir, f'orders-{size}.db')
+            print(f"Building SQLite store with {size:,} orders...")
+            build_sqlite_store(db_path, generate_orders(size, seed=SEED))
+            env.update(ORDER_STORE_BACKEND='sqlite', ORDER_DB_PATH=db_path)
+        else:
+            env.update(ORDER_STORE_BACKEND='memory')
+
+        # Cold starts
+        cold = [run_child(env) for _ in range(COLD_RUNS)]
+        wall_ms = statistics.median(wall for wall, _ in cold)
+        ready_ms = statistics.median(result['ready_ms'] for _, result in cold)
+        phases = {phase: statistics.median(result['init'][phase] for _, result in cold)
+                  for phase in ('imports_ms', 'policy_ms', 'store_ms', 'warmup_ms', 'eligibility_ms')}
+        backend = cold[0][1]['backend']
+
+        # Warm requests
+        _, warm = run_child(env, WARM_REQUESTS)
+        label = f"{size:,} ({backend})" if size else "sample (memory)"
+        print(f"  {label}: process start to ready {wall_ms:.1f} ms, module init {ready_ms:.1f} ms, "
+              f"peak RSS {warm['max_rss_mb']:.0f} MB")
+        print("    init phases: " + ", ".join(f"{phase[:-3]} {ms:.2f} ms" for phase, ms in phases.items()))
+        print(f"    first request {warm['first_request_ms']:.3f} ms")
+        for name, samples in warm['warm_ms'].items():
+            print(f"    {name:<12} p50 {pick(samples, 0.50):.3f} ms  p95 {pick(samples, 0.95):.3f} ms  "
+                  f"p99 {pick(samples, 0.99):.3f} ms")
+        rows.append((label, wall_ms, ready_ms, warm['max_rss_mb'], warm['first_request_ms'],
+                     pick(warm['warm_ms']['found'], 0.50), pick(warm['warm_ms']['found'], 0.99)))
+        print()
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"{'Store':>22} {'Start (ms)':>11} {'Init (ms)':>10} {'RSS (MB)':>9} {'First (ms)':>11} "
+      f"{'p50 (ms)':>9} {'p99 (ms)':>9}")
+for label, wall_ms, ready_ms, rss_mb, first_ms, p50, p99 in rows:
+    print(f"{label:>22} {wall_ms:>11.1f} {ready_ms:>10.1f} {rss_mb:>9.0f} {first_ms:>11.3f} {p50:>9.3f} {p99:>9.3f}")
+print(f"Eligibility per order: {strptime_us:.2f} us with strptime, {table_us:.2f} us precomputed")
+print("=" * 80)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Local gateway: MCP gateway + Cognito + order lookup Lambda emulator for offline load tests.
+
+Serves the gateway emulator (gateway_emulator.py) and prints the environment
+variables that point 14_full_agent.py and 17_runtime_agent.py at it. The agents
+get a token from the fake Cognito pool and call lookup_order / lookup_orders over
+MCP streamable HTTP exactly as they do against the AgentCore Gateway.
+
+With --load-test N it instead starts the emulator in-process and runs N gateway
+sessions through the agents' client stack (Cognito client credentials flow,
+MCPClient over streamablehttp_client, tools/list, then lookup_order calls),
+reporting per-call latency, errors and the emulator's counters.
+
+Usage:
+    python 33_local_gateway.py [--port 8765] [--latency-ms 80] [--jitter-ms 40] [--cold-start-ms 300]
+                               [--error-rate 0.01] [--throttle-rate 0.01] [--seed 7]
+    python 33_local_gateway.py --load-test 200 [--concurrency 20] [--lookups 5] [fault options]
+
+Then, in another shell:
+    export GATEWAY_URL=... COGNITO_CLIENT_ID=... COGNITO_CLIENT_SECRET=... COGNITO_DISCOVERY_URL=...
+    python 17_runtime_agent.py
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from mcp.client.streamable_http import streamablehttp_client
+from strands.tools.mcp.mcp_client import MCPClient
+
+from gateway_emulator import DEFAULT_PORT, DEFAULT_SCOPES, LocalGateway
+
+ORDER_IDS = ['ORD-001', 'ORD-002', 'ORD-003', 'ORD-404']
+
+
+def get_token(gateway_env):
+    """Client credentials flow against the discovery URL (as the agents do)"""
+    discovery = requests.get(gateway_env['COGNITO_DISCOVERY_URL'], timeout=10)
+    discovery.raise_for_status()
+    response = requests.post(
+        discovery.json()['token_endpoint'],
+        data={
+            'grant_type': 'client_credentials',
+            'client_id': gateway_env['COGNITO_CLIENT_ID'],
+            'client_secret': gateway_env['COGNITO_CLIENT_SECRET'],
+            'scope': ' '.join(DEFAULT_SCOPES)
+        },
+        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+def run_session(gateway_env, lookups, rng):
+    """One gateway session; returns (call latencies in ms, tool errors, exceptions)"""
+    token = get_token(gateway_env)
+    mcp_client = MCPClient(
+        lambda: streamablehttp_client(gateway_env['GATEWAY_URL'], headers={"Authorization": f"Bearer {token}"})
+    )
+    latencies, tool_errors, exceptions = [], 0, 0
+    with mcp_client:
+        tool_names = {tool.tool_name.split('___')[-1]: tool.tool_name for tool in mcp_client.list_tools_sync()}
+        for _ in range(lookups):
+            start = time.perf_counter()
+            try:
+                result = mcp_client.call_tool_sync(
+                    tool_use_id=f"load-{uuid.uuid4().hex[:12]}",
+                    name=tool_names['lookup_order'],
+                    arguments={'order_id': rng.choice(ORDER_IDS)}
+                )
+                if result['status'] != 'success':
+                    tool_errors += 1
+            except Exception:
+                exceptions += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, tool_errors, exceptions
+
+
+def load_test(gateway, sessions, concurrency, lookups, seed):
+    gateway_env = gateway.env()
+    latencies, counts = [], {'tool_errors': 0, 'exceptions': 0, 'failed_sessions': 0}
+    lock = threading.Lock()
+
+    def session(index):
+        try:
+            result = run_session(gateway_env, lookups, random.Random(seed + index))
+        except Exception as e:
+            with lock:
+                counts['failed_sessions'] += 1
+            print(f"  ⚠️  Session {index} failed: {e}")
+            return
+        with lock:
+            latencies.extend(result[0])
+            counts['tool_errors'] += result[1]
+            counts['exceptions'] += result[2]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(session, range(sessions)))
+    return time.perf_counter() - start, sorted(latencies), counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MCP gateway + Cognito + order lookup Lambda emulator")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port (0 picks a free port)")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added to every tool call")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Uniform random extra latency")
+    parser.add_argument('--cold-start-ms', type=float, default=0.0, help="Added when a new Lambda environment is needed")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of tool calls that fail")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of MCP requests answered 429")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--load-test', type=int, default=0, metavar='SESSIONS',
+                        help="Run this many gateway sessions against the emulator and exit")
+    parser.add_argument('--concurrency', type=int, default=10, help="Concurrent sessions (load test)")
+    parser.add_argument('--lookups', type=int, default=5, help="lookup_order calls per session (load test)")
+    args = parser.parse_args()
+
+    gateway = LocalGateway(host=args.host, port=0 if args.load_test else args.port,
+                           latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, cold_start_ms=args.cold_start_ms,
+                           error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=args.seed)
+
+    print("=" * 80)
+    print("LOCAL GATEWAY EMULATOR")
+    print("=" * 80)
+    print(f"MCP endpoint: {gateway.url}")
+    print(f"Tools:        {', '.join(tool['name'] for tool in gateway.tools)}")
+    print(f"Faults:       latency {args.latency_ms:.0f} ms + jitter {args.jitter_ms:.0f} ms, "
+          f"cold start {args.cold_start_ms:.0f} ms, error rate {args.error_rate:.1%}, "
+          f"throttle rate {args.throttle_rate:.1%}")
+    print()
+
+    if not args.load_test:
+        print("Point the agents at it with:")
+        for key, value in gateway.env().items():
+            print(f"  export {key}={value}")
+        print()
+        print("Serving (Ctrl+C to stop)...")
+        try:
+            gateway.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        stats = gateway.stats()
+        gateway.stop()
+        print()
+        print(f"✓ Stopped: {stats}")
+        return
+
+    print(f"Running {args.load_test} sessions x {args.lookups} lookups, {args.concurrency} concurrent...")
+    with gateway:
+        elapsed, latencies, counts = load_test(gateway, args.load_test, args.concurrency, args.lookups, args.seed)
+        stats = gateway.stats()
+
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+    print()
+    print("=" * 80)
+    print("LOAD TEST SUMMARY")
+    print("=" * 80)
+    print(f"Sessions:        {args.load_test} ({counts['failed_sessions']} failed) in {elapsed:.2f}s")
+    print(f"Tool calls:      {len(latencies)} ({len(latencies) / elapsed:.0f}/s)")
+    print(f"Latency:         p50 {pick(0.50):.1f} ms  p95 {pick(0.95):.1f} ms  p99 {pick(0.99):.1f} ms")
+    print(f"Errors:          {counts['tool_errors']} tool errors, {counts['exceptions']} exceptions")
+    print(f"Gateway:         {stats['tool_calls']} tool calls, {stats['tokens_issued']} tokens, "
+          f"{stats['auth_failures']} auth failures, {stats['cold_starts']} cold starts, "
+          f"{stats['injected_errors']} injected errors, {stats['throttled']} throttled")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
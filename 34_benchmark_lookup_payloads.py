@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: order lookup payload size, on the wire and in the model's context.
+
+Compares, for lookup_order (found / not found) and lookup_orders (10 IDs):
+- legacy: body JSON-encoded inside the response (JSON in JSON), every field,
+  and 404s listing available_orders
+- single-level: body as a JSON object, every field
+- projected: single-level with a fields projection
+
+For each it reports the bytes of the gateway's MCP response (JSON-RPC body, as
+sent by gateway_emulator.py) and the estimated tokens of the tool result text the
+agent adds to the conversation (tool_compactor.estimate_tokens). The coalesced
+lookup_order tool (order_loader.py) re-encodes results compactly; its text is
+reported as "agent (coalesced)".
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+from order_data import generate_orders
+from order_store import build_sqlite_store, parse_fields, project_order
+from tool_compactor import estimate_tokens
+
+# Configuration
+ORDER_COUNT = 10_000
+BATCH_IDS = 10
+LEGACY_AVAILABLE_ORDERS = 10
+PROJECTIONS = {
+    'eligibility only': ['return_eligibility'],
+    'refund quote': ['purchase_date', 'amount', 'category', 'return_eligibility'],
+}
+SEED = 5
+
+
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, 'orders.db')
+build_sqlite_store(db_path, generate_orders(ORDER_COUNT, seed=SEED))
+os.environ.update(ORDER_STORE_BACKEND='sqlite', ORDER_DB_PATH=db_path)
+
+from order_lookup_lambda import STORE, lambda_handler  # noqa: E402  (store configured above)
+
+
+def invoke(tool, arguments):
+    context = SimpleNamespace(client_context=SimpleNamespace(custom={'bedrockAgentCoreToolName': f'OrderLookup___{tool}'}))
+    return lambda_handler(dict(arguments), context)
+
+
+def legacy(response):
+    """The previous encoding: body as a JSON string, 404s listing available orders"""
+    body = dict(response['body'])
+    if response['statusCode'] == 404:
+        body['available_orders'] = STORE.order_ids(limit=LEGACY_AVAILABLE_ORDERS)
+    return {'statusCode': response['statusCode'], 'body': json.dumps(body)}
+
+
+def coalesced_text(response, fields):
+    """Tool result text from CoalescedLookupTool (compact separators, projection applied agent-side)"""
+    body = response['body']
+    if response['statusCode'] == 200:
+        body = project_order(body, parse_fields(fields))
+    return json.dumps({'statusCode': response['statusCode'], 'body': body}, separators=(',', ':'))
+
+
+def measure(text):
+    """(wire bytes of the gateway's JSON-RPC response, estimated tokens of the tool result text)"""
+    rpc = {'jsonrpc': '2.0', 'id': 1, 'result': {'content': [{'type': 'text', 'text': text}], 'isError': False}}
+    return len(json.dumps(rpc).encode()), estimate_tokens(text)
+
+
+rng = random.Random(SEED)
+found_id = f'ORD-{rng.randrange(ORDER_COUNT):08d}'
+batch_ids = [f'ORD-{rng.randrange(ORDER_COUNT):08d}' for _ in range(BATCH_IDS - 2)] + ['ORD-MISSING1', 'ORD-MISSING2']
+cases = [
+    ('lookup_order (found)', 'lookup_order', {'order_id': found_id}),
+    ('lookup_order (not found)', 'lookup_order', {'order_id': 'ORD-MISSING'}),
+    (f'lookup_orders ({BATCH_IDS} ids)', 'lookup_orders', {'order_ids': batch_ids}),
+]
+
+print("=" * 80)
+print("ORDER LOOKUP PAYLOADS")
+print("=" * 80)
+print(f"SQLite store with {ORDER_COUNT:,} orders; wire = gateway JSON-RPC response bytes, "
+      f"tokens = estimated tool result tokens")
+print()
+
+rows = []
+for label, tool, arguments in cases:
+    full = invoke(tool, arguments)
+    variants = [
+        ('legacy', json.dumps(legacy(full))),
+        ('single-level', json.dumps(full)),
+    ]
+    if full['statusCode'] == 200:
+        for name, fields in PROJECTIONS.items():
+            variants.append((f'projected: {name}', json.dumps(invoke(tool, {**arguments, 'fields': fields}))))
+    if tool == 'lookup_order':
+        variants.append(('agent (coalesced)', coalesced_text(full, None)))
+        if full['statusCode'] == 200:
+            variants.append(('agent (coalesced): eligibility only', coalesced_text(full, ['return_eligibility'])))
+
+    print(label)
+    baseline_bytes, baseline_tokens = measure(variants[0][1])
+    for name, text in variants:
+        wire_bytes, tokens = measure(text)
+        print(f"  {name:<38} {wire_bytes:>6} B  {tokens:>5} tokens  "
+              f"({(1 - tokens / baseline_tokens) * 100:>5.1f}% fewer tokens than legacy)")
+        rows.append((label, name, wire_bytes, tokens))
+    print()
+
+print("=" * 80)
+print("SUMMARY")
+print("=" * 80)
+print(f"{'Lookup':<26} {'Encoding':<38} {'Bytes':>7} {'Tokens':>7}")
+for label, name, wire_bytes, tokens in rows:
+    print(f"{label:<26} {name:<38} {wire_bytes:>7} {tokens:>7}")
+print("=" * 80)
+
+STORE.close()
+shutil.rmtree(tmp_dir)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic orders (and customers) and load them into the order store.
+
+Orders come from order_data.generate_orders: heavy-tailed customer activity,
+growing volume with weekend and holiday peaks, and per-category prices (10k to
+10M orders). They are streamed into:
+- sqlite: an orders.db file; bundle it with the Lambda via
+  ORDER_DB_SOURCE=<path> python 10_create_lambda.py (Lambda packages are capped
+  at 250 MB unzipped, about 1.5M orders; use DynamoDB beyond that)
+- dynamodb: a DynamoDB table (created with --create-table, see
+  order_store.create_dynamodb_table)
+
+The sample orders ORD-001..003 (customer user_001) are added unless
+--no-samples is given, so the demo conversations keep working on a large store.
+
+Usage:
+    python 35_generate_orders.py 1000000 [--output orders.db] [--seed 42] [--customers N]
+    python 35_generate_orders.py 1000000 --backend dynamodb --table Orders [--create-table]
+    python 35_generate_orders.py 100000 --customers-file customers.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+
+from order_data import DEFAULT_DAYS, DEFAULT_SEED, default_customer_count, generate_customers, generate_orders
+from order_store import DynamoDBOrderStore, build_sample_orders, build_sqlite_store, create_dynamodb_table
+
+REGION = 'us-west-2'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic orders and load them into the order store")
+    parser.add_argument('orders', type=int, help="Number of synthetic orders (e.g. 10000 to 10000000)")
+    parser.add_argument('--backend', choices=('sqlite', 'dynamodb'), default='sqlite')
+    parser.add_argument('--output', default='orders.db', help="SQLite file to write (sqlite backend)")
+    parser.add_argument('--table', help="DynamoDB table name (dynamodb backend)")
+    parser.add_argument('--create-table', action='store_true', help="Create the DynamoDB table first")
+    parser.add_argument('--region', default=REGION)
+    parser.add_argument('--customers', type=int, help="Number of customers (default: orders / 5)")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="Purchase dates span this many days")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--customers-file', help="Also write the customer profiles as JSON lines")
+    parser.add_argument('--no-samples', action='store_true', help="Leave out the sample orders ORD-001..003")
+    args = parser.parse_args()
+
+    customers = args.customers or default_customer_count(args.orders)
+    orders = generate_orders(args.orders, seed=args.seed, customers=customers, days=args.days)
+    if not args.no_samples:
+        orders = itertools.chain(build_sample_orders().values(), orders)
+
+    print("=" * 80)
+    print("SYNTHETIC ORDER DATA")
+    print("=" * 80)
+    print(f"Orders:    {args.orders:,} over {args.days} days (seed {args.seed})")
+    print(f"Customers: {customers:,}")
+    print()
+
+    start = time.perf_counter()
+    if args.backend == 'sqlite':
+        print(f"Building SQLite store {args.output}...")
+        written = build_sqlite_store(args.output, orders)
+        location = f"{args.output} ({os.path.getsize(args.output) / 1024 / 1024:.0f} MB)"
+    else:
+        if not args.table:
+            parser.error("--table is required for the dynamodb backend")
+        import boto3
+        client = boto3.client('dynamodb', region_name=args.region)
+        if args.create_table:
+            print(f"Creating DynamoDB table {args.table}...")
+            create_dynamodb_table(client, args.table)
+            client.get_waiter('table_exists').wait(TableName=args.table)
+        print(f"Writing to DynamoDB table {args.table}...")
+        written = DynamoDBOrderStore(args.table, client=client).put_orders(orders)
+        location = f"DynamoDB table {args.table}"
+    elapsed = time.perf_counter() - start
+    print(f"✓ {written:,} orders written to {location} in {elapsed:.1f}s ({written / elapsed:,.0f} orders/s)")
+
+    if args.customers_file:
+        with open(args.customers_file, 'w') as f:
+            for customer in generate_customers(customers, seed=args.seed, days=args.days):
+                f.write(json.dumps(customer) + '\n')
+        print(f"✓ {customers:,} customer profiles written to {args.customers_file}")
+
+    if args.backend == 'sqlite':
+        print()
+        print("Bundle it with the order lookup Lambda:")
+        print(f"  ORDER_DB_SOURCE={args.output} python 10_create_lambda.py")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
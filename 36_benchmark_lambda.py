@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: order lookup Lambda latency by data size.
+
+For each size, a SQLite order store is built from synthetic orders
+(order_data.py: heavy-tailed customers, seasonal purchase dates) and
+lambda_handler is invoked in-process, with the gateway's client context, for:
+- lookup_order: found and not-found order IDs
+- lookup_orders: batches of 10 IDs
+- search_orders: first pages for a typical and for the most active customer,
+  an eligible-only search, and the next page via the cursor
+
+Reported per operation: p50 / p95 / p99 latency and the p50 response size.
+The handler reads the module-level STORE, so each size swaps its store in
+(lambda_handler itself is unchanged).
+
+Usage:
+    python 36_benchmark_lambda.py [sizes...]     (default: 10000 100000 1000000)
+    python 36_benchmark_lambda.py 10000000       (10M orders: ~2 GB and a few minutes to build)
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from order_data import customer_id, default_customer_count, generate_orders, order_id, pick_customer
+from order_store import SQLiteOrderStore, build_sqlite_store
+
+# Configuration
+STORE_SIZES = [int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+REQUESTS = 2_000
+BATCH_SIZE = 10
+SEED = 13
+
+os.environ['ORDER_STORE_BACKEND'] = 'memory'
+import order_lookup_lambda  # noqa: E402  (sample store at import; each size swaps its store in)
+
+
+def context(tool):
+    return SimpleNamespace(client_context=SimpleNamespace(custom={'bedrockAgentCoreToolName': f'OrderLookup___{tool}'}))
+
+
+def run(tool, events):
+    """Invoke lambda_handler for each event; returns (sorted latencies in ms, sorted response sizes)"""
+    ctx = context(tool)
+    latencies, sizes = [], []
+    for event in events:
+        start = time.perf_counter()
+        response = order_lookup_lambda.lambda_handler(event, ctx)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response['statusCode'] >= 500:
+            raise RuntimeError(f"{tool} failed: {response['body']}")
+        sizes.append(len(json.dumps(response)))
+    return sorted(latencies), sorted(sizes)
+
+
+def pick(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def next_page_events(customers):
+    """search_orders events for the second page of each customer's order history"""
+    events = []
+    for customer in customers:
+        first = order_lookup_lambda.search_orders({'customer_id': customer})['body']
+        if first['next_cursor']:
+            events.append({'customer_id': customer, 'cursor': first['next_cursor']})
+    return events or [{'customer_id': customers[0]}]
+
+
+print("=" * 80)
+print("ORDER LOOKUP LAMBDA BENCHMARK BY DATA SIZE")
+print("=" * 80)
+print(f"Sizes: {', '.join(f'{size:,}' for size in STORE_SIZES)} orders; {REQUESTS:,} requests per operation")
+print()
+
+rows = []
+with tempfile.TemporaryDirectory() as tmp_dir:
+    for size in STORE_SIZES:
+        db_path = os.path.join(tmp_dir, f'orders-{size}.db')
+        print(f"Building SQLite store with {size:,} orders...")
+        start = time.perf_counter()
+        build_sqlite_store(db_path, generate_orders(size))
+        print(f"  ✓ Built in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(db_path) / 1024 / 1024:.0f} MB)")
+
+        store = SQLiteOrderStore(db_path)
+        order_lookup_lambda.STORE = store
+
+        rng = random.Random(SEED)
+        customers = default_customer_count(size)
+        ids = lambda: order_id(rng.randrange(size))
+        typical = [customer_id(pick_customer(rng, customers)) for _ in range(REQUESTS)]
+        busiest = customer_id(0)
+        operations = [
+            ('lookup_order (found)', 'lookup_order', [{'order_id': ids()} for _ in range(REQUESTS)]),
+            ('lookup_order (not found)', 'lookup_order', [{'order_id': f'ORD-X{i:07d}'} for i in range(REQUESTS)]),
+            (f'lookup_orders ({BATCH_SIZE} ids)', 'lookup_orders',
+             [{'order_ids': [ids() for _ in range(BATCH_SIZE)]} for _ in range(REQUESTS // 10)]),
+            ('search_orders (typical)', 'search_orders', [{'customer_id': c} for c in typical]),
+            ('search_orders (busiest)', 'search_orders', [{'customer_id': busiest}] * REQUESTS),
+            ('search_orders (eligible)', 'search_orders', [{'customer_id': c, 'eligible': True} for c in typical]),
+            ('search_orders (next page)', 'search_orders', next_page_events(typical[:REQUESTS // 10] + [busiest])),
+        ]
+
+        print(f"  {'Operation':<28} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'bytes':>7}")
+        for label, tool, events in operations:
+            latencies, sizes = run(tool, events)
+            print(f"  {label:<28} {pick(latencies, 0.50):>9.3f} {pick(latencies, 0.95):>9.3f} "
+                  f"{pick(latencies, 0.99):>9.3f} {pick(sizes, 0.50):>7}")
+            rows.append((size, label, pick(latencies, 0.50), pick(latencies, 0.99)))
+        print(f"  Busiest customer {busiest}: "
+              f"{len(store.orders_for_customer(busiest, limit=size)):,} orders")
+        store.close()
+        print()
+
+print("=" * 80)
+print("SUMMARY (p50 / p99 ms)")
+print("=" * 80)
+labels = list(dict.fromkeys(label for _, label, _, _ in rows))
+results = {(size, label): (p50, p99) for size, label, p50, p99 in rows}
+print(f"{'Operation':<28}" + "".join(f"{size:>18,}" for size in STORE_SIZES))
+for label in labels:
+    print(f"{label:<28}" + "".join(f"{results[size, label][0]:>9.3f} /{results[size, label][1]:>7.3f}"
+                                   for size in STORE_SIZES))
+print("=" * 80)
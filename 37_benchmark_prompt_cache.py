@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Bedrock time to first token with and without prompt caching.
+
+Sends the same request prefix the runtime agent sends on every turn - the tool
+definitions (custom tools plus the gateway's order lookup tools) and the system
+prompt - followed by a different customer question each time, through
+BedrockModel configured as the agents configure it (prompt_cache.py), once with
+prompt caching off and once with it on. For each request it records the time to
+the first streamed content (text or tool call), the total latency and the token
+usage Bedrock reports (uncached input, cache read, cache write).
+
+The first cached request writes the cache; the following ones read it. A cache
+entry lives 5 minutes from its last hit, so rerunning within that window shows
+cache reads on the first request too.
+
+Requires AWS credentials with Bedrock access (calls are real; output is capped
+at MAX_TOKENS tokens per request).
+
+Usage:
+    python 37_benchmark_prompt_cache.py [requests per mode]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+from strands_tools import current_time, retrieve
+
+from batch_eligibility import check_return_eligibility_batch
+from batch_refunds import calculate_refund_batch
+from order_tool_schemas import TOOL_SCHEMAS
+from prompt_cache import PromptCacheStats, cached_system_prompt, create_bedrock_model
+
+# Configuration
+MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
+REGION = "us-west-2"
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+MAX_TOKENS = 64
+GATEWAY_TARGET = "OrderLookup"
+
+QUESTIONS = [
+    "Can I return order ORD-001?",
+    "What is the return window for electronics?",
+    "How much will I get back for a used $200 jacket?",
+    "My tablet arrived defective, what are my options?",
+    "What have I bought recently that I can still return?",
+    "Do I need the original packaging to return headphones?",
+    "Can I return a book I bought 40 days ago?",
+    "How long does a refund take after I ship the item back?",
+]
+
+# Same shape as the runtime agent's system prompt (17_runtime_agent.py)
+SYSTEM_PROMPT = """Production returns assistant with full memory and gateway capabilities. Use the retrieve tool to access Amazon return policy documents for accurate information.
+
+When using the retrieve tool, always pass these parameters:
+- knowledgeBaseId: KBEXAMPLE01
+- region: us-west-2
+- text: the search query
+
+You have access to:
+- Gateway tools for external operations (order lookup; use lookup_orders to look up several orders in one call, search_orders to find a customer's orders when they don't know the order ID, and pass fields to get only the order fields you need)
+- Customer conversation history and preferences through memory
+- Custom tools for return eligibility and refund calculations"""
+
+
+def tool_specs():
+    """Tool definitions in the order the runtime agent registers them"""
+    specs = [retrieve.TOOL_SPEC, current_time.current_time.tool_spec,
+             check_return_eligibility_batch.tool_spec, calculate_refund_batch.tool_spec]
+    for schema in TOOL_SCHEMAS:
+        specs.append({
+            'name': f"{GATEWAY_TARGET}___{schema['name']}",
+            'description': schema['description'],
+            'inputSchema': {'json': schema['inputSchema']}
+        })
+    return specs
+
+
+def later_first_tokens(results):
+    """Time to first token of every request after the first (the first writes the cache)"""
+    return [first_ms for first_ms, _, _ in results[1:]] or [results[0][0]]
+
+
+async def timed_request(model, specs, system_prompt, question):
+    """(ms to first content, total ms, usage) for one streamed request"""
+    messages = [{'role': 'user', 'content': [{'text': question}]}]
+    start = time.perf_counter()
+    first_token_ms, usage = None, {}
+    async for event in model.stream(messages, specs, system_prompt_content=system_prompt):
+        if first_token_ms is None and 'contentBlockDelta' in event:
+            first_token_ms = (time.perf_counter() - start) * 1000
+        if 'metadata' in event:
+            usage = event['metadata'].get('usage', {})
+    total_ms = (time.perf_counter() - start) * 1000
+    return first_token_ms if first_token_ms is not None else total_ms, total_ms, usage
+
+
+async def run_mode(prompt_cache, specs, run_id):
+    model = create_bedrock_model(MODEL_ID, prompt_cache=prompt_cache, temperature=0.3, max_tokens=MAX_TOKENS,
+                                 region_name=REGION)
+    # The run ID keeps a previous run's cached system prompt from being reused
+    static_prompt = f"{SYSTEM_PROMPT}\n\nSession: {run_id}"
+    if prompt_cache:
+        system_prompt = cached_system_prompt(static_prompt, "The customer's ID (customer_id for search_orders) is user_001.")
+    else:
+        system_prompt = [{'text': static_prompt}, {'text': "The customer's ID (customer_id for search_orders) is user_001."}]
+
+    stats = PromptCacheStats()
+    results = []
+    for i in range(REQUESTS):
+        first_ms, total_ms, usage = await timed_request(model, specs, system_prompt, QUESTIONS[i % len(QUESTIONS)])
+        stats.record(usage)
+        results.append((first_ms, total_ms, usage))
+        print(f"  request {i + 1:>2}: first token {first_ms:7.0f} ms, total {total_ms:7.0f} ms, "
+              f"input {usage.get('inputTokens', 0):>5}, cache read {usage.get('cacheReadInputTokens', 0):>5}, "
+              f"cache write {usage.get('cacheWriteInputTokens', 0):>5}")
+    return results, stats.stats()
+
+
+async def main():
+    specs = tool_specs()
+    run_id = uuid.uuid4().hex[:12]
+
+    print("=" * 80)
+    print("PROMPT CACHING: TIME TO FIRST TOKEN")
+    print("=" * 80)
+    print(f"Model: {MODEL_ID}; {len(specs)} tools; {REQUESTS} requests per mode; max {MAX_TOKENS} output tokens")
+    print()
+
+    summary = {}
+    for label, prompt_cache in (('without cache', False), ('with cache', True)):
+        print(f"{label}:")
+        results, stats = await run_mode(prompt_cache, specs, run_id)
+        summary[label] = (results, stats)
+        print()
+
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    print(f"{'Mode':<15} {'first req (ms)':>15} {'later p50 (ms)':>15} {'later max (ms)':>15} "
+          f"{'total p50 (ms)':>15} {'cached input':>13}")
+    for label, (results, stats) in summary.items():
+        later = later_first_tokens(results)
+        print(f"{label:<15} {results[0][0]:>15.0f} {statistics.median(later):>15.0f} {max(later):>15.0f} "
+              f"{statistics.median(total for _, total, _ in results):>15.0f} {stats['cached_share']:>12.0%}")
+    uncached = statistics.median(later_first_tokens(summary['without cache'][0]))
+    cached = statistics.median(later_first_tokens(summary['with cache'][0]))
+    print(f"Time to first token (requests after the first): {uncached:.0f} ms -> {cached:.0f} ms "
+          f"({(1 - cached / uncached) * 100:.0f}% lower)")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
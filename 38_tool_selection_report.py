@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Report: tool subset selection accuracy, and its net effect on input tokens with
+the prompt cache.
+
+Runs customer requests, each labelled with the tools the agent needs to answer
+it, through ToolSelector over the runtime agent's tool set (custom tools plus
+the order lookup gateway tools, registered as the gateway exposes them). For
+each request it reports the tools offered and whether every needed tool is among
+them; with the full tool set every request is covered, so the coverage below
+100% is the accuracy cost of selecting. Coverage is reported separately for
+TUNING_SET, the requests QUERY_EXPANSIONS was written against, and HELD_OUT_SET,
+requests written without looking at the expansions: the held-out coverage is
+the one to expect on real traffic.
+
+Fewer tool definitions are not fewer input tokens when the prompt cache
+(prompt_cache.py) is on: the tool definitions and the system prompt are cached
+as one prefix, the full tool set is the same prefix on every request, and each
+distinct subset is a prefix of its own that is written to the cache (at
+CACHE_WRITE_PRICE) before later requests can read it (at CACHE_READ_PRICE). The
+report replays a stream of requests drawn from both sets, arriving
+--per-minute apart, through a model of Bedrock's cache (entries live
+CACHE_TTL_SECONDS from their last hit; prefixes under MIN_CACHEABLE_TOKENS are
+not cached) and compares the cache hit rate and the input tokens, weighted by
+price, of the full tool set and of selection. Only each request's first model
+call is counted: the later calls of its tool loop read the same prefix either
+way. Token counts are estimated as in tool_compactor.
+
+Add --more-targets to also register the tools of further gateway targets
+(shipping, exchanges, store credit, warranty, customer profile; definitions only,
+never called) and see how the savings grow with the tool list.
+
+The embeddings are local unless TOOL_SELECTOR_EMBEDDINGS=bedrock is set (Titan
+text embeddings; needs Bedrock access).
+
+Usage:
+    python 38_tool_selection_report.py [--top-n 4] [--more-targets] [--requests 500] [--per-minute 6]
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+from strands_tools import current_time
+
+from batch_eligibility import check_return_eligibility_batch
+from batch_refunds import calculate_refund_batch
+from kb_retrieve import retrieve
+from order_tool_schemas import TOOL_SCHEMAS
+from tool_compactor import estimate_tokens
+from tool_selector import ToolSelector, agent_tools, base_name, tool_name, tool_spec
+
+GATEWAY_TARGET = "OrderLookup"
+SEED = 7
+
+# Bedrock prompt cache (Claude models): entry lifetime, minimum cached prefix,
+# and the price of cache writes and reads relative to uncached input tokens
+CACHE_TTL_SECONDS = 300
+MIN_CACHEABLE_TOKENS = 1024
+CACHE_WRITE_PRICE = 1.25
+CACHE_READ_PRICE = 0.1
+
+# Static system prompt of the runtime agent (17_runtime_agent.py, ~680 characters),
+# cached after the tool definitions
+SYSTEM_PROMPT_TOKENS = 170
+
+os.environ.setdefault("KNOWLEDGE_BASE_ID", "BENCHMARK")
+
+# Import the custom tools from 01_returns_refunds_agent.py using importlib
+spec = importlib.util.spec_from_file_location("returns_refunds_agent", "01_returns_refunds_agent.py")
+agent_module = importlib.util.module_from_spec(spec)
+sys.modules["returns_refunds_agent"] = agent_module
+spec.loader.exec_module(agent_module)
+
+# (request, tools needed to answer it, without gateway prefix);
+# QUERY_EXPANSIONS in tool_selector.py was written against these requests
+TUNING_SET = [
+    ("Can I return order ORD-001?", {"lookup_order", "check_return_eligibility"}),
+    ("Is ORD-002 still eligible for a return?", {"lookup_order", "check_return_eligibility"}),
+    ("Look up ORD-001, ORD-002 and ORD-003 and tell me which I can still return",
+     {"lookup_orders", "check_return_eligibility_batch"}),
+    ("What have I bought recently that I can still return?", {"search_orders", "check_return_eligibility_batch"}),
+    ("Find my electronics orders from last month", {"search_orders"}),
+    ("I don't know my order number, can you find the headphones I bought?", {"search_orders"}),
+    ("How much will I get back for a used $200 jacket?", {"calculate_refund_amount"}),
+    ("What's my refund on a $1,299.99 opened laptop that is defective?", {"calculate_refund_amount"}),
+    ("Calculate refunds for a new $50 lamp and a damaged $80 blender", {"calculate_refund_batch"}),
+    ("What is the return policy for electronics?", {"retrieve"}),
+    ("Do I need the original packaging to return headphones?", {"retrieve"}),
+    ("Can you explain the refund policy in simple terms?", {"retrieve", "format_policy_response"}),
+    ("I bought a book on 2026-09-01, can I return it?", {"check_return_eligibility"}),
+    ("What's today's date and how many days do I have left to return ORD-003?",
+     {"current_time", "lookup_order", "check_return_eligibility"}),
+    ("My order ORD-002 arrived damaged, how much of a refund will I get?", {"lookup_order", "calculate_refund_amount"}),
+    ("Can I return a gift without a receipt?", {"retrieve"}),
+]
+
+# Requests written without looking at QUERY_EXPANSIONS (keep it that way: do not
+# tune the expansions against these)
+HELD_OUT_SET = [
+    ("Is it too late to send back ORD-004?", {"lookup_order", "check_return_eligibility"}),
+    ("Which of ORD-010, ORD-011 and ORD-012 can still go back?", {"lookup_orders", "check_return_eligibility_batch"}),
+    ("Show me everything I ordered in September", {"search_orders"}),
+    ("I can't remember the order number for my coffee maker", {"search_orders"}),
+    ("What would a refund be for a $75 sweater I wore once?", {"calculate_refund_amount"}),
+    ("Work out refunds for a $30 mug in new condition and a $120 used drill", {"calculate_refund_batch"}),
+    ("How many days do I have to return shoes?", {"retrieve"}),
+    ("Are restocking fees charged on opened electronics?", {"retrieve"}),
+    ("Summarize the rules for returning clothing in a short list", {"retrieve", "format_policy_response"}),
+    ("I got a blender on 2026-08-20, is it still returnable?", {"check_return_eligibility"}),
+    ("What's the status of ORD-005?", {"lookup_order"}),
+    ("The headphones from ORD-007 stopped working, what refund do I get?", {"lookup_order", "calculate_refund_amount"}),
+    ("Can I send back anything from my last few purchases?", {"search_orders", "check_return_eligibility_batch"}),
+    ("What date is it today?", {"current_time"}),
+    ("Do you accept returns of opened software?", {"retrieve"}),
+    ("How much would I be refunded for order ORD-009?", {"lookup_order", "calculate_refund_amount"}),
+]
+
+
+# Tools of further gateway targets the returns agents could be given
+MORE_TARGETS = {
+    "Shipping": [
+        ("create_return_label", "Create a prepaid return shipping label for an order and email it to the customer.",
+         {"order_id": "Order ID (e.g. ORD-001)", "carrier": "Preferred carrier"}),
+        ("track_shipment", "Track the delivery status of an outbound or return shipment by tracking number.",
+         {"tracking_number": "Carrier tracking number"}),
+        ("schedule_pickup", "Schedule a carrier pickup for a return package at the customer's address.",
+         {"order_id": "Order ID", "pickup_date": "Pickup date in YYYY-MM-DD format"}),
+    ],
+    "Exchanges": [
+        ("create_exchange", "Exchange an item for a different size or color instead of a refund.",
+         {"order_id": "Order ID", "replacement_sku": "SKU of the replacement item"}),
+        ("check_stock", "Check whether a replacement item is in stock for an exchange.",
+         {"sku": "Item SKU"}),
+    ],
+    "StoreCredit": [
+        ("issue_store_credit", "Issue store credit or a gift card balance instead of refunding to the original payment method.",
+         {"customer_id": "Customer ID", "amount": "Credit amount"}),
+        ("get_refund_status", "Get the status of a refund already issued to the original payment method.",
+         {"order_id": "Order ID"}),
+    ],
+    "Warranty": [
+        ("check_warranty", "Check manufacturer warranty coverage for an item past its return window.",
+         {"order_id": "Order ID"}),
+        ("file_warranty_claim", "File a warranty repair or replacement claim for a defective item.",
+         {"order_id": "Order ID", "issue": "Description of the defect"}),
+    ],
+    "Customers": [
+        ("get_customer_profile", "Get a customer's profile: name, contact details, membership tier and address.",
+         {"customer_id": "Customer ID"}),
+        ("update_contact_preferences", "Update how the customer wants to be contacted (email, SMS, phone).",
+         {"customer_id": "Customer ID", "channel": "Preferred channel"}),
+    ],
+}
+
+
+def gateway_tool(target, schema):
+    """Stand-in for an MCP gateway tool as the agent registers it"""
+    return SimpleNamespace(tool_name=f"{target}___{schema['name']}", tool_spec={
+        'name': f"{target}___{schema['name']}",
+        'description': schema['description'],
+        'inputSchema': {'json': schema['inputSchema']},
+    })
+
+
+def build_tools(more_targets):
+    # The custom tools as 14 and 17 pass them (current_time as a module)
+    tools = [retrieve, current_time, agent_module.check_return_eligibility,
+             check_return_eligibility_batch, agent_module.calculate_refund_amount, calculate_refund_batch,
+             agent_module.format_policy_response]
+    tools += [gateway_tool(GATEWAY_TARGET, schema) for schema in TOOL_SCHEMAS]
+    if more_targets:
+        for target, target_tools in MORE_TARGETS.items():
+            for name, description, params in target_tools:
+                tools.append(gateway_tool(target, {
+                    'name': name,
+                    'description': description,
+                    'inputSchema': {
+                        'type': 'object',
+                        'properties': {param: {'type': 'string', 'description': text} for param, text in params.items()},
+                        'required': list(params),
+                    },
+                }))
+    return agent_tools(tools)
+
+
+def definition_tokens(tools):
+    """Estimated tokens of the tool definitions"""
+    return sum(estimate_tokens(json.dumps(tool_spec(tool), default=str)) for tool in tools)
+
+
+def report_coverage(selector, tools, label, test_set):
+    """Print the tools offered for each request; returns (requests covered, offered tools by request)"""
+    print(f"{label} ({len(test_set)} requests)")
+    covered = 0
+    offered_by_query = {}
+    for query, needed in test_set:
+        offered = selector.select(query, tools).tools
+        offered_by_query[query] = offered
+        names = {base_name(tool_name(tool)) for tool in offered}
+        missing = needed - names
+        covered += not missing
+        status = "✓" if not missing else "❌"
+        print(f"  {status} {query}")
+        print(f"      offered: {', '.join(sorted(names))}")
+        if missing:
+            print(f"      missing: {', '.join(sorted(missing))}")
+    print()
+    return covered, offered_by_query
+
+
+def replay_cache(stream, interval_s):
+    """
+    Input tokens of a request stream through a model of the Bedrock prompt cache.
+
+    Args:
+        stream: (cached prefix key, prefix tokens, uncached tokens) per request, in arrival order
+        interval_s: Seconds between requests
+    """
+    expires = {}
+    hits = uncached = read = written = 0
+    for index, (key, prefix_tokens, other_tokens) in enumerate(stream):
+        now = index * interval_s
+        uncached += other_tokens
+        if prefix_tokens < MIN_CACHEABLE_TOKENS:
+            uncached += prefix_tokens
+            continue
+        if expires.get(key, -math.inf) > now:
+            hits += 1
+            read += prefix_tokens
+        else:
+            written += prefix_tokens
+        expires[key] = now + CACHE_TTL_SECONDS
+    return {
+        'hit_rate': hits / len(stream) if stream else 0.0,
+        'prefixes': len(expires),
+        'input_tokens': uncached,
+        'cache_read_tokens': read,
+        'cache_write_tokens': written,
+        'weighted_tokens': uncached + CACHE_WRITE_PRICE * written + CACHE_READ_PRICE * read,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool subset selection accuracy and its net effect on input tokens")
+    parser.add_argument('--top-n', type=int, default=4)
+    parser.add_argument('--more-targets', action='store_true', help="Also register the tools of further gateway targets")
+    parser.add_argument('--requests', type=int, default=500, help="Requests in the replayed stream")
+    parser.add_argument('--per-minute', type=float, default=6, help="Arrival rate of the replayed stream")
+    args = parser.parse_args()
+
+    tools = build_tools(args.more_targets)
+    selector = ToolSelector(top_n=args.top_n, enabled=True)
+
+    print("=" * 80)
+    print("TOOL SELECTION REPORT")
+    print("=" * 80)
+    print(f"{len(tools)} tools; top {args.top_n} plus required tools and companions")
+    print()
+
+    tuning_covered, offered = report_coverage(selector, tools, "Tuning set", TUNING_SET)
+    held_out_covered, held_out_offered = report_coverage(selector, tools, "Held-out set", HELD_OUT_SET)
+    offered.update(held_out_offered)
+
+    # Same request stream with the full tool set and with the selected subsets
+    queries = [query for query, _ in TUNING_SET + HELD_OUT_SET]
+    stream = random.Random(SEED).choices(queries, k=args.requests)
+    full_key = tuple(tool_name(tool) for tool in tools)
+    full_prefix = definition_tokens(tools) + SYSTEM_PROMPT_TOKENS
+    full = replay_cache([(full_key, full_prefix, estimate_tokens(query)) for query in stream],
+                        60 / args.per_minute)
+    selected = replay_cache([
+        (tuple(tool_name(tool) for tool in offered[query]),
+         definition_tokens(offered[query]) + SYSTEM_PROMPT_TOKENS, estimate_tokens(query))
+        for query in stream
+    ], 60 / args.per_minute)
+
+    stats = selector.stats()
+    print("=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    print("Requests with every needed tool offered (full tool set: 100%):")
+    print(f"  tuning set:   {tuning_covered}/{len(TUNING_SET)} ({tuning_covered / len(TUNING_SET):.0%})")
+    print(f"  held-out set: {held_out_covered}/{len(HELD_OUT_SET)} ({held_out_covered / len(HELD_OUT_SET):.0%})")
+    print(f"Tools offered per request: {stats['mean_tools_offered']:.1f} of {stats['mean_tools_available']:.0f}; "
+          f"{stats['fallbacks']} fell back to the full set")
+    print(f"Tool definition tokens: {stats['tool_tokens_full'] // stats['selections']} -> "
+          f"{stats['tool_tokens_offered'] // stats['selections']} per request "
+          f"({stats['saved_share']:.0%} saved before caching)")
+    print()
+    print(f"Prompt cache replay: {args.requests} requests, {args.per_minute:g} per minute, "
+          f"{CACHE_TTL_SECONDS // 60} min cache entries")
+    print(f"{'':>10} {'Prefixes':>9} {'Hit rate':>9} {'Uncached':>9} {'Read':>9} {'Written':>9} {'Weighted/req':>13}")
+    for label, result in (("full set", full), ("selection", selected)):
+        print(f"{label:>10} {result['prefixes']:>9} {result['hit_rate']:>9.0%} {result['input_tokens']:>9} "
+              f"{result['cache_read_tokens']:>9} {result['cache_write_tokens']:>9} "
+              f"{result['weighted_tokens'] / args.requests:>13.0f}")
+    change = selected['weighted_tokens'] / full['weighted_tokens'] - 1
+    print(f"Net effect of selection on price-weighted input tokens: {change:+.0%} "
+          f"(writes x{CACHE_WRITE_PRICE:g}, reads x{CACHE_READ_PRICE:g})")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
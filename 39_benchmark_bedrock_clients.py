@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Bedrock connection reuse under concurrent load.
+
+Runs concurrent "agent turns" (one model call and one knowledge base retrieve
+each) against a local HTTP stand-in for the Bedrock runtime and agent runtime
+endpoints, pointed at with boto's AWS_ENDPOINT_URL_BEDROCK_RUNTIME /
+AWS_ENDPOINT_URL_BEDROCK_AGENT_RUNTIME, in two modes:
+- per-request clients: a BedrockModel with its own boto3 session per request (as
+  17_runtime_agent.py built its model per request) and a new
+  bedrock-agent-runtime client per retrieve (as strands_tools retrieve does)
+- shared client: create_bedrock_model() and kb_retrieve on the process-wide
+  clients from bedrock_clients.py
+
+Reported per mode: TCP connections the server accepted, connection reuse rate,
+client setup time and p50 / p95 turn latency. The stand-in speaks plain HTTP, so
+the TLS handshakes a new connection costs against Bedrock come on top of these
+numbers. Model calls are non-streaming (Converse) here.
+
+Usage:
+    python 39_benchmark_bedrock_clients.py [--turns 400] [--concurrency 32] [--latency-ms 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import asyncio
+
+# Local stand-in only: requests are signed with dummy credentials
+os.environ['AWS_ACCESS_KEY_ID'] = 'benchmark'
+os.environ['AWS_SECRET_ACCESS_KEY'] = 'benchmark'
+os.environ.pop('AWS_SESSION_TOKEN', None)
+os.environ.pop('AWS_PROFILE', None)
+
+MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
+REGION = "us-west-2"
+
+CONVERSE_RESPONSE = json.dumps({
+    'output': {'message': {'role': 'assistant', 'content': [{'text': 'ok'}]}},
+    'stopReason': 'end_turn',
+    'usage': {'inputTokens': 10, 'outputTokens': 1, 'totalTokens': 11},
+    'metrics': {'latencyMs': 1},
+}).encode()
+RETRIEVE_RESPONSE = json.dumps({'retrievalResults': [
+    {'content': {'text': 'Electronics can be returned within 30 days.'}, 'score': 0.9, 'location': {}}
+]}).encode()
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_s):
+        super().__init__(address, StandInHandler)
+        self.latency_s = latency_s
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.connections = self.requests = 0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency_s)
+        body = RETRIEVE_RESPONSE if self.path.endswith('/retrieve') else CONVERSE_RESPONSE
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def converse(model):
+    """One non-streaming model call through BedrockModel"""
+    async def run():
+        async for _ in model.stream([{'role': 'user', 'content': [{'text': 'hi'}]}]):
+            pass
+    asyncio.run(run())
+
+
+def retrieve_input():
+    return {'toolUseId': 'benchmark', 'input': {'text': 'return window', 'knowledgeBaseId': 'KBBENCHMARK'}}
+
+
+def per_request_turn():
+    import boto3
+    from strands.models import BedrockModel
+    from strands_tools.retrieve import retrieve
+
+    start = time.perf_counter()
+    model = BedrockModel(model_id=MODEL_ID, temperature=0.3, streaming=False, boto_session=boto3.Session())
+    setup_s = time.perf_counter() - start
+    converse(model)
+    result = retrieve(retrieve_input())
+    if result['status'] != 'success':
+        raise RuntimeError(result['content'][0]['text'])
+    return setup_s, time.perf_counter() - start
+
+
+def shared_turn():
+    from kb_retrieve import retrieve
+    from prompt_cache import create_bedrock_model
+
+    start = time.perf_counter()
+    model = create_bedrock_model(MODEL_ID, prompt_cache=False, temperature=0.3, streaming=False, region_name=REGION)
+    setup_s = time.perf_counter() - start
+    converse(model)
+    result = retrieve._tool_func(retrieve_input())
+    if result['status'] != 'success':
+        raise RuntimeError(result['content'][0]['text'])
+    return setup_s, time.perf_counter() - start
+
+
+def run_mode(server, turn, turns, concurrency):
+    server.reset()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: turn(), range(turns)))
+    setups = sorted(setup * 1000 for setup, _ in results)
+    latencies = sorted(total * 1000 for _, total in results)
+    return {
+        'requests': server.requests,
+        'connections': server.connections,
+        'reuse_rate': 1 - server.connections / server.requests if server.requests else 0.0,
+        'setup_p50': statistics.median(setups),
+        'p50': statistics.median(latencies),
+        'p95': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bedrock connection reuse under concurrent load")
+    parser.add_argument('--turns', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = StandInServer(('127.0.0.1', 0), args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ['AWS_ENDPOINT_URL_BEDROCK_RUNTIME'] = endpoint
+    os.environ['AWS_ENDPOINT_URL_BEDROCK_AGENT_RUNTIME'] = endpoint
+
+    from bedrock_clients import MAX_POOL_CONNECTIONS, connection_stats
+
+    print("=" * 80)
+    print("BEDROCK CLIENT CONNECTION REUSE")
+    print("=" * 80)
+    print(f"{args.turns} turns (model call + retrieve) at concurrency {args.concurrency}; "
+          f"{args.latency_ms:.0f} ms server latency; shared pool size {MAX_POOL_CONNECTIONS}")
+    print()
+
+    results = {}
+    for label, turn in (('per-request clients', per_request_turn), ('shared client', shared_turn)):
+        print(f"Running {label}...")
+        results[label] = run_mode(server, turn, args.turns, args.concurrency)
+
+    print()
+    print(f"{'Mode':<22} {'requests':>9} {'connections':>12} {'reused':>7} {'setup p50':>10} "
+          f"{'turn p50':>9} {'turn p95':>9}")
+    for label, r in results.items():
+        print(f"{label:<22} {r['requests']:>9} {r['connections']:>12} {r['reuse_rate']:>7.0%} "
+              f"{r['setup_p50']:>8.1f}ms {r['p50']:>7.1f}ms {r['p95']:>7.1f}ms")
+    print()
+    for client, pool in connection_stats().items():
+        print(f"Shared {client}: {pool['requests']} requests on {pool['connections']} connections "
+              f"({pool['reuse_rate']:.0%} reused)")
+    print("=" * 80)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
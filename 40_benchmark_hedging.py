@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request hedging against heavy-tailed latency.
+
+Runs concurrent calls against two stand-ins whose latency is usually around
+--base-ms and, for --slow-share of requests, --slow-ms (a throttled or stuck
+request that a second request would not hit):
+- model: a strands Model streaming a short answer, called through HedgedModel
+  (hedged on the time to the first event)
+- retrieve: a blocking call, as boto's retrieve and the gateway's call_tool_sync
+  are, called through Hedger.call()
+
+Each is run without and with hedging. Reported per mode: p50 / p95 / p99 / max
+latency, requests sent to the stand-in (the extra load), hedges won and hedges
+the budget denied. The first MIN_SAMPLES calls of each kind only build the
+latency history.
+
+Usage:
+    python 40_benchmark_hedging.py [--calls 2000] [--concurrency 16] [--slow-share 0.03]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from strands.models import Model
+
+from hedging import HedgeBudget, HedgedModel, Hedger
+
+
+class StandIn:
+    """Heavy-tailed latency: base latency with jitter, slow_s for a share of requests"""
+
+    def __init__(self, base_s, slow_s, slow_share, seed=7):
+        self.base_s = base_s
+        self.slow_s = slow_s
+        self.slow_share = slow_share
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def latency(self):
+        with self.lock:
+            self.requests += 1
+            if self.random.random() < self.slow_share:
+                return self.slow_s
+            return self.base_s * self.random.uniform(0.7, 1.6)
+
+    def retrieve(self):
+        time.sleep(self.latency())
+        return {'retrievalResults': []}
+
+
+class StandInModel(Model):
+    """Streams a short answer after the stand-in's latency"""
+
+    def __init__(self, stand_in):
+        self.stand_in = stand_in
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {'model_id': 'stand-in'}
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, cancel_signal=None, **kwargs):
+        await asyncio.sleep(self.stand_in.latency())
+        yield {'messageStart': {'role': 'assistant'}}
+        yield {'contentBlockDelta': {'delta': {'text': 'ok'}}}
+        yield {'contentBlockStop': {}}
+        yield {'messageStop': {'stopReason': 'end_turn'}}
+
+
+def model_call(model):
+    async def run():
+        async for _ in model.stream([{'role': 'user', 'content': [{'text': 'hi'}]}]):
+            pass
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start
+
+
+def retrieve_call(hedger, stand_in):
+    start = time.perf_counter()
+    hedger.call('retrieve', stand_in.retrieve)
+    return time.perf_counter() - start
+
+
+def run_mode(kind, hedged, args):
+    stand_in = StandIn(args.base_ms / 1000, args.slow_ms / 1000, args.slow_share)
+    hedger = Hedger(enabled=hedged, budget=HedgeBudget(ratio=args.budget))
+    model = HedgedModel(StandInModel(stand_in), hedger)
+    if kind == 'model':
+        call = lambda _: model_call(model)
+    else:
+        call = lambda _: retrieve_call(hedger, stand_in)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = sorted(seconds * 1000 for seconds in pool.map(call, range(args.calls)))
+    stats = hedger.stats()
+    return {
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(0.95 * len(latencies))],
+        'p99': latencies[int(0.99 * len(latencies))],
+        'max': latencies[-1],
+        'requests': stand_in.requests,
+        'extra': stand_in.requests / args.calls - 1,
+        'hedge_wins': stats['hedge_wins'],
+        'budget_denied': stats['budget_denied'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request hedging against heavy-tailed latency")
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--base-ms', type=float, default=40.0)
+    parser.add_argument('--slow-ms', type=float, default=1000.0)
+    parser.add_argument('--slow-share', type=float, default=0.03)
+    parser.add_argument('--budget', type=float, default=0.05, help="Hedges allowed per request")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("REQUEST HEDGING")
+    print("=" * 80)
+    print(f"{args.calls} calls at concurrency {args.concurrency}; {args.base_ms:.0f} ms typical latency, "
+          f"{args.slow_share:.0%} of requests take {args.slow_ms:.0f} ms; hedge budget {args.budget:.0%}")
+    print()
+
+    print(f"{'Call':<10} {'Mode':<10} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'requests':>9} "
+          f"{'extra':>6} {'hedge wins':>11} {'denied':>7}")
+    for kind in ('model', 'retrieve'):
+        for hedged in (False, True):
+            r = run_mode(kind, hedged, args)
+            mode = 'hedged' if hedged else 'single'
+            print(f"{kind:<10} {mode:<10} {r['p50']:>6.0f}ms {r['p95']:>6.0f}ms {r['p99']:>6.0f}ms "
+                  f"{r['max']:>6.0f}ms {r['requests']:>9} {r['extra']:>6.1%} {r['hedge_wins']:>11} "
+                  f"{r['budget_denied']:>7}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
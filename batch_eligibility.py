@@ -0,0 +1,230 @@
+"""
+Batch Return Eligibility
+
+Vectorized version of check_return_eligibility for bulk flows (nightly jobs,
+"which of my orders are returnable" over a full order history).
+
+Purchase dates and categories are passed as columns. Dates are parsed once into a
+NumPy datetime64[D] array by the scalar tool's rules (strptime '%Y-%m-%d'):
+canonical YYYY-MM-DD strings are validated and cast as a whole column, any other
+string (e.g. 2026-1-5) goes through strptime itself, and strings it rejects
+(2026-10, 2026-10-01T12:00, leading or trailing spaces) become invalid dates.
+Category windows are looked up once per distinct
+category, and eligibility / days remaining are computed with array arithmetic.
+Return windows come from the shared policy rules engine (policy_rules.py).
+Results are returned in columnar form.
+
+Categories can also be passed dictionary-encoded (integer codes plus a labels list),
+which skips the per-row string handling entirely for very large batches.
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from strands import tool
+
+from policy_rules import CompiledPolicy, get_policy_engine
+
+# Status codes in the 'status' column
+STATUS_ELIGIBLE = 0
+STATUS_EXPIRED = 1
+STATUS_FUTURE = 2
+STATUS_INVALID_DATE = 3
+
+_NAT = np.datetime64('NaT', 'D')
+
+# Character positions of the digits and dashes of a canonical YYYY-MM-DD string
+_DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9]
+_DASH_POSITIONS = [4, 7]
+
+
+def _canonical_dates(dates: np.ndarray) -> np.ndarray:
+    """
+    Mask of the entries of a str or bytes column that are exactly YYYY-MM-DD in
+    ASCII digits (year 0000 excluded: strptime rejects it, datetime64 does not).
+    """
+    width = dates.dtype.itemsize // (4 if dates.dtype.kind == 'U' else 1)
+    if width < 10 or not len(dates):
+        return np.zeros(len(dates), dtype=bool)
+    chars = np.ascontiguousarray(dates).view(np.uint32 if dates.dtype.kind == 'U' else np.uint8)
+    chars = chars.reshape(len(dates), width)
+    digits = chars[:, _DIGIT_POSITIONS]
+    mask = ((digits >= ord('0')) & (digits <= ord('9'))).all(axis=1)
+    mask &= (chars[:, _DASH_POSITIONS] == ord('-')).all(axis=1)
+    mask &= (chars[:, :4] != ord('0')).any(axis=1)
+    if width > 10:
+        # Longer entries are padded with NUL characters
+        mask &= (chars[:, 10:] == 0).all(axis=1)
+    return mask
+
+
+def _parse_date(value: Any) -> np.datetime64:
+    """One date by check_return_eligibility's rules for strings; NaT when invalid"""
+    if isinstance(value, bytes):
+        value = value.decode(errors='replace')
+    try:
+        if isinstance(value, str):
+            return np.datetime64(datetime.strptime(value, '%Y-%m-%d').date(), 'D')
+        return np.datetime64(value, 'D')
+    except (TypeError, ValueError):
+        return _NAT
+
+
+def parse_dates(purchase_dates: Union[Sequence, np.ndarray]) -> np.ndarray:
+    """
+    Parse a column of YYYY-MM-DD dates into datetime64[D].
+
+    A string is valid exactly when check_return_eligibility accepts it.
+    Unparseable entries become NaT instead of failing the whole batch.
+    """
+    dates = np.asarray(purchase_dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype('datetime64[D]')
+
+    parsed = np.full(len(dates), _NAT)
+    if dates.dtype.kind in 'US':
+        canonical = _canonical_dates(dates)
+        try:
+            parsed[canonical] = dates[canonical].astype('datetime64[D]')
+        except ValueError:
+            # An impossible date (e.g. 2026-02-30) among them
+            canonical[:] = False
+        rest = np.flatnonzero(~canonical)
+    else:
+        rest = range(len(dates))
+    for i in rest:
+        parsed[i] = _parse_date(dates[i].item() if isinstance(dates[i], np.generic) else dates[i])
+    return parsed
+
+
+def lookup_windows(
+    categories: Union[str, Sequence, np.ndarray],
+    size: int,
+    category_labels: Optional[Sequence[str]] = None,
+    policy: Optional[CompiledPolicy] = None,
+    region: Optional[str] = None
+) -> np.ndarray:
+    """
+    Map a column of categories (or a single category) to return windows in days.
+
+    When category_labels is given, categories holds integer codes into that list.
+    """
+    if policy is None:
+        policy = get_policy_engine().policy
+
+    def window_for(category: Any) -> int:
+        if isinstance(category, bytes):
+            category = category.decode()
+        return policy.return_window(str(category), region)
+
+    if isinstance(categories, (str, bytes)):
+        return np.full(size, window_for(categories), dtype=np.int64)
+
+    if category_labels is not None:
+        label_windows = np.array([window_for(label) for label in category_labels], dtype=np.int64)
+        return label_windows[np.asarray(categories, dtype=np.intp)]
+
+    categories = np.asarray(categories)
+    # Look up each distinct category once, then broadcast back to rows
+    unique, inverse = np.unique(categories, return_inverse=True)
+    unique_windows = np.array([window_for(c) for c in unique], dtype=np.int64)
+    return unique_windows[inverse.reshape(-1)]
+
+
+def check_eligibility_batch(
+    purchase_dates: Union[Sequence, np.ndarray],
+    categories: Union[str, Sequence, np.ndarray],
+    today: Optional[Union[date, np.datetime64, str]] = None,
+    category_labels: Optional[Sequence[str]] = None,
+    region: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Check return eligibility for many items at once.
+
+    Args:
+        purchase_dates: Column of purchase dates (YYYY-MM-DD strings or datetime64)
+        categories: Column of product categories, or one category for every row
+        today: Evaluation date (defaults to the current local date)
+        category_labels: Labels for dictionary-encoded categories (categories are then integer codes)
+        region: Policy region for region-specific return windows
+
+    Returns:
+        Dictionary of equal-length arrays: eligible, days_remaining,
+        days_since_purchase, window and status (STATUS_* codes)
+    """
+    dates = parse_dates(purchase_dates)
+    size = len(dates)
+    if today is None:
+        today = date.today()
+    today = np.datetime64(today, 'D')
+
+    windows = lookup_windows(categories, size, category_labels, region=region)
+    invalid = np.isnat(dates)
+    days_since = (today - dates).astype(np.int64)
+    days_since[invalid] = 0
+
+    future = (days_since < 0) & ~invalid
+    eligible = (days_since <= windows) & ~future & ~invalid
+    days_remaining = np.where(eligible, windows - days_since, 0)
+
+    status = np.full(size, STATUS_EXPIRED, dtype=np.int8)
+    status[eligible] = STATUS_ELIGIBLE
+    status[future] = STATUS_FUTURE
+    status[invalid] = STATUS_INVALID_DATE
+
+    return {
+        'eligible': eligible,
+        'days_remaining': days_remaining,
+        'days_since_purchase': days_since,
+        'window': windows,
+        'status': status
+    }
+
+
+def status_reasons(result: Dict[str, np.ndarray]) -> List[str]:
+    """Render the per-row reason strings used by the scalar tool"""
+    reasons = []
+    for status, window in zip(result['status'].tolist(), result['window'].tolist()):
+        if status == STATUS_ELIGIBLE:
+            reasons.append(f'Within {window}-day return window')
+        elif status == STATUS_EXPIRED:
+            reasons.append(f'Exceeded {window}-day return window')
+        elif status == STATUS_FUTURE:
+            reasons.append('Purchase date is in the future')
+        else:
+            reasons.append('Invalid date format. Use YYYY-MM-DD')
+    return reasons
+
+
+@tool
+def check_return_eligibility_batch(purchase_dates: List[str], categories: List[str]) -> dict:
+    """
+    Check return eligibility for several items at once.
+
+    Use this instead of calling check_return_eligibility repeatedly when the customer
+    asks about multiple items or orders.
+
+    Args:
+        purchase_dates: Purchase dates in YYYY-MM-DD format, one per item
+        categories: Product categories, one per item (or a single category for all items)
+
+    Returns:
+        Columnar dictionary with one list entry per item: eligible, days_remaining, reason
+    """
+    try:
+        if len(categories) == 1:
+            categories = categories[0]
+        elif len(categories) != len(purchase_dates):
+            return {'error': 'purchase_dates and categories must have the same length'}
+
+        result = check_eligibility_batch(purchase_dates, categories)
+        return {
+            'count': len(purchase_dates),
+            'eligible': result['eligible'].tolist(),
+            'days_remaining': result['days_remaining'].tolist(),
+            'reason': status_reasons(result)
+        }
+    except Exception as e:
+        print(f"Error in check_return_eligibility_batch: {e}")
+        return {'error': f'Error checking eligibility: {str(e)}'}
@@ -0,0 +1,270 @@
+"""
+Batch Refund Quoting
+
+Exact, vectorized refund calculation for multi-item orders and bulk refund
+simulations (e.g. re-quoting open returns when the policy rules change).
+
+All money is integer cents (int64) and all rates are integer basis points, so
+per-item amounts and per-order totals never drift the way repeated float
+round(..., 2) calls do. Conditions and return reasons are passed
+dictionary-encoded: integer codes into the policy's label lists
+(policy_labels()), or caller-supplied ones. A policy's labels are
+CONDITION_LABELS / REASON_LABELS followed by any other condition or reason its
+rules name, so the standard codes stay the same across policy reloads and a
+condition or reason override added to the rules file is quoted exactly as the
+scalar calculate_refund quotes it. quote_refunds_by_label() encodes and quotes
+against one policy snapshot.
+
+Rounding: the refund is rounded half-up to the cent (half cents go to the
+customer) and the deduction is price - refund, so refund + deduction always
+equals the price exactly.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from strands import tool
+
+from policy_rules import DEFAULT_KEY, CompiledPolicy, get_policy_engine
+
+# Standard labels: the first codes of every policy's label lists
+CONDITION_LABELS = ('new', 'opened', 'used', 'damaged')
+REASON_LABELS = ('defective', 'wrong_item', 'changed_mind', 'not_as_described')
+
+BASIS_POINTS = 10_000
+NO_OVERRIDE = -1
+
+# Compiled rate tables per (policy, region, labels); a reload creates a new
+# CompiledPolicy object, so stale tables are never reused
+_TABLE_CACHE: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+_TABLE_CACHE_LIMIT = 32
+
+# Label lists per policy (same invalidation as the rate tables)
+_LABEL_CACHE: Dict[int, Tuple[CompiledPolicy, Tuple[Tuple[str, ...], Tuple[str, ...]]]] = {}
+
+
+def to_cents(amounts) -> np.ndarray:
+    """Convert dollar amounts to integer cents (rounded to the nearest cent)"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def encode_labels(values: Sequence[str], labels: Sequence[str]) -> np.ndarray:
+    """
+    Dictionary-encode string values against a label list.
+
+    Values not in labels get code len(labels), which maps to the policy default.
+    """
+    index = {label: code for code, label in enumerate(labels)}
+    unknown = len(labels)
+    return np.array([index.get(str(v).lower(), unknown) for v in values], dtype=np.int16)
+
+
+def policy_labels(policy: Optional[CompiledPolicy] = None) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    (condition labels, reason labels) of a policy: the standard labels, then
+    every other condition and reason its rules name in any region, sorted.
+    """
+    if policy is None:
+        policy = get_policy_engine().policy
+    cached = _LABEL_CACHE.get(id(policy))
+    if cached is not None and cached[0] is policy:
+        return cached[1]
+
+    conditions = {condition for _, condition in policy.condition_rates} - {DEFAULT_KEY} - set(CONDITION_LABELS)
+    reasons = {reason for _, reason in policy.reason_overrides} - set(REASON_LABELS)
+    labels = (CONDITION_LABELS + tuple(sorted(conditions)), REASON_LABELS + tuple(sorted(reasons)))
+
+    if len(_LABEL_CACHE) >= _TABLE_CACHE_LIMIT:
+        _LABEL_CACHE.clear()
+    _LABEL_CACHE[id(policy)] = (policy, labels)
+    return labels
+
+
+def refund_tables(
+    policy: Optional[CompiledPolicy] = None,
+    region: Optional[str] = None,
+    condition_labels: Optional[Sequence[str]] = None,
+    reason_labels: Optional[Sequence[str]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compile the policy into vectorized rate tables (labels default to policy_labels(policy)).
+
+    Returns:
+        (condition_bp, reason_override_bp): deduction rates in basis points indexed by
+        condition code, and override rates indexed by reason code (NO_OVERRIDE when the
+        reason does not override). The last entry of each table is for unknown codes.
+    """
+    if policy is None:
+        policy = get_policy_engine().policy
+    default_conditions, default_reasons = policy_labels(policy)
+    condition_labels = default_conditions if condition_labels is None else condition_labels
+    reason_labels = default_reasons if reason_labels is None else reason_labels
+    key = (id(policy), region, tuple(condition_labels), tuple(reason_labels))
+    cached = _TABLE_CACHE.get(key)
+    if cached is not None and cached[0] is policy:
+        return cached[1]
+
+    condition_bp = np.array(
+        [round(policy.condition_rate(label, region) * BASIS_POINTS) for label in condition_labels]
+        + [round(policy.condition_rate('', region) * BASIS_POINTS)],
+        dtype=np.int64
+    )
+    reason_bp = []
+    for label in reason_labels:
+        override = policy.reason_override(label, region)
+        reason_bp.append(NO_OVERRIDE if override is None else round(override[0] * BASIS_POINTS))
+    reason_bp.append(NO_OVERRIDE)
+    tables = (condition_bp, np.array(reason_bp, dtype=np.int64))
+
+    if len(_TABLE_CACHE) >= _TABLE_CACHE_LIMIT:
+        _TABLE_CACHE.clear()
+    _TABLE_CACHE[key] = (policy, tables)
+    return tables
+
+
+def quote_refunds_batch(
+    price_cents,
+    condition_codes,
+    reason_codes,
+    order_index=None,
+    num_orders: Optional[int] = None,
+    policy: Optional[CompiledPolicy] = None,
+    region: Optional[str] = None,
+    condition_labels: Optional[Sequence[str]] = None,
+    reason_labels: Optional[Sequence[str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Quote refunds for many items at once.
+
+    Args:
+        price_cents: Item prices in integer cents
+        condition_codes: Codes into condition_labels (len(condition_labels) = unknown)
+        reason_codes: Codes into reason_labels (len(reason_labels) = unknown)
+        order_index: Optional 0-based order number per item, for per-order totals
+        num_orders: Number of orders (defaults to max(order_index) + 1)
+        policy: Policy to apply (defaults to the active policy)
+        region: Policy region
+        condition_labels, reason_labels: Label lists the codes index (default: policy_labels(policy))
+
+    Returns:
+        Dictionary of int64 arrays: refund_cents, deduction_cents, rate_bp, valid
+        (False for negative prices), overridden (reason override applied); plus
+        order_refund_cents, order_deduction_cents and order_price_cents when
+        order_index is given
+    """
+    price_cents = np.asarray(price_cents, dtype=np.int64)
+    if policy is None:
+        policy = get_policy_engine().policy
+    condition_bp, reason_bp = refund_tables(policy, region, condition_labels, reason_labels)
+
+    conditions = np.minimum(np.asarray(condition_codes, dtype=np.intp), len(condition_bp) - 1)
+    reasons = np.minimum(np.asarray(reason_codes, dtype=np.intp), len(reason_bp) - 1)
+
+    override_bp = reason_bp[reasons]
+    overridden = override_bp != NO_OVERRIDE
+    rate_bp = np.where(overridden, override_bp, condition_bp[conditions])
+
+    valid = price_cents >= 0
+    safe_price = np.where(valid, price_cents, 0)
+    # Deduction rounded half-down (refund half-up) in pure integer arithmetic
+    deduction_cents = (safe_price * rate_bp + BASIS_POINTS // 2 - 1) // BASIS_POINTS
+    refund_cents = safe_price - deduction_cents
+
+    result = {
+        'refund_cents': refund_cents,
+        'deduction_cents': deduction_cents,
+        'rate_bp': rate_bp,
+        'valid': valid,
+        'overridden': overridden
+    }
+
+    if order_index is not None:
+        order_index = np.asarray(order_index, dtype=np.intp)
+        if num_orders is None:
+            num_orders = int(order_index.max()) + 1 if order_index.size else 0
+        for name, values in (('order_refund_cents', refund_cents),
+                             ('order_deduction_cents', deduction_cents),
+                             ('order_price_cents', safe_price)):
+            totals = np.zeros(num_orders, dtype=np.int64)
+            np.add.at(totals, order_index, values)
+            result[name] = totals
+
+    return result
+
+
+def quote_refunds_by_label(
+    price_cents,
+    conditions: Sequence[str],
+    reasons: Sequence[str],
+    order_index=None,
+    num_orders: Optional[int] = None,
+    policy: Optional[CompiledPolicy] = None,
+    region: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    quote_refunds_batch() for condition and reason strings, encoded against the
+    labels of the same policy snapshot the rates come from (a reload in between
+    cannot shift the codes).
+    """
+    if policy is None:
+        policy = get_policy_engine().policy
+    condition_labels, reason_labels = policy_labels(policy)
+    return quote_refunds_batch(
+        price_cents,
+        encode_labels(conditions, condition_labels),
+        encode_labels(reasons, reason_labels),
+        order_index=order_index,
+        num_orders=num_orders,
+        policy=policy,
+        region=region,
+        condition_labels=condition_labels,
+        reason_labels=reason_labels
+    )
+
+
+def format_cents(cents: int) -> float:
+    """Cents to a dollar amount for display"""
+    return int(cents) / 100
+
+
+@tool
+def calculate_refund_batch(original_prices: List[float], conditions: List[str],
+                           return_reasons: List[str]) -> dict:
+    """
+    Calculate refunds for several items of a multi-item return at once, with an exact order total.
+
+    Use this instead of calling calculate_refund_amount repeatedly when the customer
+    returns more than one item.
+
+    Args:
+        original_prices: Original purchase price of each item
+        conditions: Condition of each item ('new', 'opened', 'used', 'damaged')
+        return_reasons: Reason for each return ('defective', 'wrong_item', 'changed_mind', 'not_as_described')
+
+    Returns:
+        Dictionary with per-item refund_amount and deduction lists and order totals
+    """
+    try:
+        if not len(original_prices) == len(conditions) == len(return_reasons):
+            return {'error': 'original_prices, conditions and return_reasons must have the same length'}
+
+        result = quote_refunds_by_label(
+            to_cents(original_prices),
+            conditions,
+            return_reasons,
+            order_index=np.zeros(len(original_prices), dtype=np.intp),
+            num_orders=1
+        )
+        return {
+            'count': len(original_prices),
+            'refund_amount': [format_cents(c) for c in result['refund_cents'].tolist()],
+            'deduction': [format_cents(c) for c in result['deduction_cents'].tolist()],
+            'deduction_percent': [bp / 100 for bp in result['rate_bp'].tolist()],
+            'invalid_price': [not v for v in result['valid'].tolist()],
+            'total_refund': format_cents(result['order_refund_cents'][0]),
+            'total_deduction': format_cents(result['order_deduction_cents'][0]),
+            'total_original_price': format_cents(result['order_price_cents'][0])
+        }
+    except Exception as e:
+        print(f"Error in calculate_refund_batch: {e}")
+        return {'error': f'Error calculating refunds: {str(e)}'}
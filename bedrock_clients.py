@@ -0,0 +1,131 @@
+"""
+Bedrock Clients
+
+Process-wide, tuned boto3 clients for Bedrock.
+
+BedrockModel creates a boto3 client (and with it a connection pool) in its
+constructor, and the strands_tools retrieve tool creates a bedrock-agent-runtime
+client on every call; every new client loads the service model again and opens
+new TLS connections. Here one client per (service, region) is created on first
+use and shared by every agent, model and tool in the process:
+- max_pool_connections sized for concurrent invocations (one connection per
+  in-flight model stream or retrieve call)
+- TCP keep-alive, so idle pooled connections survive between requests
+- adaptive retry mode: retries with backoff and client-side rate limiting when
+  Bedrock throttles, instead of every caller retrying at full speed
+- short connect timeout, read timeout long enough for a streamed model turn
+
+BedrockModel takes a boto session rather than a client, so
+create_bedrock_model() (prompt_cache.py) passes shared_session(region), whose
+client() returns the shared client.
+
+connection_stats() reports requests sent, connections opened and the
+connection reuse rate of each shared client (from its urllib3 pools).
+
+Usage:
+    client = bedrock_client('bedrock-agent-runtime')
+    model = BedrockModel(model_id=MODEL_ID, boto_session=shared_session())
+    print(connection_stats())
+
+Environment: BEDROCK_MAX_POOL_CONNECTIONS, BEDROCK_CONNECT_TIMEOUT,
+BEDROCK_READ_TIMEOUT, BEDROCK_MAX_ATTEMPTS (connection reuse under concurrent
+load: 39_benchmark_bedrock_clients.py).
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+REGION = os.environ.get('AWS_REGION', 'us-west-2')
+
+MAX_POOL_CONNECTIONS = int(os.environ.get('BEDROCK_MAX_POOL_CONNECTIONS', 50))
+CONNECT_TIMEOUT = float(os.environ.get('BEDROCK_CONNECT_TIMEOUT', 3))
+# Model turns stream for up to a few minutes (BedrockModel's own default is 120 s)
+READ_TIMEOUT = float(os.environ.get('BEDROCK_READ_TIMEOUT', 120))
+MAX_ATTEMPTS = int(os.environ.get('BEDROCK_MAX_ATTEMPTS', 4))
+
+
+def client_config(**overrides: Any) -> Config:
+    """Connection pool, keep-alive, timeout and adaptive retry settings for Bedrock clients"""
+    settings = {
+        'max_pool_connections': MAX_POOL_CONNECTIONS,
+        'tcp_keepalive': True,
+        'connect_timeout': CONNECT_TIMEOUT,
+        'read_timeout': READ_TIMEOUT,
+        'retries': {'mode': 'adaptive', 'max_attempts': MAX_ATTEMPTS},
+        'user_agent_extra': 'strands-agents',
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+_clients: Dict[Tuple[str, str, Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def bedrock_client(service: str = 'bedrock-runtime', region: Optional[str] = None,
+                   endpoint_url: Optional[str] = None) -> Any:
+    """Shared client for a Bedrock service and region, created on first use"""
+    key = (service, region or REGION, endpoint_url)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = boto3.session.Session().client(
+                    service, region_name=key[1], endpoint_url=endpoint_url, config=client_config()
+                )
+    return client
+
+
+class SharedClientSession:
+    """
+    Stand-in for a boto3 Session whose client() returns the shared clients.
+
+    BedrockModel only reads region_name and calls client(service_name=...,
+    config=..., endpoint_url=..., region_name=...) on the session it is given.
+    The config it passes (user agent, its default read timeout) is ignored in
+    favour of client_config().
+    """
+
+    def __init__(self, region: Optional[str] = None):
+        self.region_name = region or REGION
+
+    def client(self, service_name: str, region_name: Optional[str] = None, endpoint_url: Optional[str] = None,
+               **kwargs: Any) -> Any:
+        return bedrock_client(service_name, region_name or self.region_name, endpoint_url)
+
+
+def shared_session(region: Optional[str] = None) -> SharedClientSession:
+    """Session to pass as BedrockModel(boto_session=...) so the model uses the shared client"""
+    return SharedClientSession(region)
+
+
+def pool_stats(client: Any) -> Dict[str, int]:
+    """Requests sent and connections opened by a client's urllib3 connection pools"""
+    manager = client._endpoint.http_session._manager
+    requests = connections = 0
+    for key in list(manager.pools.keys()):
+        pool = manager.pools.get(key)
+        if pool is not None:
+            requests += pool.num_requests
+            connections += pool.num_connections
+    return {'requests': requests, 'connections': connections}
+
+
+def connection_stats() -> Dict[str, Dict[str, Any]]:
+    """Requests, connections opened and connection reuse rate per shared client ('service region')"""
+    with _clients_lock:
+        clients = dict(_clients)
+    stats = {}
+    for (service, region, _), client in clients.items():
+        counts = pool_stats(client)
+        reused = counts['requests'] - counts['connections']
+        stats[f'{service} {region}'] = {
+            **counts,
+            'reuse_rate': max(0, reused) / counts['requests'] if counts['requests'] else 0.0,
+        }
+    return stats
@@ -0,0 +1,327 @@
+"""
+Bulk Returns Pipeline
+
+Processes a CSV or JSONL export of return requests through order lookup, return
+eligibility and refund calculation without the model, for 29_bulk_returns.py.
+
+Input records (CSV header or JSONL keys, case-insensitive):
+- order_id (required), condition, return_reason, request_id
+- optional purchase_date, category and price, which take precedence over the order record
+
+The pipeline has three stages running concurrently:
+1. The parent process reads raw lines and cuts them into chunks of whole records
+   (CSV records may span lines inside quoted fields)
+2. Worker processes parse a chunk, look up its orders in the order store (one
+   batched read per chunk, see order_store.py), check eligibility and quote
+   refunds with the vectorized batch functions, and format the report lines
+3. The parent process writes finished chunks to the report in input order
+
+At most max_in_flight chunks are queued or being processed at any time, so memory
+stays flat regardless of the input size. Inputs and reports ending in .gz are
+read and written gzip-compressed.
+"""
+
+import csv
+import gzip
+import io
+import json
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from batch_eligibility import check_eligibility_batch, status_reasons
+from batch_refunds import quote_refunds_by_label, to_cents
+from order_store import OrderStore, load_sample_orders, open_order_store
+
+DEFAULT_CHUNK_SIZE = 10_000
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Record status in the report
+STATUS_OK = 'ok'
+STATUS_NOT_FOUND = 'order_not_found'
+STATUS_INVALID = 'invalid_request'
+
+# Reason calculate_refund gives for a negative price
+INVALID_PRICE_REASON = 'Invalid price'
+
+# Order store of the current process (SQLite connections must not cross a fork)
+_store: Optional[OrderStore] = None
+_store_pid: Optional[int] = None
+
+REPORT_FIELDS = [
+    'row', 'request_id', 'order_id', 'status', 'error',
+    'purchase_date', 'category', 'price', 'condition', 'return_reason',
+    'eligible', 'days_remaining', 'eligibility_reason',
+    'refund_amount', 'deduction', 'deduction_percent'
+]
+MONEY_FIELDS = ('price', 'refund_amount', 'deduction')
+
+
+def detect_format(path: str) -> str:
+    """'csv' or 'jsonl' from the file extension (ignoring a trailing .gz)"""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'jsonl' if name.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def open_text(path: str, mode: str = 'r'):
+    """Open a text file for line-by-line CSV/JSONL I/O, gzip-compressed if it ends in .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def get_store() -> OrderStore:
+    """Order store for this process, opened on first use"""
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        _store = open_order_store(default_orders=load_sample_orders)
+        _store_pid = os.getpid()
+    return _store
+
+
+def read_chunks(lines: Iterable[str], input_format: str,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Cut raw input lines into chunks of whole records.
+
+    Yields (index of the first record, lines). A CSV line that leaves an odd number
+    of quote characters open continues the same record on the next line. For CSV
+    the header line is not included; pass it to process_chunk separately.
+    """
+    chunk: List[str] = []
+    records = 0
+    first = 0
+    open_quote = False
+    for line in lines:
+        if input_format == 'csv':
+            if not open_quote and not line.strip():
+                # Blank line between records (inside a quoted field it is part of the value)
+                continue
+            chunk.append(line)
+            if line.count('"') % 2:
+                open_quote = not open_quote
+            if open_quote:
+                continue
+        elif not line.strip():
+            continue
+        else:
+            chunk.append(line)
+
+        records += 1
+        if records - first >= chunk_size:
+            yield first, chunk
+            chunk = []
+            first = records
+
+    if chunk:
+        yield first, chunk
+
+
+def _parse_records(lines: List[str], input_format: str, header: Optional[List[str]]) -> List[Any]:
+    """Records as dicts with lower-cased keys (or an error string for unparseable records)"""
+    if input_format == 'csv':
+        return [dict(zip(header, values)) for values in csv.reader(lines)]
+
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            records.append(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(record, dict):
+            records.append('Invalid JSON: expected an object')
+            continue
+        records.append({str(k).lower(): v for k, v in record.items()})
+    return records
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def process_chunk(lines: List[str], first_row: int, input_format: str, output_format: str,
+                  header: Optional[List[str]], today: str) -> Tuple[str, Dict[str, int]]:
+    """
+    Process one chunk of records (runs in a worker process).
+
+    Args:
+        lines: Raw lines holding whole records
+        first_row: 0-based index of the chunk's first record in the input
+        input_format: 'csv' or 'jsonl'
+        output_format: 'csv' or 'jsonl'
+        header: Lower-cased CSV column names (CSV input only)
+        today: Evaluation date (YYYY-MM-DD), the same for every chunk of a run
+
+    Returns:
+        (formatted report lines, counters for the chunk)
+    """
+    records = _parse_records(lines, input_format, header)
+    rows: List[Dict[str, Any]] = []
+    # Rows that passed lookup and validation, as columns for the batch functions
+    ok_index: List[int] = []
+    dates: List[str] = []
+    categories: List[str] = []
+    prices: List[float] = []
+    conditions: List[str] = []
+    reasons: List[str] = []
+
+    # One batched read from the order store for the whole chunk
+    orders = get_store().get_many({_text(record.get('order_id')).upper()
+                                   for record in records if isinstance(record, dict)} - {''})
+
+    for offset, record in enumerate(records):
+        row = {'row': first_row + offset + 1, 'status': STATUS_INVALID}
+        rows.append(row)
+        if isinstance(record, str):
+            row['error'] = record
+            continue
+
+        order_id = _text(record.get('order_id')).upper()
+        row.update({
+            'request_id': _text(record.get('request_id')),
+            'order_id': order_id,
+            'condition': _text(record.get('condition')).lower(),
+            'return_reason': _text(record.get('return_reason')).lower()
+        })
+        if not order_id:
+            row['error'] = 'order_id is required'
+            continue
+
+        order = orders.get(order_id)
+        if order is None:
+            row['status'] = STATUS_NOT_FOUND
+            row['error'] = f'Order {order_id} not found'
+            continue
+
+        purchase_date = _text(record.get('purchase_date')) or order['purchase_date']
+        category = _text(record.get('category')) or order['category']
+        price = record.get('price')
+        try:
+            price = float(order['amount'] if price in (None, '') else price)
+            if not math.isfinite(price):
+                raise ValueError(price)
+        except (TypeError, ValueError):
+            row['error'] = f'{INVALID_PRICE_REASON}: {record.get("price")}'
+            continue
+
+        row.update({'status': STATUS_OK, 'purchase_date': purchase_date,
+                    'category': category, 'price': price})
+        ok_index.append(offset)
+        dates.append(purchase_date)
+        categories.append(category)
+        prices.append(price)
+        conditions.append(row['condition'])
+        reasons.append(row['return_reason'])
+
+    counts = {'rows': len(rows), STATUS_OK: len(ok_index), 'eligible': 0, 'refund_cents': 0}
+    if ok_index:
+        eligibility = check_eligibility_batch(dates, categories, today=today)
+        quote = quote_refunds_by_label(to_cents(prices), conditions, reasons)
+        eligible = eligibility['eligible'] & quote['valid']
+        counts['eligible'] = int(eligible.sum())
+        counts['refund_cents'] = int(quote['refund_cents'][eligible].sum())
+
+        for offset, is_eligible, days, reason, valid, refund, deduction, rate in zip(
+                ok_index, eligible.tolist(), eligibility['days_remaining'].tolist(), status_reasons(eligibility),
+                quote['valid'].tolist(), quote['refund_cents'].tolist(), quote['deduction_cents'].tolist(),
+                quote['rate_bp'].tolist()):
+            row = rows[offset]
+            if not valid:
+                # Not returnable, whatever the purchase date says
+                row.update({'status': STATUS_INVALID, 'error': f'{INVALID_PRICE_REASON}: {row["price"]}',
+                            'eligible': False, 'days_remaining': 0, 'eligibility_reason': INVALID_PRICE_REASON})
+                continue
+            row.update({'eligible': is_eligible, 'days_remaining': days, 'eligibility_reason': reason})
+            if is_eligible:
+                # Refunds are only quoted for returns that are accepted
+                row.update({'refund_amount': refund / 100, 'deduction': deduction / 100,
+                            'deduction_percent': rate / 100})
+        counts[STATUS_OK] -= int((~quote['valid']).sum())
+
+    counts[STATUS_NOT_FOUND] = sum(1 for row in rows if row['status'] == STATUS_NOT_FOUND)
+    counts[STATUS_INVALID] = counts['rows'] - counts[STATUS_OK] - counts[STATUS_NOT_FOUND]
+    return format_rows(rows, output_format), counts
+
+
+def format_rows(rows: List[Dict[str, Any]], output_format: str) -> str:
+    """Report lines for rows (CSV without header, or JSONL)"""
+    if output_format == 'jsonl':
+        return ''.join(json.dumps({field: row.get(field) for field in REPORT_FIELDS}) + '\n' for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        for field in MONEY_FIELDS:
+            value = row.get(field)
+            if value is not None:
+                row[field] = f'{value:.2f}'
+        # csv writes None as an empty field
+        writer.writerow([row.get(field) for field in REPORT_FIELDS])
+    return buffer.getvalue()
+
+
+def run_pipeline(input_path: str, output_path: str, workers: int = DEFAULT_WORKERS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_in_flight: Optional[int] = None,
+                 today: Optional[str] = None,
+                 progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+    """
+    Process a file of return requests into a report.
+
+    Args:
+        input_path: CSV or JSONL input (optionally .gz)
+        output_path: CSV or JSONL report (optionally .gz), format from the extension
+        workers: Worker processes (1 processes chunks in this process)
+        chunk_size: Records per chunk
+        max_in_flight: Chunks queued or running at once (defaults to 2 per worker)
+        today: Evaluation date (defaults to the current local date)
+        progress: Called with the running totals after each chunk is written
+
+    Returns:
+        Totals: rows, ok, order_not_found, invalid_request, eligible, refund_cents
+    """
+    input_format = detect_format(input_path)
+    output_format = detect_format(output_path)
+    today = today or date.today().isoformat()
+    max_in_flight = max_in_flight or 2 * workers
+    totals = {'rows': 0, STATUS_OK: 0, STATUS_NOT_FOUND: 0, STATUS_INVALID: 0, 'eligible': 0, 'refund_cents': 0}
+
+    with open_text(input_path) as source, open_text(output_path, 'w') as report:
+        header = None
+        if input_format == 'csv':
+            header_line = next(source, '')
+            header = [name.strip().lower() for name in next(csv.reader([header_line]), [])]
+            if 'order_id' not in header:
+                raise ValueError(f"{input_path}: CSV header must include an order_id column")
+        if output_format == 'csv':
+            report.write(','.join(REPORT_FIELDS) + '\n')
+
+        def write(result):
+            text, counts = result
+            report.write(text)
+            for key, value in counts.items():
+                totals[key] += value
+            if progress:
+                progress(totals)
+
+        chunks = read_chunks(source, input_format, chunk_size)
+        if workers <= 1:
+            for first_row, lines in chunks:
+                write(process_chunk(lines, first_row, input_format, output_format, header, today))
+            return totals
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for first_row, lines in chunks:
+                pending.append(pool.submit(process_chunk, lines, first_row, input_format,
+                                           output_format, header, today))
+                if len(pending) >= max_in_flight:
+                    # Write in input order; reading pauses until the oldest chunk is done
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    return totals
@@ -0,0 +1,295 @@
+"""
+Request Deadlines
+
+End-to-end time budget for one invoke call.
+
+The caller sets deadline_ms in the payload (default INVOKE_DEADLINE_MS, 60 s;
+0 turns the deadline off). Every stage that waits on another service gets the
+time left instead of its own fixed timeout, whichever is shorter:
+- memory: the AgentCore memory session manager's client timeouts, capped per
+  call and without retries (memory_client_config())
+- the Cognito token requests and the MCP gateway handshake (remaining_timeout())
+- each tool call: ToolLimits (tool_executor.py) caps its per-tool timeout, and
+  tools are not started once the deadline has passed
+- model turns: a model call is not started with less than MIN_MODEL_TURN_MS
+  left, and when the deadline passes during a turn the agent's cancel_signal is
+  set, so the Bedrock stream is closed and running tools are cancelled
+- the fast model tier: model_router.answer() gets the cancel_signal too
+
+When the budget runs out the caller gets the best partial answer instead of a
+timeout: the text the model produced before the deadline, followed by a note
+that the answer is incomplete (or, with nothing produced yet, an apology and a
+request to try again).
+
+Code that does not get the deadline passed - the gateway helpers, the tool
+limits - reads it with current_deadline() inside a `with deadline:` block
+(a context variable; strands copies the context into the threads and tasks it
+runs tools and hooks in). Outside such a block the deadline is unbounded and
+every timeout is its own cap.
+
+Usage:
+    deadline = Deadline.from_payload(payload)
+    deadline.start()
+    try:
+        agent = Agent(model=..., hooks=[..., deadline], callback_handler=deadline.callback_handler())
+        with deadline:
+            response = agent(user_input, cancel_signal=deadline.cancel_signal)
+        if deadline.cut_short:
+            return deadline.partial_answer()
+    finally:
+        deadline.finish()
+"""
+
+import contextvars
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from botocore.config import Config
+from strands.handlers.callback_handler import CompositeCallbackHandler, PrintingCallbackHandler
+from strands.hooks import (AfterInvocationEvent, BeforeModelCallEvent, BeforeToolCallEvent, HookProvider,
+                           HookRegistry)
+
+DEFAULT_DEADLINE_MS = float(os.environ.get('INVOKE_DEADLINE_MS', 60000))
+
+# A model turn started with less time left than this could not finish
+MIN_MODEL_TURN_MS = float(os.environ.get('MIN_MODEL_TURN_MS', 1000))
+
+# Shortest timeout handed to a stage that still has budget
+MIN_STAGE_TIMEOUT_S = 0.1
+
+# Connect and read timeouts of each memory call when a deadline applies
+MEMORY_CONNECT_TIMEOUT_S = 3.0
+MEMORY_READ_TIMEOUT_S = 5.0
+
+INCOMPLETE_NOTE = "(I ran out of time before finishing this answer. Ask me again to continue.)"
+NO_ANSWER_MESSAGE = ("I'm sorry, I couldn't look into this within the time available. "
+                     "Please try again in a moment.")
+
+STAGE_MEMORY = 'memory'
+STAGE_GATEWAY = 'gateway'
+STAGE_MODEL = 'model'
+STAGE_TOOLS = 'tools'
+STAGE_AGENT = 'agent'
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised by Deadline.check() when a stage starts after the deadline"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded before {stage}")
+        self.stage = stage
+
+
+class Deadline(HookProvider):
+    """
+    Time budget of one request, and the hooks that enforce it in an agent.
+
+    As a hook provider it skips model calls that could not finish in the time
+    left and cancels tool calls once the deadline has passed. start() arms a
+    timer that sets cancel_signal when the budget runs out; finish() disarms it
+    and records the request in deadline_stats. Within `with deadline:` it is
+    the current deadline. cut_short is set when the deadline cost the answer
+    content: a stage was skipped, a model call was not made or the agent was
+    cancelled.
+
+    Args:
+        budget_ms: Time budget in milliseconds, or None for no deadline
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget_ms / 1000 if budget_ms else math.inf
+        self.cancel_signal = threading.Event()
+        self.expired_stage: Optional[str] = None
+        self.cut_short = False
+        self._streamed: List[str] = []
+        self._timer: Optional[threading.Timer] = None
+        self._tokens: List[contextvars.Token] = []
+        self._finished = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> 'Deadline':
+        """Deadline from the payload's deadline_ms (default INVOKE_DEADLINE_MS; 0 for none)"""
+        budget_ms = payload.get('deadline_ms', DEFAULT_DEADLINE_MS)
+        try:
+            budget_ms = float(budget_ms)
+        except (TypeError, ValueError):
+            raise ValueError(f"deadline_ms must be a number of milliseconds, got {budget_ms!r}")
+        if budget_ms < 0:
+            raise ValueError(f"deadline_ms must not be negative, got {budget_ms:g}")
+        return cls(budget_ms or None)
+
+    @property
+    def bounded(self) -> bool:
+        return self.budget_ms is not None
+
+    def remaining(self) -> float:
+        """Seconds left (inf without a deadline)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expired_stage is not None or time.monotonic() >= self.expires_at
+
+    def expire(self, stage: str):
+        """Record the stage the budget ran out in (the first one counts) and cancel the agent"""
+        with self._lock:
+            if self.expired_stage is None:
+                self.expired_stage = stage
+        self.cancel_signal.set()
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if the deadline has passed before `stage` starts"""
+        if self.expired():
+            self.expire(stage)
+            self.cut_short = True
+            raise DeadlineExceeded(stage)
+
+    def timeout(self, cap: float) -> float:
+        """Timeout in seconds for a stage: its own cap, or the time left if that is shorter"""
+        return max(MIN_STAGE_TIMEOUT_S, min(cap, self.remaining()))
+
+    def start(self):
+        """Arm the timer that cancels the agent when the budget runs out"""
+        if self.bounded and self._timer is None:
+            self._timer = threading.Timer(self.remaining(), self.expire, args=(STAGE_AGENT,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def finish(self):
+        """Disarm the timer and record the request (once)"""
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        deadline_stats.record(self)
+
+    def __enter__(self) -> 'Deadline':
+        self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._tokens.pop())
+
+    def callback_handler(self) -> CompositeCallbackHandler:
+        """Agent callback handler that prints the stream as usual and keeps its text for partial_answer()"""
+        def capture(**kwargs: Any):
+            data = kwargs.get('data')
+            if data:
+                self._streamed.append(data)
+        return CompositeCallbackHandler(PrintingCallbackHandler(), capture)
+
+    def partial_answer(self, streamed_text: Optional[str] = None) -> str:
+        """
+        Best answer available when the budget ran out.
+
+        Args:
+            streamed_text: Text already produced (defaults to the text captured by callback_handler())
+        """
+        text = (streamed_text if streamed_text is not None else ''.join(self._streamed)).strip()
+        if not text:
+            return NO_ANSWER_MESSAGE
+        return f"{text}\n\n{INCOMPLETE_NOTE}"
+
+    def stream_ending(self, streamed: bool) -> str:
+        """Text to send after a streamed answer the deadline cut short"""
+        return f"\n\n{INCOMPLETE_NOTE}" if streamed else NO_ANSWER_MESSAGE
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._on_before_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._on_before_tool_call)
+        registry.add_callback(AfterInvocationEvent, self._on_after_invocation)
+
+    def _on_before_model_call(self, event: BeforeModelCallEvent):
+        if self.remaining() * 1000 < MIN_MODEL_TURN_MS:
+            self.expire(STAGE_MODEL)
+            self.cut_short = True
+            # Ends the invocation with this as the last assistant message
+            event.cancel = INCOMPLETE_NOTE
+
+    def _on_before_tool_call(self, event: BeforeToolCallEvent):
+        if self.expired():
+            self.expire(STAGE_TOOLS)
+            event.cancel_tool = "Not run: the request's time budget ran out"
+
+    def _on_after_invocation(self, event: AfterInvocationEvent):
+        if event.result is not None and event.result.stop_reason == 'cancelled':
+            self.cut_short = True
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar('deadline', default=None)
+
+# Returned by current_deadline() outside a deadline scope
+_UNBOUNDED = Deadline()
+
+
+def current_deadline() -> Deadline:
+    """The deadline of the request being served (unbounded outside a deadline scope)"""
+    return _current.get() or _UNBOUNDED
+
+
+def remaining_timeout(cap: float) -> float:
+    """Timeout in seconds for a stage of the current request: cap, or the time left if shorter"""
+    return current_deadline().timeout(cap)
+
+
+def memory_client_config(deadline: Optional[Deadline] = None) -> Optional[Config]:
+    """
+    Client config for the AgentCore memory session manager whose timeouts fit
+    in the time left (None without a deadline: the client defaults apply).
+    Memory reads that time out are skipped by the session manager, so the
+    agent runs without the retrieved context rather than failing.
+
+    A memory call is not retried: a second attempt would get the same timeout
+    again and could double the time spent. The config is fixed when the session
+    manager's client is built, so each call is also capped at
+    MEMORY_READ_TIMEOUT_S: the writes the session manager makes after the model
+    turns cannot take the whole budget that was left at build time.
+    """
+    deadline = deadline or current_deadline()
+    if not deadline.bounded:
+        return None
+    timeout = deadline.timeout(MEMORY_READ_TIMEOUT_S)
+    return Config(
+        connect_timeout=min(MEMORY_CONNECT_TIMEOUT_S, timeout),
+        read_timeout=timeout,
+        retries={'mode': 'standard', 'max_attempts': 1},
+    )
+
+
+class DeadlineStats:
+    """Requests served under a deadline, and the stage the budget ran out in for those cut short"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.expired = 0
+        self.expired_by_stage: Dict[str, int] = {}
+
+    def record(self, deadline: Deadline):
+        if not deadline.bounded:
+            return
+        with self._lock:
+            self.requests += 1
+            if deadline.cut_short:
+                self.expired += 1
+                self.expired_by_stage[deadline.expired_stage] = self.expired_by_stage.get(deadline.expired_stage, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'expired': self.expired,
+                'expired_share': self.expired / self.requests if self.requests else 0.0,
+                'expired_by_stage': dict(self.expired_by_stage),
+            }
+
+
+# Shared by every agent and session in the process
+deadline_stats = DeadlineStats()
@@ -0,0 +1,286 @@
+"""
+Deterministic Fast Path
+
+Pre-LLM router for structured questions that have exactly one correct answer:
+"can I return ORD-001?" and "how much will I get back for a used $200 item?".
+
+Questions are matched against anchored, precompiled patterns, so only messages
+that consist of one of these questions (plus greetings/pleasantries) are taken;
+anything longer, combined or ambiguous goes to the model. Matched questions are
+answered by calling lookup_order, check_return_eligibility and
+calculate_refund_amount directly and rendering a template. If a required call
+fails (e.g. the gateway is unavailable) the question also falls back to the model.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from bedrock_agentcore.memory.integrations.strands.bedrock_converter import AgentCoreMemoryConverter
+from strands.types.session import SessionMessage
+
+from policy_rules import get_policy_engine
+
+# Latency samples kept per path for percentiles
+LATENCY_WINDOW = 1000
+
+INTENT_ELIGIBILITY = 'order_eligibility'
+INTENT_REFUND = 'refund_quote'
+
+_GREETING = r"(?:(?:hi|hello|hey)(?:\s+there)?[,!.]?\s+)?(?:please\s+)?"
+_THANKS = r"(?:[,.!]?\s*(?:thanks|thank\s+you)(?:\s+in\s+advance)?)?"
+_END = r"\s*[?.!]*" + _THANKS + r"\s*[.!]*"
+_ORDER = r"(?:(?:my|the)\s+)?(?:order\s+(?:number\s+|#\s*)?)?(?P<order_id>ORD-\d+)"
+_ITEM = r"(?:\s+[a-z][a-z-]*){0,3}?"
+_REASON = (
+    r"(?:,?\s+(?:that\s+(?:is|was)|that's|which\s+(?:is|was)|because\s+(?:it\s+(?:is|was)|it's|i)|as\s+it\s+(?:is|was))\s+"
+    r"(?P<reason>defective|broken|faulty|(?:the\s+)?wrong\s+item|not\s+as\s+described|changed\s+my\s+mind))?"
+)
+
+
+def _price(group: str) -> str:
+    return rf"\$\s*(?P<{group}>\d{{1,3}}(?:,\d{{3}})+(?:\.\d{{1,2}})?|\d+(?:\.\d{{1,2}})?)"
+
+
+def _condition(group: str) -> str:
+    return rf"(?P<{group}>new|opened|open[- ]box|used|damaged)"
+
+
+# "a used $200 laptop" or "a $200 used laptop", optionally followed by the return reason
+_ITEM_DESCRIPTION = (
+    r"(?:a|an|my)\s+(?:" + _condition('condition') + r"\s+" + _price('price') + r"|"
+    + _price('price2') + r"\s+" + _condition('condition2') + r")" + _ITEM + _REASON
+)
+
+ELIGIBILITY_PATTERNS = [
+    re.compile(_GREETING + r"(?:can|could|may)\s+i\s+(?:still\s+)?return\s+" + _ORDER
+               + r"(?:\s+(?:still|now|anymore))?" + _END, re.IGNORECASE),
+    re.compile(_GREETING + r"is\s+" + _ORDER + r"\s+(?:still\s+)?(?:eligible\s+for\s+(?:a\s+)?return|returnable)" + _END,
+               re.IGNORECASE),
+    re.compile(_GREETING + r"(?:check\s+)?(?:the\s+)?return\s+eligibility\s+(?:for|of)\s+" + _ORDER + _END,
+               re.IGNORECASE),
+]
+
+REFUND_PATTERNS = [
+    re.compile(_GREETING + r"how\s+much\s+(?:will|would|do|can|could)\s+i\s+get\s+(?:back\s+)?(?:refunded\s+)?for\s+"
+               + _ITEM_DESCRIPTION + _END, re.IGNORECASE),
+    re.compile(_GREETING + r"what(?:'s|\s+is|\s+would\s+be)\s+(?:the|my)\s+refund\s+(?:for|on)\s+"
+               + _ITEM_DESCRIPTION + _END, re.IGNORECASE),
+]
+
+CONDITION_ALIASES = {'open-box': 'opened', 'open box': 'opened'}
+REASON_ALIASES = {
+    'defective': 'defective',
+    'broken': 'defective',
+    'faulty': 'defective',
+    'wrong item': 'wrong_item',
+    'the wrong item': 'wrong_item',
+    'not as described': 'not_as_described',
+    'changed my mind': 'changed_mind',
+}
+REASON_PHRASES = {
+    'defective': 'defective',
+    'wrong_item': 'the wrong item',
+    'not_as_described': 'not as described',
+    'changed_mind': 'no longer wanted',
+}
+
+
+@dataclass(frozen=True)
+class FastPathAnswer:
+    """A templated answer produced without the model"""
+    intent: str
+    text: str
+    latency_ms: float
+
+
+def decode_lambda_response(payload: Any) -> Tuple[int, Dict[str, Any]]:
+    """
+    Decode an order lookup result into (status code, body).
+
+    Accepts the Lambda's {'statusCode', 'body'} envelope (body as a JSON string or
+    dict), its JSON text as returned through the gateway, or a plain order dict.
+    """
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    if isinstance(payload, dict) and 'statusCode' in payload:
+        body = payload.get('body', {})
+        if isinstance(body, str):
+            body = json.loads(body)
+        return int(payload['statusCode']), body
+    return 200, payload
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+class FastPathRouter:
+    """
+    Routes structured eligibility and refund questions to deterministic handlers.
+
+    Args:
+        check_return_eligibility: (purchase_date, category) -> eligibility dict
+        calculate_refund_amount: (original_price, condition, return_reason) -> refund dict
+        lookup_order: order_id -> (status code, body); None disables order questions
+    """
+
+    def __init__(self, check_return_eligibility: Callable, calculate_refund_amount: Callable,
+                 lookup_order: Optional[Callable[[str], Tuple[int, Dict[str, Any]]]] = None):
+        self.check_return_eligibility = check_return_eligibility
+        self.calculate_refund_amount = calculate_refund_amount
+        self.lookup_order = lookup_order
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.served = 0
+        self.served_by_intent: Dict[str, int] = {}
+        self.fallbacks = 0
+        self._fast_latency = deque(maxlen=LATENCY_WINDOW)
+        self._model_latency = deque(maxlen=LATENCY_WINDOW)
+
+    def route(self, user_input: str) -> Optional[FastPathAnswer]:
+        """Answer the question deterministically, or return None to send it to the model"""
+        start = time.perf_counter()
+        text = None
+        intent = None
+        try:
+            text, intent = self._answer(user_input.strip())
+        except Exception as e:
+            print(f"⚠️  Fast path failed, using the model: {e}")
+            with self._lock:
+                self.fallbacks += 1
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.requests += 1
+            if text is not None:
+                self.served += 1
+                self.served_by_intent[intent] = self.served_by_intent.get(intent, 0) + 1
+                self._fast_latency.append(latency_ms)
+        if text is None:
+            return None
+        return FastPathAnswer(intent=intent, text=text, latency_ms=latency_ms)
+
+    def observe_model_latency(self, seconds: float) -> None:
+        """Record the latency of a request answered by the model (for comparison)"""
+        with self._lock:
+            self._model_latency.append(seconds * 1000)
+
+    def _answer(self, user_input: str) -> Tuple[Optional[str], Optional[str]]:
+        if len(user_input) > 200:
+            return None, None
+
+        if self.lookup_order is not None:
+            for pattern in ELIGIBILITY_PATTERNS:
+                match = pattern.fullmatch(user_input)
+                if match:
+                    text = self._order_eligibility(match.group('order_id').upper())
+                    if text is None:
+                        with self._lock:
+                            self.fallbacks += 1
+                    return text, INTENT_ELIGIBILITY
+
+        for pattern in REFUND_PATTERNS:
+            match = pattern.fullmatch(user_input)
+            if match:
+                return self._refund_quote(match), INTENT_REFUND
+
+        return None, None
+
+    def _order_eligibility(self, order_id: str) -> Optional[str]:
+        status, body = self.lookup_order(order_id)
+        if status == 404:
+            return (f"I couldn't find order {order_id}. Please double-check the order number "
+                    f"(it looks like ORD-001) and I'll take another look.")
+        if status != 200:
+            # Gateway or Lambda error: let the model handle it
+            return None
+
+        eligibility = self.check_return_eligibility(body['purchase_date'], body['category'])
+        product = body.get('product_name', 'your item')
+        purchased = body['purchase_date']
+        if eligibility['eligible']:
+            days = eligibility['days_remaining']
+            return (f"Yes - order {order_id} ({product}, purchased {purchased}) is eligible for return. "
+                    f"{eligibility['reason']}, with {days} day{'s' if days != 1 else ''} left to start the return. "
+                    f"Would you like me to estimate your refund?")
+        return (f"Unfortunately order {order_id} ({product}, purchased {purchased}) is not eligible for a "
+                f"standard return: {eligibility['reason'][0].lower() + eligibility['reason'][1:]}. If the item is "
+                f"defective, it may still be covered by the manufacturer's warranty.")
+
+    def _refund_quote(self, match) -> str:
+        price = float((match.group('price') or match.group('price2')).replace(',', ''))
+        condition = _normalize(match.group('condition') or match.group('condition2'))
+        condition = CONDITION_ALIASES.get(condition, condition)
+        reason_text = match.group('reason')
+        reason = REASON_ALIASES.get(_normalize(reason_text)) if reason_text else ''
+
+        refund = self.calculate_refund_amount(price, condition, reason)
+        answer = (f"For an item bought for ${price:,.2f} in {condition} condition, your refund would be "
+                  f"${refund['refund_amount']:,.2f}")
+        if refund['deduction']:
+            answer += f" (${refund['deduction']:,.2f} deducted: {refund['reason']})."
+        else:
+            answer += f", the full purchase price ({refund['reason'][0].lower() + refund['reason'][1:]})."
+
+        if not reason:
+            policy = get_policy_engine().policy
+            full_refund = [phrase for label, phrase in REASON_PHRASES.items()
+                           if policy.reason_override(label) is not None]
+            if refund['deduction'] and full_refund:
+                answer += (f" If the item is {', '.join(full_refund[:-1])}"
+                           f"{' or ' if len(full_refund) > 1 else ''}{full_refund[-1]}, "
+                           f"you would receive a full refund instead.")
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        """Share of traffic served by the fast path and latency percentiles (ms)"""
+        with self._lock:
+            fast = sorted(self._fast_latency)
+            model = sorted(self._model_latency)
+            return {
+                'requests': self.requests,
+                'served': self.served,
+                'share': self.served / self.requests if self.requests else 0.0,
+                'served_by_intent': dict(self.served_by_intent),
+                'fallbacks': self.fallbacks,
+                'fast_p50_ms': percentile(fast, 0.50),
+                'fast_p95_ms': percentile(fast, 0.95),
+                'model_p50_ms': percentile(model, 0.50),
+                'model_p95_ms': percentile(model, 0.95),
+            }
+
+
+def percentile(sorted_values, fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values (None when there are none)"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def record_turn(memory_client, memory_id: str, actor_id: str, session_id: str,
+                user_input: str, answer: str) -> None:
+    """
+    Store a fast-path exchange in AgentCore Memory as one event.
+
+    Messages are encoded like AgentCoreMemorySessionManager encodes them, so later
+    model turns restore them as conversation history and long-term memory
+    strategies see them like any other turn.
+    """
+    messages = []
+    for index, message in enumerate([
+        {'role': 'user', 'content': [{'text': user_input}]},
+        {'role': 'assistant', 'content': [{'text': answer}]},
+    ]):
+        messages.extend(AgentCoreMemoryConverter.message_to_payload(SessionMessage.from_message(message, index)))
+    memory_client.create_event(
+        memory_id=memory_id,
+        actor_id=actor_id,
+        session_id=session_id,
+        messages=messages
+    )
@@ -0,0 +1,456 @@
+"""
+Local Gateway Emulator
+
+Stand-in for the AgentCore Gateway, its Cognito authorizer and the order lookup
+Lambda, for load tests that cannot (or should not) reach AWS. One local HTTP
+server provides:
+- a fake Cognito user pool: GET /<pool id>/.well-known/openid-configuration and
+  POST /oauth2/token (client credentials grant, form or HTTP Basic client auth),
+  issuing HS256-signed JWT access tokens
+- the gateway MCP endpoint, POST /mcp: MCP streamable HTTP in JSON-response mode
+  (initialize, ping, tools/list, tools/call, session DELETE). Every request needs
+  a valid bearer token from the fake pool, as with the gateway's JWT authorizer.
+  Tools are the Lambda's TOOL_SCHEMAS (order_tool_schemas.py) named
+  <target>___<tool>; tools/call runs order_lookup_lambda.lambda_handler in-process
+  with the gateway's client context and returns the Lambda response as text
+  content, like the real gateway.
+
+Fault injection, per tools/call: fixed latency plus uniform jitter, a cold-start
+delay whenever more calls run concurrently than there are warm Lambda
+environments (as Lambda scales out), a fraction of failed Lambda invocations
+(isError results) and a fraction of throttled requests (HTTP 429).
+
+14_full_agent.py and 17_runtime_agent.py connect to it unchanged through the
+GATEWAY_URL and COGNITO_* environment variables (LocalGateway.env()). GET /stats
+returns request, tool call, auth failure and injected fault counts.
+
+    with LocalGateway(latency_ms=80) as gateway:
+        os.environ.update(gateway.env())
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from order_lookup_lambda import lambda_handler
+from order_tool_schemas import TOOL_SCHEMAS
+
+DEFAULT_PORT = 8765
+DEFAULT_TARGET = 'OrderLookup'
+DEFAULT_POOL_ID = 'local_returnsPool'
+DEFAULT_CLIENT_ID = 'local-gateway-client'
+DEFAULT_SCOPES = ('gateway-api/read', 'gateway-api/write')
+TOKEN_LIFETIME_SECONDS = 3600
+MCP_PATH = '/mcp'
+DEFAULT_PROTOCOL_VERSION = '2025-03-26'
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class AuthError(Exception):
+    """Raised for a missing, malformed, expired or unauthorized bearer token"""
+
+
+class FakeCognito:
+    """
+    Client-credentials token issuer and validator.
+
+    Args:
+        issuer: Issuer URL (the discovery URL without /.well-known/...)
+        clients: client_id -> client_secret
+        scopes: Scopes the clients may request
+    """
+
+    def __init__(self, issuer: str, clients: Dict[str, str], scopes=DEFAULT_SCOPES):
+        self.issuer = issuer
+        self.clients = dict(clients)
+        self.scopes = frozenset(scopes)
+        self._key = secrets.token_bytes(32)
+
+    def _sign(self, signing_input: str) -> str:
+        return _b64url(hmac.new(self._key, signing_input.encode(), hashlib.sha256).digest())
+
+    def issue_token(self, client_id: str, client_secret: str, scope: Optional[str] = None) -> Dict[str, Any]:
+        """Token response for a client credentials grant; raises AuthError for a bad client or scope"""
+        expected = self.clients.get(client_id)
+        if expected is None or not hmac.compare_digest(expected, client_secret or ''):
+            raise AuthError('invalid_client')
+        requested = set(scope.split()) if scope else set(self.scopes)
+        if not requested <= self.scopes:
+            raise AuthError('invalid_scope')
+
+        now = int(time.time())
+        header = _b64url(json.dumps({'alg': 'HS256', 'typ': 'JWT', 'kid': 'local'}).encode())
+        claims = _b64url(json.dumps({
+            'iss': self.issuer,
+            'sub': client_id,
+            'client_id': client_id,
+            'token_use': 'access',
+            'scope': ' '.join(sorted(requested)),
+            'iat': now,
+            'exp': now + TOKEN_LIFETIME_SECONDS,
+            'jti': uuid.uuid4().hex
+        }).encode())
+        return {
+            'access_token': f"{header}.{claims}.{self._sign(f'{header}.{claims}')}",
+            'expires_in': TOKEN_LIFETIME_SECONDS,
+            'token_type': 'Bearer'
+        }
+
+    def validate(self, authorization: Optional[str]) -> Dict[str, Any]:
+        """Claims of a valid 'Bearer <token>' header; raises AuthError otherwise"""
+        if not authorization or not authorization.startswith('Bearer '):
+            raise AuthError('missing bearer token')
+        try:
+            header, claims, signature = authorization[len('Bearer '):].strip().split('.')
+            if not hmac.compare_digest(self._sign(f'{header}.{claims}'), signature):
+                raise AuthError('invalid signature')
+            claims = json.loads(_b64url_decode(claims))
+        except (ValueError, TypeError) as e:
+            raise AuthError(f'malformed token: {e}') from e
+        if claims.get('iss') != self.issuer or claims.get('token_use') != 'access':
+            raise AuthError('token not issued by this pool')
+        if claims.get('exp', 0) <= time.time():
+            raise AuthError('token expired')
+        if claims.get('client_id') not in self.clients:
+            raise AuthError('client not allowed')
+        return claims
+
+
+class LocalGateway:
+    """
+    Local MCP gateway + fake Cognito + in-process order lookup Lambda.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        target: Gateway target name prefixed to the tool names
+        client_id: Cognito app client ID
+        client_secret: Cognito app client secret (generated if not given)
+        latency_ms: Added to every tools/call (gateway + Lambda invoke overhead)
+        jitter_ms: Uniform random extra latency, 0..jitter_ms
+        cold_start_ms: Added when a call needs a new Lambda environment
+        error_rate: Fraction of tool calls that fail as a failed Lambda invocation
+        throttle_rate: Fraction of MCP requests answered with HTTP 429
+        seed: Random seed for jitter and fault injection
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, target: str = DEFAULT_TARGET,
+                 client_id: str = DEFAULT_CLIENT_ID, client_secret: Optional[str] = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, cold_start_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, seed: Optional[int] = None):
+        self.target = target
+        self.client_id = client_id
+        self.client_secret = client_secret or secrets.token_urlsafe(24)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.cold_start_ms = cold_start_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._warm_environments = 0
+        self._busy_environments = 0
+        self._counters = {
+            'http_requests': 0, 'tool_calls': 0, 'auth_failures': 0, 'tokens_issued': 0,
+            'injected_errors': 0, 'throttled': 0, 'cold_starts': 0
+        }
+        self._tool_calls_by_name: Dict[str, int] = {}
+
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self.base_url = f'http://{self.host}:{self.port}'
+        self.cognito = FakeCognito(f'{self.base_url}/{DEFAULT_POOL_ID}', {client_id: self.client_secret})
+        self._thread: Optional[threading.Thread] = None
+
+        self.tools = [
+            {**schema, 'name': f"{target}___{schema['name']}"}
+            for schema in TOOL_SCHEMAS
+        ]
+
+    @property
+    def url(self) -> str:
+        """Gateway MCP endpoint (GATEWAY_URL)"""
+        return f'{self.base_url}{MCP_PATH}'
+
+    @property
+    def discovery_url(self) -> str:
+        return f'{self.cognito.issuer}/.well-known/openid-configuration'
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that point 14_full_agent.py and 17_runtime_agent.py at this gateway"""
+        return {
+            'GATEWAY_URL': self.url,
+            'COGNITO_CLIENT_ID': self.client_id,
+            'COGNITO_CLIENT_SECRET': self.client_secret,
+            'COGNITO_DISCOVERY_URL': self.discovery_url
+        }
+
+    def start(self) -> 'LocalGateway':
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, tool call, auth failure and injected fault counts"""
+        with self._lock:
+            return {
+                **self._counters,
+                'tool_calls_by_name': dict(self._tool_calls_by_name),
+                'warm_environments': self._warm_environments,
+                'open_sessions': len(self._sessions)
+            }
+
+    # ------------------------------------------------------------------------
+    # MCP
+    # ------------------------------------------------------------------------
+
+    def should_throttle(self) -> bool:
+        with self._lock:
+            throttled = self.throttle_rate > 0 and self._rng.random() < self.throttle_rate
+            if throttled:
+                self._counters['throttled'] += 1
+            return throttled
+
+    def open_session(self) -> str:
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions.add(session_id)
+        return session_id
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def close_session(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.discard(session_id)
+                return True
+            return False
+
+    def handle_rpc(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """JSON-RPC response for one request (None for notifications)"""
+        if not isinstance(message, dict) or message.get('jsonrpc') != '2.0' or 'method' not in message:
+            return _rpc_error(message.get('id') if isinstance(message, dict) else None,
+                              INVALID_REQUEST, 'Invalid JSON-RPC request')
+        if 'id' not in message:
+            return None
+
+        method, params = message['method'], message.get('params') or {}
+        if method == 'initialize':
+            result = {
+                'protocolVersion': params.get('protocolVersion', DEFAULT_PROTOCOL_VERSION),
+                'capabilities': {'tools': {'listChanged': False}},
+                'serverInfo': {'name': 'local-agentcore-gateway', 'version': '1.0.0'}
+            }
+        elif method == 'ping':
+            result = {}
+        elif method == 'tools/list':
+            result = {'tools': self.tools}
+        elif method == 'tools/call':
+            name = params.get('name', '')
+            if name not in {tool['name'] for tool in self.tools}:
+                return _rpc_error(message['id'], INVALID_PARAMS, f'Unknown tool: {name}')
+            result = self.call_tool(name, params.get('arguments') or {})
+        else:
+            return _rpc_error(message['id'], METHOD_NOT_FOUND, f'Method not found: {method}')
+        return {'jsonrpc': '2.0', 'id': message['id'], 'result': result}
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Invoke the Lambda for a tool call, with the configured latency and faults"""
+        with self._lock:
+            self._counters['tool_calls'] += 1
+            self._tool_calls_by_name[name] = self._tool_calls_by_name.get(name, 0) + 1
+            cold = self._busy_environments == self._warm_environments
+            if cold:
+                self._warm_environments += 1
+                self._counters['cold_starts'] += 1
+            self._busy_environments += 1
+            delay_ms = self.latency_ms + self._rng.uniform(0, self.jitter_ms) + (self.cold_start_ms if cold else 0)
+            failed = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if failed:
+                self._counters['injected_errors'] += 1
+
+        try:
+            if delay_ms > 0:
+                time.sleep(delay_ms / 1000)
+            if failed:
+                return {
+                    'content': [{'type': 'text', 'text': 'Error invoking Lambda function: injected failure'}],
+                    'isError': True
+                }
+            context = SimpleNamespace(client_context=SimpleNamespace(custom={'bedrockAgentCoreToolName': name}))
+            response = lambda_handler(dict(arguments), context)
+            return {'content': [{'type': 'text', 'text': json.dumps(response)}], 'isError': False}
+        finally:
+            with self._lock:
+                self._busy_environments -= 1
+
+
+def _rpc_error(request_id, code: int, message: str) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def _make_handler(gateway: LocalGateway):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            if body is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        def _authorize(self) -> bool:
+            try:
+                gateway.cognito.validate(self.headers.get('Authorization'))
+                return True
+            except AuthError as e:
+                gateway.count('auth_failures')
+                self._send_json(401, {'error': 'Unauthorized', 'message': str(e)},
+                                {'WWW-Authenticate': f'Bearer error="invalid_token", error_description="{e}"'})
+                return False
+
+        def do_GET(self):
+            gateway.count('http_requests')
+            path = urlparse(self.path).path
+            if path == f'/{DEFAULT_POOL_ID}/.well-known/openid-configuration':
+                self._send_json(200, {
+                    'issuer': gateway.cognito.issuer,
+                    'token_endpoint': f'{gateway.base_url}/oauth2/token',
+                    'jwks_uri': f'{gateway.cognito.issuer}/.well-known/jwks.json',
+                    'grant_types_supported': ['client_credentials'],
+                    'token_endpoint_auth_methods_supported': ['client_secret_basic', 'client_secret_post']
+                })
+            elif path == '/stats':
+                self._send_json(200, gateway.stats())
+            elif path == MCP_PATH:
+                # No server-initiated stream: every response comes back on its POST
+                self._send_json(405, None, {'Allow': 'POST, DELETE'})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            gateway.count('http_requests')
+            path = urlparse(self.path).path
+            body = self._read_body()
+            if path == '/oauth2/token':
+                self._token(body)
+            elif path == MCP_PATH:
+                self._mcp(body)
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_DELETE(self):
+            gateway.count('http_requests')
+            if urlparse(self.path).path != MCP_PATH or not self._authorize():
+                return
+            closed = gateway.close_session(self.headers.get('mcp-session-id', ''))
+            self._send_json(200 if closed else 404, None)
+
+        def _token(self, body: bytes) -> None:
+            form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+            client_id, client_secret = form.get('client_id'), form.get('client_secret')
+            authorization = self.headers.get('Authorization', '')
+            if authorization.startswith('Basic '):
+                client_id, _, client_secret = base64.b64decode(authorization[6:]).decode().partition(':')
+            if form.get('grant_type') != 'client_credentials':
+                self._send_json(400, {'error': 'unsupported_grant_type'})
+                return
+            try:
+                token = gateway.cognito.issue_token(client_id or '', client_secret or '', form.get('scope'))
+            except AuthError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+            gateway.count('tokens_issued')
+            self._send_json(200, token)
+
+        def _mcp(self, body: bytes) -> None:
+            if not self._authorize():
+                return
+            if gateway.should_throttle():
+                self._send_json(429, {'error': 'ThrottlingException', 'message': 'Rate exceeded'},
+                                {'Retry-After': '1'})
+                return
+            try:
+                message = json.loads(body)
+            except ValueError:
+                self._send_json(400, _rpc_error(None, PARSE_ERROR, 'Parse error'))
+                return
+
+            headers = {}
+            session_id = self.headers.get('mcp-session-id')
+            is_initialize = isinstance(message, dict) and message.get('method') == 'initialize'
+            if is_initialize:
+                headers['mcp-session-id'] = gateway.open_session()
+            elif session_id and not gateway.has_session(session_id):
+                self._send_json(404, _rpc_error(message.get('id') if isinstance(message, dict) else None,
+                                                INVALID_REQUEST, 'Session not found'))
+                return
+
+            if isinstance(message, list):
+                responses = [r for r in (gateway.handle_rpc(m) for m in message) if r is not None]
+            else:
+                responses = gateway.handle_rpc(message)
+            if not responses:
+                # Notifications and client responses are only acknowledged
+                self._send_json(202, None, headers)
+            else:
+                self._send_json(200, responses, headers)
+
+    return Handler
@@ -0,0 +1,386 @@
+"""
+Request Hedging
+
+Opt-in hedged requests for the calls behind the tail latency of invoke: Bedrock
+model calls, knowledge base retrieves and gateway order lookups (lookup_order,
+lookup_orders). All of them are reads, so sending one twice is safe.
+
+Each call is sent once. If it has not answered within the p95 latency tracked
+for its kind of call (the last LATENCY_WINDOW answers, once MIN_SAMPLES have been
+seen), a second, identical request is sent and whichever answers first is used;
+the other is cancelled. A slow response therefore costs about p95 plus a normal
+response instead of its own latency. For model calls "answered" means the first
+stream event (time to first token); the rest of the stream comes from the winner.
+
+Hedges are capped by a budget: every request adds HEDGE_BUDGET (default 0.05)
+of a hedge to a bucket holding at most HEDGE_BURST hedges, and each hedge takes a
+whole one, so hedges add at most ~5% load over time even when Bedrock or the
+gateway is slow across the board (when hedging cannot help).
+
+Cancelling the loser:
+- model streams: the losing BedrockModel stream's cancel_signal is set (its HTTP
+  response is closed at the next chunk) and its task is cancelled
+- gateway tool streams: the task is cancelled, which cancels the MCP call
+- synchronous calls (retrieve, direct gateway calls): a request not yet started
+  is cancelled; one already sent cannot be interrupted, its result is dropped
+
+Latency samples are the first request's: its time to answer, or the time until
+it was cancelled (a lower bound), so hedges that win do not drag the tracked p95
+down. Failed calls are not sampled.
+
+Usage:
+    model = hedged_model(create_bedrock_model(MODEL_ID))
+    response = hedger.call('retrieve', client.retrieve, **request)
+    async for event in hedger.stream('lookup_order', lambda cancel_signal: tool.stream(...)):
+        ...
+    print(hedger.stats())
+
+Set HEDGING=1 to turn hedging on (off by default).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+from strands.models import Model
+
+HEDGING_ENABLED = os.environ.get('HEDGING', '0') == '1'
+
+# Hedges allowed per request, and how many may be spent in a burst
+HEDGE_BUDGET = float(os.environ.get('HEDGE_BUDGET', 0.05))
+HEDGE_BURST = float(os.environ.get('HEDGE_BURST', 10))
+
+HEDGE_PERCENTILE = 0.95
+LATENCY_WINDOW = 500
+MIN_SAMPLES = 20
+
+# Calls answering faster than this are never hedged
+MIN_HEDGE_DELAY_S = 0.05
+
+# Threads running synchronous calls (both attempts of a hedged call)
+HEDGE_WORKERS = int(os.environ.get('HEDGE_WORKERS', 64))
+
+# Returned by an attempt whose stream ended without an event
+_END = object()
+
+
+class LatencyTracker:
+    """Rolling latency samples per kind of call, and their percentiles"""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: str, percentile: float = HEDGE_PERCENTILE) -> Optional[float]:
+        """Latency percentile in seconds, or None until min_samples have been recorded"""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._samples)
+
+
+class HedgeBudget:
+    """Token bucket: each request adds `ratio` of a hedge, each hedge takes one"""
+
+    def __init__(self, ratio: float = HEDGE_BUDGET, burst: float = HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _LinkedSignal(threading.Event):
+    """Cancel signal of one request: set on its own, or when the caller's signal is set"""
+
+    def __init__(self, parent: Optional[threading.Event] = None):
+        super().__init__()
+        self.parent = parent
+
+    def is_set(self) -> bool:
+        return super().is_set() or (self.parent is not None and self.parent.is_set())
+
+
+class _StreamAttempt:
+    """One request of a hedged stream: its iterator, cancel signal and first-event task"""
+
+    def __init__(self, start: Callable[[threading.Event], AsyncIterator[Any]],
+                 cancel_signal: Optional[threading.Event] = None):
+        self.began = time.perf_counter()
+        self.cancel_signal = _LinkedSignal(cancel_signal)
+        self.events = start(self.cancel_signal)
+        self.first = asyncio.ensure_future(self._first_event())
+
+    async def _first_event(self) -> Any:
+        try:
+            return await self.events.__anext__()
+        except StopAsyncIteration:
+            return _END
+
+    def failed(self) -> bool:
+        return self.first.done() and not self.first.cancelled() and self.first.exception() is not None
+
+    async def close(self):
+        self.cancel_signal.set()
+        self.first.cancel()
+        try:
+            await self.first
+        except BaseException:
+            pass
+        aclose = getattr(self.events, 'aclose', None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception:
+                pass
+
+
+class Hedger:
+    """
+    Sends a second request when a call is slower than its tracked p95.
+
+    Args:
+        enabled: Hedge calls (default: HEDGING env, off); when off, calls run unchanged
+        budget: Hedge budget (default: HEDGE_BUDGET / HEDGE_BURST)
+        tracker: Latency samples (default: a new LatencyTracker)
+        min_delay: Never hedge before this many seconds
+    """
+
+    def __init__(self, enabled: bool = HEDGING_ENABLED, budget: Optional[HedgeBudget] = None,
+                 tracker: Optional[LatencyTracker] = None, min_delay: float = MIN_HEDGE_DELAY_S):
+        self.enabled = enabled
+        self.budget = budget or HedgeBudget()
+        self.tracker = tracker or LatencyTracker()
+        self.min_delay = min_delay
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._budget_denied = 0
+        self._cancelled = 0
+
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging a call, or None while too few samples are known"""
+        p95 = self.tracker.percentile(key)
+        return None if p95 is None else max(self.min_delay, p95)
+
+    def _start(self):
+        self.budget.deposit()
+        with self._lock:
+            self._requests += 1
+
+    def _may_hedge(self) -> bool:
+        allowed = self.budget.try_spend()
+        with self._lock:
+            if allowed:
+                self._hedges += 1
+            else:
+                self._budget_denied += 1
+        return allowed
+
+    def _finish(self, hedge_won: bool, cancelled: int):
+        with self._lock:
+            self._hedge_wins += hedge_won
+            self._cancelled += cancelled
+
+    def _submit(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Future:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def call(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs), hedged; returns the first successful result or raises the first error"""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        self._start()
+        delay = self.delay(key)
+        began = time.perf_counter()
+        primary = self._submit(fn, args, kwargs)
+
+        def sample(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                self.tracker.record(key, time.perf_counter() - began)
+        primary.add_done_callback(sample)
+
+        attempts = [primary]
+        if delay is not None:
+            wait(attempts, timeout=delay)
+            if not primary.done() and self._may_hedge():
+                attempts.append(self._submit(fn, args, kwargs))
+
+        winner = None
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [f for f in attempts if f in done and f.exception() is None]
+            if succeeded:
+                winner = succeeded[0]
+                break
+        if winner is None:
+            winner = primary
+
+        cancelled = sum(f.cancel() for f in attempts if f is not winner)
+        self._finish(winner is not primary, cancelled)
+        return winner.result()
+
+    async def stream(self, key: str, start: Callable[[threading.Event], AsyncIterator[Any]],
+                     cancel_signal: Optional[threading.Event] = None) -> AsyncIterator[Any]:
+        """
+        Stream the events of start(cancel_signal), hedged on the time to the first event.
+
+        start is called once per request with a threading.Event that is set when
+        that request loses, the caller stops reading or the caller's cancel_signal
+        is set, and must return a new stream.
+        """
+        if not self.enabled:
+            async for event in start(cancel_signal or threading.Event()):
+                yield event
+            return
+
+        self._start()
+        delay = self.delay(key)
+        primary = _StreamAttempt(start, cancel_signal)
+        attempts = [primary]
+        winner = None
+        try:
+            if delay is not None:
+                await asyncio.wait({primary.first}, timeout=delay)
+                if not primary.first.done() and self._may_hedge():
+                    attempts.append(_StreamAttempt(start, cancel_signal))
+
+            pending = {attempt.first for attempt in attempts}
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((a for a in attempts if a.first in done and not a.failed()), None)
+            winner = winner or primary
+
+            if not primary.failed():
+                self.tracker.record(key, time.perf_counter() - primary.began)
+            losers = [attempt for attempt in attempts if attempt is not winner]
+            for attempt in losers:
+                await attempt.close()
+            self._finish(winner is not primary, len(losers))
+
+            event = winner.first.result()
+            if event is _END:
+                return
+            yield event
+            async for event in winner.events:
+                yield event
+        finally:
+            for attempt in attempts:
+                if attempt is winner:
+                    attempt.cancel_signal.set()
+                    aclose = getattr(attempt.events, 'aclose', None)
+                    if aclose is not None:
+                        await aclose()
+                elif not attempt.first.done():
+                    await attempt.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                'enabled': self.enabled,
+                'requests': self._requests,
+                'hedges': self._hedges,
+                'hedge_share': self._hedges / self._requests if self._requests else 0.0,
+                'hedge_wins': self._hedge_wins,
+                'hedge_win_rate': self._hedge_wins / self._hedges if self._hedges else 0.0,
+                'budget_denied': self._budget_denied,
+                'cancelled': self._cancelled,
+            }
+        stats['p95_ms'] = {}
+        for key in self.tracker.keys():
+            p95 = self.tracker.percentile(key)
+            stats['p95_ms'][key] = p95 * 1000 if p95 is not None else None
+        return stats
+
+
+class HedgedModel(Model):
+    """
+    Model whose stream() is hedged on the time to the first event.
+
+    Both requests get the same arguments; each gets its own cancel_signal, which
+    is set when it loses or when the agent's cancel_signal is set. Everything
+    else is delegated to the wrapped model.
+
+    Args:
+        model: Model to wrap (e.g. a BedrockModel)
+        hedger: Hedger to use (defaults to the shared hedger)
+    """
+
+    def __init__(self, model: Model, hedger: Optional[Hedger] = None):
+        self.model = model
+        self.hedger = hedger or _shared_hedger()
+        config = model.get_config()
+        self.key = f"model {config.get('model_id') if isinstance(config, dict) else type(model).__name__}"
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        agent_cancel_signal = kwargs.pop('cancel_signal', None)
+
+        def start(cancel_signal: threading.Event):
+            return self.model.stream(messages, tool_specs, system_prompt, cancel_signal=cancel_signal, **kwargs)
+
+        async for event in self.hedger.stream(self.key, start, agent_cancel_signal):
+            yield event
+
+    def __getattr__(self, name: str) -> Any:
+        model = self.__dict__.get('model')
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
+
+
+# Shared by every agent and session in the process
+hedger = Hedger()
+
+
+def _shared_hedger() -> Hedger:
+    return hedger
+
+
+def hedged_model(model: Model) -> Model:
+    """The model with hedged streams when hedging is on, else the model itself"""
+    return HedgedModel(model) if hedger.enabled else model
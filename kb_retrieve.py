@@ -0,0 +1,69 @@
+"""
+Knowledge Base Retrieve Tool
+
+The strands_tools retrieve tool (same name, specification and output) on the
+shared bedrock-agent-runtime client (bedrock_clients.py) instead of a new boto3
+client per call, so knowledge base lookups reuse pooled connections and get the
+adaptive retry settings. The profile_name input is ignored: every call uses the
+process's credentials. With HEDGING=1, slow retrieve calls are hedged (hedging.py).
+
+Usage:
+    from kb_retrieve import retrieve
+    agent = Agent(model=..., tools=[retrieve, ...])
+"""
+
+import os
+from typing import Any
+
+from strands.tools.tools import PythonAgentTool
+from strands.types.tools import ToolResult, ToolUse
+from strands_tools.retrieve import TOOL_SPEC, _validate_filter, filter_results_by_score, format_results_for_display
+
+from bedrock_clients import bedrock_client
+from hedging import hedger
+
+def _retrieve(tool: ToolUse, **kwargs: Any) -> ToolResult:
+    """Retrieve passages from a Bedrock knowledge base (see TOOL_SPEC for the input)"""
+    tool_use_id = tool['toolUseId']
+    tool_input = tool['input']
+
+    try:
+        query = tool_input['text']
+        kb_id = tool_input.get('knowledgeBaseId', os.getenv('KNOWLEDGE_BASE_ID'))
+        region = tool_input.get('region', os.getenv('AWS_REGION', 'us-west-2'))
+        min_score = tool_input.get('score', float(os.getenv('MIN_SCORE', '0.4')))
+        enable_metadata = tool_input.get(
+            'enableMetadata', os.getenv('RETRIEVE_ENABLE_METADATA_DEFAULT', 'false').lower() == 'true'
+        )
+        retrieval_config = {'vectorSearchConfiguration': {'numberOfResults': tool_input.get('numberOfResults', 10)}}
+
+        retrieve_filter = tool_input.get('retrieveFilter')
+        if retrieve_filter:
+            try:
+                if _validate_filter(retrieve_filter):
+                    retrieval_config['vectorSearchConfiguration']['filter'] = retrieve_filter
+            except ValueError as e:
+                return {'toolUseId': tool_use_id, 'status': 'error', 'content': [{'text': str(e)}]}
+
+        response = hedger.call(
+            'retrieve', bedrock_client('bedrock-agent-runtime', region).retrieve,
+            retrievalQuery={'text': query}, knowledgeBaseId=kb_id, retrievalConfiguration=retrieval_config
+        )
+
+        results = filter_results_by_score(response.get('retrievalResults', []), min_score)
+        formatted = format_results_for_display(results, enable_metadata)
+        return {
+            'toolUseId': tool_use_id,
+            'status': 'success',
+            'content': [{'text': f"Retrieved {len(results)} results with score >= {min_score}:\n{formatted}"}],
+        }
+    except Exception as e:
+        return {
+            'toolUseId': tool_use_id,
+            'status': 'error',
+            'content': [{'text': f"Error during retrieval: {str(e)}"}],
+        }
+
+
+# A module-based tool is named after its module, so the tool object is built here
+retrieve = PythonAgentTool(TOOL_SPEC['name'], TOOL_SPEC, _retrieve)
@@ -0,0 +1,281 @@
+"""
+Model Router
+
+Complexity-based routing between a fast model tier (FAST_MODEL_ID) and the main
+model (MODEL_ID) for the returns agents.
+
+Each request is classified locally before the agent runs (precompiled patterns,
+no model call):
+- fast: greetings, thanks and goodbyes (not bare acknowledgements such as
+  "ok", which usually answer a question from the assistant), questions about what the assistant can
+  do, and general return-policy questions (return windows, condition deductions,
+  which reasons get a full refund)
+- main: anything that needs tools or account data (order IDs, "my order", "I
+  bought", prices to quote, look-ups and searches), several questions at once,
+  long or multi-step requests, and anything the classifier does not recognise
+
+Fast requests go to the fast model without tools, with a summary of the compiled
+return policy in its system prompt. It is told to reply with ESCALATE_TOKEN alone
+when the request needs order data, tools, earlier conversation or more than a
+short answer; that reply, or a failed call, escalates the request to the main
+model. A misrouted request therefore costs one small-model round trip, never an
+answer given without the tools it needed.
+
+The fast tier answers each request on its own (no conversation history); callers
+that keep history record its turns themselves (17 does, as for the fast path).
+
+Usage:
+    routed = model_router.answer(user_input)
+    if routed:
+        return routed.text
+    ... run the agent on the main model ...
+    model_router.observe_main_latency(seconds)
+    print(model_router.stats())
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from strands import Agent
+
+from fast_path import percentile
+from policy_rules import BASE_REGION, CompiledPolicy, get_policy_engine
+from prompt_cache import create_bedrock_model
+
+FAST_MODEL_ID = os.environ.get('FAST_MODEL_ID', 'us.anthropic.claude-haiku-4-5-20251001-v1:0')
+ROUTING_ENABLED = os.environ.get('MODEL_ROUTING', '1') != '0'
+
+# Reply from the fast model that hands the request to the main model
+ESCALATE_TOKEN = 'ESCALATE'
+
+# Longer requests always go to the main model
+MAX_FAST_WORDS = 40
+FAST_MAX_TOKENS = 400
+
+# Latency samples kept per tier for percentiles
+LATENCY_WINDOW = 1000
+
+TIER_FAST = 'fast'
+TIER_MAIN = 'main'
+
+INTENT_GREETING = 'greeting'
+INTENT_CLOSING = 'closing'
+INTENT_CAPABILITIES = 'capabilities'
+INTENT_POLICY = 'policy_question'
+INTENT_NEEDS_TOOLS = 'needs_tools'
+INTENT_MULTI_STEP = 'multi_step'
+INTENT_UNRECOGNIZED = 'unrecognized'
+
+# Requests that need tools, account data or memory
+NEEDS_TOOLS_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\bORD-\d+",
+    r"\$\s*\d|\b\d+(?:\.\d{1,2})?\s*(?:dollars|usd|eur|euros)\b",
+    r"\b(?:my|our)\s+(?:\w+\s+)?(?:orders?|purchases?|packages?|items?|refunds?|returns?|account|laptop|phone|tablet)\b",
+    r"\b(?:i|we)\s+(?:just\s+)?(?:bought|ordered|purchased|received|got|paid)\b",
+    r"\b(?:look\s*up|track|search|find|cancel|start\s+a\s+return|ship)\b",
+    r"\b(?:days?\s+ago|weeks?\s+ago|yesterday|last\s+(?:week|month))\b|\b\d{4}-\d{2}-\d{2}\b",
+    r"\b(?:remember|last\s+time|earlier|you\s+said|my\s+preference)\b",
+)]
+
+MULTI_STEP_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\?.*\?",
+    r"\b(?:and\s+then|step\s+by\s+step|compare|versus|vs\.?|explain\s+why|walk\s+me\s+through)\b",
+)]
+
+_END = r"[\s!.?,:)]*"
+GREETING_PATTERN = re.compile(
+    r"(?:hi|hello|hey|good\s+(?:morning|afternoon|evening))(?:\s+there)?[\s!.,]*"
+    r"(?:how\s+are\s+you(?:\s+doing)?(?:\s+today)?)?" + _END, re.IGNORECASE)
+# A closing phrase is required: a bare acknowledgement ("ok", "great") usually answers
+# the assistant's own question and needs the conversation, so it goes to the main model
+CLOSING_PATTERN = re.compile(
+    r"(?:(?:ok(?:ay)?|great|perfect|awesome|got\s+it|cool)[\s!.,]*)?"
+    r"(?:thanks?(?:\s+you)?(?:\s+so\s+much|\s+a\s+lot)?|thank\s+you(?:\s+so\s+much|\s+very\s+much)?|thx|"
+    r"bye|goodbye|see\s+you|that'?s\s+all(?:\s+for\s+now)?|have\s+a\s+(?:good|nice|great)\s+day)" + _END,
+    re.IGNORECASE)
+CAPABILITIES_PATTERN = re.compile(
+    r"\b(?:what\s+(?:can|do)\s+you\s+(?:do|help)|how\s+(?:can|do)\s+you\s+help|who\s+are\s+you|"
+    r"what\s+are\s+you|what\s+is\s+this)\b", re.IGNORECASE)
+POLICY_PATTERN = re.compile(
+    r"\b(?:return\s+(?:window|policy|period|deadline)|refund\s+policy|how\s+(?:long|many\s+days)\s+"
+    r"(?:do\s+(?:i|you)\s+have|to\s+return|can\s+i|is\s+the)|deductions?|restocking|full\s+refund|"
+    r"(?:can|could)\s+(?:i|you)\s+return\s+(?:an?\s+)?(?:opened|used|damaged)|partial\s+refund)\b",
+    re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Tier chosen for a request and the intent that decided it"""
+    tier: str
+    intent: str
+
+
+@dataclass(frozen=True)
+class RoutedAnswer:
+    """An answer produced by the fast tier"""
+    intent: str
+    text: str
+    latency_ms: float
+
+
+def classify(user_input: str) -> RouteDecision:
+    """Classify a request into the fast or main tier (local patterns only)"""
+    text = ' '.join(user_input.split())
+    if not text:
+        return RouteDecision(TIER_MAIN, INTENT_UNRECOGNIZED)
+    if any(pattern.search(text) for pattern in NEEDS_TOOLS_PATTERNS):
+        return RouteDecision(TIER_MAIN, INTENT_NEEDS_TOOLS)
+    if len(text.split()) > MAX_FAST_WORDS or any(pattern.search(text) for pattern in MULTI_STEP_PATTERNS):
+        return RouteDecision(TIER_MAIN, INTENT_MULTI_STEP)
+    if GREETING_PATTERN.fullmatch(text):
+        return RouteDecision(TIER_FAST, INTENT_GREETING)
+    if CLOSING_PATTERN.fullmatch(text):
+        return RouteDecision(TIER_FAST, INTENT_CLOSING)
+    if CAPABILITIES_PATTERN.search(text):
+        return RouteDecision(TIER_FAST, INTENT_CAPABILITIES)
+    if POLICY_PATTERN.search(text):
+        return RouteDecision(TIER_FAST, INTENT_POLICY)
+    return RouteDecision(TIER_MAIN, INTENT_UNRECOGNIZED)
+
+
+def policy_summary(policy: CompiledPolicy) -> str:
+    """Return windows, condition deductions and full-refund reasons of the base policy, one line each"""
+    base = [(category, window) for (region, category), window in sorted(policy.windows.items())
+            if region == BASE_REGION]
+    deductions = [(condition, rate) for (region, condition), rate in sorted(policy.condition_rates.items())
+                  if region == BASE_REGION]
+    full_refund = sorted(reason for (region, reason), (rate, _) in policy.reason_overrides.items()
+                         if region == BASE_REGION and rate == 0)
+    return '\n'.join([
+        "Return windows (days from purchase): " + ', '.join(f"{category} {window}" for category, window in base),
+        "Refund deductions by condition: " + ', '.join(f"{condition} {rate:.0%}" for condition, rate in deductions),
+        "Full refund regardless of condition when the reason is: " + ', '.join(full_refund),
+    ])
+
+
+def fast_system_prompt(policy: CompiledPolicy) -> str:
+    return f"""You are the front desk of a returns and refunds assistant. Answer greetings, thanks, questions about what you can help with (checking return eligibility, looking up and searching orders, estimating refunds, explaining the return policy) and general return policy questions, in one to three friendly sentences.
+
+Return policy (version {policy.version}):
+{policy_summary(policy)}
+
+You have no tools and no access to orders, accounts or the earlier conversation. If the request needs any of these, asks about a specific order or item the customer bought, needs a calculation, or cannot be answered fully from the policy above, reply with exactly {ESCALATE_TOKEN} and nothing else."""
+
+
+class ModelRouter:
+    """
+    Sends simple requests to the fast model tier and everything else to the main model.
+
+    Args:
+        fast_model: Model for the fast tier (default: FAST_MODEL_ID on the shared Bedrock client, created on first use)
+        enabled: Route at all (default: MODEL_ROUTING env, on); when off every request goes to the main model
+    """
+
+    def __init__(self, fast_model: Any = None, enabled: bool = ROUTING_ENABLED):
+        self.fast_model = fast_model
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.decisions: Dict[str, int] = {}
+        self.fast_answered = 0
+        self.escalations = 0
+        self._fast_latency = deque(maxlen=LATENCY_WINDOW)
+        self._escalation_latency = deque(maxlen=LATENCY_WINDOW)
+        self._main_latency = deque(maxlen=LATENCY_WINDOW)
+
+    def route(self, user_input: str) -> RouteDecision:
+        """Classify a request and count the decision"""
+        decision = classify(user_input) if self.enabled else RouteDecision(TIER_MAIN, 'routing_disabled')
+        with self._lock:
+            self.requests += 1
+            key = f"{decision.tier}:{decision.intent}"
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+        return decision
+
+    def answer(self, user_input: str, cancel_signal: Optional[threading.Event] = None) -> Optional[RoutedAnswer]:
+        """
+        Answer on the fast tier, or return None to run the request on the main model.
+
+        Args:
+            user_input: The customer's request
+            cancel_signal: Stops the fast model call when set (e.g. the request's Deadline.cancel_signal)
+        """
+        decision = self.route(user_input)
+        if decision.tier != TIER_FAST:
+            return None
+
+        start = time.perf_counter()
+        text = None
+        try:
+            text = self._ask_fast_model(user_input, cancel_signal)
+        except Exception as e:
+            print(f"⚠️  Fast model failed, using the main model: {e}")
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        if cancel_signal is not None and cancel_signal.is_set():
+            # Not an escalation: the caller's deadline handling produces the answer
+            print(f"✓ Routing: {decision.intent} cancelled on the fast model after {latency_ms:.0f} ms")
+            return None
+
+        if not text or ESCALATE_TOKEN in text:
+            with self._lock:
+                self.escalations += 1
+                self._escalation_latency.append(latency_ms)
+            print(f"✓ Routing: {decision.intent} escalated to the main model after {latency_ms:.0f} ms")
+            return None
+
+        with self._lock:
+            self.fast_answered += 1
+            self._fast_latency.append(latency_ms)
+        print(f"✓ Routing: {decision.intent} answered by the fast model in {latency_ms:.0f} ms")
+        return RoutedAnswer(intent=decision.intent, text=text, latency_ms=latency_ms)
+
+    def observe_main_latency(self, seconds: float) -> None:
+        """Record the latency of a request answered by the main model (for comparison)"""
+        with self._lock:
+            self._main_latency.append(seconds * 1000)
+
+    def _ask_fast_model(self, user_input: str, cancel_signal: Optional[threading.Event] = None) -> str:
+        if self.fast_model is None:
+            # The fast tier's prompt is below the minimum cacheable length
+            self.fast_model = create_bedrock_model(FAST_MODEL_ID, prompt_cache=False, temperature=0.3,
+                                                   max_tokens=FAST_MAX_TOKENS)
+        agent = Agent(
+            model=self.fast_model,
+            tools=[],
+            system_prompt=fast_system_prompt(get_policy_engine().policy),
+            callback_handler=None
+        )
+        result = agent(user_input, cancel_signal=cancel_signal)
+        return ''.join(block.get('text', '') for block in result.message['content']).strip()
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing decisions, fast-tier share, escalation rate and latency percentiles (ms) per tier"""
+        with self._lock:
+            routed_fast = self.fast_answered + self.escalations
+            fast = sorted(self._fast_latency)
+            escalated = sorted(self._escalation_latency)
+            main = sorted(self._main_latency)
+            return {
+                'requests': self.requests,
+                'decisions': dict(self.decisions),
+                'routed_fast': routed_fast,
+                'fast_answered': self.fast_answered,
+                'fast_share': self.fast_answered / self.requests if self.requests else 0.0,
+                'escalations': self.escalations,
+                'escalation_rate': self.escalations / routed_fast if routed_fast else 0.0,
+                'fast_p50_ms': percentile(fast, 0.50),
+                'fast_p95_ms': percentile(fast, 0.95),
+                'escalation_p50_ms': percentile(escalated, 0.50),
+                'main_p50_ms': percentile(main, 0.50),
+                'main_p95_ms': percentile(main, 0.95),
+            }
+
+
+# Shared by every agent and session in the process
+model_router = ModelRouter()
@@ -0,0 +1,154 @@
+"""
+Order Lookup Cache
+
+Agent-side LRU + TTL cache of gateway lookup_order results, keyed by order ID and
+shared by every session in the process:
+- found orders are kept for ORDER_CACHE_TTL_SECONDS (default 300)
+- not-found results (404) are kept for ORDER_CACHE_NEGATIVE_TTL_SECONDS (default 30),
+  so repeated lookups of a mistyped ID do not each cost a gateway round trip
+- at most ORDER_CACHE_MAX_ENTRIES entries (default 10,000), least recently used
+  evicted first
+
+Only the order record is cached. return_eligibility is recomputed from
+purchase_date and category on every read with the shared policy rules, so a
+cached order never serves a stale days_remaining (or a stale window after a
+rules reload).
+
+Order-status updates call invalidate() (or handle_order_update() with the update
+event) so the next lookup goes to the gateway. The cache is per process; the TTL
+bounds staleness in processes the update does not reach.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from policy_rules import check_eligibility
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get('ORDER_CACHE_MAX_ENTRIES', 10_000))
+DEFAULT_TTL_SECONDS = float(os.environ.get('ORDER_CACHE_TTL_SECONDS', 300))
+DEFAULT_NEGATIVE_TTL_SECONDS = float(os.environ.get('ORDER_CACHE_NEGATIVE_TTL_SECONDS', 30))
+
+
+class OrderLookupCache:
+    """
+    Thread-safe LRU + TTL cache of (status code, body) lookup results.
+
+    Args:
+        max_entries: Maximum cached order IDs
+        ttl_seconds: Lifetime of found orders
+        negative_ttl_seconds: Lifetime of not-found results (0 disables negative caching)
+        clock: Monotonic time source in seconds
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 negative_ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self.ttl = DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.negative_ttl = DEFAULT_NEGATIVE_TTL_SECONDS if negative_ttl_seconds is None else negative_ttl_seconds
+        self.clock = clock
+        # order_id -> (expires at, status code, body without return_eligibility)
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def get(self, order_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Cached (status code, body) for an order, or None"""
+        order_id = order_id.upper()
+        with self._lock:
+            entry = self._entries.get(order_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, status, body = entry
+            if self.clock() >= expires_at:
+                del self._entries[order_id]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(order_id)
+            if status == 200:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+
+        if status != 200:
+            return status, dict(body)
+        # Eligibility depends on today's date and the active rules: recompute on read
+        return status, {
+            **body,
+            'return_eligibility': check_eligibility(body['purchase_date'], body['category'])
+        }
+
+    def put(self, order_id: str, status: int, body: Dict[str, Any]) -> None:
+        """Cache a lookup result (only found orders and not-found results are cached)"""
+        if status == 200:
+            if not isinstance(body, dict) or 'purchase_date' not in body or 'category' not in body:
+                return
+            ttl = self.ttl
+            body = {k: v for k, v in body.items() if k != 'return_eligibility'}
+        elif status == 404:
+            ttl = self.negative_ttl
+            body = {'error': body.get('error', f'Order {order_id} not found')}
+        else:
+            return
+        if ttl <= 0:
+            return
+
+        order_id = order_id.upper()
+        with self._lock:
+            self._entries[order_id] = (self.clock() + ttl, status, body)
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, order_ids: Iterable[str]) -> int:
+        """Drop cached results for the given orders; returns how many were cached"""
+        removed = 0
+        with self._lock:
+            for order_id in order_ids:
+                if self._entries.pop(str(order_id).upper(), None) is not None:
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def handle_order_update(self, event: Dict[str, Any]) -> int:
+        """
+        Invalidation hook for order-status updates.
+
+        Accepts {'order_id': ...}, {'order_ids': [...]}, or an EventBridge-style
+        envelope with either of those under 'detail'.
+        """
+        event = event.get('detail', event)
+        order_ids = list(event.get('order_ids') or [])
+        if event.get('order_id'):
+            order_ids.append(event['order_id'])
+        return self.invalidate(order_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, hit counters (found / not found), misses, expirations and invalidations"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                'expired': self.expired,
+                'invalidations': self.invalidations
+            }
+
+
+# Shared by every agent and session in the process
+order_cache = OrderLookupCache()
@@ -0,0 +1,171 @@
+"""
+Synthetic Order Data
+
+Synthetic customers and orders shaped like a real store's, for loading the order
+store at benchmark scale (10k to 10M orders; see 35_generate_orders.py and
+36_benchmark_lambda.py):
+- customers: order counts are heavy-tailed - a few customers place hundreds of
+  orders, most place one or two - so search_orders sees both long and short
+  order histories
+- purchase dates: volume grows over the period, with weekend and holiday-season
+  peaks; orders are generated in purchase-date order, so order IDs increase with
+  time as they do in production
+- categories: a fixed mix (including every category in the return policy) with
+  log-normal prices per category
+- status: recent orders may still be processing or shipped; a small share of
+  older orders were returned or cancelled
+
+Generation is streamed and deterministic for a seed: orders are yielded one at a
+time (build_sqlite_store and DynamoDBOrderStore.put_orders write them in
+batches), and only the per-day weights are held in memory.
+"""
+
+import itertools
+import math
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_SEED = 42
+# Purchase dates span this many days, ending today
+DEFAULT_DAYS = 730
+# Default customer count: one customer per this many orders
+ORDERS_PER_CUSTOMER = 5
+# Customer activity skew: customer index = customers * u ** CUSTOMER_SKEW, so the
+# top 1% of customers place about 10% of the orders
+CUSTOMER_SKEW = 2.0
+
+# (category, share of orders, median price, price spread (log-normal sigma), products)
+CATEGORY_PROFILES = (
+    ('electronics', 0.16, 180.0, 0.9, ('Laptop', 'Smartphone', 'Headphones', 'Tablet', 'Monitor', 'Camera')),
+    ('clothing', 0.22, 40.0, 0.6, ('Jacket', 'Jeans', 'Sneakers', 'Dress', 'Sweater', 'T-Shirt')),
+    ('books', 0.12, 18.0, 0.5, ('Novel', 'Cookbook', 'Biography', 'Textbook', 'Travel Guide')),
+    ('home', 0.14, 55.0, 0.8, ('Blender', 'Lamp', 'Cookware Set', 'Vacuum', 'Bedding Set')),
+    ('grocery', 0.12, 25.0, 0.5, ('Coffee Beans', 'Olive Oil', 'Snack Box', 'Tea Sampler')),
+    ('toys', 0.08, 30.0, 0.6, ('Building Set', 'Board Game', 'Puzzle', 'Action Figure')),
+    ('sports', 0.10, 60.0, 0.8, ('Yoga Mat', 'Running Shoes', 'Dumbbells', 'Tent', 'Bike Helmet')),
+    ('jewelry', 0.06, 120.0, 1.0, ('Necklace', 'Ring', 'Earrings', 'Bracelet', 'Watch')),
+)
+BRANDS = ('Acme', 'Northwind', 'Contoso', 'Globex', 'Initech', 'Fabrikam', 'Tailspin', 'Litware')
+REGIONS = (('us', 0.85), ('eu', 0.15))
+FIRST_NAMES = ('Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn')
+LAST_NAMES = ('Smith', 'Garcia', 'Chen', 'Patel', 'Müller', 'Rossi', 'Kim', 'Nguyen', 'Silva', 'Dubois')
+
+
+def customer_id(index: int) -> str:
+    return f'CUST-{index:07d}'
+
+
+def order_id(index: int) -> str:
+    return f'ORD-{index:08d}'
+
+
+def default_customer_count(order_count: int) -> int:
+    return max(1, order_count // ORDERS_PER_CUSTOMER)
+
+
+def pick_customer(rng: random.Random, customers: int) -> int:
+    """Customer index with heavy-tailed activity (low indexes order the most)"""
+    return min(customers - 1, int(customers * rng.random() ** CUSTOMER_SKEW))
+
+
+def daily_weights(days: int = DEFAULT_DAYS, today: Optional[date] = None) -> List[float]:
+    """
+    Relative order volume per day, oldest first (the last entry is today).
+
+    Volume doubles over the period, is 20% higher on weekends, peaks in the
+    holiday season (Nov 20 - Dec 24) and dips in January.
+    """
+    today = today or date.today()
+    weights = []
+    for offset in range(days):
+        day = today - timedelta(days=days - 1 - offset)
+        weight = 1.0 + offset / max(1, days - 1)
+        if day.weekday() >= 5:
+            weight *= 1.2
+        if (day.month == 11 and day.day >= 20) or (day.month == 12 and day.day <= 24):
+            weight *= 1.8
+        elif day.month == 1:
+            weight *= 0.85
+        weights.append(weight)
+    return weights
+
+
+def _status(rng: random.Random, age_days: int) -> str:
+    if age_days < 2:
+        return 'processing'
+    if age_days < 6:
+        return rng.choice(('shipped', 'delivered'))
+    r = rng.random()
+    if r < 0.04:
+        return 'returned'
+    if r < 0.055:
+        return 'cancelled'
+    return 'delivered'
+
+
+def generate_orders(count: int, seed: int = DEFAULT_SEED, customers: Optional[int] = None,
+                    days: int = DEFAULT_DAYS, today: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield count synthetic orders in purchase-date order (ORD-00000000 is the oldest).
+
+    Args:
+        count: Number of orders
+        seed: Random seed (same seed, count and today: same orders)
+        customers: Number of customers (default: count // ORDERS_PER_CUSTOMER)
+        days: Purchase dates span this many days, ending today
+        today: Last purchase date (default: today)
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    customers = customers or default_customer_count(count)
+    weights = daily_weights(days, today)
+    total_weight = sum(weights)
+
+    categories = [profile[0] for profile in CATEGORY_PROFILES]
+    cum_shares = list(itertools.accumulate(profile[1] for profile in CATEGORY_PROFILES))
+    profiles = {profile[0]: (math.log(profile[2]), profile[3], profile[4]) for profile in CATEGORY_PROFILES}
+
+    index = 0
+    cumulative = 0.0
+    for offset, weight in enumerate(weights):
+        # Orders up to and including this day, rounded so the days add up to count
+        cumulative += weight
+        day_end = round(cumulative / total_weight * count)
+        age_days = days - 1 - offset
+        purchase_date = (today - timedelta(days=age_days)).isoformat()
+        while index < day_end:
+            category = rng.choices(categories, cum_weights=cum_shares)[0]
+            mu, sigma, products = profiles[category]
+            yield {
+                'order_id': order_id(index),
+                'customer_id': customer_id(pick_customer(rng, customers)),
+                'product_name': f'{rng.choice(BRANDS)} {rng.choice(products)}',
+                'purchase_date': purchase_date,
+                'amount': max(1.0, round(rng.lognormvariate(mu, sigma), 2)),
+                'category': category,
+                'status': _status(rng, age_days)
+            }
+            index += 1
+
+
+def generate_customers(count: int, seed: int = DEFAULT_SEED, days: int = DEFAULT_DAYS,
+                       today: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield count customer profiles (CUST-0000000 onwards), matching the customer
+    IDs used by generate_orders with the same customer count.
+    """
+    rng = random.Random(seed + 1)
+    today = today or date.today()
+    regions = [region for region, _ in REGIONS]
+    region_shares = [share for _, share in REGIONS]
+    for index in range(count):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        yield {
+            'customer_id': customer_id(index),
+            'name': name,
+            'email': f"{name.split()[0].lower()}.{index}@example.com",
+            'region': rng.choices(regions, region_shares)[0],
+            # Customers signed up before (or up to a year before) the order history starts
+            'signup_date': (today - timedelta(days=days + rng.randrange(365))).isoformat()
+        }
@@ -0,0 +1,316 @@
+"""
+Coalescing Order Loader
+
+Collects lookup_order requests issued within a short window - several calls from
+one model turn, or calls from concurrent sessions over a shared connection - and sends
+them to the gateway as one lookup_orders call, then hands each caller its own
+result. Results have the same shape as a lookup_order gateway result, so the
+model cannot tell the difference.
+
+A batch opens with the first request and is sent when the window
+(ORDER_LOOKUP_WINDOW_MS, default 5 ms) expires or when it reaches the maximum
+batch size (ORDER_LOOKUP_MAX_BATCH, default 50, the Lambda's limit), whichever
+comes first. Batches are keyed by gateway connection (MCP client): requests only
+share a batch with requests that would use the same connection, so no lookup
+rides on another session's client, which may close before the batch is sent.
+In 17_runtime_agent.py that means the lookups of one agent invocation, and the
+fast path's lookups from every session (they share one connection). Requests
+for the same order within one batch share a single entry. If the batch call
+fails, each caller falls back to its own lookup_order call.
+
+Wiring (14_full_agent.py, 17_runtime_agent.py):
+
+    gateway_tools = coalesce_gateway_tools(list(mcp_client.list_tools_sync()))
+
+replaces the gateway's lookup_order tool with CoalescedLookupTool, which first
+checks the order cache (order_cache.py) and uses the loader when the gateway
+also serves lookup_orders.
+
+Each lookup_orders call made for CoalescedLookupTool has a read timeout of
+BATCH_READ_TIMEOUT (the lookup_order tool timeout, tool_executor.py): the batch
+is sent from the loader's own thread, outside the request's deadline scope.
+Blocking callers pass load() a timeout of their own.
+
+With HEDGING=1, slow lookup_orders and lookup_order gateway calls are hedged
+(hedging.py).
+"""
+
+import asyncio
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from strands.types.tools import AgentTool, ToolResult
+
+from fast_path import decode_lambda_response
+from hedging import hedger
+from order_cache import OrderLookupCache, order_cache
+from order_store import parse_fields, project_order
+from tool_executor import DEFAULT_TOOL_TIMEOUTS, tool_result_of
+
+DEFAULT_WINDOW_MS = float(os.environ.get('ORDER_LOOKUP_WINDOW_MS', 5))
+DEFAULT_MAX_BATCH = int(os.environ.get('ORDER_LOOKUP_MAX_BATCH', 50))
+
+# Read timeout of CoalescedLookupTool's lookup_orders calls
+BATCH_READ_TIMEOUT = timedelta(seconds=DEFAULT_TOOL_TIMEOUTS['lookup_order'])
+
+# order IDs -> {order_id: (status code, body)}
+BatchFetcher = Callable[[List[str]], Dict[str, Tuple[int, Dict[str, Any]]]]
+
+
+class _Batch:
+    def __init__(self, key: Hashable, fetch: BatchFetcher):
+        self.key = key
+        self.fetch = fetch
+        self.futures: Dict[str, Future] = {}
+        self.timer: Optional[threading.Timer] = None
+        self.sent = False
+
+
+class OrderLookupCoalescer:
+    """
+    Thread-safe request coalescer for order lookups.
+
+    Callers may run on any thread or event loop: load() blocks, load_async() awaits.
+
+    Args:
+        window_ms: How long a batch collects requests after the first one
+        max_batch: Distinct order IDs per batch (a full batch is sent immediately)
+    """
+
+    def __init__(self, window_ms: Optional[float] = None, max_batch: Optional[int] = None):
+        self.window = (DEFAULT_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or DEFAULT_MAX_BATCH
+        self._lock = threading.Lock()
+        # Open batch per gateway connection
+        self._batches: Dict[Hashable, _Batch] = {}
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.batch_sizes: Dict[int, int] = {}
+
+    def submit(self, order_id: str, fetch: BatchFetcher, key: Hashable = None) -> Future:
+        """
+        Add a request to the open batch of `key` (opening one if needed); returns its future.
+
+        Args:
+            order_id: Order to look up
+            fetch: Sends a batch (used when this request opens the batch)
+            key: The gateway connection fetch sends through; only requests with the
+                same key share a batch (default: fetch itself)
+        """
+        key = fetch if key is None else key
+        with self._lock:
+            self.requests += 1
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._batches[key] = _Batch(key, fetch)
+                batch.timer = threading.Timer(self.window, self._flush, args=(batch,))
+                batch.timer.daemon = True
+                batch.timer.start()
+            future = batch.futures.get(order_id)
+            if future is None:
+                future = batch.futures[order_id] = Future()
+            full = len(batch.futures) >= self.max_batch
+            if full:
+                # Later requests open a new batch
+                del self._batches[key]
+
+        if full:
+            batch.timer.cancel()
+            threading.Thread(target=self._flush, args=(batch,), daemon=True).start()
+        return future
+
+    def load(self, order_id: str, fetch: BatchFetcher, key: Hashable = None,
+             timeout: Optional[float] = None) -> Tuple[int, Dict[str, Any]]:
+        """Look up one order through the current batch of `key`; returns (status code, body)"""
+        return self.submit(order_id, fetch, key).result(timeout)
+
+    async def load_async(self, order_id: str, fetch: BatchFetcher, key: Hashable = None) -> Tuple[int, Dict[str, Any]]:
+        return await asyncio.wrap_future(self.submit(order_id, fetch, key))
+
+    def _flush(self, batch: _Batch) -> None:
+        with self._lock:
+            if batch.sent:
+                # The window expired while the full batch was being sent
+                return
+            batch.sent = True
+            if self._batches.get(batch.key) is batch:
+                del self._batches[batch.key]
+            self.batches += 1
+            size = len(batch.futures)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+
+        order_ids = list(batch.futures)
+        try:
+            results = batch.fetch(order_ids)
+        except Exception as e:
+            with self._lock:
+                self.failed_batches += 1
+            for future in batch.futures.values():
+                future.set_exception(e)
+            return
+
+        for order_id, future in batch.futures.items():
+            result = results.get(order_id)
+            if result is None:
+                future.set_exception(KeyError(f"{order_id} missing from the batch response"))
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests, batches, round trips saved and the batch size distribution"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'round_trips_saved': self.requests - self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'max_batch_size': max(self.batch_sizes, default=0),
+                'failed_batches': self.failed_batches,
+                'batch_sizes': dict(sorted(self.batch_sizes.items()))
+            }
+
+
+# Shared by every agent and session in the process
+order_loader = OrderLookupCoalescer()
+
+
+def gateway_batch_fetcher(mcp_client, batch_tool_name: str, read_timeout: Optional[timedelta] = None) -> BatchFetcher:
+    """
+    Fetch function that sends a batch as one lookup_orders gateway call.
+
+    Found orders map to (200, order) and missing ones to (404, {'error': ...}),
+    matching what lookup_order returns for them. read_timeout bounds the call
+    (e.g. by the time left before the request's deadline).
+    """
+    def fetch(order_ids: List[str]) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+        result = hedger.call(
+            'lookup_orders', mcp_client.call_tool_sync,
+            tool_use_id=f"lookup-orders-{uuid.uuid4().hex[:12]}",
+            name=batch_tool_name,
+            arguments={'order_ids': order_ids},
+            read_timeout_seconds=read_timeout
+        )
+        if result['status'] != 'success':
+            raise RuntimeError(f"{batch_tool_name} failed")
+        status, body = decode_lambda_response(result['content'][0]['text'])
+        if status != 200:
+            raise RuntimeError(f"{batch_tool_name} returned {status}: {body.get('error')}")
+
+        results = {}
+        for entry in body.get('orders', []):
+            order = dict(entry)
+            if order.pop('found', False):
+                results[order['order_id']] = (200, order)
+            else:
+                results[order['order_id']] = (404, {'error': order.get('error', 'Order not found')})
+        return results
+
+    return fetch
+
+
+class CoalescedLookupTool(AgentTool):
+    """
+    Drop-in replacement for the gateway lookup_order tool.
+
+    Answers from the order cache when it can; otherwise looks the order up through
+    the loader (when the gateway serves lookup_orders) or with a direct lookup_order
+    call, and caches the result. A `fields` projection is applied to the full
+    cached or batched order here; invalid fields go to the Lambda, which rejects them.
+
+    Args:
+        lookup_tool: The gateway's lookup_order tool (MCPAgentTool)
+        batch_tool: The gateway's lookup_orders tool (MCPAgentTool), or None
+        loader: Coalescer to use (defaults to the shared order_loader)
+        cache: Order cache to use (defaults to the shared order_cache)
+    """
+
+    def __init__(self, lookup_tool, batch_tool=None, loader: Optional[OrderLookupCoalescer] = None,
+                 cache: Optional[OrderLookupCache] = None):
+        super().__init__()
+        self.lookup_tool = lookup_tool
+        self.loader = loader or order_loader
+        self.cache = cache or order_cache
+        self.fetch = (gateway_batch_fetcher(batch_tool.mcp_client, batch_tool.mcp_tool.name, BATCH_READ_TIMEOUT)
+                      if batch_tool else None)
+        self.connection = batch_tool.mcp_client if batch_tool else None
+
+    @property
+    def tool_name(self) -> str:
+        return self.lookup_tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self.lookup_tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self.lookup_tool.tool_type
+
+    @staticmethod
+    def _result(tool_use, status, body, fields=None) -> ToolResult:
+        # Same envelope and encoding as the Lambda's own lookup_order response
+        if status == 200:
+            body = project_order(body, fields)
+        payload = {'statusCode': status, 'body': body}
+        return {
+            'toolUseId': tool_use['toolUseId'],
+            'status': 'success',
+            'content': [{'text': json.dumps(payload, separators=(',', ':'))}]
+        }
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        order_id = str(tool_use['input'].get('order_id', '')).strip().upper()
+        try:
+            fields = parse_fields(tool_use['input'].get('fields'))
+        except ValueError:
+            # Let the Lambda reject the request
+            order_id, fields = '', None
+
+        if order_id:
+            cached = self.cache.get(order_id)
+            if cached is not None:
+                yield self._result(tool_use, *cached, fields)
+                return
+
+        if order_id and self.fetch is not None:
+            try:
+                status, body = await self.loader.load_async(order_id, self.fetch, self.connection)
+            except Exception as e:
+                print(f"⚠️  Batched order lookup failed, looking up {order_id} directly: {e}")
+            else:
+                self.cache.put(order_id, status, body)
+                yield self._result(tool_use, status, body, fields)
+                return
+
+        # Only full records are cached: a projected result would be served as a full order later
+        cacheable = order_id and fields is None
+        lookup = hedger.stream('lookup_order', lambda _: self.lookup_tool.stream(tool_use, invocation_state, **kwargs))
+        async for event in lookup:
+            result = tool_result_of(event) if cacheable else None
+            if result is not None and result.get('status') == 'success':
+                content = result.get('content') or [{}]
+                try:
+                    self.cache.put(order_id, *decode_lambda_response(content[0].get('text')))
+                except (TypeError, ValueError):
+                    pass
+            yield event
+
+
+def coalesce_gateway_tools(gateway_tools: Sequence[Any], loader: Optional[OrderLookupCoalescer] = None,
+                           cache: Optional[OrderLookupCache] = None) -> List[Any]:
+    """
+    Route the gateway lookup_order tool through the order cache and, when the
+    gateway also serves lookup_orders, the coalescing loader.
+    """
+    by_name = {tool.tool_name.split('___')[-1]: tool for tool in gateway_tools}
+    lookup_tool, batch_tool = by_name.get('lookup_order'), by_name.get('lookup_orders')
+    if lookup_tool is None:
+        return list(gateway_tools)
+    return [CoalescedLookupTool(tool, batch_tool, loader, cache) if tool is lookup_tool else tool
+            for tool in gateway_tools]
@@ -0,0 +1,331 @@
+"""
+Order Lookup Lambda: OrderLookupFunction
+
+Source of the Lambda function deployed by 10_create_lambda.py (packaged as
+lambda_function.py together with order_store.py, order_tool_schemas.py,
+policy_rules.py and return_policy_rules.json). The gateway tool schemas it
+serves are in order_tool_schemas.py. It can also be imported and invoked in-process for
+local testing.
+
+Orders are read from the order store configured in the environment (see
+order_store.py): the bundled orders.db SQLite file, a DynamoDB table, or, when
+neither is configured, the sample orders in memory (order_store.load_sample_orders:
+sample_orders.json when it is bundled with the function, with dates relative to
+the deployment day; otherwise equivalent sample orders built relative to today).
+
+Responses are {'statusCode', 'body'} with the body as a JSON object (not a JSON
+string), so the gateway's tool result is encoded once. Both tools accept a
+`fields` projection (LOOKUP_FIELDS; order_id is always returned), and
+return_eligibility is only computed when it is requested.
+
+search_orders lists a customer's orders, most recent first, filtered by purchase
+date range, category and return eligibility. It reads one page at a time from the
+store's (customer_id, purchase_date) index: page_size is capped at
+MAX_SEARCH_PAGE_SIZE, each call reads at most MAX_SEARCH_SCAN orders, and the
+response carries an opaque next_cursor (the last order's key plus a fingerprint of
+the filters) to continue from, so no call loads a whole order history.
+
+Everything a request needs is set up once per execution environment, at module
+scope: the policy rules are compiled, the store is opened and its lookup queries
+warmed, and return eligibility is precomputed for every category and purchase
+date inside the return windows (policy_rules.EligibilityTable), so a warm request
+is one indexed read plus dict lookups. Each init phase is timed into INIT_TIMINGS,
+which is logged as one JSON line when running in Lambda.
+"""
+
+import time
+
+_init_start = time.perf_counter()
+
+import base64
+import json
+import os
+import zlib
+from datetime import date
+
+from order_store import load_sample_orders, open_order_store, parse_fields, project_order
+from order_tool_schemas import DEFAULT_SEARCH_PAGE_SIZE, MAX_BATCH_ORDER_IDS, MAX_SEARCH_PAGE_SIZE
+from policy_rules import eligibility_table, get_policy_engine
+
+# search_orders: the most orders one call reads from the store; eligibility-filtered
+# searches read in batches of SEARCH_BATCH_SIZE
+MAX_SEARCH_SCAN = 500
+SEARCH_BATCH_SIZE = 50
+
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+# Init phases (ms), measured once per execution environment
+INIT_TIMINGS = {'imports_ms': _elapsed_ms(_init_start)}
+
+_phase_start = time.perf_counter()
+POLICY_ENGINE = get_policy_engine()
+INIT_TIMINGS['policy_ms'] = _elapsed_ms(_phase_start)
+
+# Order store, opened once per execution environment
+_phase_start = time.perf_counter()
+STORE = open_order_store(default_orders=load_sample_orders)
+INIT_TIMINGS['store_ms'] = _elapsed_ms(_phase_start)
+
+# Prepare the lookup queries (and page in the index roots) before the first request
+_phase_start = time.perf_counter()
+STORE.get('')
+STORE.get_many([''])
+STORE.orders_for_customer('', limit=1)
+INIT_TIMINGS['warmup_ms'] = _elapsed_ms(_phase_start)
+
+_phase_start = time.perf_counter()
+INIT_TIMINGS['eligibility_entries'] = eligibility_table().precomputed
+INIT_TIMINGS['eligibility_ms'] = _elapsed_ms(_phase_start)
+INIT_TIMINGS['total_ms'] = _elapsed_ms(_init_start)
+
+if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    print(json.dumps({'message': 'order lookup init', 'backend': STORE.backend, **INIT_TIMINGS}))
+
+
+def invoked_tool(event, context):
+    """
+    Bare name of the gateway tool being invoked.
+
+    The gateway passes the tool name (prefixed with the target name) in the client
+    context; direct invocations without it are routed by the event's keys.
+    """
+    client_context = getattr(context, 'client_context', None)
+    tool_name = (getattr(client_context, 'custom', None) or {}).get('bedrockAgentCoreToolName', '')
+    if tool_name:
+        return tool_name.split('___')[-1]
+    if 'customer_id' in event:
+        return 'search_orders'
+    return 'lookup_orders' if 'order_ids' in event else 'lookup_order'
+
+
+def order_response(order, fields=None):
+    """Order record projected to fields, with its return eligibility if requested (None: all fields)"""
+    if fields is None or 'return_eligibility' in fields:
+        order = {
+            **order,
+            'return_eligibility': eligibility_table().check(order['purchase_date'], order['category'])
+        }
+    return project_order(order, fields)
+
+
+def error_response(status_code, message):
+    return {
+        'statusCode': status_code,
+        'body': {
+            'error': message
+        }
+    }
+
+
+def lookup_order(event):
+    """lookup_order tool: one order by ID"""
+    order_id = str(event.get('order_id') or '').strip().upper()
+
+    if not order_id:
+        return error_response(400, 'order_id is required')
+
+    try:
+        fields = parse_fields(event.get('fields'))
+    except ValueError as e:
+        return error_response(400, str(e))
+
+    # Look up order
+    order = STORE.get(order_id)
+
+    if not order:
+        return error_response(404, f'Order {order_id} not found')
+
+    return {
+        'statusCode': 200,
+        'body': order_response(order, fields)
+    }
+
+
+def lookup_orders(event):
+    """lookup_orders tool: several orders by ID in one batched store read"""
+    order_ids = event.get('order_ids')
+    if isinstance(order_ids, str):
+        order_ids = [order_ids]
+
+    if not order_ids or not isinstance(order_ids, list):
+        return error_response(400, 'order_ids is required')
+
+    if len(order_ids) > MAX_BATCH_ORDER_IDS:
+        return error_response(400, f'At most {MAX_BATCH_ORDER_IDS} order_ids can be looked up per call')
+
+    try:
+        fields = parse_fields(event.get('fields'))
+    except ValueError as e:
+        return error_response(400, str(e))
+
+    # Requested order, duplicates removed
+    requested = list(dict.fromkeys(str(order_id).strip().upper() for order_id in order_ids))
+    found = STORE.get_many(requested)
+
+    results = []
+    not_found = []
+    for order_id in requested:
+        order = found.get(order_id)
+        if order:
+            results.append({'order_id': order_id, 'found': True, **order_response(order, fields)})
+        else:
+            not_found.append(order_id)
+            results.append({'order_id': order_id, 'found': False, 'error': f'Order {order_id} not found'})
+
+    return {
+        'statusCode': 200,
+        'body': {
+            'orders': results,
+            'found_count': len(results) - len(not_found),
+            'not_found': not_found
+        }
+    }
+
+
+def _parse_date(value, name):
+    """YYYY-MM-DD argument (None if absent); ValueError if malformed"""
+    if value in (None, ''):
+        return None
+    value = str(value).strip()
+    try:
+        if len(value) != 10:
+            raise ValueError
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format') from None
+
+
+def _parse_eligible(value):
+    """eligible argument as True / False / None; ValueError if not a boolean"""
+    if value is None or isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in ('true', 'false'):
+        return str(value).strip().lower() == 'true'
+    raise ValueError('eligible must be true or false')
+
+
+def _encode_cursor(key, fingerprint):
+    payload = json.dumps({'k': list(key), 'f': fingerprint}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, fingerprint):
+    """(purchase_date, order_id) key of a cursor; ValueError if invalid or issued for other filters"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        purchase_date, order_id = payload['k']
+        issued_for = payload['f']
+    except (TypeError, ValueError, KeyError):
+        raise ValueError('cursor is invalid') from None
+    if issued_for != fingerprint:
+        raise ValueError('cursor was issued for a different search; repeat the search with the same filters')
+    return str(purchase_date), str(order_id)
+
+
+def search_orders(event):
+    """search_orders tool: one page of a customer's orders, most recent first"""
+    customer_id = str(event.get('customer_id') or '').strip()
+
+    if not customer_id:
+        return error_response(400, 'customer_id is required')
+
+    try:
+        start_date = _parse_date(event.get('start_date'), 'start_date')
+        end_date = _parse_date(event.get('end_date'), 'end_date')
+        eligible = _parse_eligible(event.get('eligible'))
+        fields = parse_fields(event.get('fields'))
+        page_size = int(event.get('page_size') if event.get('page_size') is not None else DEFAULT_SEARCH_PAGE_SIZE)
+    except (TypeError, ValueError) as e:
+        return error_response(400, str(e))
+
+    if page_size < 1:
+        return error_response(400, 'page_size must be at least 1')
+    page_size = min(page_size, MAX_SEARCH_PAGE_SIZE)
+    category = str(event.get('category') or '').strip().lower() or None
+
+    # Cursors are only valid for the filters they were issued for
+    filters = [customer_id, start_date, end_date, category, eligible]
+    fingerprint = format(zlib.crc32(json.dumps(filters).encode()), '08x')
+    before = None
+    if event.get('cursor'):
+        try:
+            before = _decode_cursor(str(event['cursor']), fingerprint)
+        except ValueError as e:
+            return error_response(400, str(e))
+
+    table = eligibility_table()
+    batch_size = page_size + 1
+    if eligible is not None:
+        batch_size = max(batch_size, SEARCH_BATCH_SIZE)
+    if eligible:
+        # Only purchases inside the longest return window can be eligible
+        oldest = date.fromordinal(table.today.toordinal() - table.max_window).isoformat()
+        start_date = max(start_date or oldest, oldest)
+        end_date = min(end_date or table.today.isoformat(), table.today.isoformat())
+
+    # Read one extra match to know whether another page follows
+    matches, scanned, exhausted = [], 0, False
+    while len(matches) <= page_size and scanned < MAX_SEARCH_SCAN:
+        limit = min(batch_size, MAX_SEARCH_SCAN - scanned)
+        batch = STORE.orders_for_customer(customer_id, start_date, end_date, limit=limit,
+                                          category=category, before=before)
+        scanned += len(batch)
+        for order in batch:
+            before = (order['purchase_date'], order['order_id'])
+            if eligible is None or table.check(order['purchase_date'], order['category'])['eligible'] == eligible:
+                matches.append(order)
+                if len(matches) > page_size:
+                    break
+        if len(batch) < limit:
+            exhausted = True
+            break
+
+    page = matches[:page_size]
+    if len(matches) > page_size:
+        next_key = (page[-1]['purchase_date'], page[-1]['order_id'])
+    elif exhausted:
+        next_key = None
+    else:
+        # Scan limit reached: continue after the last order read
+        next_key = before
+
+    return {
+        'statusCode': 200,
+        'body': {
+            'orders': [order_response(order, fields) for order in page],
+            'count': len(page),
+            'has_more': next_key is not None,
+            'next_cursor': _encode_cursor(next_key, fingerprint) if next_key else None
+        }
+    }
+
+
+def lambda_handler(event, context):
+    """
+    Lambda handler for the order lookup gateway tools.
+
+    Expected input:
+    lookup_order:  {"order_id": "ORD-001", "fields": ["status", "return_eligibility"]}
+    lookup_orders: {"order_ids": ["ORD-001", "ORD-002"], "fields": [...]}
+    search_orders: {"customer_id": "user_001", "start_date": "2025-01-01", "end_date": "2025-03-31",
+                    "category": "electronics", "eligible": true, "page_size": 10, "cursor": "...",
+                    "fields": [...]}
+    (all but order_id / order_ids / customer_id are optional)
+    """
+    try:
+        # Parse input
+        if isinstance(event, str):
+            event = json.loads(event)
+
+        tool = invoked_tool(event, context)
+        if tool == 'search_orders':
+            return search_orders(event)
+        if tool == 'lookup_orders':
+            return lookup_orders(event)
+        return lookup_order(event)
+
+    except Exception as e:
+        return error_response(500, f'Internal error: {str(e)}')
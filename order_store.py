@@ -0,0 +1,704 @@
+"""
+Order Store
+
+Pluggable order storage for the order lookup Lambda (order_lookup_lambda.py) and
+the bulk returns pipeline. Every backend implements the OrderStore interface:
+- get / get_many: primary index on order_id
+- orders_for_customer: secondary index on (customer_id, purchase_date)
+- orders_between: secondary index on purchase_date
+
+Customer order searches page with a keyset: orders_for_customer(..., before=key)
+continues below the (purchase_date, order_id) key of the last order returned, so
+each page reads only the index range it returns.
+
+Backends:
+- SQLiteOrderStore: a read-only, memory-mapped SQLite file built in WAL mode by
+  build_sqlite_store (bundled with the Lambda, or on a local disk). When the
+  file's directory is read-only, as in a Lambda package, it is opened immutable
+  (no locking and no -shm file).
+- DynamoDBOrderStore: a DynamoDB table with a customer_id and a purchase_month
+  global secondary index (create_dynamodb_table). LocalDynamoDBClient is an
+  in-process stand-in for the subset of the DynamoDB client API the store uses,
+  for running it without AWS.
+- InMemoryOrderStore: a dict with sorted secondary indexes, for the sample orders
+  (load_sample_orders; build_sample_orders builds them for a given day).
+
+open_order_store() picks the backend from the environment:
+    ORDER_STORE_BACKEND   sqlite | dynamodb | memory (default: sqlite if the
+                          database file exists, otherwise memory)
+    ORDER_DB_PATH         SQLite file (default: orders.db next to this module)
+    ORDER_TABLE_NAME      DynamoDB table name
+    ORDER_DB_MMAP_BYTES   SQLite memory map size (default 256 MB)
+
+Orders are dicts with the ORDER_FIELDS keys; dates are YYYY-MM-DD strings, so
+they sort and compare as text.
+"""
+
+import bisect
+import json
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+ORDER_FIELDS = ('order_id', 'customer_id', 'product_name', 'purchase_date', 'amount', 'category', 'status')
+# Fields an order lookup response can be projected to (order_id is always returned)
+LOOKUP_FIELDS = ORDER_FIELDS + ('return_eligibility',)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'orders.db')
+DEFAULT_MMAP_BYTES = int(os.environ.get('ORDER_DB_MMAP_BYTES', 256 * 1024 * 1024))
+DEFAULT_LIMIT = 100
+
+# SQLite bound-parameter chunk for IN (...) lookups; DynamoDB BatchGetItem maximum
+SQLITE_BATCH = 500
+DYNAMODB_BATCH_GET = 100
+DYNAMODB_BATCH_WRITE = 25
+
+CUSTOMER_INDEX = 'customer_id-purchase_date-index'
+PURCHASE_DATE_INDEX = 'purchase_month-purchase_date-index'
+
+
+def parse_fields(fields: Any) -> Optional[Tuple[str, ...]]:
+    """
+    Validate a lookup `fields` projection (a list or a comma-separated string).
+
+    Returns:
+        The requested LOOKUP_FIELDS in request order, or None for all fields
+
+    Raises:
+        ValueError: If fields is malformed or names unknown fields
+    """
+    if fields is None or fields == '' or fields == []:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    if not isinstance(fields, (list, tuple)) or not all(isinstance(field, str) for field in fields):
+        raise ValueError('fields must be a list of field names')
+    requested = tuple(dict.fromkeys(field.strip().lower() for field in fields if field.strip()))
+    unknown = [field for field in requested if field not in LOOKUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(LOOKUP_FIELDS)}")
+    return requested or None
+
+
+def project_order(order: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    """order_id plus the requested fields of an order record (fields=None keeps every field)"""
+    if fields is None:
+        return order
+    projected = {'order_id': order['order_id']}
+    for field in fields:
+        if field in order:
+            projected[field] = order[field]
+    return projected
+
+
+class OrderStore(ABC):
+    """Order storage interface"""
+
+    backend = 'base'
+
+    @abstractmethod
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Order by ID, or None"""
+
+    def get_many(self, order_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Orders by ID in one batched read (IDs that are not found are left out)"""
+        orders = {}
+        for order_id in order_ids:
+            order = self.get(order_id)
+            if order is not None:
+                orders[order_id] = order
+        return orders
+
+    @abstractmethod
+    def orders_for_customer(self, customer_id: str, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+                            category: Optional[str] = None,
+                            before: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        A customer's orders, most recent first (ties by order_id, descending).
+
+        Args:
+            customer_id: Customer to search
+            start_date / end_date: Optional inclusive purchase date range
+            limit: Maximum orders returned
+            category: Only orders in this category
+            before: Keyset cursor: only orders whose (purchase_date, order_id) is below it
+        """
+
+    @abstractmethod
+    def orders_between(self, start_date: str, end_date: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """Orders purchased within [start_date, end_date], most recent first"""
+
+    @abstractmethod
+    def order_ids(self, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """First order IDs in ID order"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of orders in the store"""
+
+    def close(self) -> None:
+        pass
+
+
+# ============================================================================
+# IN-MEMORY
+# ============================================================================
+
+class InMemoryOrderStore(OrderStore):
+    """Orders in a dict, with sorted (purchase_date, order_id) secondary indexes"""
+
+    backend = 'memory'
+
+    def __init__(self, orders: Dict[str, Dict[str, Any]]):
+        self._orders = {order_id.upper(): order for order_id, order in orders.items()}
+        self._by_date = sorted((o['purchase_date'], o['order_id']) for o in self._orders.values())
+        self._by_customer: Dict[str, List] = {}
+        for purchase_date, order_id in self._by_date:
+            customer_id = self._orders[order_id].get('customer_id')
+            if customer_id:
+                self._by_customer.setdefault(customer_id, []).append((purchase_date, order_id))
+
+    def get(self, order_id):
+        return self._orders.get(order_id)
+
+    def _range(self, index, start_date, end_date, limit):
+        low = bisect.bisect_left(index, (start_date or '',))
+        high = bisect.bisect_left(index, ((end_date or '9999-12-31') + '\x00',))
+        return [self._orders[order_id] for _, order_id in reversed(index[max(low, high - limit):high])]
+
+    def orders_for_customer(self, customer_id, start_date=None, end_date=None, limit=DEFAULT_LIMIT,
+                            category=None, before=None):
+        index = self._by_customer.get(customer_id, [])
+        if category is None and before is None:
+            return self._range(index, start_date, end_date, limit)
+        low = bisect.bisect_left(index, (start_date or '',))
+        high = bisect.bisect_left(index, ((end_date or '9999-12-31') + '\x00',))
+        if before is not None:
+            high = min(high, bisect.bisect_left(index, tuple(before)))
+        orders = []
+        for position in range(high - 1, low - 1, -1):
+            order = self._orders[index[position][1]]
+            if category is None or order.get('category') == category:
+                orders.append(order)
+                if len(orders) >= limit:
+                    break
+        return orders
+
+    def orders_between(self, start_date, end_date, limit=DEFAULT_LIMIT):
+        return self._range(self._by_date, start_date, end_date, limit)
+
+    def order_ids(self, limit=DEFAULT_LIMIT):
+        return sorted(self._orders)[:limit]
+
+    def count(self):
+        return len(self._orders)
+
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+_SELECT = f"SELECT {', '.join(ORDER_FIELDS)} FROM orders"
+
+_SCHEMA = """
+CREATE TABLE orders (
+    order_id TEXT PRIMARY KEY,
+    customer_id TEXT,
+    product_name TEXT,
+    purchase_date TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    status TEXT
+) WITHOUT ROWID
+"""
+
+# Created after the bulk load, which is faster than maintaining them row by row
+_INDEXES = (
+    "CREATE INDEX orders_customer ON orders (customer_id, purchase_date)",
+    "CREATE INDEX orders_purchase_date ON orders (purchase_date)",
+)
+
+
+def build_sqlite_store(path: str, orders: Iterable[Dict[str, Any]], batch_size: int = 50_000) -> int:
+    """
+    Build a SQLite order database (replacing any existing file at path).
+
+    Args:
+        path: Database file to write
+        orders: Order dicts (streamed; only batch_size are held at a time)
+        batch_size: Rows per insert transaction
+
+    Returns:
+        Number of orders written
+    """
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(_SCHEMA)
+        insert = f"INSERT INTO orders VALUES ({', '.join('?' * len(ORDER_FIELDS))})"
+        count = 0
+        batch = []
+        for order in orders:
+            batch.append(tuple(order.get(field) for field in ORDER_FIELDS))
+            if len(batch) >= batch_size:
+                conn.executemany(insert, batch)
+                conn.commit()
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(insert, batch)
+            count += len(batch)
+        for statement in _INDEXES:
+            conn.execute(statement)
+        conn.commit()
+        conn.execute("ANALYZE")
+        # Fold the WAL into the main file so the database is a single self-contained file
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return count
+    finally:
+        conn.close()
+
+
+class SQLiteOrderStore(OrderStore):
+    """
+    Read-only, memory-mapped SQLite order store.
+
+    Args:
+        path: Database file built by build_sqlite_store
+        mmap_bytes: Bytes of the file to memory-map (0 disables memory mapping)
+        immutable: Open without locking; defaults to True when the file's
+            directory is not writable (e.g. inside a Lambda package)
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, mmap_bytes: int = DEFAULT_MMAP_BYTES,
+                 immutable: Optional[bool] = None):
+        self.path = path
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Order database not found: {path}")
+        if immutable is None:
+            immutable = not os.access(os.path.dirname(os.path.abspath(path)), os.W_OK)
+        uri = Path(path).resolve().as_uri() + '?mode=ro' + ('&immutable=1' if immutable else '')
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        self._conn.execute("PRAGMA query_only=1")
+
+    @staticmethod
+    def _order(row) -> Dict[str, Any]:
+        return dict(zip(ORDER_FIELDS, row))
+
+    def get(self, order_id):
+        row = self._conn.execute(f"{_SELECT} WHERE order_id = ?", (order_id,)).fetchone()
+        return self._order(row) if row else None
+
+    def get_many(self, order_ids):
+        order_ids = list(dict.fromkeys(order_ids))
+        orders = {}
+        for start in range(0, len(order_ids), SQLITE_BATCH):
+            batch = order_ids[start:start + SQLITE_BATCH]
+            query = f"{_SELECT} WHERE order_id IN ({', '.join('?' * len(batch))})"
+            for row in self._conn.execute(query, batch):
+                orders[row[0]] = self._order(row)
+        return orders
+
+    def orders_for_customer(self, customer_id, start_date=None, end_date=None, limit=DEFAULT_LIMIT,
+                            category=None, before=None):
+        conditions = "customer_id = ? AND purchase_date BETWEEN ? AND ?"
+        params = [customer_id, start_date or '', end_date or '9999-12-31']
+        if category is not None:
+            conditions += " AND category = ?"
+            params.append(category)
+        if before is not None:
+            # Row-value comparison walks the (customer_id, purchase_date, order_id) index from the key down
+            conditions += " AND (purchase_date, order_id) < (?, ?)"
+            params.extend(before)
+        rows = self._conn.execute(
+            f"{_SELECT} WHERE {conditions} ORDER BY purchase_date DESC, order_id DESC LIMIT ?",
+            (*params, limit)
+        )
+        return [self._order(row) for row in rows]
+
+    def orders_between(self, start_date, end_date, limit=DEFAULT_LIMIT):
+        rows = self._conn.execute(
+            f"{_SELECT} WHERE purchase_date BETWEEN ? AND ? ORDER BY purchase_date DESC, order_id DESC LIMIT ?",
+            (start_date, end_date, limit)
+        )
+        return [self._order(row) for row in rows]
+
+    def order_ids(self, limit=DEFAULT_LIMIT):
+        return [row[0] for row in self._conn.execute("SELECT order_id FROM orders ORDER BY order_id LIMIT ?",
+                                                     (limit,))]
+
+    def count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+# ============================================================================
+# DYNAMODB
+# ============================================================================
+
+def _months(start_date: str, end_date: str) -> List[str]:
+    """YYYY-MM partitions covering [start_date, end_date], most recent first"""
+    year, month = int(end_date[:4]), int(end_date[5:7])
+    months = []
+    while f"{year:04d}-{month:02d}" >= start_date[:7]:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+
+def create_dynamodb_table(client, table_name: str) -> None:
+    """Create the orders table with its customer and purchase-date indexes (on-demand billing)"""
+    client.create_table(
+        TableName=table_name,
+        BillingMode='PAY_PER_REQUEST',
+        AttributeDefinitions=[
+            {'AttributeName': 'order_id', 'AttributeType': 'S'},
+            {'AttributeName': 'customer_id', 'AttributeType': 'S'},
+            {'AttributeName': 'purchase_month', 'AttributeType': 'S'},
+            {'AttributeName': 'purchase_date', 'AttributeType': 'S'},
+        ],
+        KeySchema=[{'AttributeName': 'order_id', 'KeyType': 'HASH'}],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': CUSTOMER_INDEX,
+                'KeySchema': [{'AttributeName': 'customer_id', 'KeyType': 'HASH'},
+                              {'AttributeName': 'purchase_date', 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': PURCHASE_DATE_INDEX,
+                'KeySchema': [{'AttributeName': 'purchase_month', 'KeyType': 'HASH'},
+                              {'AttributeName': 'purchase_date', 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+        ]
+    )
+
+
+class DynamoDBOrderStore(OrderStore):
+    """
+    DynamoDB order store.
+
+    Args:
+        table_name: Orders table (see create_dynamodb_table)
+        client: DynamoDB client (defaults to a boto3 client; pass a
+            LocalDynamoDBClient to run without AWS)
+    """
+
+    backend = 'dynamodb'
+
+    def __init__(self, table_name: str, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client('dynamodb')
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+        self.table_name = table_name
+        self.client = client
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    def _order(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        order = {}
+        for field in ORDER_FIELDS:
+            if field in item:
+                value = self._deserializer.deserialize(item[field])
+                order[field] = float(value) if isinstance(value, Decimal) else value
+        return order
+
+    def put_orders(self, orders: Iterable[Dict[str, Any]]) -> int:
+        """Write orders with BatchWriteItem, retrying unprocessed items; returns the number written"""
+        count = 0
+        batch = []
+        for order in orders:
+            item = {field: order[field] for field in ORDER_FIELDS if order.get(field) is not None}
+            item['amount'] = Decimal(str(item['amount']))
+            item['purchase_month'] = item['purchase_date'][:7]
+            batch.append({'PutRequest': {'Item': {k: self._serializer.serialize(v) for k, v in item.items()}}})
+            if len(batch) == DYNAMODB_BATCH_WRITE:
+                self._write(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+            count += len(batch)
+        return count
+
+    def _write(self, batch):
+        requests = {self.table_name: batch}
+        while requests:
+            requests = self.client.batch_write_item(RequestItems=requests).get('UnprocessedItems') or {}
+
+    def get(self, order_id):
+        item = self.client.get_item(TableName=self.table_name, Key={'order_id': {'S': order_id}}).get('Item')
+        return self._order(item) if item else None
+
+    def get_many(self, order_ids):
+        order_ids = list(dict.fromkeys(order_ids))
+        orders = {}
+        for start in range(0, len(order_ids), DYNAMODB_BATCH_GET):
+            keys = [{'order_id': {'S': order_id}} for order_id in order_ids[start:start + DYNAMODB_BATCH_GET]]
+            request = {self.table_name: {'Keys': keys}}
+            while request:
+                response = self.client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    order = self._order(item)
+                    orders[order['order_id']] = order
+                request = response.get('UnprocessedKeys') or {}
+        return orders
+
+    def _query_params(self, index_name, key_name, key_value, start_date, end_date):
+        return {
+            'TableName': self.table_name,
+            'IndexName': index_name,
+            'KeyConditionExpression': '#pk = :pk AND #sk BETWEEN :start AND :end',
+            'ExpressionAttributeNames': {'#pk': key_name, '#sk': 'purchase_date'},
+            'ExpressionAttributeValues': {':pk': {'S': key_value}, ':start': {'S': start_date},
+                                          ':end': {'S': end_date}},
+            'ScanIndexForward': False,
+        }
+
+    def _query(self, index_name, key_name, key_value, start_date, end_date, limit):
+        orders = []
+        params = self._query_params(index_name, key_name, key_value, start_date, end_date)
+        while len(orders) < limit:
+            response = self.client.query(Limit=limit - len(orders), **params)
+            orders.extend(self._order(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return orders
+
+    def _query_items(self, params, page_size):
+        """Items of a query, most recent first, read a page at a time"""
+        while True:
+            response = self.client.query(Limit=page_size, **params)
+            for item in response.get('Items', []):
+                yield self._order(item)
+            if 'LastEvaluatedKey' not in response:
+                return
+            params = {**params, 'ExclusiveStartKey': response['LastEvaluatedKey']}
+
+    def orders_for_customer(self, customer_id, start_date=None, end_date=None, limit=DEFAULT_LIMIT,
+                            category=None, before=None):
+        end_date = end_date or '9999-12-31'
+        if before is not None:
+            end_date = min(end_date, before[0])
+        params = self._query_params(CUSTOMER_INDEX, 'customer_id', customer_id,
+                                    start_date or '0000-01-01', end_date)
+
+        def keep(group):
+            # The index sorts by purchase_date only: order each date's orders the way
+            # the other backends do, then apply the keyset and category filters
+            group.sort(key=lambda o: o['order_id'], reverse=True)
+            return [o for o in group
+                    if (before is None or (o['purchase_date'], o['order_id']) < tuple(before))
+                    and (category is None or o.get('category') == category)]
+
+        orders, group = [], []
+        for order in self._query_items(params, page_size=max(limit, 25)):
+            if group and order['purchase_date'] != group[0]['purchase_date']:
+                orders.extend(keep(group))
+                group = []
+                if len(orders) >= limit:
+                    break
+            group.append(order)
+        else:
+            orders.extend(keep(group))
+        return orders[:limit]
+
+    def orders_between(self, start_date, end_date, limit=DEFAULT_LIMIT):
+        orders = []
+        for month in _months(start_date, end_date):
+            orders.extend(sorted(self._query(PURCHASE_DATE_INDEX, 'purchase_month', month,
+                                             start_date, end_date, limit),
+                                 key=lambda o: (o['purchase_date'], o['order_id']), reverse=True))
+            if len(orders) >= limit:
+                break
+        return orders[:limit]
+
+    def order_ids(self, limit=DEFAULT_LIMIT):
+        # Scan order is hash order, not ID order; sort what one page returns
+        response = self.client.scan(TableName=self.table_name, ProjectionExpression='order_id', Limit=limit)
+        return sorted(item['order_id']['S'] for item in response.get('Items', []))
+
+    def count(self):
+        return self.client.describe_table(TableName=self.table_name)['Table']['ItemCount']
+
+
+class LocalDynamoDBClient:
+    """
+    In-process stand-in for the DynamoDB client calls DynamoDBOrderStore makes.
+
+    Items are kept in the DynamoDB wire format ({'S': ...}, {'N': ...}). Only the
+    key condition form used by the store ('#pk = :pk AND #sk BETWEEN :start AND :end')
+    is supported; there is no throttling, so nothing is ever left unprocessed.
+    """
+
+    _KEY_CONDITION = re.compile(r'^#pk = :pk AND #sk BETWEEN :start AND :end$')
+
+    def __init__(self):
+        self._tables: Dict[str, Dict[str, Any]] = {}
+
+    def create_table(self, TableName, KeySchema, GlobalSecondaryIndexes=(), **kwargs):
+        indexes = {
+            index['IndexName']: tuple(key['AttributeName'] for key in index['KeySchema'])
+            for index in GlobalSecondaryIndexes
+        }
+        self._tables[TableName] = {'key': KeySchema[0]['AttributeName'], 'items': {}, 'indexes': indexes}
+        return {'TableDescription': {'TableName': TableName, 'TableStatus': 'ACTIVE'}}
+
+    def describe_table(self, TableName):
+        table = self._tables[TableName]
+        return {'Table': {'TableName': TableName, 'TableStatus': 'ACTIVE', 'ItemCount': len(table['items'])}}
+
+    def batch_write_item(self, RequestItems):
+        for table_name, requests in RequestItems.items():
+            table = self._tables[table_name]
+            for request in requests:
+                item = request['PutRequest']['Item']
+                table['items'][item[table['key']]['S']] = item
+        return {'UnprocessedItems': {}}
+
+    def get_item(self, TableName, Key):
+        table = self._tables[TableName]
+        item = table['items'].get(Key[table['key']]['S'])
+        return {'Item': item} if item else {}
+
+    def batch_get_item(self, RequestItems):
+        if sum(len(request['Keys']) for request in RequestItems.values()) > DYNAMODB_BATCH_GET:
+            raise ValueError(f"Too many items requested for the BatchGetItem call (max {DYNAMODB_BATCH_GET})")
+        responses = {}
+        for table_name, request in RequestItems.items():
+            table = self._tables[table_name]
+            found = (table['items'].get(key[table['key']]['S']) for key in request['Keys'])
+            responses[table_name] = [item for item in found if item]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def query(self, TableName, IndexName, KeyConditionExpression, ExpressionAttributeNames,
+              ExpressionAttributeValues, ScanIndexForward=True, Limit=None, ExclusiveStartKey=None, **kwargs):
+        if not self._KEY_CONDITION.match(KeyConditionExpression):
+            raise ValueError(f"Unsupported key condition: {KeyConditionExpression}")
+        table = self._tables[TableName]
+        partition_key, sort_key = table['indexes'][IndexName]
+        partition = ExpressionAttributeValues[':pk']['S']
+        start, end = ExpressionAttributeValues[':start']['S'], ExpressionAttributeValues[':end']['S']
+        items = [
+            item for item in table['items'].values()
+            if item.get(partition_key, {}).get('S') == partition and start <= item[sort_key]['S'] <= end
+        ]
+        items.sort(key=lambda item: (item[sort_key]['S'], item[table['key']]['S']), reverse=not ScanIndexForward)
+        if ExclusiveStartKey:
+            last = ExclusiveStartKey[table['key']]['S']
+            position = next(i for i, item in enumerate(items) if item[table['key']]['S'] == last)
+            items = items[position + 1:]
+        page = items[:Limit] if Limit else items
+        response = {'Items': page, 'Count': len(page)}
+        if Limit and len(items) > Limit:
+            last_item = page[-1]
+            response['LastEvaluatedKey'] = {name: last_item[name]
+                                            for name in (table['key'], partition_key, sort_key)}
+        return response
+
+    def scan(self, TableName, Limit=None, **kwargs):
+        items = [{'order_id': item['order_id']} for item in self._tables[TableName]['items'].values()]
+        return {'Items': items[:Limit] if Limit else items}
+
+
+# ============================================================================
+# SAMPLE ORDERS
+# ============================================================================
+
+# Bundled with the Lambda by 10_create_lambda.py (dates fixed at deployment time)
+SAMPLE_ORDERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_orders.json')
+
+
+def build_sample_orders(today: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Sample orders: a recent laptop, an old phone and a defective tablet"""
+    today = today or datetime.now()
+    recent_date = (today - timedelta(days=15)).strftime('%Y-%m-%d')
+    old_date = (today - timedelta(days=45)).strftime('%Y-%m-%d')
+    defective_date = (today - timedelta(days=10)).strftime('%Y-%m-%d')
+
+    return {
+        "ORD-001": {
+            "order_id": "ORD-001",
+            "customer_id": "user_001",
+            "product_name": "Dell XPS 15 Laptop",
+            "purchase_date": recent_date,
+            "amount": 1299.99,
+            "category": "electronics",
+            "status": "delivered"
+        },
+        "ORD-002": {
+            "order_id": "ORD-002",
+            "customer_id": "user_001",
+            "product_name": "iPhone 13",
+            "purchase_date": old_date,
+            "amount": 799.99,
+            "category": "electronics",
+            "status": "delivered"
+        },
+        "ORD-003": {
+            "order_id": "ORD-003",
+            "customer_id": "user_001",
+            "product_name": "Samsung Galaxy Tab (Defective)",
+            "purchase_date": defective_date,
+            "amount": 449.99,
+            "category": "electronics",
+            "status": "delivered"
+        }
+    }
+
+
+def load_sample_orders() -> Dict[str, Dict[str, Any]]:
+    """Sample orders from SAMPLE_ORDERS_FILE when it exists, otherwise built relative to today"""
+    try:
+        with open(SAMPLE_ORDERS_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return build_sample_orders()
+
+
+# ============================================================================
+# FACTORY
+# ============================================================================
+
+def open_order_store(default_orders: Optional[Callable[[], Dict[str, Dict[str, Any]]]] = None) -> OrderStore:
+    """
+    Open the order store configured in the environment (see module docstring).
+
+    Args:
+        default_orders: Returns the orders for the in-memory backend (e.g. the sample orders)
+    """
+    backend = os.environ.get('ORDER_STORE_BACKEND', '').lower()
+    path = os.environ.get('ORDER_DB_PATH', DEFAULT_DB_PATH)
+    if not backend:
+        backend = 'sqlite' if os.path.exists(path) else 'memory'
+
+    if backend == 'sqlite':
+        return SQLiteOrderStore(path)
+    if backend == 'dynamodb':
+        table_name = os.environ.get('ORDER_TABLE_NAME')
+        if not table_name:
+            raise ValueError("ORDER_TABLE_NAME is required for the dynamodb order store")
+        return DynamoDBOrderStore(table_name)
+    if backend == 'memory':
+        return InMemoryOrderStore(default_orders() if default_orders else {})
+    raise ValueError(f"Unknown ORDER_STORE_BACKEND: {backend}")
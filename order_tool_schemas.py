@@ -0,0 +1,102 @@
+"""
+Order Lookup Tool Schemas
+
+Gateway tool schemas of the order lookup Lambda (order_lookup_lambda.py):
+lookup_order, lookup_orders and search_orders, and the limits they advertise.
+
+Kept apart from the handler module, which opens the order store and precomputes
+return eligibility when imported, so the deploy scripts (10_create_lambda.py,
+12_add_lambda_to_gateway.py) and the reports can read the schemas without that
+init. Bundled with the Lambda by 10_create_lambda.py.
+"""
+
+from order_store import LOOKUP_FIELDS
+
+# Maximum order IDs per lookup_orders call
+MAX_BATCH_ORDER_IDS = 50
+
+# search_orders page size (default and cap)
+DEFAULT_SEARCH_PAGE_SIZE = 10
+MAX_SEARCH_PAGE_SIZE = 25
+
+FIELDS_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string", "enum": list(LOOKUP_FIELDS)},
+    "description": "Fields to return (order_id is always included). Omit for all fields; e.g. [\"return_eligibility\"] when only the return eligibility is needed."
+}
+
+# Gateway tool schemas served by the order lookup Lambda (registered by 12_add_lambda_to_gateway.py)
+TOOL_SCHEMAS = [
+    {
+        "name": "lookup_order",
+        "description": "Look up order details by order ID. Returns order information including product name, purchase date, amount, and return eligibility status.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "order_id": {
+                    "type": "string",
+                    "description": "The order ID to look up (e.g., ORD-001, ORD-002, ORD-003)"
+                },
+                "fields": FIELDS_SCHEMA
+            },
+            "required": ["order_id"]
+        }
+    },
+    {
+        "name": "lookup_orders",
+        "description": f"Look up several orders by ID in one call (up to {MAX_BATCH_ORDER_IDS}). Use this instead of calling lookup_order repeatedly when the customer asks about more than one order. Returns one entry per order ID, with found set to false for orders that do not exist.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "order_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "The order IDs to look up (e.g., [\"ORD-001\", \"ORD-002\"])"
+                },
+                "fields": FIELDS_SCHEMA
+            },
+            "required": ["order_ids"]
+        }
+    },
+    {
+        "name": "search_orders",
+        "description": f"Search a customer's orders, most recent first, when the customer does not know the order ID (e.g. \"what have I bought recently that I can return?\"). Filter by purchase date range, category and return eligibility. Returns at most page_size orders (up to {MAX_SEARCH_PAGE_SIZE}); when has_more is true, pass next_cursor as cursor with the same filters to get the next page (a page can hold fewer orders than page_size while has_more is true).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "customer_id": {
+                    "type": "string",
+                    "description": "The customer whose orders to search (e.g., user_001)"
+                },
+                "start_date": {
+                    "type": "string",
+                    "description": "Earliest purchase date, YYYY-MM-DD (inclusive)"
+                },
+                "end_date": {
+                    "type": "string",
+                    "description": "Latest purchase date, YYYY-MM-DD (inclusive)"
+                },
+                "category": {
+                    "type": "string",
+                    "description": "Only orders in this category (e.g., electronics)"
+                },
+                "eligible": {
+                    "type": "boolean",
+                    "description": "true: only orders that can still be returned; false: only orders that cannot"
+                },
+                "page_size": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": MAX_SEARCH_PAGE_SIZE,
+                    "description": f"Orders per page (default {DEFAULT_SEARCH_PAGE_SIZE})"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "next_cursor from the previous page"
+                },
+                "fields": FIELDS_SCHEMA
+            },
+            "required": ["customer_id"]
+        }
+    }
+]
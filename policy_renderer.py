@@ -0,0 +1,157 @@
+"""
+Policy Response Renderer
+
+Linear-time renderer behind the format_policy_response tool.
+
+The policy text is rendered in bounded blocks that end at a line boundary, with
+output collected as parts and joined once per block, instead of splitting the
+whole text into a list of lines and growing one string with +=. iter_policy_chunks
+yields each block's output as soon as it is rendered (the streaming entrypoint in
+17_runtime_agent.py forwards these chunks); render_policy returns the full text
+and memoizes it by (SHA-256 of the policy text, customer question) in a bounded
+LRU cache shared by all sessions in the process.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+HEADER = '📋 Return Policy Information\n' + '=' * 50 + '\n\n'
+FOOTER = '\n' + '=' * 50 + '\n' + '💡 Tip: If you have specific questions about your return, I can help!\n'
+
+# Characters of policy text rendered per yielded chunk (split at a line boundary)
+CHUNK_CHARS = 16 * 1024
+
+DEFAULT_CACHE_ENTRIES = 256
+DEFAULT_CACHE_CHARS = 32 * 1024 * 1024
+
+
+def _render_lines(block: str, parts: list) -> None:
+    """Append the rendered lines of a block of policy text to parts"""
+    append = parts.append
+    for line in block.split('\n'):
+        line = line.strip()
+        if not line:
+            append('\n')
+        elif line.isupper() or line.endswith(':'):
+            # Treat as section header
+            append(f'\n{line}\n')
+        elif line.startswith('-') or line.startswith('•'):
+            # Keep bullet points
+            append(f'  {line}\n')
+        else:
+            # Regular text
+            append(f'{line}\n')
+
+
+def iter_policy_chunks(policy_text: str, customer_question: str = '',
+                       chunk_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """
+    Render policy text in a customer-friendly format, yielding output chunks.
+
+    The text is processed in blocks of about chunk_chars characters ending at a
+    line boundary, so memory stays bounded by the block size and the first chunk is
+    available before the rest of the text is scanned. Concatenating the chunks gives
+    exactly the output of the original format_policy_response implementation.
+    """
+    parts = [HEADER]
+    if customer_question:
+        parts.append(f'Regarding: {customer_question}\n\n')
+
+    text = policy_text.strip()
+    start = 0
+    while True:
+        end = text.find('\n', start + chunk_chars)
+        if end == -1:
+            _render_lines(text[start:], parts)
+            break
+        _render_lines(text[start:end], parts)
+        yield ''.join(parts)
+        parts = []
+        start = end + 1
+
+    parts.append(FOOTER)
+    yield ''.join(parts)
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered policies, bounded by entries and total characters"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, max_chars: int = DEFAULT_CACHE_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(policy_text: str, customer_question: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(policy_text.encode('utf-8', 'surrogatepass')).hexdigest()
+        return digest, customer_question
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rendered
+
+    def put(self, key: Tuple[str, str], rendered: str) -> None:
+        if len(rendered) > self.max_chars:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._chars -= len(previous)
+            self._entries[key] = rendered
+            self._chars += len(rendered)
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'chars': self._chars,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+render_cache = RenderCache()
+
+
+def render_policy(policy_text: str, customer_question: str = '') -> str:
+    """Render policy text in full, memoized by (policy text hash, question)"""
+    key = RenderCache.key(policy_text, customer_question)
+    rendered = render_cache.get(key)
+    if rendered is None:
+        rendered = ''.join(iter_policy_chunks(policy_text, customer_question))
+        render_cache.put(key, rendered)
+    return rendered
+
+
+def stream_policy(policy_text: str, customer_question: str = '') -> Iterator[str]:
+    """
+    Yield rendered chunks as they are produced; a cached render is yielded as one chunk.
+
+    The full render is added to the cache once the last chunk has been produced.
+    """
+    key = RenderCache.key(policy_text, customer_question)
+    rendered = render_cache.get(key)
+    if rendered is not None:
+        yield rendered
+        return
+
+    chunks = []
+    for chunk in iter_policy_chunks(policy_text, customer_question):
+        chunks.append(chunk)
+        yield chunk
+    render_cache.put(key, ''.join(chunks))
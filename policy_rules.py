@@ -0,0 +1,384 @@
+"""
+Return Policy Rules Engine
+
+Single source of truth for return windows, condition deductions and reason
+overrides, shared by all agents (01, 06, 14, 17), the batch engines and the
+order lookup Lambda.
+
+Rules are loaded from a JSON file (return_policy_rules.json by default, or the
+POLICY_RULES_PATH environment variable) and compiled once into flat lookup tables
+keyed by (region, value), so every lookup is a single dict access. The rules file
+is re-checked at most every POLICY_RULES_RELOAD_SECONDS seconds; a changed file is
+compiled in full and swapped in with one reference assignment, so callers always
+see either the old or the new policy, never a mix. A file that fails to load or
+validate is reported and the current policy stays active. To publish new rules,
+write them to a temporary file and rename it over the rules file.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'return_policy_rules.json')
+DEFAULT_RELOAD_SECONDS = 30.0
+# Memoized (purchase date, category) results per EligibilityTable
+DEFAULT_ELIGIBILITY_ENTRIES = 100_000
+
+# Region key used for the base rules
+BASE_REGION = ''
+DEFAULT_KEY = 'default'
+
+
+class PolicyRulesError(ValueError):
+    """Raised when a rules file cannot be loaded or is invalid"""
+
+
+class CompiledPolicy(NamedTuple):
+    """
+    Immutable, precompiled policy tables.
+
+    A NamedTuple rather than a frozen dataclass: importing dataclasses (and
+    inspect) would add ~10 ms to every order lookup Lambda cold start.
+
+    Attributes:
+        version: Version string from the rules file
+        windows: (region, category) -> return window in days
+        condition_rates: (region, condition) -> deduction rate
+        reason_overrides: (region, reason) -> (deduction rate, description)
+        regions: Regions with exceptions (BASE_REGION included)
+    """
+    version: str
+    windows: Dict[Tuple[str, str], int]
+    condition_rates: Dict[Tuple[str, str], float]
+    reason_overrides: Dict[Tuple[str, str], Tuple[float, str]]
+    regions: frozenset
+
+    def _region(self, region: Optional[str]) -> str:
+        region = (region or BASE_REGION).lower()
+        return region if region in self.regions else BASE_REGION
+
+    def return_window(self, category: str, region: Optional[str] = None) -> int:
+        """Return window in days for a category"""
+        region = self._region(region)
+        window = self.windows.get((region, category.lower()))
+        if window is None:
+            window = self.windows[(region, DEFAULT_KEY)]
+        return window
+
+    def condition_rate(self, condition: str, region: Optional[str] = None) -> float:
+        """Deduction rate for an item condition"""
+        region = self._region(region)
+        rate = self.condition_rates.get((region, condition.lower()))
+        if rate is None:
+            rate = self.condition_rates[(region, DEFAULT_KEY)]
+        return rate
+
+    def reason_override(self, reason: str, region: Optional[str] = None) -> Optional[Tuple[float, str]]:
+        """(deduction rate, description) if the return reason overrides the condition rate"""
+        return self.reason_overrides.get((self._region(region), reason.lower()))
+
+
+def compile_rules(rules: Dict[str, Any]) -> CompiledPolicy:
+    """
+    Validate raw rules and compile them into lookup tables.
+
+    Region exceptions are merged over the base rules at compile time, so a
+    lookup never has to fall back from a region to the base tables.
+    """
+    try:
+        base_windows = {k.lower(): int(v) for k, v in rules['category_windows'].items()}
+        base_rates = {k.lower(): float(v) for k, v in rules['condition_deductions'].items()}
+        base_overrides = {
+            k.lower(): (float(v['deduction_rate']), str(v['description']))
+            for k, v in rules.get('reason_overrides', {}).items()
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise PolicyRulesError(f"Invalid policy rules: {e}") from e
+
+    if DEFAULT_KEY not in base_windows or DEFAULT_KEY not in base_rates:
+        raise PolicyRulesError("category_windows and condition_deductions need a 'default' entry")
+
+    layers = {BASE_REGION: (base_windows, base_rates, base_overrides)}
+    for region, exception in rules.get('region_exceptions', {}).items():
+        try:
+            windows = dict(base_windows)
+            windows.update({k.lower(): int(v) for k, v in exception.get('category_windows', {}).items()})
+            rates = dict(base_rates)
+            rates.update({k.lower(): float(v) for k, v in exception.get('condition_deductions', {}).items()})
+            overrides = dict(base_overrides)
+            overrides.update({
+                k.lower(): (float(v['deduction_rate']), str(v['description']))
+                for k, v in exception.get('reason_overrides', {}).items()
+            })
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise PolicyRulesError(f"Invalid region exception '{region}': {e}") from e
+        layers[region.lower()] = (windows, rates, overrides)
+
+    windows, rates, overrides = {}, {}, {}
+    for region, (region_windows, region_rates, region_overrides) in layers.items():
+        for category, window in region_windows.items():
+            if window < 0:
+                raise PolicyRulesError(f"Negative return window for '{category}'")
+            windows[(region, category)] = window
+        for condition, rate in region_rates.items():
+            if not 0.0 <= rate <= 1.0:
+                raise PolicyRulesError(f"Deduction rate for '{condition}' must be between 0 and 1")
+            rates[(region, condition)] = rate
+        for reason, override in region_overrides.items():
+            overrides[(region, reason)] = override
+
+    return CompiledPolicy(
+        version=str(rules.get('version', 'unversioned')),
+        windows=windows,
+        condition_rates=rates,
+        reason_overrides=overrides,
+        regions=frozenset(layers)
+    )
+
+
+def load_rules_file(path: str) -> CompiledPolicy:
+    """Load and compile a rules file"""
+    try:
+        with open(path) as f:
+            rules = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PolicyRulesError(f"Cannot load policy rules from {path}: {e}") from e
+    return compile_rules(rules)
+
+
+class PolicyEngine:
+    """
+    Holds the active CompiledPolicy and hot-reloads it when the rules file changes.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_seconds: Optional[float] = None):
+        self.path = path or os.environ.get('POLICY_RULES_PATH', DEFAULT_RULES_PATH)
+        if reload_seconds is None:
+            reload_seconds = float(os.environ.get('POLICY_RULES_RELOAD_SECONDS', DEFAULT_RELOAD_SECONDS))
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._policy = load_rules_file(self.path)
+        self._next_check = time.monotonic() + self.reload_seconds
+        self.reloads = 0
+
+    @property
+    def policy(self) -> CompiledPolicy:
+        """The active policy (checks the rules file for changes when the interval has passed)"""
+        if self.reload_seconds >= 0 and time.monotonic() >= self._next_check:
+            self.maybe_reload()
+        return self._policy
+
+    def maybe_reload(self) -> bool:
+        """Reload the rules if the file changed. Returns True if a new policy was swapped in."""
+        # Only one thread checks; others keep using the current policy
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = time.monotonic() + self.reload_seconds
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                print(f"⚠️  Policy rules file unavailable, keeping version {self._policy.version}: {e}")
+                return False
+            if mtime == self._mtime:
+                return False
+            return self._swap(mtime)
+        finally:
+            self._lock.release()
+
+    def reload(self) -> bool:
+        """Force a reload of the rules file"""
+        with self._lock:
+            return self._swap(os.stat(self.path).st_mtime_ns)
+
+    def _swap(self, mtime: int) -> bool:
+        try:
+            policy = load_rules_file(self.path)
+        except PolicyRulesError as e:
+            # Leave _mtime unchanged so the file is retried on the next check
+            print(f"⚠️  {e} - keeping version {self._policy.version}")
+            return False
+        self._policy = policy
+        self._mtime = mtime
+        self.reloads += 1
+        print(f"✓ Policy rules reloaded: version {policy.version}")
+        return True
+
+
+_engine: Optional[PolicyEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_policy_engine() -> PolicyEngine:
+    """Process-wide policy engine, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PolicyEngine()
+    return _engine
+
+
+def _eligibility(days_since_purchase: int, window: int) -> dict:
+    """Eligibility result for a purchase made days_since_purchase days ago"""
+    if days_since_purchase < 0:
+        return {
+            'eligible': False,
+            'reason': 'Purchase date is in the future',
+            'days_remaining': 0
+        }
+    elif days_since_purchase <= window:
+        return {
+            'eligible': True,
+            'reason': f'Within {window}-day return window',
+            'days_remaining': window - days_since_purchase
+        }
+    else:
+        return {
+            'eligible': False,
+            'reason': f'Exceeded {window}-day return window',
+            'days_remaining': 0
+        }
+
+
+_INVALID_DATE = {
+    'eligible': False,
+    'reason': 'Invalid date format. Use YYYY-MM-DD',
+    'days_remaining': 0
+}
+
+
+def check_eligibility(purchase_date: str, category: str, region: Optional[str] = None) -> dict:
+    """
+    Check if an item is eligible for return based on purchase date and category.
+
+    Returns:
+        Dictionary with eligible, reason and days_remaining
+    """
+    try:
+        purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
+    except ValueError:
+        return dict(_INVALID_DATE)
+
+    days_since_purchase = (datetime.now() - purchase_dt).days
+    window = get_policy_engine().policy.return_window(category, region)
+    return _eligibility(days_since_purchase, window)
+
+
+class EligibilityTable:
+    """
+    Precomputed check_eligibility results for one day and one compiled policy.
+
+    Built once (e.g. at Lambda init) with a result for every base-region category
+    and every purchase date from today back to the end of its return window.
+    Other (purchase date, category) pairs - older orders, unlisted categories,
+    unusual date strings - are computed once with check_eligibility's rules and
+    memoized, up to max_entries. A lookup is then one dict access instead of a
+    strptime call.
+
+    Args:
+        policy: Compiled policy the results are computed with
+        today: Day the results are computed for (default: today)
+        max_entries: Memoized results beyond the precomputed ones
+    """
+
+    def __init__(self, policy: CompiledPolicy, today: Optional[date] = None,
+                 max_entries: int = DEFAULT_ELIGIBILITY_ENTRIES):
+        self.policy = policy
+        self.today = today or date.today()
+        self.max_entries = max_entries
+        self._today_ordinal = self.today.toordinal()
+        self._results: Dict[Tuple[str, str], dict] = {}
+        # Longest base-region return window: older purchases are never eligible
+        self.max_window = 0
+
+        for (region, category), window in policy.windows.items():
+            if region != BASE_REGION:
+                continue
+            self.max_window = max(self.max_window, window)
+            # Purchase dates inside the window, plus the first day past it
+            for days in range(window + 2):
+                purchase_date = date.fromordinal(self._today_ordinal - days).isoformat()
+                self._results[(purchase_date, category)] = _eligibility(days, window)
+        self.precomputed = len(self._results)
+        self._limit = self.precomputed + max_entries
+
+    def check(self, purchase_date: str, category: str) -> dict:
+        """Same result as check_eligibility(purchase_date, category) on self.today"""
+        key = (purchase_date, category)
+        result = self._results.get(key)
+        if result is None:
+            result = self._compute(purchase_date, category)
+            if len(self._results) < self._limit:
+                self._results[key] = result
+        # Callers own the returned dict
+        return dict(result)
+
+    def _compute(self, purchase_date: str, category: str) -> dict:
+        try:
+            if len(purchase_date) == 10 and purchase_date[4] == purchase_date[7] == '-':
+                # Canonical YYYY-MM-DD: same result as strptime without importing _strptime
+                purchase_day = date.fromisoformat(purchase_date)
+            else:
+                purchase_day = datetime.strptime(purchase_date, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return _INVALID_DATE
+        window = self.policy.return_window(category)
+        return _eligibility(self._today_ordinal - purchase_day.toordinal(), window)
+
+
+_table: Optional[EligibilityTable] = None
+
+
+def eligibility_table() -> EligibilityTable:
+    """
+    Process-wide EligibilityTable for the active policy and today's date.
+
+    Rebuilt on the first call after the date changes or the rules are reloaded,
+    so long-lived processes never serve a stale days_remaining.
+    """
+    global _table
+    table = _table
+    policy = get_policy_engine().policy
+    if table is None or table.policy is not policy or table.today != date.today():
+        table = _table = EligibilityTable(policy)
+    return table
+
+
+def calculate_refund(original_price: float, condition: str, return_reason: str,
+                     region: Optional[str] = None) -> dict:
+    """
+    Calculate refund amount based on price, condition, and return reason.
+
+    Returns:
+        Dictionary with refund_amount, deduction, original_price and reason
+    """
+    if original_price < 0:
+        return {
+            'refund_amount': 0.0,
+            'deduction': 0.0,
+            'reason': 'Invalid price'
+        }
+
+    policy = get_policy_engine().policy
+    override = policy.reason_override(return_reason, region)
+
+    if override is not None:
+        deduction_rate, reason = override
+    else:
+        deduction_rate = policy.condition_rate(condition, region)
+        reason = f'{int(deduction_rate * 100)}% deduction for {condition} condition'
+
+    deduction = original_price * deduction_rate
+    refund_amount = original_price - deduction
+
+    return {
+        'refund_amount': round(refund_amount, 2),
+        'deduction': round(deduction, 2),
+        'original_price': original_price,
+        'reason': reason
+    }
@@ -0,0 +1,151 @@
+"""
+Prompt Cache
+
+Bedrock prompt caching for the returns agents.
+
+The tool definitions (custom tools plus gateway tools) and the system prompt are
+identical on every turn and every request. create_bedrock_model() configures
+BedrockModel to place a cache point after the tool definitions and after the
+system prompt, so Bedrock reads that prefix from its prompt cache instead of
+reprocessing it: lower time to first token and cheaper input tokens for as long
+as the cache entry lives (5 minutes by default, refreshed by every hit). Strands
+also moves a cache point to the end of the conversation on each model call, so
+the cycles of one tool loop reuse the history sent by the previous cycle.
+
+Bedrock caches the prefix in the order tools -> system prompt -> messages, so:
+- anything that varies per request (the customer's ID) goes after the system
+  cache point: cached_system_prompt(static, dynamic)
+- the tool list must be built in the same order on every request
+
+PromptCacheStats is a hook that reads each invocation's token usage and
+accumulates cache read / write tokens. Strands also records them on its
+OpenTelemetry spans (gen_ai.usage.cache_read_input_tokens and
+gen_ai.usage.cache_write_input_tokens) and event loop metrics.
+
+Usage:
+    model = create_bedrock_model(MODEL_ID, temperature=0.3)
+    prompt_cache_stats = PromptCacheStats()
+    agent = Agent(model=model, tools=...,
+                  system_prompt=cached_system_prompt(SYSTEM_PROMPT, f"The customer's ID is {actor_id}."),
+                  hooks=[prompt_cache_stats])
+
+Set PROMPT_CACHE=0 to turn caching off (e.g. to compare, see 37_benchmark_prompt_cache.py).
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from strands.hooks import AfterInvocationEvent, HookProvider, HookRegistry
+from strands.models import BedrockModel, CacheConfig, Model
+
+from bedrock_clients import shared_session
+from hedging import hedged_model
+
+PROMPT_CACHE_ENABLED = os.environ.get('PROMPT_CACHE', '1') != '0'
+
+# Cache entry lifetime (Bedrock default: 5 minutes; "1h" on models that support it)
+PROMPT_CACHE_TTL = os.environ.get('PROMPT_CACHE_TTL') or None
+
+
+def prompt_cache_config(ttl: Optional[str] = PROMPT_CACHE_TTL) -> CacheConfig:
+    """Cache points after the tool definitions and the system prompt"""
+    return CacheConfig(strategy='auto', ttl=ttl, system_prompt_ttl=True, tools_ttl=True)
+
+
+def create_bedrock_model(model_id: str, prompt_cache: bool = PROMPT_CACHE_ENABLED, **kwargs: Any) -> Model:
+    """
+    BedrockModel with prompt caching for the tool definitions and system prompt,
+    on the process-wide Bedrock runtime client (bedrock_clients.py), with hedged
+    model calls when HEDGING=1 (hedging.py).
+
+    Args:
+        model_id: Bedrock model ID (caching is applied to Claude models)
+        prompt_cache: Place cache points (default: PROMPT_CACHE env, on)
+        **kwargs: Other BedrockModel configuration (temperature, region_name, ...)
+    """
+    if prompt_cache:
+        kwargs.setdefault('cache_config', prompt_cache_config())
+    if 'boto_session' not in kwargs:
+        kwargs['boto_session'] = shared_session(kwargs.pop('region_name', None))
+    return hedged_model(BedrockModel(model_id=model_id, **kwargs))
+
+
+def cached_system_prompt(static_prompt: str, dynamic_prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    System prompt content blocks with a cache point after the static part.
+
+    Args:
+        static_prompt: Prompt text that is the same on every request (cached)
+        dynamic_prompt: Per-request text appended after the cache point (not cached)
+    """
+    blocks: List[Dict[str, Any]] = [{'text': static_prompt}]
+    if PROMPT_CACHE_ENABLED:
+        blocks.append({'cachePoint': {'type': 'default'}})
+    if dynamic_prompt:
+        blocks.append({'text': dynamic_prompt})
+    return blocks
+
+
+class PromptCacheStats(HookProvider):
+    """
+    Strands hook provider that accumulates prompt cache usage per invocation.
+
+    Input tokens are split by Bedrock into uncached input, cache reads (prefix
+    served from the cache) and cache writes (prefix stored for later requests).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.invocations = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.last_invocation: Dict[str, int] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AfterInvocationEvent, self._on_after_invocation)
+
+    def record(self, usage: Dict[str, int]) -> None:
+        """Add one invocation's token usage (Bedrock usage keys)"""
+        usage = {
+            'input_tokens': usage.get('inputTokens', 0),
+            'cache_read_tokens': usage.get('cacheReadInputTokens', 0),
+            'cache_write_tokens': usage.get('cacheWriteInputTokens', 0),
+        }
+        with self._lock:
+            self.invocations += 1
+            self.cache_hits += usage['cache_read_tokens'] > 0
+            self.input_tokens += usage['input_tokens']
+            self.cache_read_tokens += usage['cache_read_tokens']
+            self.cache_write_tokens += usage['cache_write_tokens']
+            self.last_invocation = usage
+
+    def _on_after_invocation(self, event: AfterInvocationEvent) -> None:
+        invocation = event.agent.event_loop_metrics.latest_agent_invocation
+        if invocation is None:
+            return
+        self.record(invocation.usage)
+        usage = self.last_invocation
+        if usage['cache_read_tokens'] or usage['cache_write_tokens']:
+            print(f"✓ Prompt cache: {usage['cache_read_tokens']} tokens read, "
+                  f"{usage['cache_write_tokens']} written, {usage['input_tokens']} uncached")
+
+    def stats(self) -> Dict[str, Any]:
+        """Invocations, cache hits, token counts and the share of input tokens read from the cache"""
+        with self._lock:
+            total = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+            return {
+                'invocations': self.invocations,
+                'cache_hits': self.cache_hits,
+                'hit_rate': self.cache_hits / self.invocations if self.invocations else 0.0,
+                'input_tokens': self.input_tokens,
+                'cache_read_tokens': self.cache_read_tokens,
+                'cache_write_tokens': self.cache_write_tokens,
+                'cached_share': self.cache_read_tokens / total if total else 0.0
+            }
+
+
+# Shared by every agent and session in the process
+prompt_cache_stats = PromptCacheStats()
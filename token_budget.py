@@ -0,0 +1,351 @@
+"""
+Token Budget
+
+Per-invocation input token budget and accounting for the returns agents.
+
+Before every model call the budget estimates the input tokens of each component
+of the request (tool_compactor.estimate_tokens, ~4 characters per token, no
+tokenizer):
+- system: the system prompt
+- tools: the tool definitions (custom tools plus gateway tools)
+- memory: long-term memory injected by the AgentCore memory session manager
+  (<user_context> blocks)
+- tool_results: tool results from earlier turns
+- history: the rest of the earlier turns
+- current: the current turn (the request and this turn's tool calls and results)
+
+When the total exceeds the ceiling, components are trimmed lowest priority first
+(TRIM_ORDER) until the request fits: earlier tool results are truncated, then
+memory context items are dropped, then the oldest turns. The system prompt, the
+tool definitions and the current turn are never trimmed; a request that is still
+over the ceiling is sent as is and counted as over budget. Trimming the history
+changes the cached conversation prefix (prompt_cache.py), so the ceiling should
+sit well above the usual request size.
+
+After each invocation the token usage reported by Bedrock (input including cache
+reads and writes, output) is recorded per actor and per session, next to the
+estimate. The actor and session come from the agent's trace attributes, which
+also label its OpenTelemetry spans:
+
+    agent = Agent(..., hooks=[token_budget],
+                  trace_attributes={'actor.id': actor_id, 'session.id': session_id})
+    ...
+    print(token_budget.usage_for(actor_id=actor_id))
+
+TOKEN_BUDGET sets the ceiling (input tokens per model call); TOKEN_BUDGET=0
+keeps the accounting but never trims.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands.hooks import AfterInvocationEvent, BeforeModelCallEvent, HookProvider, HookRegistry
+
+from tool_compactor import estimate_tokens, truncate_to_tokens
+
+DEFAULT_CEILING = int(os.environ.get('TOKEN_BUDGET', 32_000))
+
+# Components trimmed first when a request is over the ceiling (lowest priority first)
+TRIM_ORDER = ('tool_results', 'memory', 'history')
+
+# Earlier tool results are truncated to this many tokens each when trimmed
+TRIMMED_RESULT_TOKENS = 40
+
+# Tag the AgentCore memory session manager wraps retrieved memories in
+MEMORY_CONTEXT_TAG = 'user_context'
+
+# Actors and sessions with recorded usage (least recently used are evicted)
+MAX_TRACKED = 10_000
+
+COMPONENTS = ('system', 'tools', 'memory', 'tool_results', 'history', 'current')
+
+_MEMORY_OPEN = f'<{MEMORY_CONTEXT_TAG}>'
+_MEMORY_CLOSE = f'</{MEMORY_CONTEXT_TAG}>'
+
+
+def _is_memory_block(block: Dict) -> bool:
+    text = block.get('text')
+    return isinstance(text, str) and text.startswith(_MEMORY_OPEN)
+
+
+def _is_turn_start(message: Dict) -> bool:
+    """A user message carrying a request (rather than tool results) starts a turn"""
+    if message.get('role') != 'user':
+        return False
+    content = message.get('content', [])
+    return any('text' in block for block in content) and not any('toolResult' in block for block in content)
+
+
+def _current_turn_start(messages: List[Dict]) -> int:
+    for index in range(len(messages) - 1, -1, -1):
+        if _is_turn_start(messages[index]):
+            return index
+    return 0
+
+
+def _result_tokens(result: Dict) -> int:
+    tokens = 0
+    for block in result.get('content', []):
+        if 'text' in block:
+            tokens += estimate_tokens(block['text'])
+        elif 'json' in block:
+            tokens += estimate_tokens(json.dumps(block['json'], default=str))
+    return tokens
+
+
+def _block_tokens(block: Dict) -> int:
+    if 'text' in block:
+        return estimate_tokens(block['text'])
+    if 'toolUse' in block:
+        tool_use = block['toolUse']
+        return estimate_tokens(tool_use.get('name', '')) + estimate_tokens(json.dumps(tool_use.get('input'), default=str))
+    if 'toolResult' in block:
+        return _result_tokens(block['toolResult'])
+    return 0
+
+
+def _usage_entry() -> Dict[str, int]:
+    return {'invocations': 0, 'model_calls': 0, 'input_tokens': 0, 'cache_read_tokens': 0,
+            'output_tokens': 0, 'estimated_input_tokens': 0}
+
+
+class TokenBudget(HookProvider):
+    """
+    Strands hook provider that keeps each model call under an input token ceiling
+    and accounts actual token usage per actor and session.
+
+    Args:
+        ceiling: Input tokens per model call (0 disables trimming)
+        trim_order: Trimmable components, lowest priority first
+    """
+
+    def __init__(self, ceiling: int = DEFAULT_CEILING, trim_order: Tuple[str, ...] = TRIM_ORDER):
+        unknown = set(trim_order) - {'tool_results', 'memory', 'history'}
+        if unknown:
+            raise ValueError(f"Components cannot be trimmed: {', '.join(sorted(unknown))}")
+        self.ceiling = ceiling
+        self.trim_order = trim_order
+        self._lock = threading.Lock()
+        self._tool_tokens: Dict[str, int] = {}
+        self.model_calls = 0
+        self.trimmed_calls = 0
+        self.over_budget = 0
+        self.tokens_trimmed = 0
+        self.trimmed_by_component: Dict[str, int] = {}
+        self.component_tokens = dict.fromkeys(COMPONENTS, 0)
+        self.last_estimate: Dict[str, int] = {}
+        self._estimates: Dict[int, int] = {}
+        self.totals = _usage_entry()
+        self._actors: 'OrderedDict[str, Dict[str, int]]' = OrderedDict()
+        self._sessions: 'OrderedDict[str, Dict[str, int]]' = OrderedDict()
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._on_before_model_call)
+        registry.add_callback(AfterInvocationEvent, self._on_after_invocation)
+
+    def _tools_tokens(self, tool_specs: List[Dict]) -> int:
+        # Tool definitions do not change between calls: estimate each one once
+        total = 0
+        for spec in tool_specs:
+            name = spec.get('name', '')
+            tokens = self._tool_tokens.get(name)
+            if tokens is None:
+                tokens = self._tool_tokens[name] = estimate_tokens(json.dumps(spec, default=str))
+            total += tokens
+        return total
+
+    def estimate(self, messages: List[Dict], system_prompt: Optional[str] = None,
+                 tool_specs: Optional[List[Dict]] = None) -> Dict[str, int]:
+        """Estimated input tokens per component (and 'total') of a model call"""
+        tokens = dict.fromkeys(COMPONENTS, 0)
+        tokens['system'] = estimate_tokens(system_prompt or '')
+        tokens['tools'] = self._tools_tokens(tool_specs or [])
+        current_start = _current_turn_start(messages)
+        for index, message in enumerate(messages):
+            for block in message.get('content', []):
+                if _is_memory_block(block):
+                    tokens['memory'] += _block_tokens(block)
+                elif index >= current_start:
+                    tokens['current'] += _block_tokens(block)
+                elif 'toolResult' in block:
+                    tokens['tool_results'] += _block_tokens(block)
+                else:
+                    tokens['history'] += _block_tokens(block)
+        tokens['total'] = sum(tokens[component] for component in COMPONENTS)
+        return tokens
+
+    def trim(self, messages: List[Dict], excess: int) -> Dict[str, int]:
+        """
+        Trim messages in place by at least excess tokens where possible.
+
+        Returns:
+            Dictionary of tokens removed per component
+        """
+        removed: Dict[str, int] = {}
+        for component in self.trim_order:
+            if excess <= 0:
+                break
+            tokens = getattr(self, f'_trim_{component}')(messages, excess)
+            if tokens:
+                removed[component] = tokens
+                excess -= tokens
+        return removed
+
+    def _trim_tool_results(self, messages: List[Dict], excess: int) -> int:
+        # Oldest first; only earlier turns (the model is still working with this turn's results)
+        removed = 0
+        for message in messages[:_current_turn_start(messages)]:
+            for block in message.get('content', []):
+                if removed >= excess:
+                    return removed
+                if 'toolResult' not in block:
+                    continue
+                result = block['toolResult']
+                before = _result_tokens(result)
+                if before <= TRIMMED_RESULT_TOKENS:
+                    continue
+                text = '\n'.join(
+                    b['text'] if 'text' in b else json.dumps(b['json'], default=str)
+                    for b in result.get('content', []) if 'text' in b or 'json' in b
+                )
+                result['content'] = [{'text': truncate_to_tokens(text, TRIMMED_RESULT_TOKENS)}]
+                removed += before - _result_tokens(result)
+        return removed
+
+    def _trim_memory(self, messages: List[Dict], excess: int) -> int:
+        # Drop retrieved memory items from the end of each context block, newest message first
+        removed = 0
+        for message in reversed(messages):
+            content = message.get('content', [])
+            for position, block in enumerate(content):
+                if removed >= excess or not _is_memory_block(block):
+                    continue
+                before = _block_tokens(block)
+                items = block['text'][len(_MEMORY_OPEN):].rsplit(_MEMORY_CLOSE, 1)[0].split('\n')
+                while items and before - estimate_tokens(_MEMORY_OPEN + '\n'.join(items) + _MEMORY_CLOSE) < excess - removed:
+                    items.pop()
+                if items:
+                    block['text'] = _MEMORY_OPEN + '\n'.join(items) + _MEMORY_CLOSE
+                    removed += before - _block_tokens(block)
+                else:
+                    content[position] = {}
+                    removed += before
+            if any(not block for block in content):
+                message['content'] = [block for block in content if block]
+        return removed
+
+    def _trim_history(self, messages: List[Dict], excess: int) -> int:
+        # Drop whole turns, oldest first, so every toolUse keeps its toolResult
+        removed = 0
+        current_start = _current_turn_start(messages)
+        end = 0
+        while removed < excess and end < current_start:
+            turn_end = end + 1
+            while turn_end < current_start and not _is_turn_start(messages[turn_end]):
+                turn_end += 1
+            removed += sum(_block_tokens(block) for message in messages[end:turn_end]
+                           for block in message.get('content', []))
+            end = turn_end
+        del messages[:end]
+        return removed
+
+    def _on_before_model_call(self, event: BeforeModelCallEvent) -> None:
+        agent = event.agent
+        tokens = self.estimate(agent.messages, agent.system_prompt, agent.tool_registry.get_all_tool_specs())
+        removed: Dict[str, int] = {}
+        if self.ceiling and tokens['total'] > self.ceiling:
+            removed = self.trim(agent.messages, tokens['total'] - self.ceiling)
+            if removed:
+                tokens = self.estimate(agent.messages, agent.system_prompt, agent.tool_registry.get_all_tool_specs())
+                print(f"✓ Token budget: trimmed ~{sum(removed.values())} tokens "
+                      f"({', '.join(f'{c} {t}' for c, t in removed.items())}) to fit {self.ceiling}")
+            if tokens['total'] > self.ceiling:
+                print(f"⚠️  Token budget: ~{tokens['total']} input tokens after trimming (ceiling {self.ceiling})")
+
+        with self._lock:
+            self.model_calls += 1
+            self.trimmed_calls += bool(removed)
+            self.over_budget += bool(self.ceiling) and tokens['total'] > self.ceiling
+            for component, count in removed.items():
+                self.trimmed_by_component[component] = self.trimmed_by_component.get(component, 0) + count
+                self.tokens_trimmed += count
+            for component in COMPONENTS:
+                self.component_tokens[component] += tokens[component]
+            self.last_estimate = tokens
+            self._estimates[id(agent)] = self._estimates.get(id(agent), 0) + tokens['total']
+
+    def _on_after_invocation(self, event: AfterInvocationEvent) -> None:
+        agent = event.agent
+        with self._lock:
+            estimated = self._estimates.pop(id(agent), 0)
+        invocation = agent.event_loop_metrics.latest_agent_invocation
+        if invocation is None:
+            return
+        attributes = agent.trace_attributes or {}
+        self.record(invocation.usage, actor_id=attributes.get('actor.id'), session_id=attributes.get('session.id'),
+                    model_calls=len(invocation.cycles), estimated=estimated)
+
+    def record(self, usage: Dict[str, int], actor_id: Optional[str] = None, session_id: Optional[str] = None,
+               model_calls: int = 1, estimated: int = 0) -> None:
+        """Add one invocation's Bedrock token usage to the totals and to its actor and session"""
+        cache_read = usage.get('cacheReadInputTokens', 0)
+        input_tokens = usage.get('inputTokens', 0) + cache_read + usage.get('cacheWriteInputTokens', 0)
+        entries = [self.totals]
+        with self._lock:
+            for key, tracked in ((actor_id, self._actors), (session_id, self._sessions)):
+                if key is None:
+                    continue
+                entry = tracked.get(key)
+                if entry is None:
+                    entry = tracked[key] = _usage_entry()
+                    if len(tracked) > MAX_TRACKED:
+                        tracked.popitem(last=False)
+                else:
+                    tracked.move_to_end(key)
+                entries.append(entry)
+            for entry in entries:
+                entry['invocations'] += 1
+                entry['model_calls'] += model_calls
+                entry['input_tokens'] += input_tokens
+                entry['cache_read_tokens'] += cache_read
+                entry['output_tokens'] += usage.get('outputTokens', 0)
+                entry['estimated_input_tokens'] += estimated
+
+    def usage_for(self, actor_id: Optional[str] = None, session_id: Optional[str] = None) -> Optional[Dict[str, int]]:
+        """Recorded token usage of an actor or a session (None if nothing was recorded)"""
+        with self._lock:
+            if session_id is not None:
+                entry = self._sessions.get(session_id)
+            else:
+                entry = self._actors.get(actor_id)
+            return dict(entry) if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Trimming counters, mean estimated tokens per component per model call and usage totals"""
+        with self._lock:
+            calls = self.model_calls
+            totals = dict(self.totals)
+            return {
+                'ceiling': self.ceiling,
+                'model_calls': calls,
+                'trimmed_calls': self.trimmed_calls,
+                'over_budget': self.over_budget,
+                'tokens_trimmed': self.tokens_trimmed,
+                'trimmed_by_component': dict(self.trimmed_by_component),
+                'mean_component_tokens': {
+                    component: count / calls if calls else 0.0 for component, count in self.component_tokens.items()
+                },
+                'usage': totals,
+                'estimate_ratio': (
+                    totals['estimated_input_tokens'] / totals['input_tokens'] if totals['input_tokens'] else None
+                ),
+                'actors': len(self._actors),
+                'sessions': len(self._sessions),
+            }
+
+
+# Shared by every agent and session in the process
+token_budget = TokenBudget()
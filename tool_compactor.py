@@ -0,0 +1,311 @@
+"""
+Tool Result Compactor
+
+Post-processing stage for tool results carried in the agent's conversation history.
+
+Tool results (KB passages from retrieve, gateway lookup_order payloads, custom tool
+dicts) are sent to the model in full on the turn that produced them. Before the next
+invocation starts, the compactor rewrites every earlier tool result in the history to
+a compact form: unused fields are projected away and long passages are truncated to a
+token budget. Rules are configured per tool name. JSON results stay valid JSON under
+the budget: long string fields are shortened first, then trailing list elements are
+dropped whole.
+
+Usage:
+    compactor = ToolResultCompactor()
+    agent = Agent(model=..., tools=..., hooks=[compactor])
+    ...
+    print(compactor.last_invocation)   # tokens removed per tool for the last invocation
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands.hooks import BeforeInvocationEvent, HookProvider, HookRegistry
+
+# Rough chars-per-token ratio for English text and JSON
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = ' …[truncated]'
+
+# Gateway tools are exposed as "<TargetName>___<tool_name>"
+GATEWAY_TOOL_SEPARATOR = '___'
+
+# Smallest per-field budget tried before list elements are dropped
+MIN_FIELD_TOKENS = 8
+
+_PASSAGE_SPLIT = re.compile(r'\n(?=Score: )')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a string without a tokenizer"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to roughly max_tokens, cutting at a word boundary"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    if text.endswith(TRUNCATION_MARKER) and len(text) <= max_chars + len(TRUNCATION_MARKER):
+        # Already truncated on a previous pass
+        return text
+    cut = text.rfind(' ', 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + TRUNCATION_MARKER
+
+
+@dataclass(frozen=True)
+class CompactionRule:
+    """
+    How to compact the result of one tool.
+
+    Attributes:
+        keep_fields: Top-level JSON fields to keep (None keeps all fields)
+        max_tokens: Token budget for the whole compacted result
+        passage_tokens: Token budget for each KB passage (retrieve-style results)
+    """
+    keep_fields: Optional[Tuple[str, ...]] = None
+    max_tokens: Optional[int] = None
+    passage_tokens: Optional[int] = None
+
+
+# Default rules for the tools used by the returns agents
+DEFAULT_RULES = {
+    'retrieve': CompactionRule(passage_tokens=120, max_tokens=500),
+    'lookup_order': CompactionRule(
+        keep_fields=('order_id', 'product_name', 'purchase_date', 'amount',
+                     'category', 'status', 'return_eligibility', 'error'),
+        max_tokens=200
+    ),
+    'lookup_orders': CompactionRule(keep_fields=('orders', 'found_count', 'not_found', 'error'), max_tokens=800),
+    'search_orders': CompactionRule(keep_fields=('orders', 'count', 'has_more', 'next_cursor', 'error'), max_tokens=800),
+    'check_return_eligibility': CompactionRule(keep_fields=('eligible', 'days_remaining', 'reason')),
+    'check_return_eligibility_batch': CompactionRule(keep_fields=('count', 'eligible', 'days_remaining', 'error')),
+    'calculate_refund_amount': CompactionRule(keep_fields=('refund_amount', 'deduction', 'reason')),
+    'calculate_refund_batch': CompactionRule(keep_fields=('count', 'refund_amount', 'total_refund', 'error')),
+    'format_policy_response': CompactionRule(max_tokens=150),
+    'current_time': CompactionRule(max_tokens=20),
+}
+
+
+def _decode_json(text: str) -> Any:
+    """Decode a JSON tool payload, unwrapping Lambda-style {'statusCode', 'body'} envelopes"""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(data, dict) and 'statusCode' in data and 'body' in data:
+        body = data['body']
+        if isinstance(body, str):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                return data
+        data = body
+    return data
+
+
+def _project(data: Any, keep_fields: Tuple[str, ...]) -> Any:
+    """Keep only the given top-level fields of a dict (or of each dict in a list)"""
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if k in keep_fields}
+    if isinstance(data, list):
+        return [_project(item, keep_fields) for item in data]
+    return data
+
+
+def _dumps(data: Any) -> str:
+    """Compact JSON serialization used for compacted results"""
+    return json.dumps(data, separators=(',', ':'), default=str)
+
+
+def _truncate_strings(data: Any, max_tokens: int) -> Any:
+    """Truncate every string value in decoded JSON to roughly max_tokens"""
+    if isinstance(data, str):
+        return truncate_to_tokens(data, max_tokens)
+    if isinstance(data, dict):
+        return {k: _truncate_strings(v, max_tokens) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_truncate_strings(item, max_tokens) for item in data]
+    return data
+
+
+def _longest_list(data: Any) -> Optional[List]:
+    """The longest non-empty list at the top level of decoded JSON (the result itself or a field)"""
+    lists = [data] if isinstance(data, list) else []
+    if isinstance(data, dict):
+        lists = [value for value in data.values() if isinstance(value, list)]
+    lists = [items for items in lists if items]
+    return max(lists, key=len) if lists else None
+
+
+def _fit_json(data: Any, max_tokens: int) -> str:
+    """
+    Serialize decoded JSON within roughly max_tokens, keeping it valid JSON.
+
+    Long string fields are truncated first, halving their budget until the result
+    fits; then whole elements are dropped from the end of the longest list. A result
+    that still does not fit (many small fields) is returned as short as it got.
+    """
+    text = _dumps(data)
+    field_tokens = max_tokens
+    while estimate_tokens(text) > max_tokens and field_tokens >= MIN_FIELD_TOKENS:
+        data = _truncate_strings(data, field_tokens)
+        text = _dumps(data)
+        field_tokens //= 2
+
+    # Drop elements from a copy, never from the tool's own payload
+    data = json.loads(text)
+    items = _longest_list(data)
+    while estimate_tokens(text) > max_tokens and items:
+        items.pop()
+        text = _dumps(data)
+        items = _longest_list(data)
+    return text
+
+
+def _truncate_passages(text: str, passage_tokens: int) -> str:
+    """Truncate every 'Score: ... Content: ...' passage of a retrieve result"""
+    passages = _PASSAGE_SPLIT.split(text)
+    return '\n'.join(truncate_to_tokens(passage, passage_tokens) for passage in passages)
+
+
+class ToolResultCompactor(HookProvider):
+    """
+    Strands hook provider that compacts tool results from previous invocations.
+
+    Results produced during the current invocation are left untouched, so the model
+    always reasons over the full output of the tools it just called. When the next
+    invocation starts, those results are replaced in the history by their compact form.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, CompactionRule]] = None):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self._lock = threading.Lock()
+        self.invocations = 0
+        self.tokens_removed = 0
+        self.removed_by_tool: Dict[str, int] = {}
+        self.last_invocation: Dict[str, int] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeInvocationEvent, self._on_before_invocation)
+
+    def rule_for(self, tool_name: str) -> Optional[CompactionRule]:
+        """Find the rule for a tool, matching gateway tools by their bare name"""
+        if tool_name in self.rules:
+            return self.rules[tool_name]
+        bare_name = tool_name.rsplit(GATEWAY_TOOL_SEPARATOR, 1)[-1]
+        return self.rules.get(bare_name)
+
+    def compact_content(self, tool_name: str, content: List[Dict]) -> List[Dict]:
+        """Return the compact form of a toolResult content list"""
+        rule = self.rule_for(tool_name)
+        if rule is None:
+            return content
+
+        compacted = []
+        for block in content:
+            if 'json' in block:
+                data = block['json']
+                text = None
+            elif 'text' in block:
+                text = block['text']
+                data = _decode_json(text)
+            else:
+                # Images, documents, etc. are passed through unchanged
+                compacted.append(block)
+                continue
+
+            if data is not None and isinstance(data, (dict, list)):
+                if rule.keep_fields is not None:
+                    data = _project(data, rule.keep_fields)
+                if rule.max_tokens is not None:
+                    text = _fit_json(data, rule.max_tokens)
+                else:
+                    text = _dumps(data)
+            else:
+                if rule.passage_tokens is not None:
+                    text = _truncate_passages(text, rule.passage_tokens)
+                if rule.max_tokens is not None:
+                    text = truncate_to_tokens(text, rule.max_tokens)
+            compacted.append({'text': text})
+
+        return compacted
+
+    def compact_messages(self, messages: List[Dict]) -> Dict[str, int]:
+        """
+        Compact all tool results in a message list in place.
+
+        Args:
+            messages: Conversation history (agent.messages)
+
+        Returns:
+            Dictionary of tokens removed per tool name
+        """
+        tool_names = {}
+        removed: Dict[str, int] = {}
+
+        for message in messages:
+            for block in message.get('content', []):
+                if 'toolUse' in block:
+                    tool_use = block['toolUse']
+                    tool_names[tool_use['toolUseId']] = tool_use['name']
+                elif 'toolResult' in block:
+                    result = block['toolResult']
+                    tool_name = tool_names.get(result.get('toolUseId'), '')
+                    content = result.get('content', [])
+                    compacted = self.compact_content(tool_name, content)
+                    if compacted is content:
+                        continue
+
+                    before = sum(estimate_tokens(_block_text(b)) for b in content)
+                    after = sum(estimate_tokens(_block_text(b)) for b in compacted)
+                    if after < before:
+                        result['content'] = compacted
+                        removed[tool_name] = removed.get(tool_name, 0) + before - after
+
+        return removed
+
+    def _on_before_invocation(self, event: BeforeInvocationEvent) -> None:
+        # Compaction is idempotent, so results compacted by an earlier
+        # invocation (or restored from memory already compact) are left as-is
+        removed = self.compact_messages(event.agent.messages)
+
+        # One compactor serves every session's agents, so invocations can overlap
+        with self._lock:
+            self.invocations += 1
+            self.last_invocation = removed
+            for tool_name, tokens in removed.items():
+                self.removed_by_tool[tool_name] = self.removed_by_tool.get(tool_name, 0) + tokens
+                self.tokens_removed += tokens
+
+        if removed:
+            print(f"✓ Compacted tool results: removed ~{sum(removed.values())} tokens from history")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative compaction metrics"""
+        with self._lock:
+            return {
+                'invocations': self.invocations,
+                'tokens_removed': self.tokens_removed,
+                'tokens_removed_per_invocation': (
+                    self.tokens_removed / self.invocations if self.invocations else 0.0
+                ),
+                'removed_by_tool': dict(self.removed_by_tool),
+            }
+
+
+def _block_text(block: Dict) -> str:
+    """Text used to estimate the size of a content block"""
+    if 'text' in block:
+        return block['text']
+    if 'json' in block:
+        return json.dumps(block['json'], default=str)
+    return ''
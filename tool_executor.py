@@ -0,0 +1,206 @@
+"""
+Bounded Concurrent Tool Execution
+
+Runs the independent tool uses the model emits in one turn (e.g. several
+lookup_order and check_return_eligibility calls for a multi-order question)
+concurrently, with:
+- a configurable limit on tools in flight per agent invocation
+  (TOOL_MAX_CONCURRENCY, default 8)
+- a timeout per tool (TOOL_TIMEOUT_SECONDS, default 30, with per-tool overrides),
+  shortened to the time left before the request's deadline (deadline.py); a
+  tool that times out gets an error result so the model can carry on
+- results returned in the order the model requested them
+
+The agent's own ConcurrentToolExecutor runs the tools; ToolLimits is a hook
+provider that wraps each tool it is about to call (BeforeToolCallEvent.selected_tool)
+in one that waits for a slot and enforces the timeout. The slots live in the
+invocation's invocation_state, so concurrent requests served on one event loop
+each get their own limit.
+
+Gateway tools are matched by their bare name (OrderLookup___lookup_order ->
+lookup_order). Timed-out gateway (MCP) and async tools are cancelled. A timed-out
+synchronous tool cannot be interrupted: the model continues without it and its
+result is discarded, but its worker thread runs to completion (a synchronous
+agent(...) call returns only once that thread has finished).
+
+Usage:
+    tool_limits = ToolLimits()
+    agent = Agent(model=..., tools=[...], hooks=[..., tool_limits])
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from strands.hooks import BeforeToolCallEvent, HookProvider, HookRegistry
+from strands.types.tools import AgentTool, ToolResult
+
+from deadline import current_deadline
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get('TOOL_MAX_CONCURRENCY', 8))
+DEFAULT_TIMEOUT_SECONDS = float(os.environ.get('TOOL_TIMEOUT_SECONDS', 30))
+
+# Per-tool timeouts (seconds), by bare tool name
+DEFAULT_TOOL_TIMEOUTS = {
+    'lookup_order': 10.0,
+    'lookup_orders': 10.0,
+    'search_orders': 10.0,
+    'retrieve': 20.0,
+}
+
+# invocation_state key of an invocation's tool slots
+_SLOTS_KEY = 'tool_limits_slots'
+
+# Ends the event queue of a bounded tool run
+_DONE = object()
+
+
+def bare_tool_name(name: str) -> str:
+    """Tool name without the gateway target prefix"""
+    return name.split('___')[-1]
+
+
+def tool_result_of(event: Any) -> Optional[ToolResult]:
+    """
+    The tool result a tool stream event carries, or None for progress events.
+
+    Detected by shape: a plain ToolResult dict (what a tool yields last), or an
+    SDK result event wrapping one under 'tool_result'.
+    """
+    if not isinstance(event, dict):
+        return None
+    result = event.get('tool_result', event)
+    if isinstance(result, dict) and 'toolUseId' in result and 'status' in result:
+        return result
+    return None
+
+
+class _BoundedTool(AgentTool):
+    """A tool run within its invocation's concurrency limit and a timeout"""
+
+    def __init__(self, tool: AgentTool, limits: 'ToolLimits', timeout: float):
+        super().__init__()
+        self.tool = tool
+        self.limits = limits
+        self.timeout = timeout
+
+    @property
+    def tool_name(self) -> str:
+        return self.tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self.tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self.tool.tool_type
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        slots = invocation_state.get(_SLOTS_KEY)
+        if slots is None:
+            slots = invocation_state[_SLOTS_KEY] = asyncio.Semaphore(self.limits.max_concurrency)
+
+        async with slots:
+            self.limits._started()
+            # The tool runs in its own task so it can be cancelled at the timeout
+            # without cancelling the executor's task reading this stream
+            queue: asyncio.Queue = asyncio.Queue()
+            task = asyncio.ensure_future(self._pump(tool_use, invocation_state, queue, **kwargs))
+            deadline = asyncio.get_running_loop().time() + self.timeout
+            try:
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    try:
+                        event = await asyncio.wait_for(queue.get(), max(0.0, remaining))
+                    except asyncio.TimeoutError:
+                        task.cancel()
+                        yield self._timed_out(tool_use)
+                        return
+                    if event is _DONE:
+                        break
+                    if isinstance(event, BaseException):
+                        raise event
+                    yield event
+            finally:
+                if not task.done():
+                    task.cancel()
+                self.limits._finished()
+
+    async def _pump(self, tool_use, invocation_state, queue: asyncio.Queue, **kwargs) -> None:
+        try:
+            async for event in self.tool.stream(tool_use, invocation_state, **kwargs):
+                queue.put_nowait(event)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_DONE)
+
+    def _timed_out(self, tool_use) -> ToolResult:
+        self.limits._timed_out()
+        print(f"⚠️  Tool {tool_use['name']} timed out after {self.timeout:.3g}s")
+        # The last value a tool yields is its result
+        return {
+            'toolUseId': tool_use['toolUseId'],
+            'status': 'error',
+            'content': [{'text': f"Tool {tool_use['name']} timed out after {self.timeout:.3g} seconds"}]
+        }
+
+
+class ToolLimits(HookProvider):
+    """
+    Concurrency limit and per-tool timeouts for an agent's tool calls.
+
+    Args:
+        max_concurrency: Maximum tools running at once per agent invocation
+        default_timeout: Timeout in seconds for tools without an override
+        timeouts: Per-tool timeouts by bare tool name (merged over DEFAULT_TOOL_TIMEOUTS)
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, default_timeout: Optional[float] = None,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        self.default_timeout = default_timeout or DEFAULT_TIMEOUT_SECONDS
+        self.timeouts = {**DEFAULT_TOOL_TIMEOUTS, **(timeouts or {})}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.timeouts_hit = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.timeouts.get(bare_tool_name(tool_name), self.default_timeout)
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeToolCallEvent, self._on_before_tool_call)
+
+    def _on_before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        # Registered after the hooks that pick or cancel the tool, so it wraps the tool that will run
+        if event.selected_tool is None or event.cancel_tool:
+            return
+        timeout = current_deadline().timeout(self.timeout_for(event.tool_use['name']))
+        event.selected_tool = _BoundedTool(event.selected_tool, self, timeout)
+
+    def _started(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _timed_out(self) -> None:
+        with self._lock:
+            self.timeouts_hit += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'timeouts': self.timeouts_hit,
+                'max_in_flight': self.max_in_flight,
+                'max_concurrency': self.max_concurrency
+            }
@@ -0,0 +1,153 @@
+"""
+Tool Memoization
+
+Memoization decorator for pure custom tools, applied underneath @tool:
+
+    @tool
+    @memoize_tool(date_aware=True, case_insensitive=('category',))
+    def check_return_eligibility(purchase_date: str, category: str) -> dict:
+        ...
+
+Results are stored in one bounded LRU cache shared by every agent and session in
+the process. Keys are the canonicalized arguments (bound to the signature with
+defaults applied, listed string arguments lower-cased the way the policy
+rules compare them), plus:
+- the current date for date-aware tools, so eligibility is recomputed each day
+- the active policy rules generation, so a rules reload never serves stale results
+
+The wrapper keeps the function's name, docstring and signature, so @tool builds
+the same tool spec as for the undecorated function.
+"""
+
+import copy
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from policy_rules import get_policy_engine
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get('TOOL_MEMO_MAX_ENTRIES', 4096))
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable, order-independent form of an argument value"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+class ToolMemoCache:
+    """Thread-safe LRU cache of tool results with per-tool hit counters"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def get(self, tool_name: str, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+                return True, self._entries[key]
+            self.misses[tool_name] = self.misses.get(tool_name, 0) + 1
+            return False, None
+
+    def put(self, key: Tuple, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, total hits/misses, hit rate and per-tool counters"""
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                'entries': len(self._entries),
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                'by_tool': {
+                    name: {'hits': self.hits.get(name, 0), 'misses': self.misses.get(name, 0)}
+                    for name in sorted(set(self.hits) | set(self.misses))
+                }
+            }
+
+
+# Shared by all memoized tools in the process
+tool_memo_cache = ToolMemoCache()
+
+
+def _policy_generation() -> Tuple[str, int]:
+    engine = get_policy_engine()
+    return engine.policy.version, engine.reloads
+
+
+def memoize_tool(date_aware: bool = False, case_insensitive: Sequence[str] = (),
+                 cache: Optional[ToolMemoCache] = None) -> Callable:
+    """
+    Memoize a pure tool function.
+
+    Args:
+        date_aware: Include today's date in the key (for results that depend on the current date)
+        case_insensitive: Names of string arguments the function compares case-insensitively
+            (only list arguments that are not echoed back in the result)
+        cache: Cache to use (defaults to the shared tool_memo_cache)
+
+    Returns:
+        Decorator to apply underneath @tool
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        folded = frozenset(case_insensitive)
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            memo = cache or tool_memo_cache
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                # Let the function report bad arguments itself
+                return func(*args, **kwargs)
+            bound.apply_defaults()
+
+            arguments = []
+            for arg_name, value in bound.arguments.items():
+                if arg_name in folded and isinstance(value, str):
+                    value = value.lower()
+                arguments.append((arg_name, _freeze(value)))
+            key = (name, tuple(arguments), _policy_generation(),
+                   date.today().isoformat() if date_aware else None)
+
+            try:
+                found, result = memo.get(name, key)
+            except TypeError:
+                # Unhashable argument: call through without caching
+                return func(*args, **kwargs)
+            if not found:
+                result = func(*args, **kwargs)
+                memo.put(key, result)
+            # Callers may modify the returned dict; keep the cached copy intact
+            return copy.deepcopy(result)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,358 @@
+"""
+Tool Selector
+
+Query-relevant tool subsets for the returns agents.
+
+Every tool definition (custom tools plus every gateway target's tools) is sent
+to the model on every call; as gateway targets are added, the tool definitions
+dominate the prompt and the model takes longer to pick a tool. The selector
+ranks the tools against the current request and passes only the best TOP_N
+plus the required tools (REQUIRED_TOOLS, offered on every request). The single
+and batch variants of a tool (check_return_eligibility and
+check_return_eligibility_batch, lookup_order and lookup_orders) are ranked and
+offered together.
+
+Each tool is scored on its name, description and parameter descriptions by:
+- keywords: IDF-weighted share of the request's words (plus QUERY_EXPANSIONS)
+  found in the tool (double in its name), normalized for description length as
+  in BM25
+- embeddings: cosine similarity of the request and tool embeddings; local hashed
+  character-trigram vectors by default (no model call), or Amazon Titan text
+  embeddings with TOOL_SELECTOR_EMBEDDINGS=bedrock (tool embeddings are cached,
+  each request costs one embedding call)
+
+Misses fall back to the full tool set:
+- when no tool scores MIN_SCORE, every tool is offered
+- when the model calls a tool that was not offered (the system prompt names the
+  gateway tools), the request's ToolSelection hook resolves it from that
+  request's full tool set and runs it
+
+Module-based tools (strands_tools.current_time) are loaded into tool objects
+the way Agent loads them, so the offered tools and the full set are all
+AgentTool objects the hook can run. select() returns a ToolSelection per request: the tools to offer, and the hook
+holding the request's full tool set. Nothing is shared between requests, so a
+tool is only ever run on the request's own gateway connection.
+
+Selected tools keep their original order, so requests selecting the same subset
+share a prompt cache entry (prompt_cache.py); a different subset misses the cache
+of the tool definitions and the system prompt that follows them. The full tool
+set is one cache entry for every request, so with few tools selection can cost
+more input tokens than it saves: 38_tool_selection_report.py measures the net
+effect with the prompt cache, and coverage on requests the keyword table was not
+tuned on. Selection is therefore off by default; set TOOL_SELECTION=1 where the
+report shows a net saving (many gateway targets, and enough traffic to keep
+every subset's cache entry warm).
+
+Usage:
+    selection = tool_selector.select(user_input, custom_tools + gateway_tools)
+    agent = Agent(model=..., tools=selection.tools, hooks=[..., selection])
+    print(tool_selector.stats())
+"""
+
+import hashlib
+import inspect
+import json
+import math
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from strands.hooks import BeforeToolCallEvent, HookProvider, HookRegistry
+from strands.tools.loader import load_tools_from_module
+from strands.types.tools import AgentTool
+
+from tool_compactor import GATEWAY_TOOL_SEPARATOR, estimate_tokens
+
+TOOL_SELECTION_ENABLED = os.environ.get('TOOL_SELECTION', '0') == '1'
+EMBEDDINGS = os.environ.get('TOOL_SELECTOR_EMBEDDINGS', 'local')
+EMBEDDING_MODEL_ID = 'amazon.titan-embed-text-v2:0'
+REGION = 'us-west-2'
+
+TOP_N = int(os.environ.get('TOOL_SELECTOR_TOP_N', 4))
+REQUIRED_TOOLS = ('retrieve',)
+# Best score below which the request is treated as a miss (full tool set)
+MIN_SCORE = 0.12
+KEYWORD_WEIGHT = 0.6
+NAME_WEIGHT = 2.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+EMBEDDING_DIMENSIONS = 1024
+
+_WORD = re.compile(r'[a-z0-9]+')
+_ORDER_ID = re.compile(r'\bORD-[0-9A-Z]+\b', re.IGNORECASE)
+_AMOUNT = re.compile(r'\$\s*\d')
+# Words customers use for what the tool descriptions call something else
+QUERY_EXPANSIONS = {
+    'return': 'eligible',
+    'back': 'refund',
+    'money': 'refund',
+    'today': 'current date time',
+    'left': 'current date eligible',
+    'policy': 'knowledge',
+    'bought': 'search customer',
+    'purchased': 'search customer',
+    'recent': 'search',
+    'find': 'search',
+    'damaged': 'condition',
+    'defective': 'reason',
+}
+_STOPWORDS = frozenset(
+    'a an and are as at be by can could do does for from get got how i if in is it its me my of on or our the '
+    'this to was we what when which will with would you your'.split()
+)
+
+
+def _stem(word: str) -> str:
+    if word.endswith('ibility'):
+        return word[:-len('ibility')] + 'ible'
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase content words, lightly stemmed (tool names are split on underscores)"""
+    text = _ORDER_ID.sub(' order id ', text)
+    text = _AMOUNT.sub(' price ', text)
+    return [_stem(word) for word in _WORD.findall(text.lower().replace('_', ' ')) if word not in _STOPWORDS]
+
+
+def query_words(query: str) -> List[str]:
+    """Request words plus their QUERY_EXPANSIONS"""
+    words = tokenize(query)
+    for word in _WORD.findall(query.lower()):
+        if word in QUERY_EXPANSIONS:
+            words += tokenize(QUERY_EXPANSIONS[word])
+    return words
+
+
+def tool_family(name: str) -> str:
+    """Shared name of a tool's single and batch variants (lookup_order / lookup_orders)"""
+    return re.sub(r'(_batch|_amount|s)$', '', base_name(name))
+
+
+def agent_tools(tools: Sequence[Any]) -> List[AgentTool]:
+    """Tool objects of a tool list, with module-based tools loaded as Agent loads them"""
+    resolved = []
+    for tool in tools:
+        if inspect.ismodule(tool):
+            resolved.extend(load_tools_from_module(tool, tool.__name__.split('.')[-1]))
+        else:
+            resolved.append(tool)
+    return resolved
+
+
+def tool_name(tool: AgentTool) -> str:
+    return tool.tool_name
+
+
+def tool_spec(tool: AgentTool) -> Dict[str, Any]:
+    return tool.tool_spec
+
+
+def base_name(name: str) -> str:
+    """Tool name without the gateway target prefix"""
+    return name.rsplit(GATEWAY_TOOL_SEPARATOR, 1)[-1]
+
+
+def tool_document(spec: Dict[str, Any]) -> str:
+    """Text a tool is ranked on: name, description and parameter descriptions"""
+    parts = [base_name(spec['name']), spec.get('description', '')]
+    schema = spec.get('inputSchema', {})
+    schema = schema.get('json', schema)
+    for name, prop in schema.get('properties', {}).items():
+        parts.append(f"{name} {prop.get('description', '')}")
+    return '\n'.join(parts)
+
+
+def local_embedding(text: str) -> np.ndarray:
+    """Hashed word and character-trigram vector, L2-normalized (no model call)"""
+    vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    for word in tokenize(text):
+        padded = f'#{word}#'
+        features = [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode(), digest_size=4).digest()
+            vector[int.from_bytes(digest, 'little') % EMBEDDING_DIMENSIONS] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class BedrockEmbedder:
+    """Amazon Titan text embeddings (normalized)"""
+
+    def __init__(self, model_id: str = EMBEDDING_MODEL_ID, region: str = REGION, client: Any = None):
+        if client is None:
+            import boto3
+            client = boto3.client('bedrock-runtime', region_name=region)
+        self.client = client
+        self.model_id = model_id
+
+    def __call__(self, text: str) -> np.ndarray:
+        response = self.client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({'inputText': text, 'dimensions': EMBEDDING_DIMENSIONS, 'normalize': True})
+        )
+        return np.asarray(json.loads(response['body'].read())['embedding'], dtype=np.float32)
+
+
+class ToolSelection(HookProvider):
+    """
+    The tools offered for one request, and the hook that runs the others.
+
+    Pass `tools` to the request's Agent and the selection itself as one of its
+    hooks: when the model calls a tool that was not offered, the hook resolves
+    it from this request's full tool set.
+    """
+
+    def __init__(self, selector: 'ToolSelector', tools: Sequence[Any], offered: Sequence[Any]):
+        self.selector = selector
+        self.tools = list(offered)
+        self._all = {tool_name(tool): tool for tool in tools}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeToolCallEvent, self._on_before_tool_call)
+
+    def _on_before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        if event.selected_tool is not None:
+            return
+        tool = self._all.get(event.tool_use['name'])
+        if tool is None:
+            return
+        self.selector._missed()
+        print(f"✓ Tool selection: {event.tool_use['name']} was not offered, running it from the full tool set")
+        event.selected_tool = tool
+
+
+class ToolSelector:
+    """
+    Ranks tools against a request and selects the relevant subset.
+
+    Args:
+        top_n: Ranked tools (single and batch variants count once) to offer on top of the required tools
+        required: Tool names (without gateway prefix) offered on every request
+        embed: Text -> normalized vector (default: local_embedding, or Titan with
+            TOOL_SELECTOR_EMBEDDINGS=bedrock)
+        enabled: Select at all (default: TOOL_SELECTION env, off)
+    """
+
+    def __init__(self, top_n: int = TOP_N, required: Sequence[str] = REQUIRED_TOOLS,
+                 embed: Optional[Callable[[str], np.ndarray]] = None, enabled: bool = TOOL_SELECTION_ENABLED):
+        self.top_n = top_n
+        self.required = frozenset(required)
+        self._embed = embed
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._documents: Dict[str, tuple] = {}
+        self.selections = 0
+        self.fallbacks = 0
+        self.misses = 0
+        self.tools_offered = 0
+        self.tools_available = 0
+        self.tokens_full = 0
+        self.tokens_offered = 0
+
+    @property
+    def embed(self) -> Callable[[str], np.ndarray]:
+        if self._embed is None:
+            self._embed = BedrockEmbedder() if EMBEDDINGS == 'bedrock' else local_embedding
+        return self._embed
+
+    def _document(self, tool: Any) -> tuple:
+        """(text, keyword set, embedding, token count, name words) of a tool, computed once per definition"""
+        spec = tool_spec(tool)
+        text = tool_document(spec)
+        key = spec['name']
+        cached = self._documents.get(key)
+        if cached is None or cached[0] != text:
+            cached = (text, frozenset(tokenize(text)), self.embed(text),
+                      estimate_tokens(json.dumps(spec, default=str)), frozenset(tokenize(base_name(key))))
+            self._documents[key] = cached
+        return cached
+
+    def score(self, query: str, tools: Sequence[Any]) -> Dict[str, float]:
+        """Relevance of each tool to the request (0..1), by tool name"""
+        documents = {tool_name(tool): self._document(tool) for tool in tools}
+        words = set(query_words(query))
+        # IDF over the offered tools: words every tool mentions carry no signal
+        idf = {word: math.log(1 + len(documents) / (1 + sum(word in doc[1] for doc in documents.values())))
+               for word in words}
+        idf_total = sum(idf.values())
+        mean_length = sum(len(doc[1]) for doc in documents.values()) / len(documents)
+        query_vector = self.embed(query) if words else None
+
+        scores = {}
+        for name, (_, keywords, vector, _, name_words) in documents.items():
+            # Words in the tool name count double; BM25-style length normalization:
+            # long descriptions match more words by chance
+            matched = sum(idf[word] * (NAME_WEIGHT if word in name_words else 1) for word in words if word in keywords)
+            length_norm = (1 + BM25_K1) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * len(keywords) / mean_length))
+            keyword_score = min(1.0, matched * length_norm / idf_total) if idf_total else 0.0
+            embedding_score = max(0.0, float(np.dot(query_vector, vector))) if query_vector is not None else 0.0
+            scores[name] = KEYWORD_WEIGHT * keyword_score + (1 - KEYWORD_WEIGHT) * embedding_score
+        return scores
+
+    def select(self, query: str, tools: Sequence[Any]) -> ToolSelection:
+        """The tools to offer for a request (in their original order), as the request's ToolSelection"""
+        tools = agent_tools(tools)
+        if not self.enabled or len(tools) <= self.top_n:
+            return ToolSelection(self, tools, tools)
+
+        scores = self.score(query, tools)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        fallback = scores[ranked[0]] < MIN_SCORE
+        if fallback:
+            chosen = set(scores)
+        else:
+            # Single and batch variants of a tool go together and take one of the top_n places
+            families = []
+            for name in ranked:
+                if len(families) == self.top_n or scores[name] <= 0:
+                    break
+                if tool_family(name) not in families:
+                    families.append(tool_family(name))
+            chosen = {name for name in scores if tool_family(name) in families or base_name(name) in self.required}
+        selected = [tool for tool in tools if tool_name(tool) in chosen]
+
+        full_tokens = sum(self._documents[tool_name(tool)][3] for tool in tools)
+        offered_tokens = sum(self._documents[tool_name(tool)][3] for tool in selected)
+        with self._lock:
+            self.selections += 1
+            self.fallbacks += fallback
+            self.tools_offered += len(selected)
+            self.tools_available += len(tools)
+            self.tokens_full += full_tokens
+            self.tokens_offered += offered_tokens
+        if fallback:
+            print(f"⚠️  Tool selection: no tool matched (best {scores[ranked[0]]:.2f}), offering all {len(tools)} tools")
+        else:
+            print(f"✓ Tool selection: {len(selected)}/{len(tools)} tools "
+                  f"(~{full_tokens - offered_tokens} tool definition tokens saved)")
+        return ToolSelection(self, tools, selected)
+
+    def _missed(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Selections, fallbacks, misses and tool definition tokens saved"""
+        with self._lock:
+            return {
+                'selections': self.selections,
+                'fallbacks': self.fallbacks,
+                'misses': self.misses,
+                'mean_tools_offered': self.tools_offered / self.selections if self.selections else 0.0,
+                'mean_tools_available': self.tools_available / self.selections if self.selections else 0.0,
+                'tool_tokens_full': self.tokens_full,
+                'tool_tokens_offered': self.tokens_offered,
+                'tokens_saved': self.tokens_full - self.tokens_offered,
+                'saved_share': 1 - self.tokens_offered / self.tokens_full if self.tokens_full else 0.0,
+            }
+
+
+# Shared by every agent and session in the process
+tool_selector = ToolSelector()